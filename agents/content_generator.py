@@ -8,6 +8,8 @@ import boto3
 from botocore.config import Config
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from src.completion_cache import get_completion_cache
+
 # 统一使用的模型
 MODEL_ID = "us.anthropic.claude-sonnet-4-20250514-v1:0"  # inference profile
 
@@ -22,6 +24,7 @@ class ContentGeneratorAgent:
             region_name='us-east-1',
             config=Config(read_timeout=30, retries={'max_attempts': 3})
         )
+        self.completion_cache = get_completion_cache()
 
     def generate_slide_content(self, slide_outline: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -258,27 +261,35 @@ class ContentGeneratorAgent:
         }
 
     def _call_bedrock(self, prompt: str) -> str:
-        """调用Bedrock模型"""
-        try:
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "max_tokens": 1000,
-                "temperature": 0.7
-            }
+        """调用Bedrock模型（相同提示词的响应跨请求复用，失败结果不缓存）"""
+        request_body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "max_tokens": 1000,
+            "temperature": 0.7
+        }
 
+        def invoke():
             response = self.bedrock_runtime.invoke_model(
                 modelId=MODEL_ID,
                 body=json.dumps(request_body)
             )
-
             result = json.loads(response['body'].read())
             return result.get("content", [{}])[0].get("text", "")
+
+        try:
+            return self.completion_cache.get_or_generate(
+                MODEL_ID,
+                prompt,
+                invoke,
+                temperature=request_body["temperature"],
+                max_tokens=request_body["max_tokens"]
+            )
         except Exception as e:
             print(f"Bedrock调用失败: {e}")
             return ""
@@ -10,6 +10,8 @@ from botocore.config import Config
 import PyPDF2
 from io import BytesIO
 
+from src.completion_cache import get_completion_cache
+
 # 统一使用的模型
 MODEL_ID = "us.anthropic.claude-sonnet-4-20250514-v1:0"  # inference profile
 
@@ -24,6 +26,7 @@ class DocumentAnalyzerAgent:
             region_name='us-east-1',
             config=Config(read_timeout=30, retries={'max_attempts': 3})
         )
+        self.completion_cache = get_completion_cache()
         self.s3_client = boto3.client('s3')
         self.textract_client = boto3.client('textract', region_name='us-east-1')
 
@@ -319,27 +322,35 @@ class DocumentAnalyzerAgent:
         return conclusions
 
     def _call_bedrock(self, prompt: str) -> str:
-        """调用Bedrock模型"""
-        try:
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "max_tokens": 1000,
-                "temperature": 0.3
-            }
+        """调用Bedrock模型（相同提示词的响应跨请求复用，失败结果不缓存）"""
+        request_body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "max_tokens": 1000,
+            "temperature": 0.3
+        }
 
+        def invoke():
             response = self.bedrock_runtime.invoke_model(
                 modelId=MODEL_ID,
                 body=json.dumps(request_body)
             )
-
             result = json.loads(response['body'].read())
             return result.get("content", [{}])[0].get("text", "")
+
+        try:
+            return self.completion_cache.get_or_generate(
+                MODEL_ID,
+                prompt,
+                invoke,
+                temperature=request_body["temperature"],
+                max_tokens=request_body["max_tokens"]
+            )
         except Exception as e:
             print(f"Bedrock调用失败: {e}")
             return "{}"
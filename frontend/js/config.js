@@ -27,7 +27,9 @@ class ConfigManager {
             polling: {
                 intervalMs: 2000,
                 maxAttempts: 150, // 5分钟最大轮询时间
-                timeoutMs: 300000 // 5分钟超时
+                timeoutMs: 300000, // 5分钟超时
+                push: true, // 优先长轮询订阅状态变更，服务端不支持时回退到定时轮询
+                longPollWaitSeconds: 8 // 单次订阅请求的最长等待时间
             },
 
             // 默认配置
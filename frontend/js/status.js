@@ -1,4 +1,4 @@
-// 状态轮询管理 - 优化版
+// 状态订阅与轮询管理 - 优化版
 class StatusPoller {
     constructor(generator) {
         this.generator = generator;
@@ -9,6 +9,10 @@ class StatusPoller {
         this.maxInterval = 30000; // 最大轮询间隔30秒
         this.consecutiveErrors = 0; // 连续错误计数
         this.lastProgress = 0; // 上次进度
+        this.pushEnabled = window.configManager.get('polling.push', true);
+        this.longPollWaitSeconds = window.configManager.get('polling.longPollWaitSeconds', 8);
+        this.subscribeController = null; // 进行中的订阅请求
+        this.subscribing = false;
     }
 
     // 国际化辅助方法
@@ -18,10 +22,20 @@ class StatusPoller {
 
     start(presentationId) {
         this.currentRetries = 0;
-        this.poll(presentationId);
+        if (this.pushEnabled) {
+            this.subscribing = true;
+            this.subscribe(presentationId);
+        } else {
+            this.poll(presentationId);
+        }
     }
 
     stop() {
+        this.subscribing = false;
+        if (this.subscribeController) {
+            this.subscribeController.abort();
+            this.subscribeController = null;
+        }
         if (this.generator.statusPoller) {
             clearTimeout(this.generator.statusPoller);
             this.generator.statusPoller = null;
@@ -144,6 +158,86 @@ class StatusPoller {
         }
     }
 
+    // 长轮询订阅状态变更：首次返回完整快照，之后只返回变化的字段
+    // 服务端未启用推送或接口不可用时回退到定时轮询，并在本页面内不再订阅
+    async subscribe(presentationId, cursor = null, state = null) {
+        if (!this.subscribing) {
+            return;
+        }
+
+        const endpoint = getAPIEndpoint();
+        const apiKey = getAPIKey();
+        const headers = {
+            'Accept': 'application/json'
+        };
+        if (apiKey) {
+            headers['X-API-Key'] = apiKey;
+        }
+
+        const params = new URLSearchParams({ wait: String(this.longPollWaitSeconds) });
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+
+        try {
+            const controller = new AbortController();
+            this.subscribeController = controller;
+            const timer = setTimeout(() => controller.abort(), (this.longPollWaitSeconds + 10) * 1000);
+            let response;
+            try {
+                response = await fetch(`${endpoint}/status/${presentationId}/events?${params}`, {
+                    method: 'GET',
+                    headers,
+                    signal: controller.signal
+                });
+            } finally {
+                clearTimeout(timer);
+            }
+
+            if (!response.ok) {
+                // 订阅接口不可用，本页面之后的任务直接使用定时轮询
+                this.pushEnabled = false;
+                throw new Error(`HTTP ${response.status}`);
+            }
+
+            const data = await response.json();
+            if (!this.subscribing) {
+                return;
+            }
+
+            const events = data.events || [];
+            const nextState = Object.assign({}, data.snapshot || state);
+            events.forEach(event => Object.assign(nextState, event.changes));
+            if (nextState.status === 'failed' && !nextState.message && nextState.error_info) {
+                nextState.message = nextState.error_info.error_message;
+            }
+
+            this.consecutiveErrors = 0;
+            if (data.snapshot || events.length) {
+                this.handleStatusUpdate(nextState, presentationId);
+            }
+            if (nextState.status === 'completed' || nextState.status === 'failed') {
+                return;
+            }
+
+            if (data.push) {
+                this.subscribe(presentationId, data.cursor, nextState);
+            } else {
+                // 服务端未启用推送，本页面之后的任务不再请求订阅接口
+                this.pushEnabled = false;
+                this.subscribing = false;
+                this.generator.statusPoller = setTimeout(() => this.poll(presentationId), this.pollInterval);
+            }
+        } catch (error) {
+            if (!this.subscribing) {
+                return;
+            }
+            console.warn('状态订阅失败，回退到轮询:', error);
+            this.subscribing = false;
+            this.poll(presentationId);
+        }
+    }
+
     // 计算动态轮询间隔
     calculateDynamicInterval(currentProgress) {
         const progressDiff = currentProgress - this.lastProgress;
@@ -18,6 +18,7 @@ from src.status_manager import StatusManager, PresentationStatus
 from src.validators import RequestValidator
 from src.common.s3_service import S3Service
 from src.throttle_manager import ThrottleManager
+from src.config import CONTENT_MAX_WORKERS
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -85,7 +86,7 @@ def lambda_handler(event, context):
         # 2. 初始化管理器
         status_manager = StatusManager(bucket_name)
         s3_service = S3Service(bucket_name)
-        content_generator = ContentGenerator(s3_service=s3_service)
+        content_generator = ContentGenerator(s3_service=s3_service, max_workers=CONTENT_MAX_WORKERS)
         ppt_compiler = PPTCompiler()
 
         # 3. 创建初始状态
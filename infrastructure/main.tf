@@ -183,6 +183,25 @@ resource "aws_dynamodb_table" "presentations" {
     type = "S"
   }
 
+  attribute {
+    name = "user_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "created_at"
+    type = "S"
+  }
+
+  # 列表查询：按用户分区、创建时间排序，只投影列表字段
+  global_secondary_index {
+    name               = "user_id-created_at-index"
+    hash_key           = "user_id"
+    range_key          = "created_at"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["topic", "status", "page_count"]
+  }
+
   tags = {
     Name        = "${var.project_name}-presentations"
     Environment = var.environment
@@ -909,6 +928,84 @@ resource "aws_api_gateway_method_response" "status_get" {
   }
 }
 
+# /status/{id}/events endpoint（长轮询订阅状态变更）
+resource "aws_api_gateway_resource" "status_events" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_resource.status_id.id
+  path_part   = "events"
+}
+
+resource "aws_api_gateway_method" "status_events_get" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.status_events.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "status_events_integration" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.status_events.id
+  http_method = aws_api_gateway_method.status_events_get.http_method
+
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.status_check.invoke_arn
+}
+
+resource "aws_api_gateway_method" "status_events_options" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.status_events.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "status_events_options" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.status_events.id
+  http_method = aws_api_gateway_method.status_events_options.http_method
+
+  type = "MOCK"
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "status_events_options" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.status_events.id
+  http_method = aws_api_gateway_method.status_events_options.http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+    "method.response.header.Access-Control-Max-Age"       = true
+  }
+
+  response_models = {
+    "application/json" = "Empty"
+  }
+}
+
+resource "aws_api_gateway_integration_response" "status_events_options" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.status_events.id
+  http_method = aws_api_gateway_method.status_events_options.http_method
+  status_code = aws_api_gateway_method_response.status_events_options.status_code
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,Accept,Accept-Language'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+    "method.response.header.Access-Control-Max-Age"       = "'86400'"
+  }
+
+  depends_on = [
+    aws_api_gateway_integration.status_events_options
+  ]
+}
+
 # /download/{id} endpoint
 resource "aws_api_gateway_resource" "download" {
   rest_api_id = aws_api_gateway_rest_api.api.id
@@ -1033,6 +1130,8 @@ resource "aws_api_gateway_deployment" "api" {
       aws_api_gateway_gateway_response.timeout.id,
       aws_api_gateway_gateway_response.missing_authentication_token.id,
       aws_api_gateway_method.status_options.id,
+      aws_api_gateway_method.status_events_get.id,
+      aws_api_gateway_method.status_events_options.id,
       aws_api_gateway_method.download_get.id,
       aws_api_gateway_method.download_options.id,
 
@@ -1041,12 +1140,15 @@ resource "aws_api_gateway_deployment" "api" {
       aws_api_gateway_integration.generate_options.id,
       aws_api_gateway_integration.status_integration.id,
       aws_api_gateway_integration.status_options.id,
+      aws_api_gateway_integration.status_events_integration.id,
+      aws_api_gateway_integration.status_events_options.id,
       aws_api_gateway_integration.download_integration.id,
       aws_api_gateway_integration.download_options.id,
 
       # Include all integration response configurations
       aws_api_gateway_integration_response.generate_options.id,
       aws_api_gateway_integration_response.status_options.id,
+      aws_api_gateway_integration_response.status_events_options.id,
       aws_api_gateway_integration_response.download_options.id,
 
       # Include all method response configurations
@@ -1054,6 +1156,7 @@ resource "aws_api_gateway_deployment" "api" {
       aws_api_gateway_method_response.generate_options.id,
       aws_api_gateway_method_response.status_get.id,
       aws_api_gateway_method_response.status_options.id,
+      aws_api_gateway_method_response.status_events_options.id,
       aws_api_gateway_method_response.download_get.id,
       aws_api_gateway_method_response.download_options.id,
 
@@ -1061,6 +1164,7 @@ resource "aws_api_gateway_deployment" "api" {
       aws_api_gateway_resource.generate.id,
       aws_api_gateway_resource.status.id,
       aws_api_gateway_resource.status_id.id,
+      aws_api_gateway_resource.status_events.id,
       aws_api_gateway_resource.download.id,
       aws_api_gateway_resource.download_id.id
     ]))
@@ -19,6 +19,7 @@ from src.ppt_compiler import PPTCompiler
 from src.common.response_builder import ResponseBuilder
 from src.common.s3_service import S3Service, S3ServiceError
 from src.constants import Config
+from src.status_manager import StatusManager
 from src.exceptions import ValidationError, ResourceNotFoundError, PPTAssistantError
 
 logger = logging.getLogger()
@@ -30,6 +31,7 @@ class APIHandler:
     def __init__(self, s3_client=None):
         self.bucket_name = os.environ.get(Config.Env.S3_BUCKET, Config.Env.DEFAULT_BUCKET)
         self.s3_service = S3Service(self.bucket_name, s3_client)
+        self.status_manager = StatusManager(self.bucket_name, self.s3_service.s3_client)
         self.content_generator = ContentGenerator()
         self.ppt_compiler = PPTCompiler()
 
@@ -102,15 +104,16 @@ class APIHandler:
             if not presentation_id:
                 raise ValidationError("Presentation ID required", "id")
 
-            # 2. 从S3读取状态信息
-            try:
-                status_key = Config.File.STATUS_FILE_TEMPLATE.format(presentation_id=presentation_id)
-                status_info = self.s3_service.download_json(status_key)
-            except S3ServiceError:
+            # 2. 读取状态信息（容器内缓存 + ETag条件读取）
+            status_info, etag = self.status_manager.get_status_with_etag(presentation_id)
+            if status_info is None:
                 raise ResourceNotFoundError("Presentation", presentation_id)
 
-            # 3. 返回状态和进度
-            return ResponseBuilder.success_response(Config.API.HTTP_OK, status_info)
+            # 3. 客户端持有的版本未变化时返回304，否则返回状态和进度
+            headers = {'ETag': etag, 'Cache-Control': 'no-cache'} if etag else None
+            if etag and etag_matches(get_request_header(event, 'If-None-Match'), etag):
+                return ResponseBuilder.not_modified_response(headers)
+            return ResponseBuilder.success_response(Config.API.HTTP_OK, status_info, headers)
 
         except ValidationError as e:
             return ResponseBuilder.validation_error_response(e.message, e.field)
@@ -191,6 +194,29 @@ class APIHandler:
 
 
 
+def get_request_header(event: Dict, name: str) -> Optional[str]:
+    """读取请求头（API Gateway传入的请求头大小写不固定）"""
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match是否命中当前ETag（按弱比较，支持多个值和*）"""
+    if not if_none_match:
+        return False
+    current = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == current:
+            return True
+    return False
+
+
 def lambda_handler(event, context):
     """Lambda主处理函数"""
     try:
@@ -23,7 +23,12 @@ from utils.api_base import (
     with_error_handling
 )
 from services.s3_service import S3Service, S3ServiceError
-from services.dynamodb_service import DynamoDBService, DynamoDBServiceError
+from services.dynamodb_service import (
+    DynamoDBService,
+    DynamoDBServiceError,
+    encode_page_token,
+    decode_page_token
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -38,6 +43,12 @@ class PPTConfig:
     MAX_TOPIC_LENGTH = 200
     DOWNLOAD_URL_EXPIRY = 3600  # 1小时
 
+    # 列表查询：按用户和创建时间排序的GSI，只投影列表字段
+    LIST_INDEX_NAME = os.environ.get('PRESENTATIONS_USER_INDEX', 'user_id-created_at-index')
+    LIST_DEFAULT_LIMIT = 20
+    LIST_MAX_LIMIT = 100
+    LIST_PROJECTION = 'presentation_id, user_id, topic, #status, page_count, created_at'
+
     # S3路径模板
     STATUS_FILE_TEMPLATE = "presentations/{presentation_id}/status.json"
     CONTENT_FILE_TEMPLATE = "presentations/{presentation_id}/content.json"
@@ -133,7 +144,7 @@ class PPTAPIHandler(BaseAPIHandler):
             'progress': 0,
             'created_at': datetime.utcnow().isoformat(),
             'updated_at': datetime.utcnow().isoformat(),
-            'user_id': event.get('requestContext', {}).get('identity', {}).get('userArn', 'anonymous')
+            'user_id': self._get_user_id(event)
         }
 
         try:
@@ -343,23 +354,45 @@ class PPTAPIHandler(BaseAPIHandler):
     def handle_list(self, event: Dict) -> Dict:
         """
         处理列表查询请求
-        GET /presentations
+        GET /presentations?limit=&status=&next_token=
+
+        通过GSI按创建时间倒序查询当前用户的演示文稿，next_token为上一页返回的游标
         """
         query_params = event.get('queryStringParameters', {}) or {}
-        limit = min(int(query_params.get('limit', 20)), 100)
+        try:
+            limit = int(query_params.get('limit', PPTConfig.LIST_DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            raise ValidationError("limit must be an integer", 'limit', query_params.get('limit'))
+        limit = max(1, min(limit, PPTConfig.LIST_MAX_LIMIT))
         status_filter = query_params.get('status')
+        user_id = self._get_user_id(event)
 
         try:
-            if status_filter:
-                # 使用过滤条件扫描
-                items = self.dynamodb_service.scan(
-                    filter_expression='#status = :status',
-                    expression_attribute_values={':status': status_filter},
-                    limit=limit
-                )
-            else:
-                # 扫描所有项目
-                items = self.dynamodb_service.scan(limit=limit)
+            start_key = decode_page_token(query_params.get('next_token'))
+        except DynamoDBServiceError:
+            raise ValidationError("Invalid next_token", 'next_token')
+        if start_key is not None and start_key.get('user_id') != user_id:
+            # 游标只能用于生成它的用户
+            raise ValidationError("Invalid next_token", 'next_token')
+
+        values = {':user_id': user_id}
+        filter_expression = None
+        if status_filter:
+            filter_expression = '#status = :status'
+            values[':status'] = status_filter
+
+        try:
+            items, last_key = self.dynamodb_service.query_page(
+                key_condition='user_id = :user_id',
+                expression_attribute_values=values,
+                index_name=PPTConfig.LIST_INDEX_NAME,
+                limit=limit,
+                scan_forward=False,
+                filter_expression=filter_expression,
+                projection_expression=PPTConfig.LIST_PROJECTION,
+                expression_attribute_names={'#status': 'status'},
+                exclusive_start_key=start_key
+            )
 
             # 格式化响应
             presentations = [self._format_list_item(item) for item in items]
@@ -369,7 +402,8 @@ class PPTAPIHandler(BaseAPIHandler):
                 {
                     'presentations': presentations,
                     'count': len(presentations),
-                    'limit': limit
+                    'limit': limit,
+                    'next_token': encode_page_token(last_key)
                 }
             )
 
@@ -418,6 +452,11 @@ class PPTAPIHandler(BaseAPIHandler):
                 raise ResourceNotFoundError("Presentation", presentation_id)
             raise
 
+    @staticmethod
+    def _get_user_id(event: Dict) -> str:
+        """从请求上下文获取用户标识"""
+        return event.get('requestContext', {}).get('identity', {}).get('userArn') or 'anonymous'
+
     def _format_status_response(self, item: Dict) -> Dict:
         """格式化状态响应"""
         return {
@@ -0,0 +1,152 @@
+"""
+缓存编解码器 - Redis L2层的二进制安全序列化
+
+格式（所有整数为单字节）：
+    MAGIC(2) | VERSION(1) | VALUE_TYPE(1) | COMPRESSION(1) | PAYLOAD
+
+- 按值类型编码：bytes原样存储，str为UTF-8，其余为JSON（嵌套的bytes以base64标记）
+- 超过阈值的负载使用zstd（已安装时）或zlib压缩，压缩后不变小则保留原文
+- 版本头用于安全地演进格式；没有魔数的数据按旧版JSON字符串解析
+"""
+
+import json
+import zlib
+import base64
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class CodecError(Exception):
+    """缓存数据无法解码"""
+    pass
+
+
+class CacheCodec:
+    """按值类型选择编码、按大小选择压缩的缓存编解码器"""
+
+    MAGIC = b'\xa7C'
+    VERSION = 1
+
+    # 值类型
+    TYPE_JSON = 0
+    TYPE_BYTES = 1
+    TYPE_STR = 2
+
+    # 压缩算法
+    COMPRESSION_NONE = 0
+    COMPRESSION_ZLIB = 1
+    COMPRESSION_ZSTD = 2
+
+    BYTES_MARKER = '__bytes_b64__'
+
+    def __init__(self, compress_threshold: int = 1024,
+                 compression: Optional[str] = None,
+                 level: int = 3):
+        """
+        Args:
+            compress_threshold: 超过该字节数的负载才尝试压缩
+            compression: 'zstd'、'zlib'或'none'，默认有zstandard时用zstd
+            level: 压缩级别
+        """
+        if compression is None:
+            compression = 'zstd' if zstandard is not None else 'zlib'
+        if compression == 'zstd' and zstandard is None:
+            logger.warning("zstandard not installed, falling back to zlib")
+            compression = 'zlib'
+
+        self.compress_threshold = compress_threshold
+        self.compression = {
+            'none': self.COMPRESSION_NONE,
+            'zlib': self.COMPRESSION_ZLIB,
+            'zstd': self.COMPRESSION_ZSTD
+        }[compression]
+        self.level = level
+
+        self._zstd_compressor = zstandard.ZstdCompressor(level=level) if zstandard else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def encode(self, value: Any) -> bytes:
+        """将值编码为带版本头的字节串"""
+        value_type, payload = self._serialize(value)
+
+        compression = self.COMPRESSION_NONE
+        if self.compression != self.COMPRESSION_NONE and len(payload) > self.compress_threshold:
+            compressed = self._compress(payload, self.compression)
+            if len(compressed) < len(payload):
+                payload = compressed
+                compression = self.compression
+
+        return self.MAGIC + bytes((self.VERSION, value_type, compression)) + payload
+
+    def decode(self, data: Any) -> Any:
+        """解码字节串；兼容旧版无头JSON字符串"""
+        if data is None:
+            return None
+        if isinstance(data, str):
+            return json.loads(data)
+
+        if not data.startswith(self.MAGIC):
+            # 旧版格式：json.dumps的UTF-8文本
+            return json.loads(data.decode('utf-8'))
+
+        if len(data) < 5:
+            raise CodecError("Truncated cache header")
+
+        version, value_type, compression = data[2], data[3], data[4]
+        if version > self.VERSION:
+            raise CodecError(f"Unsupported cache format version: {version}")
+
+        payload = self._decompress(data[5:], compression)
+        return self._deserialize(value_type, payload)
+
+    def _serialize(self, value: Any) -> Tuple[int, bytes]:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return self.TYPE_BYTES, bytes(value)
+        if isinstance(value, str):
+            return self.TYPE_STR, value.encode('utf-8')
+        return self.TYPE_JSON, json.dumps(
+            value, default=self._json_default, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+
+    def _deserialize(self, value_type: int, payload: bytes) -> Any:
+        if value_type == self.TYPE_BYTES:
+            return payload
+        if value_type == self.TYPE_STR:
+            return payload.decode('utf-8')
+        if value_type == self.TYPE_JSON:
+            return json.loads(payload.decode('utf-8'), object_hook=self._json_object_hook)
+        raise CodecError(f"Unknown value type: {value_type}")
+
+    def _json_default(self, obj: Any) -> Any:
+        # 嵌套在dict/list中的二进制数据（如图片结果里的image_data）
+        if isinstance(obj, (bytes, bytearray, memoryview)):
+            return {self.BYTES_MARKER: base64.b64encode(bytes(obj)).decode('ascii')}
+        return str(obj)
+
+    def _json_object_hook(self, obj: Dict[str, Any]) -> Any:
+        if len(obj) == 1 and self.BYTES_MARKER in obj:
+            return base64.b64decode(obj[self.BYTES_MARKER])
+        return obj
+
+    def _compress(self, payload: bytes, compression: int) -> bytes:
+        if compression == self.COMPRESSION_ZSTD:
+            return self._zstd_compressor.compress(payload)
+        return zlib.compress(payload, self.level)
+
+    def _decompress(self, payload: bytes, compression: int) -> bytes:
+        if compression == self.COMPRESSION_NONE:
+            return payload
+        if compression == self.COMPRESSION_ZLIB:
+            return zlib.decompress(payload)
+        if compression == self.COMPRESSION_ZSTD:
+            if self._zstd_decompressor is None:
+                raise CodecError("zstd-compressed entry but zstandard is not installed")
+            return self._zstd_decompressor.decompress(payload)
+        raise CodecError(f"Unknown compression: {compression}")
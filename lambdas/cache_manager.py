@@ -15,6 +15,8 @@ import json
 import time
 import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import Any, Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 from functools import lru_cache, wraps
@@ -22,6 +24,13 @@ import boto3
 import redis
 from botocore.exceptions import ClientError
 
+try:
+    from .single_flight import SingleFlight, RedisLeaseStore
+    from .cache_codec import CacheCodec, CodecError
+except ImportError:
+    from single_flight import SingleFlight, RedisLeaseStore
+    from cache_codec import CacheCodec, CodecError
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
@@ -85,35 +94,165 @@ class CacheKeyGenerator:
         return normalized
 
 
+class MemoryLRUCache:
+    """L1内存缓存：O(1) LRU + 读时TTL检查 + 字节预算
+
+    基于OrderedDict实现，命中时move_to_end，逐出时从头部弹出，
+    容量按条目估算字节数计算，而不是按条目个数。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: Optional[int] = None):
+        """
+        Args:
+            max_bytes: 内存预算（字节）
+            max_entries: 最大条目数（可选，None表示只按字节限制）
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'rejected': 0
+        }
+
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        """估算缓存值占用的字节数"""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return len(value)
+        if isinstance(value, str):
+            return len(value.encode('utf-8'))
+        try:
+            return len(json.dumps(value, default=str).encode('utf-8'))
+        except (TypeError, ValueError):
+            return len(repr(value))
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """获取缓存项
+
+        Returns:
+            (是否命中, 数据)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return False, None
+
+            value, expires_at, _ = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: int = 3600) -> bool:
+        """设置缓存项，超出预算时逐出最久未使用的项"""
+        size = self.estimate_size(value)
+        with self._lock:
+            # 先移除旧值：新值即使被拒绝，也不能继续返回旧值
+            if key in self._entries:
+                self._remove(key)
+
+            if size > self.max_bytes:
+                self.stats['rejected'] += 1
+                logger.debug(f"Value for key {key} exceeds L1 budget ({size} bytes), skipped")
+                return False
+
+            self._entries[key] = (value, time.time() + ttl, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes or (
+                    self.max_entries is not None and len(self._entries) > self.max_entries):
+                lru_key, (_, _, lru_size) = self._entries.popitem(last=False)
+                self._bytes -= lru_size
+                self.stats['evictions'] += 1
+                logger.debug(f"Evicted LRU key: {lru_key}")
+        return True
+
+    def delete(self, key: str) -> bool:
+        """删除缓存项"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                return True
+            return False
+
+    def keys(self) -> List[str]:
+        """返回当前所有键（按最久未使用到最近使用排列）"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        """移除条目并更新字节计数（调用方需持有锁）"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    @property
+    def bytes_used(self) -> int:
+        """当前占用的估算字节数"""
+        return self._bytes
+
+
 class MultiLevelCache:
     """多级缓存实现"""
 
     def __init__(self, redis_endpoint: Optional[str] = None,
                  redis_port: int = 6379,
                  memory_cache_size: int = 128,
-                 enable_cdn: bool = True):
+                 enable_cdn: bool = True,
+                 memory_cache_max_bytes: int = 64 * 1024 * 1024,
+                 codec: Optional[CacheCodec] = None,
+                 redis_client: Optional[Any] = None):
         """
         初始化多级缓存
 
         Args:
             redis_endpoint: Redis集群端点
             redis_port: Redis端口
-            memory_cache_size: 内存缓存大小（LRU）
+            memory_cache_size: 内存缓存最大条目数（LRU）
             enable_cdn: 是否启用CDN缓存
+            memory_cache_max_bytes: 内存缓存字节预算
+            codec: L2序列化编解码器（默认按类型编码并压缩大负载）
+            redis_client: 已创建的Redis客户端（可选，优先于redis_endpoint，需返回bytes）
         """
         # L1: 内存缓存
-        self._memory_cache = {}
+        self._memory_cache = MemoryLRUCache(
+            max_bytes=memory_cache_max_bytes,
+            max_entries=memory_cache_size
+        )
         self._memory_cache_size = memory_cache_size
-        self._access_times = {}
 
-        # L2: Redis缓存
-        self._redis_client = None
-        if redis_endpoint:
+        # L2: Redis缓存（二进制安全，由codec负责序列化）
+        self._codec = codec or CacheCodec()
+        self._redis_client = redis_client
+        if redis_client is None and redis_endpoint:
             try:
                 self._redis_client = redis.Redis(
                     host=redis_endpoint,
                     port=redis_port,
-                    decode_responses=True,
+                    decode_responses=False,
                     socket_keepalive=True,
                     socket_keepalive_options={
                         1: 1,  # TCP_KEEPIDLE
@@ -127,18 +266,23 @@ class MultiLevelCache:
                 logger.warning(f"Failed to connect to Redis: {e}")
                 self._redis_client = None
 
+        # 相同键的并发未命中只计算一次（有Redis时跨容器协调）
+        self._single_flight = SingleFlight(
+            lease_store=RedisLeaseStore(self._redis_client) if self._redis_client else None
+        )
+
         # L3: CDN缓存（通过CloudFront）
         self._enable_cdn = enable_cdn
         if enable_cdn:
             self._cloudfront_client = boto3.client('cloudfront')
             self._s3_client = boto3.client('s3')
 
-        # 缓存统计
+        # 缓存统计（L1的命中/逐出由MemoryLRUCache自行统计）
         self._stats = {
-            'hits': {'l1': 0, 'l2': 0, 'l3': 0},
+            'hits': {'l2': 0, 'l3': 0},
+            'level_misses': {'l2': 0, 'l3': 0},
             'misses': 0,
-            'sets': 0,
-            'evictions': 0
+            'sets': 0
         }
 
     def get(self, key: str, cache_level: str = "all") -> Optional[Any]:
@@ -152,13 +296,12 @@ class MultiLevelCache:
         Returns:
             缓存的数据或None
         """
-        # L1: 检查内存缓存
+        # L1: 检查内存缓存（过期项在读取时淘汰）
         if cache_level in ["l1", "all"]:
-            if key in self._memory_cache:
-                self._stats['hits']['l1'] += 1
-                self._access_times[key] = time.time()
+            hit, data = self._memory_cache.get(key)
+            if hit:
                 logger.debug(f"L1 cache hit for key: {key}")
-                return self._memory_cache[key]['data']
+                return data
 
         # L2: 检查Redis缓存
         if cache_level in ["l2", "all"] and self._redis_client:
@@ -166,10 +309,16 @@ class MultiLevelCache:
                 data = self._redis_client.get(key)
                 if data:
                     self._stats['hits']['l2'] += 1
+                    value = self._codec.decode(data)
                     # 提升到L1缓存
-                    self._set_memory_cache(key, json.loads(data))
+                    self._set_memory_cache(key, value)
                     logger.debug(f"L2 cache hit for key: {key}")
-                    return json.loads(data)
+                    return value
+                self._stats['level_misses']['l2'] += 1
+            except CodecError as e:
+                # 无法识别的格式按未命中处理，由后续写入覆盖
+                self._stats['level_misses']['l2'] += 1
+                logger.warning(f"Redis value for key {key} could not be decoded: {e}")
             except Exception as e:
                 logger.error(f"Redis get error: {e}")
 
@@ -184,6 +333,7 @@ class MultiLevelCache:
                     self._set_redis_cache(key, data)
                 logger.debug(f"L3 cache hit for key: {key}")
                 return data
+            self._stats['level_misses']['l3'] += 1
 
         self._stats['misses'] += 1
         return None
@@ -219,11 +369,44 @@ class MultiLevelCache:
 
         return success
 
+    def get_or_compute(self, key: str, compute_fn, ttl: int = 3600,
+                       cache_level: str = "all") -> Any:
+        """
+        获取缓存，未命中时合并并发请求只计算一次
+
+        Args:
+            key: 缓存键
+            compute_fn: 未命中时调用的计算函数
+            ttl: 过期时间（秒）
+            cache_level: 缓存级别
+
+        Returns:
+            缓存的或新计算的数据
+        """
+        cached = self.get(key, cache_level)
+        if cached is not None:
+            return cached
+
+        def compute():
+            value = compute_fn()
+            if value is not None:
+                self.set(key, value, ttl, cache_level)
+            return value
+
+        # 其他容器持有租约时，从Redis读取其写入的结果
+        check = None
+        if self._redis_client and cache_level in ["l2", "all"]:
+            check = lambda: self.get(key, "l2")
+
+        value, shared = self._single_flight.do(key, compute, check=check)
+        if shared:
+            logger.debug(f"Coalesced concurrent request for key: {key}")
+        return value
+
     def delete(self, key: str) -> bool:
         """删除缓存项"""
         # 从所有级别删除
-        if key in self._memory_cache:
-            del self._memory_cache[key]
+        self._memory_cache.delete(key)
 
         if self._redis_client:
             try:
@@ -252,8 +435,8 @@ class MultiLevelCache:
         keys_to_delete = [k for k in self._memory_cache.keys()
                          if self._match_pattern(k, pattern)]
         for key in keys_to_delete:
-            del self._memory_cache[key]
-            count += 1
+            if self._memory_cache.delete(key):
+                count += 1
 
         # L2: 清理Redis缓存
         if self._redis_client:
@@ -268,31 +451,8 @@ class MultiLevelCache:
         return count
 
     def _set_memory_cache(self, key: str, value: Any, ttl: int = 3600):
-        """设置内存缓存（带LRU逐出）"""
-        # 检查容量并逐出最旧的项
-        if len(self._memory_cache) >= self._memory_cache_size:
-            self._evict_lru()
-
-        self._memory_cache[key] = {
-            'data': value,
-            'expires_at': time.time() + ttl
-        }
-        self._access_times[key] = time.time()
-
-    def _evict_lru(self):
-        """LRU逐出策略"""
-        if not self._access_times:
-            return
-
-        # 找到最近最少使用的键
-        lru_key = min(self._access_times, key=self._access_times.get)
-
-        # 删除该项
-        if lru_key in self._memory_cache:
-            del self._memory_cache[lru_key]
-            del self._access_times[lru_key]
-            self._stats['evictions'] += 1
-            logger.debug(f"Evicted LRU key: {lru_key}")
+        """设置内存缓存（按字节预算LRU逐出）"""
+        self._memory_cache.set(key, value, ttl)
 
     def _set_redis_cache(self, key: str, value: Any, ttl: int = 3600) -> bool:
         """设置Redis缓存"""
@@ -300,7 +460,7 @@ class MultiLevelCache:
             self._redis_client.setex(
                 key,
                 ttl,
-                json.dumps(value, default=str)
+                self._codec.encode(value)
             )
             return True
         except Exception as e:
@@ -355,18 +515,40 @@ class MultiLevelCache:
 
     def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
-        total_hits = sum(self._stats['hits'].values())
+        l1_stats = dict(self._memory_cache.stats)
+        hits = {'l1': l1_stats['hits'], **self._stats['hits']}
+        total_hits = sum(hits.values())
         total_requests = total_hits + self._stats['misses']
         hit_rate = total_hits / total_requests if total_requests > 0 else 0
 
         return {
-            'hits': self._stats['hits'],
+            'hits': hits,
             'misses': self._stats['misses'],
             'sets': self._stats['sets'],
-            'evictions': self._stats['evictions'],
+            'evictions': l1_stats['evictions'],
             'hit_rate': hit_rate,
             'memory_cache_size': len(self._memory_cache),
-            'memory_cache_capacity': self._memory_cache_size
+            'memory_cache_capacity': self._memory_cache_size,
+            'memory_cache_bytes': self._memory_cache.bytes_used,
+            'memory_cache_max_bytes': self._memory_cache.max_bytes,
+            'levels': {
+                'l1': {
+                    **l1_stats,
+                    'entries': len(self._memory_cache),
+                    'bytes': self._memory_cache.bytes_used
+                },
+                'l2': {
+                    'hits': self._stats['hits']['l2'],
+                    'misses': self._stats['level_misses']['l2'],
+                    'enabled': self._redis_client is not None
+                },
+                'l3': {
+                    'hits': self._stats['hits']['l3'],
+                    'misses': self._stats['level_misses']['l3'],
+                    'enabled': self._enable_cdn
+                }
+            },
+            'single_flight': dict(self._single_flight.stats)
         }
 
 
@@ -477,19 +659,13 @@ def cached_function(ttl: int = 300, cache_level: str = "all"):
             # 获取缓存实例
             cache = get_cache_instance()
 
-            # 尝试从缓存获取
-            cached_result = cache.get(cache_key, cache_level)
-            if cached_result is not None:
-                logger.info(f"Cache hit for function: {func.__name__}")
-                return cached_result
-
-            # 执行函数
-            result = func(*args, **kwargs)
-
-            # 存储到缓存
-            cache.set(cache_key, result, ttl, cache_level)
-
-            return result
+            # 未命中时相同参数的并发调用只执行一次函数
+            return cache.get_or_compute(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                ttl,
+                cache_level
+            )
         return wrapper
     return decorator
 
@@ -506,7 +682,12 @@ def get_cache_instance() -> MultiLevelCache:
         _cache_instance = MultiLevelCache(
             redis_endpoint=redis_endpoint,
             memory_cache_size=int(os.environ.get('MEMORY_CACHE_SIZE', '128')),
-            enable_cdn=os.environ.get('ENABLE_CDN', 'true').lower() == 'true'
+            enable_cdn=os.environ.get('ENABLE_CDN', 'true').lower() == 'true',
+            memory_cache_max_bytes=int(os.environ.get('MEMORY_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+            codec=CacheCodec(
+                compress_threshold=int(os.environ.get('CACHE_COMPRESS_THRESHOLD', '1024')),
+                compression=os.environ.get('CACHE_COMPRESSION') or None
+            )
         )
     return _cache_instance
 
@@ -12,9 +12,16 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import boto3
 from botocore.exceptions import ClientError
+import math
 import threading
 from collections import deque
-import statistics
+
+try:
+    from .metrics_aggregation import MetricAggregate, compact_metric_data
+    from .metrics_emf import create_metrics_client
+except ImportError:
+    from metrics_aggregation import MetricAggregate, compact_metric_data
+    from metrics_emf import create_metrics_client
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +43,7 @@ class Metric:
     timestamp: datetime
     dimensions: Dict[str, str]
     metric_type: MetricType
+    high_resolution: bool = False
 
 
 class CloudWatchMonitor:
@@ -49,12 +57,12 @@ class CloudWatchMonitor:
 
         Args:
             namespace: CloudWatch命名空间
-            client: CloudWatch客户端
+            client: CloudWatch客户端，默认按 METRICS_BACKEND 选择 EMF 或 API
             batch_size: 批量发送大小
             flush_interval: 刷新间隔（秒）
         """
         self.namespace = namespace
-        self.client = client or boto3.client('cloudwatch')
+        self.client = client or create_metrics_client(namespace=namespace)
         self.batch_size = batch_size
         self.flush_interval = flush_interval
 
@@ -77,7 +85,8 @@ class CloudWatchMonitor:
 
     def record_metric(self, name: str, value: float, unit: str = 'Count',
                      dimensions: Optional[Dict[str, str]] = None,
-                     metric_type: MetricType = MetricType.GAUGE) -> None:
+                     metric_type: MetricType = MetricType.GAUGE,
+                     high_resolution: bool = False) -> None:
         """
         记录单个指标
 
@@ -87,6 +96,7 @@ class CloudWatchMonitor:
             unit: 单位
             dimensions: 维度
             metric_type: 指标类型
+            high_resolution: 是否按1秒精度存储
         """
         metric = Metric(
             name=name,
@@ -94,7 +104,8 @@ class CloudWatchMonitor:
             unit=unit,
             timestamp=datetime.utcnow(),
             dimensions=dimensions or {},
-            metric_type=metric_type
+            metric_type=metric_type,
+            high_resolution=high_resolution
         )
 
         with self._buffer_lock:
@@ -182,6 +193,9 @@ class CloudWatchMonitor:
                     'Timestamp': metric.timestamp
                 }
 
+                if metric.high_resolution:
+                    data_point['StorageResolution'] = 1
+
                 if metric.dimensions:
                     data_point['Dimensions'] = [
                         {'Name': k, 'Value': v}
@@ -190,7 +204,8 @@ class CloudWatchMonitor:
 
                 metric_data.append(data_point)
 
-            # 发送到CloudWatch
+            # 同一指标的重复值合并为 Values/Counts 后发送到CloudWatch
+            metric_data = compact_metric_data(metric_data)
             self.client.put_metric_data(
                 Namespace=self.namespace,
                 MetricData=metric_data
@@ -412,17 +427,34 @@ class AlarmManager:
 class MetricsAggregator:
     """指标聚合器"""
 
-    def __init__(self, window_size: int = 60):
+    def __init__(self, window_size: int = 60, slot_seconds: Optional[float] = None):
         """
         初始化指标聚合器
 
+        时间窗口被划分为若干时间槽，每个槽保存统计集和分位数草图，
+        内存占用与写入量无关。
+
         Args:
             window_size: 时间窗口大小（秒）
+            slot_seconds: 时间槽长度（秒），默认为窗口的1/12
         """
         self.window_size = window_size
+        self.slot_seconds = slot_seconds or max(window_size / 12, 1)
+        self._slot_count = int(math.ceil(window_size / self.slot_seconds))
         self._metrics = {}
         self._lock = threading.Lock()
 
+    def _current_slot(self, metric_name: str) -> MetricAggregate:
+        """获取当前时间槽的聚合（需持有锁）"""
+        slot = int(time.time() // self.slot_seconds)
+        slots = self._metrics.get(metric_name)
+        if slots is None:
+            slots = self._metrics[metric_name] = deque(maxlen=self._slot_count + 1)
+
+        if not slots or slots[-1][0] != slot:
+            slots.append((slot, MetricAggregate()))
+        return slots[-1][1]
+
     def add_value(self, metric_name: str, value: float) -> None:
         """
         添加指标值
@@ -432,13 +464,18 @@ class MetricsAggregator:
             value: 值
         """
         with self._lock:
-            if metric_name not in self._metrics:
-                self._metrics[metric_name] = deque(maxlen=100)
+            self._current_slot(metric_name).add(value)
 
-            self._metrics[metric_name].append({
-                'value': value,
-                'timestamp': time.time()
-            })
+    def add_values(self, metric_name: str, values: List[float]) -> None:
+        """
+        批量添加指标值
+
+        Args:
+            metric_name: 指标名称
+            values: 值列表
+        """
+        with self._lock:
+            self._current_slot(metric_name).add_many(values)
 
     def get_statistics(self, metric_name: str) -> Dict[str, float]:
         """
@@ -454,25 +491,14 @@ class MetricsAggregator:
             if metric_name not in self._metrics:
                 return {}
 
-            # 过滤时间窗口内的值
-            current_time = time.time()
-            values = [
-                item['value'] for item in self._metrics[metric_name]
-                if current_time - item['timestamp'] < self.window_size
-            ]
-
-            if not values:
-                return {}
+            # 合并时间窗口内的时间槽
+            oldest = (time.time() - self.window_size) // self.slot_seconds
+            merged = MetricAggregate()
+            for slot, aggregate in self._metrics[metric_name]:
+                if slot >= oldest:
+                    merged.merge(aggregate)
 
-            return {
-                'count': len(values),
-                'sum': sum(values),
-                'average': statistics.mean(values),
-                'min': min(values),
-                'max': max(values),
-                'median': statistics.median(values),
-                'stddev': statistics.stdev(values) if len(values) > 1 else 0
-            }
+            return merged.summary()
 
 
 # 全局监控实例
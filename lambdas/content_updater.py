@@ -69,7 +69,7 @@ class ContentUpdater:
     - 并发控制
     """
 
-    def __init__(self, dynamodb_client=None, s3_client=None, bucket_name: str = None):
+    def __init__(self, dynamodb_client=None, s3_client=None, bucket_name: str = None, compiler=None):
         """
         初始化内容更新器
 
@@ -77,11 +77,13 @@ class ContentUpdater:
             dynamodb_client: DynamoDB客户端
             s3_client: S3客户端
             bucket_name: S3存储桶名称
+            compiler: PPT编译器（可选），提供时更新后增量重新编译PPTX
         """
         self.dynamodb = dynamodb_client or boto3.client('dynamodb')
         self.s3_client = s3_client or boto3.client('s3')
         self.bucket_name = bucket_name or "ai-ppt-presentations"
         self.table_name = "ai-ppt-presentations"
+        self.compiler = compiler
 
         logger.info(f"ContentUpdater初始化完成，使用存储桶: {self.bucket_name}")
 
@@ -130,7 +132,7 @@ class ContentUpdater:
 
             logger.info(f"成功更新演示文稿 {presentation_id} 第 {slide_number} 页")
 
-            return {
+            result = {
                 "status": "success",
                 "updated_slide": updated_slide,
                 "presentation_id": presentation_id,
@@ -138,6 +140,12 @@ class ContentUpdater:
                 "updated_at": presentation_data["updated_at"]
             }
 
+            pptx_key = self._recompile(presentation_id, presentation_data)
+            if pptx_key:
+                result["pptx_key"] = pptx_key
+
+            return result
+
         except (ValidationError, PresentationNotFoundError, VersionConflictError):
             raise
         except Exception as e:
@@ -260,6 +268,17 @@ class ContentUpdater:
             logger.error(f"保存演示文稿失败: {str(e)}")
             raise ContentUpdateError("S3 storage unavailable") from e
 
+    def _recompile(self, presentation_id: str, presentation_data: Dict[str, Any]) -> Optional[str]:
+        """增量重新编译PPTX（只重建内容变化的幻灯片），失败不影响内容更新"""
+        if self.compiler is None:
+            return None
+
+        try:
+            return self.compiler.compile_edited_slides(presentation_id, presentation_data["slides"])
+        except Exception as e:
+            logger.warning(f"重新编译PPTX失败: {str(e)}")
+            return None
+
     def _update_dynamodb_record(self, presentation_data: Dict[str, Any]) -> None:
         """更新DynamoDB记录"""
         try:
@@ -307,6 +326,19 @@ class ContentUpdater:
         return {key: deserialize_value(value) for key, value in item.items()}
 
 
+def _create_compiler():
+    """创建PPT编译器（python-pptx不可用时返回None，只更新内容）"""
+    try:
+        try:
+            from .ppt_compiler import PPTCompiler
+        except ImportError:
+            from ppt_compiler import PPTCompiler
+        return PPTCompiler()
+    except Exception as e:
+        logger.warning(f"PPT编译器不可用，跳过重新编译: {str(e)}")
+        return None
+
+
 def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
     """
     AWS Lambda处理函数
@@ -333,7 +365,7 @@ def lambda_handler(event: Dict[str, Any], context) -> Dict[str, Any]:
             body['version'] = headers['If-Match']
 
         # 创建更新器并执行更新
-        updater = ContentUpdater()
+        updater = ContentUpdater(compiler=_create_compiler())
         result = updater.update_slide(presentation_id, body)
 
         return {
@@ -7,20 +7,25 @@ import json
 import logging
 import time
 from typing import Dict, List, Any, Optional
-import boto3
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from src.bedrock_invoker import BedrockInvoker, create_bedrock_client
+from src.completion_cache import get_completion_cache
+
 logger = logging.getLogger(__name__)
 
 # 配置常量
 SPEAKER_NOTE_MIN_LENGTH = 100
 SPEAKER_NOTE_MAX_LENGTH = 200
+SPEAKER_NOTE_INVOKE_TIMEOUT = 30  # 单次Bedrock调用超时（秒）
+SPEAKER_NOTE_MAX_TOKENS = 300
+SPEAKER_NOTE_TEMPERATURE = 0.7
 
 
 class SpeakerNotesGenerator:
     """演讲者备注生成器类"""
 
-    def __init__(self, bedrock_client=None, language="zh-CN", use_fallback=False):
+    def __init__(self, bedrock_client=None, language="zh-CN", use_fallback=False, completion_cache=None):
         """
         初始化演讲者备注生成器
 
@@ -28,11 +33,14 @@ class SpeakerNotesGenerator:
             bedrock_client: Bedrock客户端实例
             language: 生成语言 (zh-CN 或 en)
             use_fallback: 是否启用fallback机制
+            completion_cache: 文本生成缓存（可选），默认使用容器内共享缓存
         """
         self.bedrock_client = bedrock_client
         if not self.bedrock_client:
             try:
-                self.bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
+                self.bedrock_client = create_bedrock_client(
+                    read_timeout=SPEAKER_NOTE_INVOKE_TIMEOUT, region_name='us-east-1'
+                )
             except:
                 # 如果无法创建客户端，使用fallback模式
                 self.use_fallback = True
@@ -40,6 +48,8 @@ class SpeakerNotesGenerator:
         self.language = language
         self.use_fallback = use_fallback or (self.bedrock_client is None)
         self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
+        self.invoker = BedrockInvoker(default_timeout=SPEAKER_NOTE_INVOKE_TIMEOUT)
+        self.completion_cache = completion_cache or get_completion_cache()
 
     def generate_notes(self, slide_data: Dict[str, Any]) -> str:
         """
@@ -145,8 +155,8 @@ Speaker Notes:"""
 
         request_body = {
             "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 300,
-            "temperature": 0.7,
+            "max_tokens": SPEAKER_NOTE_MAX_TOKENS,
+            "temperature": SPEAKER_NOTE_TEMPERATURE,
             "messages": [
                 {
                     "role": "user",
@@ -155,16 +165,25 @@ Speaker Notes:"""
             ]
         }
 
-        response = self.bedrock_client.invoke_model(
-            modelId=self.model_id,
-            body=json.dumps(request_body),
-            contentType='application/json',
-            accept='application/json'
+        def invoke():
+            # 超时抛出DeadlineExceededError，由调用方走fallback
+            response = self.invoker.call(
+                self.bedrock_client.invoke_model,
+                modelId=self.model_id,
+                body=json.dumps(request_body),
+                contentType='application/json',
+                accept='application/json'
+            )
+            return json.loads(response['body'].read())
+
+        return self.completion_cache.get_or_generate(
+            self.model_id,
+            prompt,
+            invoke,
+            temperature=SPEAKER_NOTE_TEMPERATURE,
+            max_tokens=SPEAKER_NOTE_MAX_TOKENS
         )
 
-        response_body = json.loads(response['body'].read())
-        return response_body
-
     def _extract_notes(self, response: Dict[str, Any]) -> str:
         """从Bedrock响应中提取演讲者备注"""
         if 'content' in response and response['content']:
@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from src.content_generator import ContentGenerator
 from src.content_validator import validate_complete_presentation
-from src.config import DEFAULT_PAGE_COUNT, MIN_PAGE_COUNT, MAX_PAGE_COUNT
+from src.config import DEFAULT_PAGE_COUNT, MIN_PAGE_COUNT, MAX_PAGE_COUNT, CONTENT_MAX_WORKERS
 
 # 配置日志
 logger = logging.getLogger()
@@ -70,7 +70,7 @@ def lambda_handler(event, context):
         logger.info(f"开始生成PPT: {presentation_id}, 主题: {topic}, 页数: {page_count}")
 
         # 3. 初始化生成器
-        generator = ContentGenerator()
+        generator = ContentGenerator(max_workers=CONTENT_MAX_WORKERS)
 
         # 4. 生成大纲
         logger.info("生成大纲...")
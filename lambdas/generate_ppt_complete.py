@@ -18,6 +18,8 @@ from src.status_manager import StatusManager, PresentationStatus
 from src.validators import RequestValidator
 from src.common.s3_service import S3Service
 from src.throttle_manager import ThrottleManager
+from src.bedrock_invoker import BedrockInvoker, Deadline, deadline_scope, current_deadline
+from src.config import CONTENT_MAX_WORKERS, STREAMING_OUTLINE_ENABLED
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -86,7 +88,13 @@ def lambda_handler(event, context):
         # 2. 初始化管理器
         status_manager = StatusManager(bucket_name)
         s3_service = S3Service(bucket_name)
-        content_generator = ContentGenerator(s3_service=s3_service)
+        # 按Lambda剩余时间设置截止时间，超时前留出保存状态的时间
+        deadline = Deadline.from_lambda_context(context) or current_deadline()
+        content_generator = ContentGenerator(
+            s3_service=s3_service,
+            max_workers=CONTENT_MAX_WORKERS,
+            deadline=deadline
+        )
         ppt_compiler = PPTCompiler()
 
         # 3. 创建初始状态
@@ -137,39 +145,59 @@ def lambda_handler(event, context):
                     })
                 }
 
-        # 4. 生成大纲
-        logger.info("开始生成PPT大纲")
-        status_manager.update_status(
-            presentation_id,
-            PresentationStatus.PROCESSING.value,
-            25,
-            'outline_generation'
-        )
+        if STREAMING_OUTLINE_ENABLED:
+            # 4-5. 流式生成大纲，每页大纲就绪后立即生成该页内容
+            logger.info("开始流式生成PPT大纲和内容")
+            status_manager.update_status(
+                presentation_id,
+                PresentationStatus.PROCESSING.value,
+                25,
+                'outline_generation'
+            )
 
-        try:
-            outline = content_generator.generate_outline(topic, page_count)
-            logger.info(f"大纲生成成功，包含 {len(outline.get('slides', []))} 页")
-        except Exception as e:
-            logger.error(f"大纲生成失败: {str(e)}")
-            status_manager.mark_failed(presentation_id, f"大纲生成失败: {str(e)}", "OUTLINE_GENERATION_FAILED")
-            return format_error_response(500, f"大纲生成失败: {str(e)}")
+            try:
+                outline, slides = content_generator.generate_presentation_streaming(
+                    topic, page_count, include_speaker_notes=True
+                )
+                logger.info(f"流式生成成功，生成了 {len(slides)} 页详细内容")
+            except Exception as e:
+                logger.error(f"内容生成失败: {str(e)}")
+                status_manager.mark_failed(presentation_id, f"内容生成失败: {str(e)}", "CONTENT_GENERATION_FAILED")
+                return format_error_response(500, f"内容生成失败: {str(e)}")
+        else:
+            # 4. 生成大纲
+            logger.info("开始生成PPT大纲")
+            status_manager.update_status(
+                presentation_id,
+                PresentationStatus.PROCESSING.value,
+                25,
+                'outline_generation'
+            )
 
-        # 5. 生成详细内容
-        logger.info("开始生成详细内容")
-        status_manager.update_status(
-            presentation_id,
-            PresentationStatus.PROCESSING.value,
-            50,
-            'content_generation'
-        )
+            try:
+                outline = content_generator.generate_outline(topic, page_count)
+                logger.info(f"大纲生成成功，包含 {len(outline.get('slides', []))} 页")
+            except Exception as e:
+                logger.error(f"大纲生成失败: {str(e)}")
+                status_manager.mark_failed(presentation_id, f"大纲生成失败: {str(e)}", "OUTLINE_GENERATION_FAILED")
+                return format_error_response(500, f"大纲生成失败: {str(e)}")
+
+            # 5. 生成详细内容
+            logger.info("开始生成详细内容")
+            status_manager.update_status(
+                presentation_id,
+                PresentationStatus.PROCESSING.value,
+                50,
+                'content_generation'
+            )
 
-        try:
-            slides = content_generator.generate_slide_content(outline, include_speaker_notes=True)
-            logger.info(f"内容生成成功，生成了 {len(slides)} 页详细内容")
-        except Exception as e:
-            logger.error(f"内容生成失败: {str(e)}")
-            status_manager.mark_failed(presentation_id, f"内容生成失败: {str(e)}", "CONTENT_GENERATION_FAILED")
-            return format_error_response(500, f"内容生成失败: {str(e)}")
+            try:
+                slides = content_generator.generate_slide_content(outline, include_speaker_notes=True)
+                logger.info(f"内容生成成功，生成了 {len(slides)} 页详细内容")
+            except Exception as e:
+                logger.error(f"内容生成失败: {str(e)}")
+                status_manager.mark_failed(presentation_id, f"内容生成失败: {str(e)}", "CONTENT_GENERATION_FAILED")
+                return format_error_response(500, f"内容生成失败: {str(e)}")
 
         # 6. 保存内容到S3
         logger.info("保存内容到S3")
@@ -343,29 +371,21 @@ def format_error_response(status_code: int, message: str) -> dict:
 
 def handle_request_with_timeout(request_data: Dict, timeout_seconds: int) -> Dict:
     """处理带超时的请求（测试用）"""
-    import signal
-
-    def timeout_handler(signum, frame):
-        raise TimeoutError(f"Request timed out after {timeout_seconds} seconds")
-
-    # 设置超时信号
-    signal.signal(signal.SIGALRM, timeout_handler)
-    signal.alarm(timeout_seconds)
+    # 模拟事件结构
+    event = {
+        'body': json.dumps(request_data),
+        'httpMethod': 'POST'
+    }
 
-    try:
-        # 模拟事件结构
-        event = {
-            'body': json.dumps(request_data),
-            'httpMethod': 'POST'
-        }
-        result = lambda_handler(event, None)
-        signal.alarm(0)  # 取消超时
-        return result
-    except TimeoutError:
-        signal.alarm(0)  # 取消超时
-        raise
-    finally:
-        signal.alarm(0)  # 确保清除超时
+    # 在工作线程中执行并等待，不依赖SIGALRM（可在任意线程调用）；
+    # 截止时间随上下文传递给下游Bedrock调用
+    deadline = Deadline(timeout_seconds)
+    with deadline_scope(deadline):
+        return BedrockInvoker().call(
+            lambda_handler, event, None,
+            deadline=deadline,
+            operation=f"Request ({timeout_seconds}s)"
+        )
 
 
 def handle_generate_request_with_retry(request_data: Dict, max_retries: int = 3) -> Dict:
@@ -27,6 +27,8 @@ class ImageConfig:
     MAX_RETRY_ATTEMPTS: int = 3
     RETRY_DELAY_SECONDS: int = 2
     BATCH_TIMEOUT_SECONDS: int = 60
+    MAX_CONCURRENT_IMAGES: int = 4  # 并发生成图片的最大线程数，1表示逐张生成
+    IMAGE_TIMEOUT_SECONDS: int = 30  # 单张图片生成超时，超时后使用占位图
 
     # 风格配置
     DEFAULT_STYLE_SCHEME: str = "blue_white_professional"
@@ -47,6 +49,8 @@ class ImageConfig:
             DEFAULT_IMAGE_WIDTH=int(os.getenv('IMAGE_WIDTH', cls.DEFAULT_IMAGE_WIDTH)),
             DEFAULT_IMAGE_HEIGHT=int(os.getenv('IMAGE_HEIGHT', cls.DEFAULT_IMAGE_HEIGHT)),
             MAX_RETRY_ATTEMPTS=int(os.getenv('MAX_RETRY_ATTEMPTS', cls.MAX_RETRY_ATTEMPTS)),
+            MAX_CONCURRENT_IMAGES=int(os.getenv('MAX_CONCURRENT_IMAGES', cls.MAX_CONCURRENT_IMAGES)),
+            IMAGE_TIMEOUT_SECONDS=int(os.getenv('IMAGE_TIMEOUT_SECONDS', cls.IMAGE_TIMEOUT_SECONDS)),
         )
 
 
@@ -9,6 +9,7 @@ AI-PPT-Assistant 图片生成器 - 重构版本
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 
 try:
@@ -29,6 +30,8 @@ except ImportError:
     from image_s3_service import S3Service as ImageS3Service
     from image_processing_service import ImageProcessingService
 
+from src.bedrock_invoker import BedrockInvoker
+
 # 配置日志
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -46,7 +49,9 @@ class ImageGenerator:
     def __init__(self,
                  processing_service: Optional[ImageProcessingService] = None,
                  s3_service: Optional[ImageS3Service] = None,
-                 bucket_name: Optional[str] = None):
+                 bucket_name: Optional[str] = None,
+                 max_workers: Optional[int] = None,
+                 image_timeout: Optional[float] = None):
         """
         初始化图片生成器
 
@@ -54,9 +59,14 @@ class ImageGenerator:
             processing_service: 图片处理服务实例
             s3_service: S3服务实例
             bucket_name: 存储桶名称
+            max_workers: 并发生成图片的最大线程数，1表示逐张生成
+            image_timeout: 单张图片生成超时（秒），超时后使用占位图
         """
         self.processing_service = processing_service or ImageProcessingService()
         self.s3_service = s3_service or ImageS3Service(bucket_name=bucket_name)
+        self.max_workers = max(1, max_workers or CONFIG.MAX_CONCURRENT_IMAGES)
+        self.image_timeout = image_timeout or CONFIG.IMAGE_TIMEOUT_SECONDS
+        self.invoker = BedrockInvoker(default_timeout=self.image_timeout)
 
         logger.info(f"ImageGenerator初始化完成，使用存储桶: {self.s3_service.bucket_name}")
 
@@ -130,60 +140,103 @@ class ImageGenerator:
 
         return self.s3_service.save_image(image_data, presentation_id, slide_number)
 
-    def generate_consistent_images(self, slides: List[Dict[str, Any]], presentation_id: str) -> List[Dict[str, Any]]:
+    def generate_consistent_images(self, slides: List[Dict[str, Any]], presentation_id: str,
+                                   max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         为演示文稿生成一致风格的图片
 
         Args:
             slides: 幻灯片列表
             presentation_id: 演示文稿ID
+            max_workers: 并发线程数（可选），默认使用初始化时的配置
 
         Returns:
-            生成结果列表
+            生成结果列表，顺序与slides一致
         """
         if not slides:
             return []
 
-        # 定义一致的风格参数
+        # 定义一致的风格参数（所有线程共享同一份，结果中各自复制）
         base_style = {
             'color_scheme': CONFIG.DEFAULT_STYLE_SCHEME,
             'art_style': CONFIG.DEFAULT_ART_STYLE,
             'composition': CONFIG.DEFAULT_COMPOSITION
         }
 
-        results = []
+        workers = min(max(1, max_workers or self.max_workers), len(slides))
+
+        if workers == 1:
+            return [
+                self._generate_slide_image(slide, presentation_id, i, base_style)
+                for i, slide in enumerate(slides, 1)
+            ]
+
+        logger.info(f"并发生成{len(slides)}张图片，线程数: {workers}")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slide-image") as executor:
+            # executor.map按提交顺序返回结果，保证与幻灯片顺序一致
+            return list(executor.map(
+                lambda item: self._generate_slide_image(item[1], presentation_id, item[0], base_style),
+                enumerate(slides, 1)
+            ))
+
+    def _generate_slide_image(self, slide: Dict[str, Any], presentation_id: str,
+                              slide_number: int, base_style: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        为单张幻灯片生成图片，失败或超时时使用占位图
+
+        Args:
+            slide: 幻灯片内容
+            presentation_id: 演示文稿ID
+            slide_number: 幻灯片编号
+            base_style: 共享的风格参数
 
-        for i, slide in enumerate(slides, 1):
+        Returns:
+            生成结果字典
+        """
+        prompt = ""
+        try:
+            prompt = self.generate_prompt(slide)
+            # 超时只约束模型调用；超时后不再保存该调用的结果，避免覆盖占位图
+            image_data = self.invoker.call(
+                self.processing_service.call_image_generation,
+                prompt,
+                timeout=self.image_timeout,
+                operation=f"第{slide_number}张图片生成"
+            )
+            result = {
+                'status': 'success',
+                'image_url': self.save_to_s3(image_data, presentation_id, slide_number),
+                'prompt': prompt
+            }
+
+        except Exception as e:
+            logger.error(f"生成第{slide_number}张图片失败: {str(e)}")
             try:
-                # 为每张幻灯片生成图片
-                prompt = self.generate_prompt(slide)
-                result = self.generate_image(prompt, presentation_id, i)
-                result['style_params'] = base_style.copy()
-                results.append(result)
-
-            except Exception as e:
-                logger.error(f"生成第{i}张图片失败: {str(e)}")
-                # 即使失败也要保持风格参数一致性
-                results.append({
+                result = self._generate_fallback_image(prompt, presentation_id, slide_number, str(e))
+            except Exception as fallback_error:
+                result = {
                     'status': 'error',
-                    'style_params': base_style.copy(),
-                    'error': str(e)
-                })
+                    'error': str(fallback_error)
+                }
 
-        return results
+        # 即使失败也要保持风格参数一致性
+        result['style_params'] = base_style.copy()
+        return result
 
-    def batch_generate_images(self, slides: List[Dict[str, Any]], presentation_id: str) -> List[Dict[str, Any]]:
+    def batch_generate_images(self, slides: List[Dict[str, Any]], presentation_id: str,
+                              max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         批量生成图片
 
         Args:
             slides: 幻灯片列表
             presentation_id: 演示文稿ID
+            max_workers: 并发线程数（可选）
 
         Returns:
             生成结果列表
         """
-        return self.generate_consistent_images(slides, presentation_id)
+        return self.generate_consistent_images(slides, presentation_id, max_workers=max_workers)
 
     def save_image_with_metadata(self, image_data: bytes, metadata: Dict[str, Any],
                                 presentation_id: str, slide_number: int) -> Dict[str, Any]:
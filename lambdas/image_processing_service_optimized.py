@@ -29,9 +29,13 @@ try:
     from .image_exceptions import ImageProcessingError, NovaServiceError
     from .metrics_collector import MetricsCollector
     from .cache_manager import DistributedCacheManager
+    from .single_flight import get_single_flight
+    from .metrics_emf import create_metrics_client
 except ImportError:
     from image_config import CONFIG
     from image_exceptions import ImageProcessingError, NovaServiceError
+    from single_flight import get_single_flight
+    from metrics_emf import create_metrics_client
     # 如果导入失败，创建模拟类
     class MetricsCollector:
         def record_metric(self, *args, **kwargs): pass
@@ -46,6 +50,8 @@ except ImportError:
         def set(self, key, value, ttl=None): pass
         def clear(self): pass
 
+from src.bedrock_invoker import BedrockInvoker
+
 logger = logging.getLogger(__name__)
 
 
@@ -271,7 +277,10 @@ class ImageProcessingServiceOptimized:
         self.connection_pool = ConnectionPool(max_connections=50)
         self.bedrock_client = self.connection_pool.get_client('bedrock-runtime')
         self.s3_client = self.connection_pool.get_client('s3')
-        self.cloudwatch_client = self.connection_pool.get_client('cloudwatch')
+        self.cloudwatch_client = create_metrics_client(
+            lambda: self.connection_pool.get_client('cloudwatch'))
+        # 线程安全的超时控制（替代signal.alarm，可在工作线程中使用）
+        self.bedrock_invoker = BedrockInvoker(self.bedrock_client)
 
         # 缓存管理
         self.enable_caching = enable_caching
@@ -293,6 +302,9 @@ class ImageProcessingServiceOptimized:
         self.semaphore = asyncio.Semaphore(10)  # 最大并发数
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=20)
 
+        # 相同提示词的并发生成只调用一次模型（容器内所有实例共享）
+        self.single_flight = get_single_flight("image_generation")
+
         # 预加载管理
         self.enable_preloading = enable_preloading
         self.preload_queue = deque(maxlen=50)
@@ -376,26 +388,19 @@ class ImageProcessingServiceOptimized:
                     cost=0.0
                 )
 
-            # 使用信号量控制并发
-            async with self.semaphore:
-                # 智能模型选择
-                model_config = self._select_optimal_model(request)
-
-                # 生成图片
-                image_data = await self._generate_with_model_async(
-                    request,
-                    model_config
-                )
-
-                # 异步缓存结果
-                asyncio.create_task(self._cache_image_async(request, image_data))
-
-                # 预加载相关图片
-                if self.enable_preloading:
-                    asyncio.create_task(self._preload_related_images(request))
+            # 相同缓存键的并发请求合并为一次模型调用
+            (image_data, model_config), shared = await self.single_flight.do_async(
+                self._generate_cache_key(request),
+                lambda: self._generate_and_cache_async(request)
+            )
 
-                generation_time = time.time() - start_time
+            generation_time = time.time() - start_time
 
+            if shared:
+                self.performance_stats['cache_hits'] += 1
+                if self.enable_monitoring:
+                    self.metrics_collector.record_metric('ImageGenerationCoalesced', 1)
+            else:
                 # 更新性能统计
                 self._update_performance_stats(
                     model_config,
@@ -403,14 +408,14 @@ class ImageProcessingServiceOptimized:
                     success=True
                 )
 
-                return ImageResponse(
-                    request_id=request.request_id,
-                    image_data=image_data,
-                    model_used=model_config.model_id,
-                    generation_time=generation_time,
-                    from_cache=False,
-                    cost=model_config.cost_per_request
-                )
+            return ImageResponse(
+                request_id=request.request_id,
+                image_data=image_data,
+                model_used=model_config.model_id,
+                generation_time=generation_time,
+                from_cache=shared,
+                cost=0.0 if shared else model_config.cost_per_request
+            )
 
         except Exception as e:
             logger.error(f"图片生成失败: {str(e)}")
@@ -428,6 +433,39 @@ class ImageProcessingServiceOptimized:
                 cost=0.0
             )
 
+    async def _generate_and_cache_async(self, request: ImageRequest) -> Tuple[bytes, ModelConfig]:
+        """
+        调用模型生成图片并写入缓存（single-flight的实际计算）
+
+        Args:
+            request: 图片请求
+
+        Returns:
+            (图片数据, 使用的模型配置)
+        """
+        # 使用信号量控制并发
+        async with self.semaphore:
+            # 智能模型选择
+            model_config = self._select_optimal_model(request)
+
+            # 生成图片
+            image_data = await self._generate_with_model_async(
+                request,
+                model_config
+            )
+
+        # 先写入L1，使合并结束后到达的请求直接命中缓存
+        self.lru_cache.set(self._generate_cache_key(request), image_data)
+
+        # 异步缓存结果
+        asyncio.create_task(self._cache_image_async(request, image_data))
+
+        # 预加载相关图片
+        if self.enable_preloading:
+            asyncio.create_task(self._preload_related_images(request))
+
+        return image_data, model_config
+
     def generate_image_batch(self, requests: List[ImageRequest]) -> List[ImageResponse]:
         """
         批量生成图片
@@ -654,24 +692,19 @@ class ImageProcessingServiceOptimized:
         Returns:
             生成的图片数据
         """
-        import signal
-
-        def timeout_handler(signum, frame):
-            raise TimeoutError(f"模型调用超时: {model_config.model_id}")
-
-        # 设置超时
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(model_config.timeout)
+        if model_config.model_id.startswith("amazon.nova"):
+            call = self._call_nova_optimized
+        elif model_config.model_id.startswith("stability."):
+            call = self._call_stability_optimized
+        else:
+            raise ValueError(f"不支持的模型: {model_config.model_id}")
 
-        try:
-            if model_config.model_id.startswith("amazon.nova"):
-                return self._call_nova_optimized(prompt, model_config)
-            elif model_config.model_id.startswith("stability."):
-                return self._call_stability_optimized(prompt, model_config)
-            else:
-                raise ValueError(f"不支持的模型: {model_config.model_id}")
-        finally:
-            signal.alarm(0)  # 取消超时
+        # 超时抛出DeadlineExceededError（TimeoutError子类）
+        return self.bedrock_invoker.call(
+            call, prompt, model_config,
+            timeout=model_config.timeout,
+            operation=f"模型调用 {model_config.model_id}"
+        )
 
     def _call_nova_optimized(self, prompt: str, model_config: ModelConfig) -> bytes:
         """优化的Nova API调用"""
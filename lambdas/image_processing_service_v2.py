@@ -134,7 +134,10 @@ class ImageProcessingServiceV2:
                 self.cache_service.save_to_cache(
                     cache_key=cache_key,
                     image_data=optimized_image,
-                    metadata=generation_result
+                    metadata={
+                        **generation_result,
+                        'style': context.get('style', 'business') if context else 'business'
+                    }
                 )
 
             return s3_result
@@ -25,10 +25,12 @@ from botocore.exceptions import ClientError, BotoCoreError
 
 try:
     from .image_config import CONFIG
-    from .image_exceptions import ImageProcessingError, NovaServiceError
+    from .image_exceptions import NovaServiceError
 except ImportError:
     from image_config import CONFIG
-    from image_exceptions import ImageProcessingError, NovaServiceError
+    from image_exceptions import NovaServiceError
+
+from src.throttle_manager import ThrottleManager
 
 # 创建一个虚拟的MetricsCollector如果不存在
 class MetricsCollector:
@@ -236,8 +238,8 @@ class ImageProcessingServiceV3:
             'model_usage': {}
         }
 
-        # 请求限流
-        self._rate_limiter = RateLimiter(max_requests=100, time_window=60)
+        # 请求限流：与其他Bedrock调用方共享的按模型自适应令牌桶
+        self._rate_limiter = ThrottleManager.get_shared_limiter()
 
     async def generate_images_batch(self, requests: List[ImageRequest]) -> List[ImageResponse]:
         """
@@ -302,10 +304,6 @@ class ImageProcessingServiceV3:
         """
         start_time = time.perf_counter()
 
-        # 检查限流
-        if not self._rate_limiter.allow_request():
-            raise ImageProcessingError("请求频率超过限制")
-
         # 优化提示词
         optimized_prompt = self._optimize_prompt_advanced(request.prompt)
 
@@ -330,6 +328,11 @@ class ImageProcessingServiceV3:
         best_model = self._select_best_model(request.model_preference)
 
         try:
+            # 缓存未命中才消耗配额；等待期间不阻塞事件循环
+            waited = await self._rate_limiter.acquire_async(best_model)
+            if waited > 0 and self.metrics:
+                self.metrics.record_timing('rate_limit_wait', waited)
+
             # 在线程池中执行同步操作
             loop = asyncio.get_event_loop()
             image_data = await loop.run_in_executor(
@@ -413,10 +416,17 @@ class ImageProcessingServiceV3:
             # 更新模型状态
             self.model_pool[model_id]['last_success'] = time.time()
             self.model_pool[model_id]['failures'] = 0
+            self._rate_limiter.record_success(model_id)
 
             return image_data
 
         except Exception as e:
+            if isinstance(e, ClientError) and \
+                    e.response.get('Error', {}).get('Code') == 'ThrottlingException':
+                # 限流时降低该模型的速率，不计入模型故障
+                self._rate_limiter.record_throttle(model_id)
+                raise
+
             # 更新失败计数
             self.model_pool[model_id]['failures'] += 1
             if self.model_pool[model_id]['failures'] >= 3:
@@ -637,27 +647,3 @@ class ImageProcessingServiceV3:
         """清理资源"""
         self.executor.shutdown(wait=True)
         logger.info("图片处理服务资源已清理")
-
-
-class RateLimiter:
-    """请求限流器"""
-
-    def __init__(self, max_requests: int, time_window: int):
-        self.max_requests = max_requests
-        self.time_window = time_window
-        self.requests = []
-        self._lock = threading.Lock()
-
-    def allow_request(self) -> bool:
-        """检查是否允许请求"""
-        with self._lock:
-            now = time.time()
-            # 清理过期的请求记录
-            self.requests = [t for t in self.requests
-                           if now - t < self.time_window]
-
-            if len(self.requests) < self.max_requests:
-                self.requests.append(now)
-                return True
-
-            return False
\ No newline at end of file
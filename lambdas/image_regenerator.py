@@ -14,8 +14,9 @@ AI PPT Assistant Phase 3 - 图片重新生成器
 import json
 import logging
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
 import base64
@@ -66,13 +67,14 @@ class ImageRegenerator:
 
     功能：
     - 重新生成单个图片
-    - 批量重新生成图片
+    - 批量重新生成图片（有界并发，模型调用与S3写入重叠）
     - 自定义提示词
     - 失败回退机制
     - S3存储管理
     """
 
-    def __init__(self, bedrock_client=None, s3_client=None, bucket_name: str = None):
+    def __init__(self, bedrock_client=None, s3_client=None, bucket_name: str = None,
+                 max_workers: Optional[int] = None):
         """
         初始化图片重新生成器
 
@@ -80,10 +82,12 @@ class ImageRegenerator:
             bedrock_client: Bedrock客户端
             s3_client: S3客户端
             bucket_name: S3存储桶名称
+            max_workers: 批量重新生成时并发的模型调用数
         """
         self.bedrock = bedrock_client or boto3.client('bedrock-runtime')
         self.s3_client = s3_client or boto3.client('s3')
-        self.bucket_name = bucket_name or CONFIG.S3_BUCKET_NAME or "ai-ppt-presentations"
+        self.bucket_name = bucket_name or getattr(CONFIG, 'S3_BUCKET_NAME', None) or "ai-ppt-presentations"
+        self.max_workers = max(1, max_workers or CONFIG.MAX_CONCURRENT_IMAGES)
 
         # 使用现有的图片生成器
         self.image_generator = ImageGenerator(s3_service=None)
@@ -141,37 +145,148 @@ class ImageRegenerator:
             logger.error(f"重新生成图片时发生未预期错误: {str(e)}")
             return self._generate_fallback_image(presentation_id, slide_number, str(e))
 
-    def regenerate_multiple_images(self, presentation_id: str, regenerate_requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def regenerate_multiple_images(self, presentation_id: str, regenerate_requests: List[Dict[str, Any]],
+                                   max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         批量重新生成多个图片
 
         Args:
             presentation_id: 演示文稿ID
             regenerate_requests: 重新生成请求列表
+            max_workers: 并发的模型调用数（可选）
 
         Returns:
-            重新生成结果列表
+            重新生成结果列表，顺序与请求一致
         """
         if not regenerate_requests:
             return []
 
-        results = []
+        results: List[Optional[Dict[str, Any]]] = [None] * len(regenerate_requests)
+        for index, result in self._iter_regenerate(presentation_id, regenerate_requests, max_workers):
+            results[index] = result
 
-        for request in regenerate_requests:
-            try:
-                result = self.regenerate_image(presentation_id, request)
-                result["slide_number"] = request["slide_number"]
-                results.append(result)
+        return results
+
+    def iter_regenerate_images(self, presentation_id: str, regenerate_requests: List[Dict[str, Any]],
+                               max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        批量重新生成图片，按完成顺序逐个返回结果
+
+        Args:
+            presentation_id: 演示文稿ID
+            regenerate_requests: 重新生成请求列表
+            max_workers: 并发的模型调用数（可选）
 
+        Yields:
+            单页重新生成结果（包含slide_number）
+        """
+        for _, result in self._iter_regenerate(presentation_id, regenerate_requests, max_workers):
+            yield result
+
+    def _iter_regenerate(self, presentation_id: str, regenerate_requests: List[Dict[str, Any]],
+                         max_workers: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        批量重新生成的核心流程
+
+        - 相同提示词在一批内只调用一次模型，结果分别保存到各页
+        - 模型调用与S3写入使用两个线程池，保存上一张图片时下一张已在生成
+
+        Yields:
+            (请求索引, 结果)
+        """
+        # 验证请求并按提示词分组
+        prompt_groups: Dict[str, List[int]] = {}
+        for index, request in enumerate(regenerate_requests):
+            try:
+                self._validate_regenerate_request(request)
+                prompt = self._get_image_prompt(request)
             except Exception as e:
-                logger.error(f"重新生成第 {request.get('slide_number', 'unknown')} 页图片失败: {str(e)}")
-                results.append({
-                    "slide_number": request.get("slide_number", 0),
+                logger.error(f"重新生成第 {self._slide_number_of(request)} 页图片失败: {str(e)}")
+                yield index, {
+                    "slide_number": self._slide_number_of(request),
                     "status": "error",
                     "error": str(e)
-                })
+                }
+                continue
+            prompt_groups.setdefault(prompt, []).append(index)
 
-        return results
+        if not prompt_groups:
+            return
+
+        deduplicated = sum(len(indexes) for indexes in prompt_groups.values()) - len(prompt_groups)
+        if deduplicated:
+            logger.info(f"批次内有 {deduplicated} 个重复提示词，复用生成结果")
+
+        workers = min(max(1, max_workers or self.max_workers), len(prompt_groups))
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="regen-model") as model_pool, \
+                ThreadPoolExecutor(max_workers=workers * 2, thread_name_prefix="regen-s3") as s3_pool:
+            generations = {
+                model_pool.submit(self._call_image_generation_service, prompt): prompt
+                for prompt in prompt_groups
+            }
+            saves: Dict[Future, int] = {}
+
+            while generations or saves:
+                done, _ = wait(list(generations) + list(saves), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in saves:
+                        # S3写入完成，立即返回给调用方
+                        yield saves.pop(future), future.result()
+                        continue
+
+                    # 图片生成完成后立即提交S3写入，不等待其他模型调用
+                    prompt = generations.pop(future)
+                    try:
+                        image_data, error = future.result(), None
+                    except Exception as e:
+                        logger.warning(f"图片生成失败，使用回退方案: {str(e)}")
+                        image_data, error = None, str(e)
+
+                    for index in prompt_groups[prompt]:
+                        save = s3_pool.submit(
+                            self._store_regenerated_image, presentation_id,
+                            regenerate_requests[index], prompt, image_data, error, start_time
+                        )
+                        saves[save] = index
+
+    def _store_regenerated_image(self, presentation_id: str, request: Dict[str, Any], prompt: str,
+                                 image_data: Optional[bytes], error: Optional[str],
+                                 start_time: float) -> Dict[str, Any]:
+        """保存单页重新生成的图片（失败时保存占位图），并删除旧图片"""
+        slide_number = request["slide_number"]
+
+        try:
+            if image_data is None:
+                result = self._generate_fallback_image(presentation_id, slide_number, error)
+            else:
+                try:
+                    result = {
+                        "status": "success",
+                        "new_image_url": self._save_new_image(image_data, presentation_id, slide_number),
+                        "generation_time": time.time() - start_time,
+                        "used_prompt": prompt
+                    }
+                except Exception as e:
+                    logger.warning(f"保存第 {slide_number} 页图片失败，使用回退方案: {str(e)}")
+                    result = self._generate_fallback_image(presentation_id, slide_number, str(e))
+
+            old_image_url = request.get("old_image_url")
+            if old_image_url and result.get("new_image_url") != old_image_url:
+                result["old_image_deleted"] = self.delete_old_image(old_image_url)
+
+        except Exception as e:
+            logger.error(f"重新生成第 {slide_number} 页图片失败: {str(e)}")
+            result = {"status": "error", "error": str(e)}
+
+        result["slide_number"] = slide_number
+        return result
+
+    @staticmethod
+    def _slide_number_of(request: Any) -> int:
+        """从请求中读取幻灯片编号（请求格式错误时返回0）"""
+        return request.get("slide_number", 0) if isinstance(request, dict) else 0
 
     def regenerate_all_images(self, presentation_id: str, presentation_data: Dict[str, Any],
                              new_prompt: str = None) -> Dict[str, Any]:
@@ -258,7 +373,7 @@ class ImageRegenerator:
             return self.image_generator.generate_prompt(request["slide_content"])
 
         # 使用默认提示词
-        return CONFIG.DEFAULT_IMAGE_PROMPT or "Professional presentation slide illustration"
+        return getattr(CONFIG, 'DEFAULT_IMAGE_PROMPT', None) or "Professional presentation slide illustration"
 
     def _call_image_generation_service(self, prompt: str) -> bytes:
         """调用图片生成服务"""
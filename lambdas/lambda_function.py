@@ -18,6 +18,8 @@ from src.status_manager import StatusManager, PresentationStatus
 from src.validators import RequestValidator
 from src.common.s3_service import S3Service
 from src.throttle_manager import ThrottleManager
+from src.bedrock_invoker import BedrockInvoker, Deadline, deadline_scope, current_deadline
+from src.config import CONTENT_MAX_WORKERS
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -66,7 +68,13 @@ def lambda_handler(event, context):
         # 2. 初始化管理器
         status_manager = StatusManager(bucket_name)
         s3_service = S3Service(bucket_name)
-        content_generator = ContentGenerator(s3_service=s3_service)
+        # 按Lambda剩余时间设置截止时间，超时前留出保存状态的时间
+        deadline = Deadline.from_lambda_context(context) or current_deadline()
+        content_generator = ContentGenerator(
+            s3_service=s3_service,
+            max_workers=CONTENT_MAX_WORKERS,
+            deadline=deadline
+        )
         ppt_compiler = PPTCompiler()
 
         # 3. 创建初始状态
@@ -279,29 +287,21 @@ def format_error_response(status_code: int, message: str) -> dict:
 
 def handle_request_with_timeout(request_data: Dict, timeout_seconds: int) -> Dict:
     """处理带超时的请求（测试用）"""
-    import signal
-
-    def timeout_handler(signum, frame):
-        raise TimeoutError(f"Request timed out after {timeout_seconds} seconds")
-
-    # 设置超时信号
-    signal.signal(signal.SIGALRM, timeout_handler)
-    signal.alarm(timeout_seconds)
+    # 模拟事件结构
+    event = {
+        'body': json.dumps(request_data),
+        'httpMethod': 'POST'
+    }
 
-    try:
-        # 模拟事件结构
-        event = {
-            'body': json.dumps(request_data),
-            'httpMethod': 'POST'
-        }
-        result = handler(event, None)
-        signal.alarm(0)  # 取消超时
-        return result
-    except TimeoutError:
-        signal.alarm(0)  # 取消超时
-        raise
-    finally:
-        signal.alarm(0)  # 确保清除超时
+    # 在工作线程中执行并等待，不依赖SIGALRM（可在任意线程调用）；
+    # 截止时间随上下文传递给下游Bedrock调用
+    deadline = Deadline(timeout_seconds)
+    with deadline_scope(deadline):
+        return BedrockInvoker().call(
+            lambda_handler, event, None,
+            deadline=deadline,
+            operation=f"Request ({timeout_seconds}s)"
+        )
 
 
 def handle_generate_request_with_retry(request_data: Dict, max_retries: int = 3) -> Dict:
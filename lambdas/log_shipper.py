@@ -0,0 +1,314 @@
+"""
+异步日志投递
+============
+请求线程只把日志条目放入有界环形缓冲区，由后台线程按批量大小和时间间隔
+投递到CloudWatch Logs；缓冲区满时按策略丢弃并计数，调用结束时显式刷新。
+
+功能:
+- 有界缓冲区与非阻塞提交
+- 按条数和时间间隔触发的批量投递
+- 背压策略：丢弃最旧（drop_oldest）或按比例采样（sample），错误日志总是保留
+- Lambda调用结束时的刷新钩子
+- 可替换的投递目标（CloudWatch Logs / 内存）
+"""
+
+import atexit
+import json
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+# 背压策略
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+OVERFLOW_SAMPLE = 'sample'
+
+# 采样策略下总是保留的日志级别
+PRIORITY_LEVELS = frozenset({'ERROR', 'CRITICAL'})
+
+# PutLogEvents 限制：每批最多10000条，总大小1MB，每条额外计26字节
+PUT_LOG_EVENTS_MAX_COUNT = 10000
+PUT_LOG_EVENTS_MAX_BYTES = 1048576
+PUT_LOG_EVENTS_EVENT_OVERHEAD = 26
+
+# 进程内所有投递器，进程退出时统一刷新
+_shippers = weakref.WeakSet()
+
+
+def _entry_millis(entry: Dict[str, Any]) -> int:
+    """日志条目时间戳（毫秒）"""
+    timestamp = entry.get('timestamp')
+    if isinstance(timestamp, str):
+        try:
+            return int(datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp() * 1000)
+        except ValueError:
+            pass
+    return int(time.time() * 1000)
+
+
+class CloudWatchLogsSink:
+    """CloudWatch Logs 投递目标"""
+
+    def __init__(self, client, log_group: str, stream_prefix: str):
+        """
+        初始化投递目标
+
+        Args:
+            client: CloudWatch Logs 客户端
+            log_group: 日志组名称
+            stream_prefix: 日志流名称前缀，按天追加日期
+        """
+        self.client = client
+        self.log_group = log_group
+        self.stream_prefix = stream_prefix
+        self._known_streams = set()
+
+    def _ensure_stream(self, stream_name: str) -> None:
+        """每个日志流只尝试创建一次"""
+        if stream_name in self._known_streams:
+            return
+        try:
+            self.client.create_log_stream(logGroupName=self.log_group, logStreamName=stream_name)
+        except self.client.exceptions.ResourceAlreadyExistsException:
+            pass
+        self._known_streams.add(stream_name)
+
+    def send(self, entries: List[Dict[str, Any]]) -> None:
+        """按 PutLogEvents 限制分批投递日志条目"""
+        stream_name = f"{self.stream_prefix}-{datetime.now().strftime('%Y%m%d')}"
+        self._ensure_stream(stream_name)
+
+        events = sorted(
+            ({'timestamp': _entry_millis(entry), 'message': json.dumps(entry, default=str)}
+             for entry in entries),
+            key=lambda event: event['timestamp']
+        )
+
+        batch, batch_bytes = [], 0
+        for event in events:
+            size = len(event['message'].encode('utf-8')) + PUT_LOG_EVENTS_EVENT_OVERHEAD
+            if batch and (len(batch) >= PUT_LOG_EVENTS_MAX_COUNT
+                          or batch_bytes + size > PUT_LOG_EVENTS_MAX_BYTES):
+                self._put(stream_name, batch)
+                batch, batch_bytes = [], 0
+            batch.append(event)
+            batch_bytes += size
+        if batch:
+            self._put(stream_name, batch)
+
+    def _put(self, stream_name: str, events: List[Dict[str, Any]]) -> None:
+        self.client.put_log_events(logGroupName=self.log_group, logStreamName=stream_name,
+                                   logEvents=events)
+
+
+class MemorySink:
+    """内存投递目标，用于本地运行和测试"""
+
+    def __init__(self):
+        self.batches: List[List[Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+
+    def send(self, entries: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.batches.append(list(entries))
+
+    @property
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [entry for batch in self.batches for entry in batch]
+
+
+class LogShipper:
+    """有界缓冲区 + 后台线程的批量日志投递器"""
+
+    def __init__(self, sink, capacity: int = 1000, batch_size: int = 50,
+                 flush_interval: float = 5.0, overflow_policy: str = OVERFLOW_DROP_OLDEST,
+                 sample_rate: float = 0.1):
+        """
+        初始化日志投递器
+
+        Args:
+            sink: 具有 send(entries) 方法的投递目标
+            capacity: 缓冲区容量（条）
+            batch_size: 达到该条数时唤醒后台线程投递
+            flush_interval: 最长投递间隔（秒）
+            overflow_policy: 缓冲区满时的策略，drop_oldest 或 sample
+            sample_rate: sample 策略下新日志被保留的比例
+        """
+        if overflow_policy not in (OVERFLOW_DROP_OLDEST, OVERFLOW_SAMPLE):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.sink = sink
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.sample_rate = sample_rate
+
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # 投递串行化：后台线程与显式刷新不并发调用 sink
+        self._send_lock = threading.Lock()
+        self._stopped = False
+        self._worker = None
+
+        self.stats = {
+            'submitted': 0,
+            'shipped': 0,
+            'dropped_oldest': 0,
+            'sampled_out': 0,
+            'failed': 0,
+            'batches': 0
+        }
+
+        _shippers.add(self)
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """
+        非阻塞提交日志条目
+
+        Args:
+            entry: 日志条目
+
+        Returns:
+            条目是否进入缓冲区
+        """
+        with self._lock:
+            self.stats['submitted'] += 1
+
+            if len(self._queue) >= self.capacity:
+                if (self.overflow_policy == OVERFLOW_SAMPLE
+                        and entry.get('level') not in PRIORITY_LEVELS
+                        and random.random() >= self.sample_rate):
+                    self.stats['sampled_out'] += 1
+                    return False
+                self._queue.popleft()
+                self.stats['dropped_oldest'] += 1
+
+            self._queue.append(entry)
+            if len(self._queue) >= self.batch_size:
+                self._wakeup.notify()
+
+        if self._worker is None:
+            self._start_worker()
+        return True
+
+    def _start_worker(self) -> None:
+        with self._lock:
+            if self._worker is not None or self._stopped:
+                return
+            self._worker = threading.Thread(target=self._run, name='log-shipper', daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        """后台投递循环：攒够一批或到达间隔时投递"""
+        while True:
+            with self._lock:
+                if len(self._queue) < self.batch_size and not self._stopped:
+                    self._wakeup.wait(self.flush_interval)
+                if self._stopped and not self._queue:
+                    return
+            self._ship_pending()
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            count = min(len(self._queue), PUT_LOG_EVENTS_MAX_COUNT)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _ship_pending(self, deadline: Optional[float] = None) -> bool:
+        """投递缓冲区中的全部条目，超过截止时间时返回False"""
+        if deadline is None:
+            acquired = self._send_lock.acquire()
+        else:
+            # 等待进行中的后台投递完成
+            acquired = self._send_lock.acquire(timeout=max(deadline - time.monotonic(), 0))
+        if not acquired:
+            return False
+
+        try:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return True
+                try:
+                    self.sink.send(batch)
+                    outcome = {'shipped': len(batch), 'batches': 1}
+                except Exception as e:
+                    outcome = {'failed': len(batch)}
+                    print(f"Failed to ship {len(batch)} log entries: {e}")
+                with self._lock:
+                    for key, value in outcome.items():
+                        self.stats[key] += value
+                if deadline is not None and time.monotonic() >= deadline:
+                    return not self._queue
+        finally:
+            self._send_lock.release()
+
+    def flush(self, timeout: Optional[float] = 2.0) -> bool:
+        """
+        在调用线程中投递缓冲区中的日志
+
+        Args:
+            timeout: 最长等待时间（秒），None表示不限
+
+        Returns:
+            缓冲区是否已清空
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        return self._ship_pending(deadline)
+
+    def close(self, timeout: Optional[float] = 2.0) -> bool:
+        """停止后台线程并投递剩余日志"""
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        return self.flush(timeout)
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'pending': len(self._queue), 'capacity': self.capacity}
+
+
+def flush_all_shippers(timeout: Optional[float] = 2.0) -> None:
+    """刷新进程内所有投递器"""
+    for shipper in list(_shippers):
+        shipper.flush(timeout)
+
+
+def flush_logs_after_invocation(handler: Callable = None, *, timeout: float = 2.0) -> Callable:
+    """
+    装饰器：Lambda处理函数返回后刷新日志
+
+    在响应返回前投递剩余日志，避免执行环境冻结时丢失；
+    刷新失败不影响处理函数的结果。
+
+    Args:
+        handler: Lambda处理函数
+        timeout: 刷新最长等待时间（秒）
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                try:
+                    flush_all_shippers(timeout)
+                except Exception as e:
+                    print(f"Failed to flush logs: {e}")
+        return wrapper
+
+    return decorator(handler) if handler is not None else decorator
+
+
+atexit.register(flush_all_shippers)
@@ -17,6 +17,7 @@ import logging
 import os
 import re
 import sys
+import threading
 import traceback
 import uuid
 from datetime import datetime, timedelta
@@ -25,7 +26,12 @@ from enum import Enum
 import boto3
 from botocore.exceptions import ClientError
 import hashlib
-from functools import wraps
+from functools import lru_cache, wraps
+
+try:
+    from .log_shipper import CloudWatchLogsSink, LogShipper, flush_logs_after_invocation
+except ImportError:
+    from log_shipper import CloudWatchLogsSink, LogShipper, flush_logs_after_invocation
 
 # AWS 客户端
 cloudwatch_logs = boto3.client('logs')
@@ -39,6 +45,113 @@ CLOUDWATCH_LOG_GROUP = os.environ.get('LOG_GROUP', f'/aws/{SERVICE_NAME}/main')
 ENABLE_CORRELATION = os.environ.get('ENABLE_CORRELATION', 'true').lower() == 'true'
 MASK_SENSITIVE_DATA = os.environ.get('MASK_SENSITIVE_DATA', 'true').lower() == 'true'
 
+# 日志投递配置
+LOG_QUEUE_CAPACITY = int(os.environ.get('LOG_QUEUE_CAPACITY', '1000'))
+LOG_BATCH_SIZE = int(os.environ.get('LOG_BATCH_SIZE', '50'))
+LOG_FLUSH_INTERVAL = float(os.environ.get('LOG_FLUSH_INTERVAL_SECONDS', '5'))
+LOG_OVERFLOW_POLICY = os.environ.get('LOG_OVERFLOW_POLICY', 'drop_oldest')
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '0.1'))
+
+# 按服务名共享的投递器，避免每个 LoggingManager 实例各起一个后台线程
+_shippers: Dict[str, LogShipper] = {}
+_shippers_lock = threading.Lock()
+
+
+def get_log_shipper(service_name: str = None) -> LogShipper:
+    """获取服务的共享日志投递器"""
+    service_name = service_name or SERVICE_NAME
+    with _shippers_lock:
+        shipper = _shippers.get(service_name)
+        if shipper is None:
+            shipper = LogShipper(
+                CloudWatchLogsSink(cloudwatch_logs, CLOUDWATCH_LOG_GROUP, service_name),
+                capacity=LOG_QUEUE_CAPACITY,
+                batch_size=LOG_BATCH_SIZE,
+                flush_interval=LOG_FLUSH_INTERVAL,
+                overflow_policy=LOG_OVERFLOW_POLICY,
+                sample_rate=LOG_SAMPLE_RATE
+            )
+            _shippers[service_name] = shipper
+        return shipper
+
+
+# 敏感数据模式（按顺序逐个替换，后面的模式作用于前面模式替换后的文本）
+SENSITIVE_PATTERNS = [
+    ('email', r'([a-zA-Z0-9._%+-]+)@([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'),
+    ('api_key', r'(sk-|api[_-]?key["\']?\s*[:=]\s*["\']?)([a-zA-Z0-9]{20,})'),
+    ('aws_key', r'(AKIA[A-Z0-9]{16})'),
+    ('aws_secret', r'([a-zA-Z0-9/+=]{40})'),
+    ('phone', r'(\+?[1-9]\d{0,2}[-.\s]?)(\d{3,4}[-.\s]?\d{3,4}[-.\s]?\d{3,5})'),
+    ('credit_card', r'\b(\d{4}[-\s]?)(\d{4}[-\s]?)(\d{4}[-\s]?)(\d{4})\b'),
+    ('ssn', r'\b(\d{3})-(\d{2})-(\d{4})\b'),
+    ('ip_address', r'\b(\d{1,3}\.){3}\d{1,3}\b'),
+    ('jwt_token', r'eyJ[a-zA-Z0-9_-]+\.eyJ[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+'),
+    ('password', r'(password|passwd|pwd)["\']?\s*[:=]\s*["\']?([^"\'\s,;}]+)')
+]
+
+# 键名包含以下任一子串即整体脱敏
+SENSITIVE_KEYS = (
+    'password', 'passwd', 'pwd', 'secret', 'token', 'api_key',
+    'apikey', 'auth', 'authorization', 'private_key', 'access_token',
+    'refresh_token', 'email', 'phone', 'ssn', 'user_content'
+)
+
+# 各模式的替换规则，未列出的模式整体替换为****
+_REPLACEMENTS = {
+    'email': lambda m: f"{m.group(1)[:1]}***@{m.group(2)}",
+    'api_key': lambda m: f"{m.group(1)}****",
+    'aws_key': lambda m: f"AKIA****{m.group(1)[-4:]}",
+    'phone': lambda m: f"{m.group(1)}****",
+    'credit_card': lambda m: f"****-****-****-{m.group(4)}",
+    'jwt_token': "eyJ****.[MASKED]",
+    'password': lambda m: f"{m.group(1)}=****"
+}
+
+# 模式命中所必需的子串：当前文本中不含任一子串时跳过该模式，结果不变
+_TRIGGERS = {
+    'email': ('@',),
+    'api_key': ('sk-', 'api'),
+    'aws_key': ('AKIA',),
+    'jwt_token': ('eyJ',),
+    'password': ('password', 'passwd', 'pwd')
+}
+_DIGIT_PATTERNS = ('phone', 'credit_card', 'ssn', 'ip_address')
+_DIGIT = re.compile(r'\d')
+
+# 模块加载时编译一次
+_COMPILED_PATTERNS = [(name, re.compile(pattern), _REPLACEMENTS.get(name, "****"))
+                      for name, pattern in SENSITIVE_PATTERNS]
+
+
+def _may_match(name: str, text: str) -> bool:
+    """快速判断模式在当前文本中是否可能命中"""
+    if name in _TRIGGERS:
+        return any(trigger in text for trigger in _TRIGGERS[name])
+    if name in _DIGIT_PATTERNS:
+        return _DIGIT.search(text) is not None
+    # aws_secret 需要40个连续字符
+    return len(text) >= 40
+
+
+def mask_sensitive_string(text: str) -> str:
+    """
+    脱敏字符串中的敏感信息
+
+    按SENSITIVE_PATTERNS顺序逐个替换；每个模式替换前先检查必需子串，
+    不可能命中的模式直接跳过。
+    """
+    for name, pattern, replacement in _COMPILED_PATTERNS:
+        if _may_match(name, text):
+            text = pattern.sub(replacement, text)
+    return text
+
+
+@lru_cache(maxsize=4096)
+def is_sensitive_key(key: str) -> bool:
+    """判断键名是否敏感，结果按键名缓存"""
+    lowered = key.lower()
+    return any(sensitive in lowered for sensitive in SENSITIVE_KEYS)
+
 
 class LogLevel(Enum):
     """日志级别枚举"""
@@ -52,13 +165,15 @@ class LogLevel(Enum):
 class LoggingManager:
     """统一的日志管理器"""
 
-    def __init__(self, service_name: str = None, log_level: str = None):
+    def __init__(self, service_name: str = None, log_level: str = None,
+                 shipper: LogShipper = None):
         """
         初始化日志管理器
 
         Args:
             service_name: 服务名称
             log_level: 日志级别
+            shipper: 日志投递器，默认使用服务的共享投递器
         """
         self.service_name = service_name or SERVICE_NAME
         self.log_level = self._parse_log_level(log_level or LOG_LEVEL)
@@ -72,9 +187,8 @@ class LoggingManager:
         # 敏感数据模式
         self.sensitive_patterns = self._compile_sensitive_patterns()
 
-        # 日志缓冲区（用于批量发送）
-        self.log_buffer = []
-        self.buffer_size = 50
+        # 后台批量投递
+        self.shipper = shipper or get_log_shipper(self.service_name)
 
         # 日志统计
         self.log_stats = {
@@ -113,19 +227,8 @@ class LoggingManager:
             return LogLevel.INFO
 
     def _compile_sensitive_patterns(self) -> Dict[str, re.Pattern]:
-        """编译敏感数据正则表达式模式"""
-        return {
-            'email': re.compile(r'([a-zA-Z0-9._%+-]+)@([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'),
-            'api_key': re.compile(r'(sk-|api[_-]?key["\']?\s*[:=]\s*["\']?)([a-zA-Z0-9]{20,})'),
-            'aws_key': re.compile(r'(AKIA[A-Z0-9]{16})'),
-            'aws_secret': re.compile(r'([a-zA-Z0-9/+=]{40})'),
-            'phone': re.compile(r'(\+?[1-9]\d{0,2}[-.\s]?)(\d{3,4}[-.\s]?\d{3,4}[-.\s]?\d{3,5})'),
-            'credit_card': re.compile(r'\b(\d{4}[-\s]?)(\d{4}[-\s]?)(\d{4}[-\s]?)(\d{4})\b'),
-            'ssn': re.compile(r'\b(\d{3})-(\d{2})-(\d{4})\b'),
-            'ip_address': re.compile(r'\b(\d{1,3}\.){3}\d{1,3}\b'),
-            'jwt_token': re.compile(r'eyJ[a-zA-Z0-9_-]+\.eyJ[a-zA-Z0-9_-]+\.[a-zA-Z0-9_-]+'),
-            'password': re.compile(r'(password|passwd|pwd)["\']?\s*[:=]\s*["\']?([^"\'\s,;}]+)')
-        }
+        """敏感数据正则表达式模式（逐个模式，供单独匹配使用）"""
+        return {name: pattern for name, pattern, _ in _COMPILED_PATTERNS}
 
     def set_correlation_context(self, correlation_id: str = None,
                                session_id: str = None,
@@ -157,13 +260,13 @@ class LoggingManager:
         Returns:
             日志记录结果
         """
-        # 构建日志条目
-        log_entry = self._build_log_entry(level, message, context, metadata)
-
-        # 检查日志级别
+        # 检查日志级别，被过滤的日志不构建条目也不脱敏
         if not self.should_log(level):
             return {'logged': False, 'reason': 'below_log_level'}
 
+        # 构建日志条目
+        log_entry = self._build_log_entry(level, message, context, metadata)
+
         # 脱敏处理
         if MASK_SENSITIVE_DATA:
             log_entry = self._mask_sensitive_data_in_dict(log_entry)
@@ -275,51 +378,18 @@ class LoggingManager:
 
     def _mask_sensitive_string(self, text: str) -> str:
         """脱敏字符串中的敏感信息"""
-        masked_text = text
-
-        for pattern_name, pattern in self.sensitive_patterns.items():
-            if pattern_name == 'email':
-                masked_text = pattern.sub(lambda m: f"{m.group(1)[:1]}***@{m.group(2)}", masked_text)
-            elif pattern_name == 'api_key':
-                masked_text = pattern.sub(lambda m: f"{m.group(1)}****", masked_text)
-            elif pattern_name == 'aws_key':
-                masked_text = pattern.sub(lambda m: f"AKIA****{m.group(1)[-4:]}", masked_text)
-            elif pattern_name == 'phone':
-                masked_text = pattern.sub(lambda m: f"{m.group(1)}****", masked_text)
-            elif pattern_name == 'credit_card':
-                masked_text = pattern.sub(lambda m: f"****-****-****-{m.group(4)}", masked_text)
-            elif pattern_name == 'jwt_token':
-                masked_text = pattern.sub("eyJ****.[MASKED]", masked_text)
-            elif pattern_name == 'password':
-                masked_text = pattern.sub(lambda m: f"{m.group(1)}=****", masked_text)
-            else:
-                masked_text = pattern.sub("****", masked_text)
-
-        return masked_text
+        return mask_sensitive_string(text)
 
     def _mask_sensitive_data_in_dict(self, data: Dict) -> Dict:
         """递归脱敏字典中的敏感数据"""
         masked_data = {}
 
-        sensitive_keys = [
-            'password', 'passwd', 'pwd', 'secret', 'token', 'api_key',
-            'apikey', 'auth', 'authorization', 'private_key', 'access_token',
-            'refresh_token', 'email', 'phone', 'ssn', 'user_content'
-        ]
-
         for key, value in data.items():
-            # 检查键名是否包含敏感词
-            is_sensitive_key = any(sensitive in key.lower() for sensitive in sensitive_keys)
-
-            if is_sensitive_key:
-                if isinstance(value, str):
-                    masked_data[key] = "[MASKED]" if len(value) > 0 else ""
-                    self.log_stats['masked_fields'] += 1
-                else:
-                    masked_data[key] = "[MASKED]"
-                    self.log_stats['masked_fields'] += 1
+            if is_sensitive_key(key):
+                masked_data[key] = "[MASKED]" if not isinstance(value, str) or len(value) > 0 else ""
+                self.log_stats['masked_fields'] += 1
             elif isinstance(value, str):
-                masked_data[key] = self._mask_sensitive_string(value)
+                masked_data[key] = mask_sensitive_string(value)
             elif isinstance(value, dict):
                 masked_data[key] = self._mask_sensitive_data_in_dict(value)
             elif isinstance(value, list):
@@ -455,6 +525,8 @@ class LoggingManager:
         """
         发送日志到CloudWatch
 
+        条目进入投递器的有界缓冲区后立即返回，由后台线程批量投递。
+
         Args:
             log_entry: 日志条目
 
@@ -462,62 +534,28 @@ class LoggingManager:
             发送结果
         """
         try:
-            # 添加到缓冲区
-            self.log_buffer.append(log_entry)
-
-            # 如果缓冲区满了，批量发送
-            if len(self.log_buffer) >= self.buffer_size:
-                self._flush_log_buffer()
+            queued = self.shipper.submit(log_entry)
 
             # 同时输出到控制台
             print(json.dumps(log_entry))
 
-            return {'success': True}
+            return {'success': True, 'queued': queued}
 
         except Exception as e:
             print(f"Failed to send log to CloudWatch: {e}")
             return {'success': False, 'error': str(e)}
 
-    def _flush_log_buffer(self):
-        """刷新日志缓冲区到CloudWatch"""
-        if not self.log_buffer:
-            return
-
-        try:
-            # 获取或创建日志流
-            log_stream_name = f"{self.service_name}-{datetime.now().strftime('%Y%m%d')}"
-
-            # 尝试创建日志流
-            try:
-                cloudwatch_logs.create_log_stream(
-                    logGroupName=CLOUDWATCH_LOG_GROUP,
-                    logStreamName=log_stream_name
-                )
-            except cloudwatch_logs.exceptions.ResourceAlreadyExistsException:
-                pass  # 日志流已存在
-
-            # 准备日志事件
-            log_events = []
-            for entry in self.log_buffer:
-                log_events.append({
-                    'timestamp': int(datetime.fromisoformat(
-                        entry['timestamp'].replace('Z', '+00:00')
-                    ).timestamp() * 1000),
-                    'message': json.dumps(entry)
-                })
-
-            # 发送日志
-            cloudwatch_logs.put_log_events(
-                logGroupName=CLOUDWATCH_LOG_GROUP,
-                logStreamName=log_stream_name,
-                logEvents=sorted(log_events, key=lambda x: x['timestamp'])
-            )
+    def flush(self, timeout: Optional[float] = 2.0) -> bool:
+        """
+        投递缓冲区中的日志，Lambda调用结束前调用
 
-            # 清空缓冲区
-            self.log_buffer.clear()
+        Args:
+            timeout: 最长等待时间（秒）
 
-        except Exception as e:
-            print(f"Failed to flush log buffer: {e}")
+        Returns:
+            缓冲区是否已清空
+        """
+        return self.shipper.flush(timeout)
 
     def _update_stats(self, level: str):
         """更新日志统计"""
@@ -528,14 +566,7 @@ class LoggingManager:
 
     def get_stats(self) -> Dict[str, Any]:
         """获取日志统计信息"""
-        return self.log_stats
-
-    def __del__(self):
-        """析构函数，确保日志被刷新"""
-        try:
-            self._flush_log_buffer()
-        except:
-            pass
+        return {**self.log_stats, 'shipping': self.shipper.get_stats()}
 
 
 # 装饰器：自动记录函数执行
@@ -618,5 +649,7 @@ __all__ = [
     'log_warning',
     'log_error',
     'log_debug',
-    'global_logger'
+    'global_logger',
+    'get_log_shipper',
+    'flush_logs_after_invocation'
 ]
\ No newline at end of file
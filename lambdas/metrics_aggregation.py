@@ -0,0 +1,397 @@
+"""
+指标聚合引擎
+============
+固定内存的分位数草图、CloudWatch统计集预聚合与批量更新
+
+功能:
+- DDSketch相对误差分位数草图（内存上限固定，可合并）
+- 单指标统计集（计数、求和、极值、方差）
+- 线程安全的多指标聚合引擎
+- 刷新前将原始数据点压缩为 Values/Counts 数组
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy为可选依赖
+    np = None
+
+# 默认相对误差 1%
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# 每个符号方向最多保留的桶数，超出后合并最低桶
+DEFAULT_MAX_BINS = 2048
+# CloudWatch 单个数据点 Values/Counts 数组的最大长度
+CLOUDWATCH_MAX_VALUES = 150
+# 低于该批量大小时逐个写入比构造数组更快
+_BULK_THRESHOLD = 32
+
+
+class DDSketch:
+    """
+    DDSketch分位数草图
+
+    按对数间隔分桶，任意分位数的估计值与真实值的相对误差不超过
+    relative_accuracy；桶数超过上限时合并最低的桶，内存占用固定。
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_bins: int = DEFAULT_MAX_BINS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self._positive: Dict[int, int] = {}
+        self._negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, magnitude: float) -> int:
+        """计算正数值所在的桶编号"""
+        return int(math.ceil(math.log(magnitude) / self._log_gamma))
+
+    def _value(self, index: int) -> float:
+        """桶的代表值（桶区间的相对中点）"""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        """添加单个值"""
+        if value > 0:
+            store = self._positive
+            index = self._index(value)
+        elif value < 0:
+            store = self._negative
+            index = self._index(-value)
+        else:
+            self.zero_count += count
+            self.count += count
+            return
+
+        store[index] = store.get(index, 0) + count
+        self.count += count
+        if len(store) > self.max_bins:
+            self._collapse(store)
+
+    def add_many(self, values: Iterable[float]) -> None:
+        """批量添加值，安装了numpy时向量化计算桶编号"""
+        if np is None:
+            for value in values:
+                self.add(value)
+            return
+
+        array = np.asarray(values, dtype=np.float64).ravel()
+        if array.size == 0:
+            return
+        if array.size < _BULK_THRESHOLD:
+            for value in array.tolist():
+                self.add(value)
+            return
+
+        zeros = int(np.count_nonzero(array == 0))
+        self.zero_count += zeros
+        self.count += zeros
+
+        for store, magnitudes in ((self._positive, array[array > 0]),
+                                  (self._negative, -array[array < 0])):
+            if magnitudes.size == 0:
+                continue
+            indexes = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+            keys, counts = np.unique(indexes, return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                store[key] = store.get(key, 0) + count
+            self.count += int(magnitudes.size)
+            if len(store) > self.max_bins:
+                self._collapse(store)
+
+    def _collapse(self, store: Dict[int, int]) -> None:
+        """合并最低的桶直到桶数回到上限"""
+        keys = sorted(store)
+        overflow = keys[:len(keys) - self.max_bins + 1]
+        merged = sum(store.pop(key) for key in overflow)
+        target = keys[len(overflow)]
+        store[target] = store.get(target, 0) + merged
+
+    def merge(self, other: 'DDSketch') -> None:
+        """合并另一个参数相同的草图"""
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different relative accuracy")
+
+        for store, other_store in ((self._positive, other._positive),
+                                   (self._negative, other._negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+            if len(store) > self.max_bins:
+                self._collapse(store)
+
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        估计分位数
+
+        Args:
+            q: 0到1之间的分位点
+
+        Returns:
+            估计值，草图为空时返回None
+        """
+        if self.count == 0:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("quantile must be between 0 and 1")
+
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self._negative, reverse=True):
+            seen += self._negative[index]
+            if seen > rank:
+                return -self._value(index)
+
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+
+        for index in sorted(self._positive):
+            seen += self._positive[index]
+            if seen > rank:
+                return self._value(index)
+
+        return self._value(max(self._positive)) if self._positive else 0.0
+
+    def bins(self) -> List[Tuple[float, int]]:
+        """按值升序返回 (代表值, 计数) 列表"""
+        result = [(-self._value(index), self._negative[index])
+                  for index in sorted(self._negative, reverse=True)]
+        if self.zero_count:
+            result.append((0.0, self.zero_count))
+        result.extend((self._value(index), self._positive[index])
+                      for index in sorted(self._positive))
+        return result
+
+    def __len__(self) -> int:
+        return len(self._positive) + len(self._negative) + (1 if self.zero_count else 0)
+
+
+class MetricAggregate:
+    """单个指标的统计集与分位数草图"""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_bins: int = DEFAULT_MAX_BINS):
+        self.sketch = DDSketch(relative_accuracy, max_bins)
+        self.count = 0
+        self.sum = 0.0
+        self.sum_of_squares = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.last: Optional[float] = None
+
+    def add(self, value: float) -> None:
+        """添加单个值"""
+        value = float(value)
+        self.sketch.add(value)
+        self.count += 1
+        self.sum += value
+        self.sum_of_squares += value * value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.last = value
+
+    def add_many(self, values: Iterable[float]) -> None:
+        """批量添加值"""
+        if np is None:
+            for value in values:
+                self.add(value)
+            return
+
+        array = np.asarray(values, dtype=np.float64).ravel()
+        if array.size == 0:
+            return
+
+        self.sketch.add_many(array)
+        self.count += int(array.size)
+        self.sum += float(array.sum())
+        self.sum_of_squares += float(np.dot(array, array))
+        self.min = min(self.min, float(array.min()))
+        self.max = max(self.max, float(array.max()))
+        self.last = float(array[-1])
+
+    def merge(self, other: 'MetricAggregate') -> None:
+        """合并另一个聚合"""
+        if other.count == 0:
+            return
+        self.sketch.merge(other.sketch)
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_of_squares += other.sum_of_squares
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.last = other.last
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        """样本标准差"""
+        if self.count < 2:
+            return 0.0
+        variance = (self.sum_of_squares - self.sum * self.sum / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def quantile(self, q: float) -> float:
+        """估计分位数，结果限制在观测到的极值之间"""
+        estimate = self.sketch.quantile(q)
+        if estimate is None:
+            return 0.0
+        return min(max(estimate, self.min), self.max)
+
+    def percentile(self, percentile: float) -> float:
+        return self.quantile(percentile / 100)
+
+    def to_statistic_set(self) -> Dict[str, float]:
+        """转换为 CloudWatch StatisticValues"""
+        return {
+            'SampleCount': float(self.count),
+            'Sum': self.sum,
+            'Minimum': self.min,
+            'Maximum': self.max
+        }
+
+    def summary(self) -> Dict[str, float]:
+        """常用统计摘要"""
+        if self.count == 0:
+            return {}
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'average': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'median': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'stddev': self.stddev
+        }
+
+
+class AggregationEngine:
+    """线程安全的多指标聚合引擎"""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_bins: int = DEFAULT_MAX_BINS):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._aggregates: Dict[str, MetricAggregate] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, metric_name: str) -> MetricAggregate:
+        aggregate = self._aggregates.get(metric_name)
+        if aggregate is None:
+            aggregate = MetricAggregate(self.relative_accuracy, self.max_bins)
+            self._aggregates[metric_name] = aggregate
+        return aggregate
+
+    def record(self, metric_name: str, value: float) -> None:
+        """记录单个值"""
+        with self._lock:
+            self._get(metric_name).add(value)
+
+    def record_many(self, metric_name: str, values: Iterable[float]) -> None:
+        """批量记录同一指标的多个值"""
+        with self._lock:
+            self._get(metric_name).add_many(values)
+
+    def get(self, metric_name: str) -> Optional[MetricAggregate]:
+        return self._aggregates.get(metric_name)
+
+    def statistics(self, metric_name: str) -> Dict[str, float]:
+        """获取指标统计摘要"""
+        with self._lock:
+            aggregate = self._aggregates.get(metric_name)
+            return aggregate.summary() if aggregate else {}
+
+    def drain(self, metric_names: Optional[Iterable[str]] = None) -> Dict[str, MetricAggregate]:
+        """取出并清空聚合，用于按刷新周期发布
+
+        Args:
+            metric_names: 只取出这些指标，默认取出全部
+        """
+        with self._lock:
+            if metric_names is None:
+                aggregates, self._aggregates = self._aggregates, {}
+                return aggregates
+            return {name: self._aggregates.pop(name) for name in metric_names if name in self._aggregates}
+
+    def __contains__(self, metric_name: str) -> bool:
+        return metric_name in self._aggregates
+
+    def __len__(self) -> int:
+        return len(self._aggregates)
+
+
+def _datum_group_key(datum: Dict[str, Any]) -> Tuple:
+    """同名、同维度、同单位且在同一分钟内的数据点可以合并"""
+    dimensions = tuple(sorted((d['Name'], d['Value']) for d in datum.get('Dimensions', [])))
+    timestamp = datum.get('Timestamp')
+    minute = timestamp.replace(second=0, microsecond=0) if isinstance(timestamp, datetime) else None
+    return (datum['MetricName'], dimensions, datum.get('Unit'),
+            datum.get('StorageResolution'), minute)
+
+
+def compact_metric_data(metric_data: List[Dict[str, Any]],
+                        max_values: int = CLOUDWATCH_MAX_VALUES) -> List[Dict[str, Any]]:
+    """
+    将单值数据点压缩为 Values/Counts 数组
+
+    相同指标的重复值合并计数，CloudWatch 端的统计和分位数保持不变；
+    已经是 StatisticValues 或 Values 形式的数据点原样保留。
+
+    Args:
+        metric_data: PutMetricData 的 MetricData 列表
+        max_values: 单个数据点的最大不同值数量
+
+    Returns:
+        压缩后的数据点列表
+    """
+    groups: 'OrderedDict[Tuple, Tuple[Dict[str, Any], Dict[float, float]]]' = OrderedDict()
+    passthrough = []
+
+    for datum in metric_data:
+        if 'Value' not in datum:
+            passthrough.append(datum)
+            continue
+
+        key = _datum_group_key(datum)
+        if key not in groups:
+            groups[key] = (datum, {})
+        counts = groups[key][1]
+        counts[datum['Value']] = counts.get(datum['Value'], 0) + 1
+
+    compacted = []
+    for template, counts in groups.values():
+        if len(counts) == 1 and next(iter(counts.values())) == 1:
+            compacted.append(template)
+            continue
+
+        base = {k: v for k, v in template.items() if k != 'Value'}
+        items = list(counts.items())
+        for start in range(0, len(items), max_values):
+            chunk = items[start:start + max_values]
+            datum = dict(base)
+            datum['Values'] = [value for value, _ in chunk]
+            datum['Counts'] = [float(count) for _, count in chunk]
+            compacted.append(datum)
+
+    return compacted + passthrough
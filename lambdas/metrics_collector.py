@@ -19,14 +19,20 @@ import threading
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Union
 from enum import Enum
-from collections import defaultdict, deque
+from collections import defaultdict
 import boto3
 from botocore.exceptions import ClientError
-import statistics
 from functools import wraps
 
-# AWS 客户端
-cloudwatch = boto3.client('cloudwatch')
+try:
+    from .metrics_aggregation import AggregationEngine, compact_metric_data
+    from .metrics_emf import create_metrics_client
+except ImportError:
+    from metrics_aggregation import AggregationEngine, compact_metric_data
+    from metrics_emf import create_metrics_client
+
+# AWS 客户端（METRICS_BACKEND=emf 时指标写入标准输出）
+cloudwatch = create_metrics_client()
 kinesis = boto3.client('kinesis')
 
 # 环境配置
@@ -99,14 +105,10 @@ class MetricsCollector:
         # 自定义指标注册表
         self.custom_metrics = {}
 
-        # 指标聚合器
-        self.aggregators = defaultdict(lambda: {
-            'values': deque(maxlen=1000),
-            'count': 0,
-            'sum': 0,
-            'min': float('inf'),
-            'max': float('-inf')
-        })
+        # 指标聚合器（固定内存的统计集与分位数草图）
+        self.aggregators = AggregationEngine()
+        # 关键指标最近一个有数据的采集周期的统计
+        self._critical_snapshots: Dict[str, Dict[str, float]] = {}
 
         # 错误指标追踪
         self.error_metrics = defaultdict(lambda: defaultdict(int))
@@ -598,16 +600,20 @@ class MetricsCollector:
             'environment': self.environment
         }
 
-        # 从聚合器获取最新值
-        for metric_name in getattr(self, 'critical_metrics', ['error_rate', 'response_time']):
-            if metric_name in self.aggregators:
-                agg = self.aggregators[metric_name]
-                if agg['values']:
-                    metrics[metric_name] = {
-                        'latest': agg['values'][-1] if agg['values'] else 0,
-                        'avg': statistics.mean(agg['values']) if agg['values'] else 0,
-                        'p99': self._calculate_percentile(agg['values'], 99) if agg['values'] else 0
-                    }
+        # 每个采集周期取出关键指标的聚合，avg/p99只统计本周期的值；
+        # 本周期没有新值的指标沿用最近一个有数据周期的统计
+        critical_metrics = getattr(self, 'critical_metrics', ['error_rate', 'response_time'])
+        window = self.aggregators.drain(critical_metrics)
+        for metric_name in critical_metrics:
+            agg = window.get(metric_name)
+            if agg and agg.count:
+                self._critical_snapshots[metric_name] = {
+                    'latest': agg.last,
+                    'avg': agg.mean,
+                    'p99': agg.percentile(99)
+                }
+            if metric_name in self._critical_snapshots:
+                metrics[metric_name] = self._critical_snapshots[metric_name]
 
         return metrics
 
@@ -639,14 +645,15 @@ class MetricsCollector:
             return
 
         try:
-            # 分批发送
-            for i in range(0, len(self.metrics_buffer), BATCH_SIZE):
-                batch = self.metrics_buffer[i:i + BATCH_SIZE]
+            # 重复数据点预聚合为 Values/Counts 后分批发送
+            metric_data = compact_metric_data(self.metrics_buffer)
+            for i in range(0, len(metric_data), BATCH_SIZE):
+                batch = metric_data[i:i + BATCH_SIZE]
                 cloudwatch.put_metric_data(
                     Namespace=self.namespace,
                     MetricData=batch
                 )
-                self.stats['metrics_sent'] += len(batch)
+            self.stats['metrics_sent'] += len(self.metrics_buffer)
 
             self.metrics_buffer.clear()
             self.stats['batch_count'] += 1
@@ -655,22 +662,17 @@ class MetricsCollector:
             print(f"Failed to flush metrics buffer: {e}")
             self.stats['metrics_failed'] += len(self.metrics_buffer)
 
-    def _update_aggregator(self, metric_name: str, value: float):
-        """更新指标聚合器"""
-        agg = self.aggregators[metric_name]
-        agg['values'].append(value)
-        agg['count'] += 1
-        agg['sum'] += value
-        agg['min'] = min(agg['min'], value)
-        agg['max'] = max(agg['max'], value)
-
-    def _calculate_percentile(self, values: List[float], percentile: int) -> float:
-        """计算百分位数"""
-        if not values:
-            return 0
-        sorted_values = sorted(values)
-        index = int(len(sorted_values) * percentile / 100)
-        return sorted_values[min(index, len(sorted_values) - 1)]
+    def _update_aggregator(self, metric_name: str, value: Union[float, List[float]]):
+        """更新指标聚合器，传入列表时批量更新"""
+        if isinstance(value, (list, tuple)):
+            self.aggregators.record_many(metric_name, value)
+        else:
+            self.aggregators.record(metric_name, value)
+
+    def _calculate_percentile(self, metric_name: str, percentile: int) -> float:
+        """从分位数草图估计百分位数"""
+        agg = self.aggregators.get(metric_name)
+        return agg.percentile(percentile) if agg else 0
 
     def _update_dashboard_metrics(self, metrics: Dict[str, Any]) -> bool:
         """更新仪表板指标（模拟）"""
@@ -0,0 +1,245 @@
+"""
+CloudWatch嵌入式指标格式（EMF）输出
+==================================
+将指标以结构化JSON写入标准输出，由Lambda日志管道异步提取为CloudWatch指标，
+请求路径上不再同步调用 PutMetricData。
+
+功能:
+- 与 boto3 CloudWatch 客户端兼容的 put_metric_data 接口
+- 按命名空间、维度集和时间分组批量输出
+- 高精度指标（StorageResolution=1）
+- 通过 METRICS_BACKEND=emf 显式启用，默认仍直接调用 PutMetricData
+"""
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+import boto3
+
+# 后端选择：emf 输出到标准输出，api 直接调用 PutMetricData
+# 未设置时使用 api，已部署的函数不会在未配置的情况下改变指标发布方式
+METRICS_BACKEND_EMF = 'emf'
+METRICS_BACKEND_API = 'api'
+
+# EMF 限制：每条记录最多100个指标，每个指标最多100个值，每个维度集最多30个维度
+EMF_MAX_METRICS_PER_RECORD = 100
+EMF_MAX_VALUES_PER_METRIC = 100
+EMF_MAX_DIMENSIONS = 30
+
+
+def get_metrics_backend() -> str:
+    """获取当前环境的指标后端（只有 METRICS_BACKEND=emf 时使用EMF）"""
+    backend = os.environ.get('METRICS_BACKEND', '').strip().lower()
+    return METRICS_BACKEND_EMF if backend == METRICS_BACKEND_EMF else METRICS_BACKEND_API
+
+
+def _epoch_millis(timestamp: Optional[datetime]) -> int:
+    """转换为EMF要求的毫秒时间戳"""
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc)
+    elif timestamp.tzinfo is None:
+        # 仓库中的时间戳多由 utcnow() 生成，按UTC解释
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() * 1000)
+
+
+def _datum_values(datum: Dict[str, Any]) -> List[float]:
+    """将数据点展开为EMF值列表"""
+    if 'Value' in datum:
+        return [datum['Value']]
+
+    if 'Values' in datum:
+        counts = datum.get('Counts') or [1] * len(datum['Values'])
+        values = []
+        for value, count in zip(datum['Values'], counts):
+            values.extend([value] * int(count))
+        return values
+
+    stats = datum.get('StatisticValues')
+    if not stats:
+        return []
+
+    # EMF 不支持统计集：展开为最小值、最大值和SampleCount-2个均值填充，
+    # 计数、求和与极值都保持准确；超过单指标值上限的部分由 _group_records 拆分到多条记录
+    count = int(stats['SampleCount'])
+    if count <= 0:
+        return []
+    if count == 1:
+        return [stats['Sum']]
+    filler_count = count - 2
+    filler = (stats['Sum'] - stats['Minimum'] - stats['Maximum']) / filler_count if filler_count else 0
+    return [stats['Minimum'], stats['Maximum']] + [filler] * filler_count
+
+
+class EMFEmitter:
+    """
+    嵌入式指标格式输出器
+
+    提供与 CloudWatch 客户端相同的 put_metric_data 调用方式，
+    现有的批量发送代码无需修改即可切换后端。
+    """
+
+    def __init__(self, namespace: Optional[str] = None, stream: Optional[TextIO] = None,
+                 default_dimensions: Optional[Dict[str, str]] = None):
+        """
+        初始化EMF输出器
+
+        Args:
+            namespace: 未在调用中指定命名空间时使用的默认值
+            stream: 输出流，默认为标准输出
+            default_dimensions: 附加到每条记录的维度
+        """
+        self.namespace = namespace
+        self._stream = stream
+        self.default_dimensions = dict(default_dimensions or {})
+        self._lock = threading.Lock()
+        self.stats = {'records_written': 0, 'metrics_written': 0}
+
+    @property
+    def stream(self) -> TextIO:
+        # 延迟解析标准输出，兼容运行时对 sys.stdout 的替换
+        return self._stream or sys.stdout
+
+    def put_metric_data(self, Namespace: Optional[str] = None,
+                        MetricData: Optional[List[Dict[str, Any]]] = None,
+                        **kwargs) -> Dict[str, Any]:
+        """
+        以EMF格式输出一批指标
+
+        Args:
+            Namespace: CloudWatch命名空间
+            MetricData: PutMetricData 格式的数据点列表
+
+        Returns:
+            与 boto3 响应结构一致的空响应
+        """
+        namespace = Namespace or self.namespace
+        if not namespace:
+            raise ValueError("Namespace is required")
+
+        records = self.build_records(namespace, MetricData or [])
+        if records:
+            payload = ''.join(json.dumps(record, separators=(',', ':'), default=str) + '\n'
+                              for record in records)
+            with self._lock:
+                self.stream.write(payload)
+                self.stream.flush()
+                self.stats['records_written'] += len(records)
+                self.stats['metrics_written'] += len(MetricData)
+
+        return {'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def build_records(self, namespace: str, metric_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将数据点分组为EMF记录
+
+        维度集相同且时间戳落在同一存储精度区间内的数据点合并为一条记录，
+        同名指标的值合并为数组。
+
+        Args:
+            namespace: 命名空间
+            metric_data: 数据点列表
+
+        Returns:
+            EMF记录列表
+        """
+        groups: Dict[Tuple, Dict[str, Any]] = {}
+
+        for datum in metric_data:
+            values = _datum_values(datum)
+            if not values:
+                continue
+
+            dimensions = dict(self.default_dimensions)
+            for dimension in datum.get('Dimensions', []):
+                dimensions[dimension['Name']] = str(dimension['Value'])
+            if len(dimensions) > EMF_MAX_DIMENSIONS:
+                raise ValueError(f"EMF supports at most {EMF_MAX_DIMENSIONS} dimensions")
+
+            high_resolution = datum.get('StorageResolution') == 1
+            timestamp = _epoch_millis(datum.get('Timestamp'))
+            bucket = timestamp // (1000 if high_resolution else 60000)
+            key = (tuple(sorted(dimensions.items())), bucket)
+
+            group = groups.setdefault(key, {'dimensions': dimensions, 'timestamp': timestamp,
+                                            'metrics': {}})
+            group['timestamp'] = max(group['timestamp'], timestamp)
+            metric = group['metrics'].setdefault(datum['MetricName'], {
+                'unit': datum.get('Unit', 'None'),
+                'high_resolution': high_resolution,
+                'values': []
+            })
+            metric['values'].extend(values)
+
+        records = []
+        for group in groups.values():
+            records.extend(self._group_records(namespace, group))
+        return records
+
+    def _group_records(self, namespace: str, group: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """按EMF数量限制拆分一个分组"""
+        # 每个值块成为一个 (指标名, 元数据, 值) 条目
+        entries = []
+        for name, metric in group['metrics'].items():
+            values = metric['values']
+            for start in range(0, len(values), EMF_MAX_VALUES_PER_METRIC):
+                entries.append((name, metric, values[start:start + EMF_MAX_VALUES_PER_METRIC]))
+
+        records = []
+        pending: Dict[str, Any] = {}
+        definitions: List[Dict[str, Any]] = []
+
+        def flush():
+            if not definitions:
+                return
+            record = {
+                '_aws': {
+                    'Timestamp': group['timestamp'],
+                    'CloudWatchMetrics': [{
+                        'Namespace': namespace,
+                        'Dimensions': [sorted(group['dimensions'])],
+                        'Metrics': list(definitions)
+                    }]
+                }
+            }
+            record.update(group['dimensions'])
+            record.update(pending)
+            records.append(record)
+            pending.clear()
+            definitions.clear()
+
+        for name, metric, values in entries:
+            # 同一记录中指标名唯一，重复的值块放到下一条记录
+            if name in pending or len(definitions) >= EMF_MAX_METRICS_PER_RECORD:
+                flush()
+            definition = {'Name': name, 'Unit': metric['unit']}
+            if metric['high_resolution']:
+                definition['StorageResolution'] = 1
+            definitions.append(definition)
+            pending[name] = values[0] if len(values) == 1 else values
+        flush()
+
+        return records
+
+
+def create_metrics_client(client_factory: Optional[Callable[[], Any]] = None,
+                          namespace: Optional[str] = None) -> Any:
+    """
+    按当前环境创建指标客户端
+
+    Args:
+        client_factory: api 后端使用的客户端工厂，默认创建 boto3 CloudWatch 客户端
+        namespace: emf 后端的默认命名空间
+
+    Returns:
+        具有 put_metric_data 方法的客户端
+    """
+    if get_metrics_backend() == METRICS_BACKEND_EMF:
+        return EMFEmitter(namespace=namespace)
+    if client_factory is not None:
+        return client_factory()
+    return boto3.client('cloudwatch')
@@ -3,30 +3,69 @@ PPT编译器 - 将JSON内容编译为PPTX文件
 使用python-pptx库生成演示文稿
 """
 
+import pptx
 from pptx import Presentation
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.parts.slide import NotesSlidePart, SlidePart
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from PIL import Image, ImageDraw
 import boto3
+import copy
 import json
 import os
+import hashlib
 import tempfile
 import logging
-from typing import Dict, List
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 from io import BytesIO
+from urllib.parse import urlparse, unquote
 import urllib.request
 import urllib.error
+import posixpath
+import zipfile
+from lxml import etree
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# 增量编译清单版本，格式变化时递增以触发全量编译
+MANIFEST_VERSION = 1
 
-def create_pptx_from_content(content: Dict, include_notes: bool = True) -> bytes:
+# 影响渲染结果的幻灯片字段（speaker_notes仅在包含备注时参与哈希）
+RENDERED_SLIDE_FIELDS = ('title', 'bullet_points', 'image_url')
+
+# 图片预取配置
+IMAGE_FETCH_WORKERS = int(os.environ.get('IMAGE_FETCH_WORKERS', '8'))  # 并发下载线程数
+IMAGE_FETCH_TIMEOUT = float(os.environ.get('IMAGE_FETCH_TIMEOUT', '15'))  # 单张图片从开始下载起的等待上限（秒）
+
+# 图片规范化配置：按图片框实际尺寸和目标DPI缩放后再嵌入
+IMAGE_BOX_WIDTH = Inches(4)
+IMAGE_BOX_HEIGHT = Inches(3)
+IMAGE_TARGET_DPI = int(os.environ.get('IMAGE_TARGET_DPI', '150'))
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', '85'))
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def create_pptx_from_content(content: Dict, include_notes: bool = True,
+                             media_report: Optional[Dict] = None,
+                             template_name: str = 'default') -> bytes:
     """
     从JSON内容创建PPTX文件
 
     Args:
         content: 包含slides列表的字典
         include_notes: 是否包含演讲者备注
+        media_report: 传入字典时填充图片体积统计（见build_media_report）
+        template_name: 模板名称（见get_compiled_template）
 
     Returns:
         bytes: PPTX文件的字节数据
@@ -38,12 +77,21 @@ def create_pptx_from_content(content: Dict, include_notes: bool = True) -> bytes
     if not slides:
         raise ValueError("Content must contain at least one slide")
 
-    # 创建新的演示文稿
-    prs = Presentation()
+    # 从预编译模板创建演示文稿
+    template = get_compiled_template(template_name)
+    prs = template.new_presentation()
+    stamper = template.stamper(prs)
+
+    # 组装幻灯片前并发预取并规范化所有图片
+    image_urls = [slide_data.get('image_url') for slide_data in slides]
+    original_sizes = {}
+    images = prefetch_images(image_urls, original_sizes=original_sizes)
+    if media_report is not None:
+        media_report.update(build_media_report(image_urls, images, original_sizes))
 
     # 为每个幻灯片添加内容
     for slide_data in slides:
-        add_content_slide(prs, slide_data, include_notes)
+        stamper.add_slide(slide_data, include_notes, image_data=images.get(slide_data.get('image_url')))
 
     # 将演示文稿保存到字节流
     pptx_bytes = BytesIO()
@@ -53,7 +101,8 @@ def create_pptx_from_content(content: Dict, include_notes: bool = True) -> bytes
     return pptx_bytes.getvalue()
 
 
-def add_content_slide(prs: Presentation, slide_data: Dict, include_notes: bool = True):
+def add_content_slide(prs: Presentation, slide_data: Dict, include_notes: bool = True,
+                      image_data: Optional[bytes] = None):
     """
     添加内容页到演示文稿
 
@@ -61,6 +110,10 @@ def add_content_slide(prs: Presentation, slide_data: Dict, include_notes: bool =
         prs: 演示文稿对象
         slide_data: 幻灯片数据，包含title, bullet_points和image_url
         include_notes: 是否包含演讲者备注
+        image_data: 已获取的图片数据（可选），提供时不再下载image_url
+
+    Returns:
+        新添加的幻灯片
     """
     # 检查是否有图片URL
     has_image = 'image_url' in slide_data and slide_data['image_url']
@@ -102,98 +155,7 @@ def add_content_slide(prs: Presentation, slide_data: Dict, include_notes: bool =
                 p.space_after = Pt(12)
 
         # 右侧添加图片
-        try:
-            # 处理图片URL
-            image_url = slide_data['image_url']
-            if image_url.startswith('http'):
-                # 下载HTTP/HTTPS图片
-                try:
-                    with urllib.request.urlopen(image_url, timeout=10) as response:
-                        if response.status == 200:
-                            image_stream = BytesIO(response.read())
-                            left = Inches(5.5)
-                            top = Inches(1.8)
-                            width = Inches(4)
-                            height = Inches(3)
-                            slide.shapes.add_picture(image_stream, left, top, width, height)
-                            logger.info(f"成功添加图片到幻灯片")
-                except (urllib.error.URLError, urllib.error.HTTPError) as e:
-                    logger.warning(f"下载图片失败: {e}")
-            elif image_url.startswith('s3://'):
-                # 处理S3 URL格式: s3://bucket-name/key/path
-                logger.info(f"处理S3 URL: {image_url}")
-                s3 = boto3.client('s3')
-
-                # 解析S3 URL
-                url_parts = image_url.replace('s3://', '').split('/', 1)
-                if len(url_parts) == 2:
-                    bucket_name = url_parts[0]
-                    key = url_parts[1]
-
-                    logger.info(f"从S3获取图片 - Bucket: {bucket_name}, Key: {key}")
-
-                    try:
-                        obj = s3.get_object(Bucket=bucket_name, Key=key)
-                        image_stream = BytesIO(obj['Body'].read())
-                        left = Inches(5.5)
-                        top = Inches(1.8)
-                        width = Inches(4)
-                        height = Inches(3)
-                        slide.shapes.add_picture(image_stream, left, top, width, height)
-                        logger.info(f"成功从S3添加图片到幻灯片: {key}")
-                    except Exception as e:
-                        logger.error(f"从S3获取图片失败: {str(e)}")
-                        raise
-                else:
-                    logger.warning(f"无法解析S3 URL: {image_url}")
-                    raise ValueError(f"无效的S3 URL格式: {image_url}")
-            else:
-                # 假设是S3 HTTPS URL
-                # 从S3获取图片
-                s3 = boto3.client('s3')
-                # 从完整URL解析bucket和key
-                if 's3.amazonaws.com' in image_url:
-                    # 移除协议前缀
-                    url_without_protocol = image_url.replace('https://', '').replace('http://', '')
-                    parts = url_without_protocol.split('/')
-                    domain_part = parts[0]
-
-                    # 处理不同的S3 URL格式
-                    if '.s3.' in domain_part:
-                        # 格式: bucket-name.s3.region.amazonaws.com 或 bucket-name.s3.amazonaws.com
-                        bucket_with_suffix = domain_part.split('.s3.')[0]
-
-                        # 移除AWS账号ID后缀（如果存在）
-                        # AWS账号ID通常是12位数字，但为了兼容性检查10位以上的数字
-                        if '-' in bucket_with_suffix:
-                            parts_bucket = bucket_with_suffix.split('-')
-                            if parts_bucket[-1].isdigit() and len(parts_bucket[-1]) >= 10:
-                                bucket_name = '-'.join(parts_bucket[:-1])
-                            else:
-                                bucket_name = bucket_with_suffix
-                        else:
-                            bucket_name = bucket_with_suffix
-                    else:
-                        # 回退到原始逻辑
-                        bucket_name = domain_part.split('.')[0]
-
-                    key = '/'.join(parts[1:])
-                else:
-                    # 可能是相对路径，跳过图片
-                    logger.warning(f"无法解析图片URL: {image_url}")
-                    raise ValueError("无法解析图片URL")
-
-                obj = s3.get_object(Bucket=bucket_name, Key=key)
-                image_stream = BytesIO(obj['Body'].read())
-                left = Inches(5.5)
-                top = Inches(1.8)
-                width = Inches(4)
-                height = Inches(3)
-                slide.shapes.add_picture(image_stream, left, top, width, height)
-                logger.info(f"成功从S3添加图片到幻灯片")
-        except Exception as e:
-            logger.warning(f"添加图片失败: {str(e)}")
-            # 即使图片添加失败，也继续处理
+        _add_slide_image(slide, slide_data, image_data)
     else:
         # 没有图片，使用标准布局
         slide_layout = prs.slide_layouts[1]  # 布局1通常是标题+内容
@@ -228,6 +190,888 @@ def add_content_slide(prs: Presentation, slide_data: Dict, include_notes: bool =
         text_frame = notes_slide.notes_text_frame
         text_frame.text = slide_data['speaker_notes']
 
+    return slide
+
+
+def _add_slide_image(slide, slide_data: Dict, image_data: Optional[bytes]) -> None:
+    """在幻灯片右侧添加图片，失败时只记录警告"""
+    try:
+        if image_data is not None:
+            image_stream = BytesIO(image_data)
+        else:
+            image_stream = fetch_image(slide_data['image_url'])
+            if image_stream is not None:
+                image_stream = BytesIO(normalize_image(image_stream.getvalue()))
+        if image_stream is not None:
+            left = Inches(5.5)
+            top = Inches(1.8)
+            slide.shapes.add_picture(image_stream, left, top, IMAGE_BOX_WIDTH, IMAGE_BOX_HEIGHT)
+            logger.info(f"成功添加图片到幻灯片")
+    except Exception as e:
+        logger.warning(f"添加图片失败: {str(e)}")
+        # 即使图片添加失败，也继续处理
+
+
+# 模板目录：default 使用 python-pptx 内置母版，其余模板从该目录加载 {名称}.pptx
+PPT_TEMPLATE_DIR = os.environ.get(
+    'PPT_TEMPLATE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+)
+_DEFAULT_MASTER_PATH = os.path.join(os.path.dirname(pptx.__file__), 'templates', 'default.pptx')
+
+# 原型渲染时使用的占位文本，编译时按标记定位可替换的段落
+_PROTOTYPE_TEXT = {
+    'title': '{{title}}',
+    'bullets': ('{{bullet:0}}', '{{bullet:1}}'),
+    'notes': '{{notes}}',
+}
+
+_SLIDE_PARTNAME = '/ppt/slides/slide%d.xml'
+_NOTES_SLIDE_PARTNAME = '/ppt/notesSlides/notesSlide%d.xml'
+
+
+class _ParagraphSlot:
+    """原型中一个文本框的段落插槽：首段和后续段落各有一个预设样式的段落原型"""
+
+    def __init__(self, path: Tuple[int, ...], first, rest):
+        self.path = path
+        self.first = first
+        self.rest = rest
+
+    def fill(self, root, texts: List[str]) -> None:
+        """按文本列表克隆段落原型并追加到插槽所在的文本框"""
+        tx_body = root
+        for index in self.path:
+            tx_body = tx_body[index]
+        for i, text in enumerate(texts):
+            tx_body.append(_stamp_paragraph(self.first if i == 0 else self.rest, text))
+
+
+def _stamp_paragraph(prototype: Tuple, text: str):
+    """克隆段落原型并替换文本，空文本与 python-pptx 一样不保留文本段"""
+    paragraph, prefix, suffix = prototype
+    paragraph = copy.deepcopy(paragraph)
+    run = paragraph.find(_TAG_RUN)
+    if text or prefix or suffix:
+        run.find(_TAG_TEXT).text = f"{prefix}{text}{suffix}"
+    else:
+        paragraph.remove(run)
+    return paragraph
+
+
+def _capture_slots(root, markers: Dict[str, Tuple[str, ...]]) -> Dict[str, _ParagraphSlot]:
+    """
+    从渲染好的原型中取出带标记的段落作为段落原型
+
+    标记段落从原型中移除，剩余部分作为每页克隆的骨架。
+    """
+    slots = {}
+    for name, texts in markers.items():
+        prototypes = []
+        tx_body = None
+        for marker in texts:
+            for t in root.iter(_TAG_TEXT):
+                if t.text and marker in t.text:
+                    break
+            else:
+                raise ValueError(f"Prototype marker '{marker}' not found")
+            run = t.getparent()
+            paragraph = run.getparent()
+            tx_body = paragraph.getparent()
+            prefix, suffix = t.text.split(marker, 1)
+            if len(paragraph.findall(_TAG_RUN)) != 1:
+                raise ValueError(f"Unexpected prototype paragraph for '{marker}'")
+            prototypes.append((paragraph, prefix, suffix))
+
+        for paragraph, _, _ in prototypes:
+            tx_body.remove(paragraph)
+        if len(tx_body.findall(_TAG_PARAGRAPH)):
+            raise ValueError(f"Unexpected paragraphs left in prototype slot '{name}'")
+
+        path = []
+        node = tx_body
+        while node is not root:
+            parent = node.getparent()
+            path.append(parent.index(node))
+            node = parent
+        slots[name] = _ParagraphSlot(tuple(reversed(path)), prototypes[0], prototypes[-1])
+    return slots
+
+
+class CompiledTemplate:
+    """
+    预编译的幻灯片模板
+
+    每个容器内每个模板只加载一次母版，并用 add_content_slide 渲染一次示例页，
+    缓存两种版式（标题+内容、图文）的幻灯片骨架、段落原型和备注页原型。
+    之后每页幻灯片通过克隆骨架和段落原型并替换文本生成，输出与逐页调用
+    add_content_slide 完全一致。
+    """
+
+    TEXT_LAYOUT = 1
+    IMAGE_LAYOUT = 5
+
+    def __init__(self, name: str, master_bytes: bytes):
+        """
+        初始化并编译模板
+
+        Args:
+            name: 模板名称
+            master_bytes: 母版PPTX字节数据
+        """
+        self.name = name
+        self.master_bytes = master_bytes
+
+        prs = Presentation(BytesIO(master_bytes))
+        sample = {
+            'title': _PROTOTYPE_TEXT['title'],
+            'bullet_points': list(_PROTOTYPE_TEXT['bullets']),
+            'speaker_notes': _PROTOTYPE_TEXT['notes'],
+        }
+        text_slide = add_content_slide(prs, sample, include_notes=True)
+        image_slide = add_content_slide(prs, {**sample, 'image_url': 'prototype'}, include_notes=False,
+                                        image_data=placeholder_image())
+
+        slide_markers = {'title': (_PROTOTYPE_TEXT['title'],), 'bullets': _PROTOTYPE_TEXT['bullets']}
+        self.text_slide = copy.deepcopy(text_slide._element)
+        self.text_slots = _capture_slots(self.text_slide, slide_markers)
+
+        # 图片在每页单独添加，骨架中只保留文本框
+        self.image_slide = copy.deepcopy(image_slide._element)
+        sp_tree = self.image_slide.find(f'.//{_TAG_SP_TREE}')
+        for picture in sp_tree.findall(f'{{{_NS_P}}}pic'):
+            sp_tree.remove(picture)
+        self.image_slots = _capture_slots(self.image_slide, slide_markers)
+
+        self.notes_slide = copy.deepcopy(text_slide.notes_slide._element)
+        self.notes_slots = _capture_slots(self.notes_slide, {'notes': (_PROTOTYPE_TEXT['notes'],)})
+
+    def new_presentation(self) -> Presentation:
+        """从缓存的母版字节创建空演示文稿"""
+        return Presentation(BytesIO(self.master_bytes))
+
+    def stamper(self, prs: Presentation) -> 'SlideStamper':
+        """创建向演示文稿追加幻灯片的编译器"""
+        return SlideStamper(self, prs)
+
+
+def _is_plain_text(value) -> bool:
+    """字符串不含需要 python-pptx 特殊处理的控制字符（换行、垂直制表等）"""
+    return isinstance(value, str) and all(ch >= ' ' for ch in value)
+
+
+class SlideStamper:
+    """按预编译模板向一个演示文稿追加幻灯片"""
+
+    def __init__(self, template: CompiledTemplate, prs: Presentation):
+        self.template = template
+        self.prs = prs
+        self._package = prs.part.package
+        self._text_layout = prs.slide_layouts[CompiledTemplate.TEXT_LAYOUT]
+        self._image_layout = prs.slide_layouts[CompiledTemplate.IMAGE_LAYOUT]
+        self._notes_master_part = None
+
+        # 部件名只扫描一次，之后按计数分配，避免每页遍历整个包
+        self._used_partnames = {str(part.partname) for part in self._package.iter_parts()}
+        self._partname_counters = {}
+
+        self.stats = {'stamped': 0, 'fallback': 0}
+
+    def _next_partname(self, template: str) -> PackURI:
+        n = self._partname_counters.get(template, 1)
+        while template % n in self._used_partnames:
+            n += 1
+        self._partname_counters[template] = n + 1
+        self._used_partnames.add(template % n)
+        return PackURI(template % n)
+
+    @property
+    def notes_master_part(self):
+        # 与 python-pptx 一致，只在第一页备注时创建备注母版
+        if self._notes_master_part is None:
+            self._notes_master_part = self.prs.part.notes_master_part
+        return self._notes_master_part
+
+    def add_slide(self, slide_data: Dict, include_notes: bool = True,
+                  image_data: Optional[bytes] = None):
+        """
+        添加内容页，参数与 add_content_slide 相同
+
+        缺少标题或要点、要点为空、文本含控制字符等原型未覆盖的情况
+        回退到 add_content_slide。
+
+        Returns:
+            新添加的幻灯片
+        """
+        title = slide_data.get('title')
+        bullet_points = slide_data.get('bullet_points')
+        with_notes = include_notes and 'speaker_notes' in slide_data
+        compilable = (
+            _is_plain_text(title)
+            and isinstance(bullet_points, list) and bullet_points
+            and all(_is_plain_text(point) for point in bullet_points)
+            and (not with_notes or _is_plain_text(slide_data['speaker_notes']))
+        )
+        if not compilable:
+            self.stats['fallback'] += 1
+            slide = add_content_slide(self.prs, slide_data, include_notes, image_data=image_data)
+            self._used_partnames.update(str(part.partname) for part in self._slide_parts(slide))
+            return slide
+
+        has_image = 'image_url' in slide_data and slide_data['image_url']
+        if has_image:
+            skeleton, slots, layout = self.template.image_slide, self.template.image_slots, self._image_layout
+        else:
+            skeleton, slots, layout = self.template.text_slide, self.template.text_slots, self._text_layout
+
+        element = copy.deepcopy(skeleton)
+        slots['title'].fill(element, [title])
+        slots['bullets'].fill(element, bullet_points)
+
+        slide_part = SlidePart(self._next_partname(_SLIDE_PARTNAME), CT.PML_SLIDE, self._package, element)
+        slide_part.relate_to(layout.part, RT.SLIDE_LAYOUT)
+        self.prs.slides._sldIdLst.add_sldId(self.prs.part.relate_to(slide_part, RT.SLIDE))
+        slide = slide_part.slide
+
+        if has_image:
+            _add_slide_image(slide, slide_data, image_data)
+
+        if with_notes:
+            notes_element = copy.deepcopy(self.template.notes_slide)
+            self.template.notes_slots['notes'].fill(notes_element, [slide_data['speaker_notes']])
+            notes_part = NotesSlidePart(self._next_partname(_NOTES_SLIDE_PARTNAME), CT.PML_NOTES_SLIDE,
+                                        self._package, notes_element)
+            notes_part.relate_to(self.notes_master_part, RT.NOTES_MASTER)
+            notes_part.relate_to(slide_part, RT.SLIDE)
+            slide_part.relate_to(notes_part, RT.NOTES_SLIDE)
+
+        self.stats['stamped'] += 1
+        return slide
+
+    @staticmethod
+    def _slide_parts(slide):
+        yield slide.part
+        if slide.has_notes_slide:
+            yield slide.notes_slide.part
+
+
+_compiled_templates: Dict[str, CompiledTemplate] = {}
+_compiled_templates_lock = threading.Lock()
+
+
+def _template_master_path(template_name: str) -> str:
+    if template_name == 'default':
+        return _DEFAULT_MASTER_PATH
+    path = os.path.join(PPT_TEMPLATE_DIR, f"{template_name}.pptx")
+    if os.path.basename(template_name) != template_name or not os.path.isfile(path):
+        raise FileNotFoundError(f"Template '{template_name}' not found")
+    return path
+
+
+def get_compiled_template(template_name: str = 'default') -> CompiledTemplate:
+    """
+    获取预编译模板，每个容器内每个模板只编译一次
+
+    Args:
+        template_name: 模板名称，default 为 python-pptx 内置母版，
+            其余名称对应 PPT_TEMPLATE_DIR 下的 {名称}.pptx
+
+    Returns:
+        CompiledTemplate: 预编译模板
+
+    Raises:
+        FileNotFoundError: 模板不存在
+    """
+    template = _compiled_templates.get(template_name)
+    if template is not None:
+        return template
+
+    with _compiled_templates_lock:
+        template = _compiled_templates.get(template_name)
+        if template is None:
+            with open(_template_master_path(template_name), 'rb') as f:
+                template = CompiledTemplate(template_name, f.read())
+            _compiled_templates[template_name] = template
+    return template
+
+
+def _get_s3_client():
+    """获取模块内共享的S3客户端（boto3客户端线程安全）"""
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            _s3_client = boto3.client('s3')
+        return _s3_client
+
+
+def parse_s3_url(image_url: str) -> Optional[Tuple[str, str]]:
+    """
+    解析S3图片地址
+
+    支持s3://bucket/key、虚拟主机风格（bucket.s3.region.amazonaws.com/key）
+    和路径风格（s3.region.amazonaws.com/bucket/key）的HTTPS地址，忽略预签名参数。
+
+    Returns:
+        (bucket, key)，不是S3地址时返回None
+
+    Raises:
+        ValueError: s3://地址缺少对象键
+    """
+    if image_url.startswith('s3://'):
+        url_parts = image_url.replace('s3://', '').split('/', 1)
+        if len(url_parts) != 2 or not url_parts[1]:
+            logger.warning(f"无法解析S3 URL: {image_url}")
+            raise ValueError(f"无效的S3 URL格式: {image_url}")
+        return url_parts[0], url_parts[1]
+
+    if 's3.amazonaws.com' not in image_url and '.amazonaws.com' not in image_url:
+        return None
+
+    parsed = urlparse(image_url if '://' in image_url else f"https://{image_url}")
+    host = parsed.hostname or ''
+    path = unquote(parsed.path.lstrip('/'))
+    if not host.endswith('.amazonaws.com') or not path:
+        return None
+
+    if host.startswith('s3.') or host.startswith('s3-'):
+        # 路径风格
+        bucket, _, key = path.partition('/')
+        return (bucket, key) if key else None
+    if '.s3.' in host or '.s3-' in host:
+        # 虚拟主机风格
+        return host.split('.s3', 1)[0], path
+    return None
+
+
+def fetch_image(image_url: str) -> Optional[BytesIO]:
+    """
+    下载幻灯片图片
+
+    S3地址（包括预签名HTTPS地址）直接通过S3 API读取，失败时对HTTP地址回退到HTTP下载。
+
+    Args:
+        image_url: HTTP(S)、s3://或S3 HTTPS格式的图片地址
+
+    Returns:
+        图片数据流；HTTP下载失败时返回None
+
+    Raises:
+        ValueError: 无法解析的图片URL
+    """
+    s3_location = parse_s3_url(image_url)
+    if s3_location:
+        bucket_name, key = s3_location
+        logger.info(f"从S3获取图片 - Bucket: {bucket_name}, Key: {key}")
+        try:
+            obj = _get_s3_client().get_object(Bucket=bucket_name, Key=key)
+            return BytesIO(obj['Body'].read())
+        except Exception as e:
+            if not image_url.startswith('http'):
+                logger.error(f"从S3获取图片失败: {str(e)}")
+                raise
+            logger.warning(f"直接读取S3失败，改用HTTP下载: {str(e)}")
+
+    if image_url.startswith('http'):
+        # 下载HTTP/HTTPS图片
+        try:
+            with urllib.request.urlopen(image_url, timeout=10) as response:
+                if response.status == 200:
+                    return BytesIO(response.read())
+        except (urllib.error.URLError, urllib.error.HTTPError) as e:
+            logger.warning(f"下载图片失败: {e}")
+        return None
+
+    # 可能是相对路径，跳过图片
+    logger.warning(f"无法解析图片URL: {image_url}")
+    raise ValueError("无法解析图片URL")
+
+
+def _fetch_and_decode(image_url: str) -> Optional[Tuple[bytes, int]]:
+    """下载、校验并规范化图片，返回(嵌入数据, 原始字节数)，失败返回None"""
+    try:
+        stream = fetch_image(image_url)
+        if stream is None:
+            return None
+        data = stream.getvalue()
+        # 提前校验图片可解码，避免组装幻灯片时失败
+        Image.open(BytesIO(data)).verify()
+        return normalize_image(data), len(data)
+    except Exception as e:
+        logger.warning(f"获取图片失败 {image_url}: {str(e)}")
+        return None
+
+
+def _has_transparency(image: Image.Image) -> bool:
+    """图片是否包含实际使用的透明通道"""
+    if image.mode == 'P' and 'transparency' in image.info:
+        image = image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA', 'PA'):
+        return image.getchannel('A').getextrema()[0] < 255
+    return False
+
+
+def normalize_image(data: bytes, box_width=IMAGE_BOX_WIDTH, box_height=IMAGE_BOX_HEIGHT,
+                    dpi: int = IMAGE_TARGET_DPI) -> bytes:
+    """
+    按图片框尺寸规范化图片
+
+    缩放到刚好覆盖图片框（box尺寸 x dpi）的分辨率；带透明通道或颜色数不超过256的
+    图形使用PNG，照片类内容使用JPEG。PowerPoint不支持嵌入WebP，因此不使用WebP。
+    结果不比原图小时返回原图。
+
+    Args:
+        data: 原始图片数据
+        box_width: 图片框宽度（EMU长度）
+        box_height: 图片框高度（EMU长度）
+        dpi: 目标DPI
+
+    Returns:
+        bytes: 用于嵌入的图片数据；无法解码时原样返回
+    """
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+    except Exception as e:
+        logger.warning(f"图片无法解码，跳过规范化: {str(e)}")
+        return data
+
+    target_width = max(1, round(box_width.inches * dpi))
+    target_height = max(1, round(box_height.inches * dpi))
+    scale = max(target_width / image.width, target_height / image.height)
+    if scale < 1:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+
+    buffer = BytesIO()
+    if _has_transparency(image):
+        image.convert('RGBA').save(buffer, format='PNG', optimize=True)
+    else:
+        image = image.convert('RGB')
+        if image.getcolors(maxcolors=256) is not None:
+            # 平面图形（图表、占位图等）用PNG无损保存
+            image.save(buffer, format='PNG', optimize=True)
+        else:
+            image.save(buffer, format='JPEG', quality=IMAGE_JPEG_QUALITY, optimize=True)
+
+    normalized = buffer.getvalue()
+    return normalized if len(normalized) < len(data) else data
+
+
+def build_media_report(image_urls: Iterable[Optional[str]], images: Dict[str, bytes],
+                       original_sizes: Dict[str, int]) -> Dict:
+    """
+    统计嵌入图片的体积
+
+    相同内容的图片在PPTX包中只保存一份（python-pptx按SHA1复用图片部件），
+    因此按内容哈希去重后计算嵌入字节数。
+
+    Args:
+        image_urls: 各幻灯片引用的图片地址
+        images: 图片地址到嵌入数据的映射
+        original_sizes: 图片地址到原始字节数的映射
+
+    Returns:
+        Dict: images（去重后图片数）、references（引用次数）、deduplicated、
+              original_bytes、embedded_bytes、bytes_saved
+    """
+    references = [url for url in image_urls if url and url in images]
+    unique_media = {}
+    for url in dict.fromkeys(references):
+        digest = hashlib.sha1(images[url]).hexdigest()
+        unique_media.setdefault(digest, (len(images[url]), original_sizes.get(url, len(images[url]))))
+
+    original_bytes = sum(original for _, original in unique_media.values())
+    embedded_bytes = sum(embedded for embedded, _ in unique_media.values())
+    return {
+        'images': len(unique_media),
+        'references': len(references),
+        'deduplicated': len(references) - len(unique_media),
+        'original_bytes': original_bytes,
+        'embedded_bytes': embedded_bytes,
+        'bytes_saved': original_bytes - embedded_bytes
+    }
+
+
+@lru_cache(maxsize=1)
+def placeholder_image() -> bytes:
+    """图片无法获取时使用的占位图（PNG）"""
+    image = Image.new('RGB', (400, 300), (240, 240, 245))
+    ImageDraw.Draw(image).rectangle([0, 0, 399, 299], outline=(200, 200, 210), width=4)
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def prefetch_images(image_urls: Iterable[Optional[str]],
+                    max_workers: int = IMAGE_FETCH_WORKERS,
+                    timeout: float = IMAGE_FETCH_TIMEOUT,
+                    original_sizes: Optional[Dict[str, int]] = None) -> Dict[str, bytes]:
+    """
+    并发预取幻灯片图片
+
+    相同地址只下载一次，下载线程内完成规范化（见normalize_image）；下载失败或
+    开始下载后timeout内未完成的图片使用占位图，不阻塞整个演示文稿的编译。
+    排队等待线程的图片从开始下载时才计时；整体等待不超过timeout乘以排队批次数。
+    相同内容的图片在PPTX包中只保存一份。
+
+    Args:
+        image_urls: 图片地址（None和空值会被忽略）
+        max_workers: 并发下载线程数
+        timeout: 单张图片从开始下载起的等待上限（秒）
+        original_sizes: 传入字典时记录每个地址的原始字节数
+
+    Returns:
+        Dict[str, bytes]: 图片地址到图片数据的映射
+    """
+    unique_urls = list(dict.fromkeys(url for url in image_urls if url))
+    if not unique_urls:
+        return {}
+
+    workers = max(1, min(max_workers, len(unique_urls)))
+    started: Dict[str, float] = {}
+
+    def fetch(url: str) -> Optional[Tuple[bytes, int]]:
+        started[url] = time.monotonic()
+        return _fetch_and_decode(url)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-prefetch")
+    timed_out = set()
+    try:
+        futures = {executor.submit(fetch, url): url for url in unique_urls}
+        pending = set(futures)
+        batches = (len(unique_urls) + workers - 1) // workers
+        overall_deadline = time.monotonic() + timeout * batches
+        while pending:
+            now = time.monotonic()
+            if now >= overall_deadline:
+                timed_out.update(futures[future] for future in pending)
+                break
+            # 尚未开始下载的图片最早在now + timeout超时
+            deadlines = {future: started.get(futures[future], now) + timeout for future in pending}
+            expired = [future for future, deadline in deadlines.items() if deadline <= now]
+            for future in expired:
+                pending.discard(future)
+                timed_out.add(futures[future])
+            if not pending:
+                break
+            wake_at = min(min(deadlines[future] for future in pending), overall_deadline)
+            _, pending = wait(pending, timeout=wake_at - now, return_when=FIRST_COMPLETED)
+    finally:
+        # 慢请求在后台结束，不再等待
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    images = {}
+    for future, url in futures.items():
+        result = None
+        if url not in timed_out and future.done() and not future.cancelled():
+            result = future.result()
+        if result is None:
+            if url in timed_out:
+                logger.warning(f"图片预取超时，使用占位图: {url}")
+            result = (placeholder_image(), len(placeholder_image()))
+        images[url], original_size = result
+        if original_sizes is not None:
+            original_sizes[url] = original_size
+
+    logger.info(f"预取图片 {len(unique_urls)} 张，其中 {len(timed_out)} 张超时")
+    return images
+
+
+def compute_slide_hash(slide_data: Dict, include_notes: bool = True) -> str:
+    """
+    计算幻灯片的内容哈希（只包含影响渲染的字段）
+
+    Args:
+        slide_data: 幻灯片数据
+        include_notes: 是否包含演讲者备注
+
+    Returns:
+        str: SHA-256十六进制摘要
+    """
+    fields = {field: slide_data.get(field) for field in RENDERED_SLIDE_FIELDS}
+    if include_notes:
+        fields['speaker_notes'] = slide_data.get('speaker_notes')
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def build_slide_manifest(content: Dict, include_notes: bool = True) -> Dict:
+    """
+    生成增量编译清单：每页的内容哈希和图片地址
+
+    Args:
+        content: 包含slides列表的字典
+        include_notes: 是否包含演讲者备注
+
+    Returns:
+        Dict: 清单
+    """
+    return {
+        'version': MANIFEST_VERSION,
+        'include_notes': include_notes,
+        'slides': [
+            {
+                'hash': compute_slide_hash(slide_data, include_notes),
+                'image_url': slide_data.get('image_url')
+            }
+            for slide_data in content['slides']
+        ]
+    }
+
+
+def update_pptx_incremental(previous_pptx: bytes, previous_manifest: Optional[Dict], content: Dict,
+                            include_notes: bool = True,
+                            media_report: Optional[Dict] = None) -> Tuple[bytes, Dict, List[int]]:
+    """
+    基于上次编译结果增量更新PPTX，只重建内容哈希变化的幻灯片
+
+    未变化的幻灯片部件和媒体原样保留；图片地址未变的幻灯片复用已嵌入的图片，
+    其余图片在重建前并发预取。清单不可用或与文件不一致时回退到全量编译。
+
+    Args:
+        previous_pptx: 上次编译的PPTX字节数据
+        previous_manifest: 上次编译的清单
+        content: 新的幻灯片内容
+        include_notes: 是否包含演讲者备注
+        media_report: 传入字典时填充本次新预取图片的体积统计
+
+    Returns:
+        (PPTX字节数据, 新清单, 重建的幻灯片编号列表)
+    """
+    if not content or 'slides' not in content:
+        raise ValueError("Content must contain 'slides' key")
+    if not content['slides']:
+        raise ValueError("Content must contain at least one slide")
+
+    manifest = build_slide_manifest(content, include_notes)
+    all_slides = list(range(1, len(content['slides']) + 1))
+
+    if not previous_pptx or not _manifest_compatible(previous_manifest, include_notes):
+        return create_pptx_from_content(content, include_notes, media_report), manifest, all_slides
+
+    try:
+        prs = Presentation(BytesIO(previous_pptx))
+    except Exception as e:
+        logger.warning(f"无法打开上次编译的PPTX，全量编译: {e}")
+        return create_pptx_from_content(content, include_notes, media_report), manifest, all_slides
+
+    old_entries = previous_manifest['slides']
+    if len(prs.slides) != len(old_entries):
+        logger.warning("清单与PPTX页数不一致，全量编译")
+        return create_pptx_from_content(content, include_notes, media_report), manifest, all_slides
+
+    new_entries = manifest['slides']
+
+    # 先确定需要重建的幻灯片及可复用的图片，再统一预取其余图片
+    plan = []
+    for index, slide_data in enumerate(content['slides']):
+        if index >= len(old_entries):
+            plan.append((index, None))
+            continue
+
+        old_entry = old_entries[index]
+        if old_entry.get('hash') == new_entries[index]['hash']:
+            continue
+
+        # 图片地址未变时复用已嵌入的图片
+        image_data = None
+        if slide_data.get('image_url') and slide_data.get('image_url') == old_entry.get('image_url'):
+            image_data = _extract_picture_blob(prs.slides[index])
+        plan.append((index, image_data))
+
+    fetch_urls = [content['slides'][index].get('image_url') for index, image_data in plan if image_data is None]
+    original_sizes = {}
+    images = prefetch_images(fetch_urls, original_sizes=original_sizes)
+    if media_report is not None:
+        media_report.update(build_media_report(fetch_urls, images, original_sizes))
+
+    rebuilt = []
+    for index, image_data in plan:
+        slide_data = content['slides'][index]
+        if image_data is None:
+            image_data = images.get(slide_data.get('image_url'))
+
+        if index >= len(old_entries):
+            add_content_slide(prs, slide_data, include_notes, image_data=image_data)
+        else:
+            _replace_slide(prs, index, slide_data, include_notes, image_data)
+        rebuilt.append(index + 1)
+
+    # 删除多余的幻灯片
+    for index in range(len(old_entries) - 1, len(content['slides']) - 1, -1):
+        _delete_slide(prs, index)
+
+    pptx_bytes = BytesIO()
+    prs.save(pptx_bytes)
+    return pptx_bytes.getvalue(), manifest, rebuilt
+
+
+def _manifest_compatible(manifest: Optional[Dict], include_notes: bool) -> bool:
+    """清单可用于增量编译"""
+    return (
+        isinstance(manifest, dict)
+        and manifest.get('version') == MANIFEST_VERSION
+        and manifest.get('include_notes') == include_notes
+        and isinstance(manifest.get('slides'), list)
+    )
+
+
+def _extract_picture_blob(slide) -> Optional[bytes]:
+    """获取幻灯片中第一张图片的数据"""
+    for shape in slide.shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+            return shape.image.blob
+    return None
+
+
+def _replace_slide(prs: Presentation, index: int, slide_data: Dict, include_notes: bool,
+                   image_data: Optional[bytes]) -> None:
+    """用新内容重建指定位置的幻灯片，新幻灯片沿用旧幻灯片的部件名"""
+    old_partname = prs.slides[index].part.partname
+    new_slide = add_content_slide(prs, slide_data, include_notes, image_data=image_data)
+
+    # 新幻灯片追加在末尾，移动到原位置后删除旧幻灯片
+    sld_id_lst = prs.slides._sldIdLst
+    new_sld_id = sld_id_lst[-1]
+    sld_id_lst.remove(new_sld_id)
+    sld_id_lst.insert(index, new_sld_id)
+    _delete_slide(prs, index + 1)
+
+    # 追加时按页数分配的部件名（slide{N+1}.xml）在多页替换时会重复，
+    # 旧部件已不可达，将其部件名交给新幻灯片，保持 slide1..slideN 连续且唯一
+    new_slide.part.partname = old_partname
+
+
+def _delete_slide(prs: Presentation, index: int) -> None:
+    """删除指定位置的幻灯片（保存时不再引用的部件和媒体会被丢弃）"""
+    sld_id_lst = prs.slides._sldIdLst
+    sld_id = sld_id_lst[index]
+    prs.part.drop_rel(sld_id.rId)
+    sld_id_lst.remove(sld_id)
+
+
+# PPTX 包内 XML 命名空间与关系类型
+_NS_P = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+_NS_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+_NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_REL_NOTES_SLIDE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide'
+_TAG_SP = f'{{{_NS_P}}}sp'
+_TAG_SP_TREE = f'{{{_NS_P}}}spTree'
+_TAG_TX_BODY = f'{{{_NS_P}}}txBody'
+_TAG_PARAGRAPH = f'{{{_NS_A}}}p'
+_TAG_RUN = f'{{{_NS_A}}}r'
+_TAG_FIELD = f'{{{_NS_A}}}fld'
+_TAG_BREAK = f'{{{_NS_A}}}br'
+_TAG_TEXT = f'{{{_NS_A}}}t'
+
+
+def _rels_part_name(part_name: str) -> str:
+    """部件对应的关系文件路径"""
+    directory, filename = posixpath.split(part_name)
+    return posixpath.join(directory, '_rels', f'{filename}.rels')
+
+
+def _paragraph_text(paragraph) -> str:
+    """段落文本：与 python-pptx 一致，换行符 a:br 记为垂直制表符"""
+    parts = []
+    for child in paragraph:
+        if child.tag == _TAG_RUN or child.tag == _TAG_FIELD:
+            t = child.find(_TAG_TEXT)
+            if t is not None and t.text:
+                parts.append(t.text)
+        elif child.tag == _TAG_BREAK:
+            parts.append('\v')
+    return ''.join(parts)
+
+
+class PPTXInspector:
+    """
+    轻量PPTX读取器
+
+    直接用 zipfile 打开包，只流式解析需要的幻灯片和备注部件，
+    不构建 python-pptx 的对象模型。文本结果与 python-pptx 的
+    shape.text 一致：只包含幻灯片顶层的 p:sp 形状。
+    """
+
+    def __init__(self, pptx_bytes: bytes):
+        self._zip = zipfile.ZipFile(BytesIO(pptx_bytes))
+        self._slide_parts = None
+
+    def _read_relationships(self, part_name: str) -> Dict[str, Tuple[str, str]]:
+        """读取部件的关系：rId -> (关系类型, 目标部件路径)"""
+        rels_name = _rels_part_name(part_name)
+        try:
+            data = self._zip.read(rels_name)
+        except KeyError:
+            return {}
+
+        base = posixpath.dirname(part_name)
+        relationships = {}
+        for element in etree.fromstring(data).iter(f'{{{_NS_REL}}}Relationship'):
+            if element.get('TargetMode') == 'External':
+                continue
+            target = posixpath.normpath(posixpath.join(base, element.get('Target')))
+            relationships[element.get('Id')] = (element.get('Type'), target)
+        return relationships
+
+    def slide_parts(self) -> List[str]:
+        """按放映顺序返回幻灯片部件路径"""
+        if self._slide_parts is None:
+            relationships = self._read_relationships('ppt/presentation.xml')
+            parts = []
+            with self._zip.open('ppt/presentation.xml') as stream:
+                for _, element in etree.iterparse(stream, tag=f'{{{_NS_P}}}sldId'):
+                    parts.append(relationships[element.get(f'{{{_NS_R}}}id')][1])
+                    element.clear()
+            self._slide_parts = parts
+        return self._slide_parts
+
+    def slide_count(self) -> int:
+        return len(self.slide_parts())
+
+    def _shape_texts(self, part_name: str) -> List[str]:
+        """流式解析部件，返回顶层形状的文本"""
+        texts = []
+        with self._zip.open(part_name) as stream:
+            for _, element in etree.iterparse(stream, tag=_TAG_SP):
+                parent = element.getparent()
+                if parent is None or parent.tag != _TAG_SP_TREE:
+                    continue
+                tx_body = element.find(_TAG_TX_BODY)
+                if tx_body is None:
+                    texts.append('')
+                else:
+                    texts.append('\n'.join(_paragraph_text(p) for p in tx_body.iterchildren(_TAG_PARAGRAPH)))
+                element.clear()
+        return texts
+
+    def _notes_part(self, slide_part: str) -> Optional[str]:
+        for rel_type, target in self._read_relationships(slide_part).values():
+            if rel_type == _REL_NOTES_SLIDE:
+                return target
+        return None
+
+    def slide_texts(self) -> List[List[str]]:
+        """每张幻灯片的形状文本列表"""
+        return [self._shape_texts(part) for part in self.slide_parts()]
+
+    def speaker_notes(self) -> List[str]:
+        """每张幻灯片的演讲者备注，没有备注页时为空字符串"""
+        notes = []
+        for slide_part in self.slide_parts():
+            notes_part = self._notes_part(slide_part)
+            notes.append(''.join(self._shape_texts(notes_part)) if notes_part else '')
+        return notes
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> 'PPTXInspector':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
 
 def get_slide_count(pptx_bytes: bytes) -> int:
     """
@@ -239,9 +1083,8 @@ def get_slide_count(pptx_bytes: bytes) -> int:
     Returns:
         int: 幻灯片数量
     """
-    pptx_stream = BytesIO(pptx_bytes)
-    prs = Presentation(pptx_stream)
-    return len(prs.slides)
+    with PPTXInspector(pptx_bytes) as inspector:
+        return inspector.slide_count()
 
 
 def extract_text_content(pptx_bytes: bytes) -> str:
@@ -254,17 +1097,8 @@ def extract_text_content(pptx_bytes: bytes) -> str:
     Returns:
         str: 提取的文本内容
     """
-    pptx_stream = BytesIO(pptx_bytes)
-    prs = Presentation(pptx_stream)
-
-    text_content = []
-
-    for slide in prs.slides:
-        for shape in slide.shapes:
-            if hasattr(shape, "text"):
-                text_content.append(shape.text)
-
-    return " ".join(text_content)
+    with PPTXInspector(pptx_bytes) as inspector:
+        return " ".join(text for texts in inspector.slide_texts() for text in texts)
 
 
 def create_pptx_with_template(content: Dict, template_name: str = "default") -> bytes:
@@ -278,11 +1112,7 @@ def create_pptx_with_template(content: Dict, template_name: str = "default") ->
     Returns:
         bytes: PPTX文件字节数据
     """
-    if template_name != "default":
-        raise FileNotFoundError(f"Template '{template_name}' not found")
-
-    # 目前只支持默认模板
-    return create_pptx_from_content(content)
+    return create_pptx_from_content(content, template_name=template_name)
 
 
 def extract_speaker_notes(pptx_bytes: bytes) -> List[str]:
@@ -295,23 +1125,8 @@ def extract_speaker_notes(pptx_bytes: bytes) -> List[str]:
     Returns:
         List[str]: 每页的演讲者备注列表
     """
-    pptx_stream = BytesIO(pptx_bytes)
-    prs = Presentation(pptx_stream)
-
-    notes = []
-    for slide in prs.slides:
-        if slide.has_notes_slide:
-            notes_slide = slide.notes_slide
-            # 提取备注文本
-            notes_text = ""
-            for shape in notes_slide.shapes:
-                if hasattr(shape, "text"):
-                    notes_text += shape.text
-            notes.append(notes_text)
-        else:
-            notes.append("")
-
-    return notes
+    with PPTXInspector(pptx_bytes) as inspector:
+        return inspector.speaker_notes()
 
 
 class PPTCompiler:
@@ -320,13 +1135,15 @@ class PPTCompiler:
     def __init__(self):
         self.s3_client = boto3.client('s3')
         self.bucket_name = os.environ.get('S3_BUCKET', 'ai-ppt-presentations-dev')
+        self.last_media_report = {}
 
-    def compile_ppt(self, presentation_id: str) -> str:
+    def compile_ppt(self, presentation_id: str, incremental: bool = False) -> str:
         """
         编译PPT的主函数
 
         Args:
             presentation_id: 演示文稿ID
+            incremental: 是否基于上次编译结果增量更新
 
         Returns:
             str: 预签名下载URL
@@ -344,17 +1161,113 @@ class PPTCompiler:
             logger.error(f"Failed to read content from S3: {e}")
             raise
 
-        # 生成PPTX
-        pptx_bytes = create_pptx_from_content(content)
-
-        # 保存到S3
-        s3_key = self.save_to_s3(pptx_bytes, presentation_id)
+        # 生成PPTX并保存到S3
+        s3_key = self.compile_content(presentation_id, content, incremental=incremental)
 
         # 生成下载链接
         download_url = self.generate_download_url(s3_key)
 
         return download_url
 
+    def compile_content(self, presentation_id: str, content: Dict, incremental: bool = True,
+                        include_notes: bool = True) -> str:
+        """
+        编译内容并保存PPTX和增量编译清单
+
+        Args:
+            presentation_id: 演示文稿ID
+            content: 包含slides列表的字典
+            incremental: 是否基于上次编译结果增量更新
+            include_notes: 是否包含演讲者备注
+
+        Returns:
+            str: PPTX的S3对象键
+        """
+        previous = self._load_previous_build(presentation_id) if incremental else None
+        media_report = {}
+
+        if previous:
+            pptx_bytes, manifest, rebuilt = update_pptx_incremental(
+                previous[0], previous[1], content, include_notes, media_report
+            )
+            logger.info(f"增量编译完成，重建 {len(rebuilt)}/{len(content['slides'])} 页: {rebuilt}")
+        else:
+            pptx_bytes = create_pptx_from_content(content, include_notes, media_report)
+            manifest = build_slide_manifest(content, include_notes)
+
+        self.last_media_report = media_report
+        if media_report.get('images'):
+            logger.info(
+                f"图片规范化: {media_report['images']} 张（去重 {media_report['deduplicated']} 次引用），"
+                f"{media_report['original_bytes']} -> {media_report['embedded_bytes']} 字节，"
+                f"节省 {media_report['bytes_saved']} 字节"
+            )
+
+        # 清单记录所描述PPTX的摘要，PPTX被其他流程覆盖后不再用于增量编译
+        manifest['pptx_sha256'] = hashlib.sha256(pptx_bytes).hexdigest()
+        s3_key = self.save_to_s3(pptx_bytes, presentation_id)
+        self._save_manifest(manifest, presentation_id)
+        return s3_key
+
+    def compile_edited_slides(self, presentation_id: str, slides: List[Dict]) -> str:
+        """
+        增量编译编辑接口保存的幻灯片
+
+        编辑接口使用content字段保存要点，编译前映射为bullet_points。
+
+        Args:
+            presentation_id: 演示文稿ID
+            slides: 编辑后的幻灯片列表
+
+        Returns:
+            str: PPTX的S3对象键
+        """
+        content_slides = []
+        for slide in slides:
+            slide = dict(slide)
+            if 'bullet_points' not in slide and isinstance(slide.get('content'), list):
+                slide['bullet_points'] = slide['content']
+            content_slides.append(slide)
+        return self.compile_content(presentation_id, {'slides': content_slides}, incremental=True)
+
+    def _manifest_key(self, presentation_id: str) -> str:
+        return f"presentations/{presentation_id}/output/manifest.json"
+
+    def _load_previous_build(self, presentation_id: str) -> Optional[Tuple[bytes, Dict]]:
+        """读取上次编译的PPTX和清单，任一不存在或清单不是该PPTX的清单时返回None"""
+        try:
+            manifest_obj = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=self._manifest_key(presentation_id)
+            )
+            manifest = json.loads(manifest_obj['Body'].read().decode('utf-8'))
+            pptx_obj = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=f"presentations/{presentation_id}/output/presentation.pptx"
+            )
+            pptx_bytes = pptx_obj['Body'].read()
+        except Exception as e:
+            logger.info(f"没有可用的上次编译结果，全量编译: {e}")
+            return None
+
+        if not isinstance(manifest, dict) or \
+                manifest.get('pptx_sha256') != hashlib.sha256(pptx_bytes).hexdigest():
+            logger.info("编译清单与当前PPTX不一致，全量编译")
+            return None
+        return pptx_bytes, manifest
+
+    def _save_manifest(self, manifest: Dict, presentation_id: str) -> None:
+        """保存增量编译清单（失败只影响下次编译的增量能力）"""
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=self._manifest_key(presentation_id),
+                Body=json.dumps(manifest).encode('utf-8'),
+                ContentType='application/json'
+            )
+        except Exception as e:
+            logger.warning(f"保存编译清单失败: {e}")
+
     def save_to_s3(self, pptx_bytes: bytes, presentation_id: str) -> str:
         """
         保存PPTX到S3
@@ -13,6 +13,11 @@ from enum import Enum
 import boto3
 from botocore.exceptions import ClientError
 
+try:
+    from ..single_flight import get_single_flight
+except ImportError:
+    from single_flight import get_single_flight
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,6 +52,8 @@ class BedrockImageService:
         self.bedrock_client = bedrock_client or boto3.client('bedrock-runtime')
         self.cache_client = cache_client
         self.model_chain = sorted(ImageModel, key=lambda m: m.priority)
+        # 容器内共享：相同参数的并发请求只调用一次模型
+        self.single_flight = get_single_flight("bedrock_image")
 
     def generate_image(
         self,
@@ -55,7 +62,8 @@ class BedrockImageService:
         width: int = 1024,
         height: int = 768,
         style_preset: str = "photographic",
-        use_cache: bool = True
+        use_cache: bool = True,
+        allow_similar: bool = False
     ) -> Dict[str, Any]:
         """
         生成图片（带fallback机制）
@@ -67,19 +75,61 @@ class BedrockImageService:
             height: 图片高度
             style_preset: 风格预设
             use_cache: 是否使用缓存
+            allow_similar: 精确缓存未命中时是否复用提示词相似的缓存图片（相似度只反映字面重合，默认关闭）
 
         Returns:
             包含图片数据和元信息的字典
         """
+        if not use_cache:
+            return self._generate_with_fallback(
+                prompt, negative_prompt, width, height, style_preset, cache_key=None
+            )
+
+        cache_key = self._generate_cache_key(prompt, width, height, style_preset)
+
         # 检查缓存
-        if use_cache and self.cache_client:
-            cache_key = self._generate_cache_key(prompt, width, height, style_preset)
+        if self.cache_client:
             cached_result = self._get_from_cache(cache_key)
             if cached_result:
                 logger.info(f"Cache hit for prompt: {prompt[:50]}...")
                 return cached_result
 
-        # 尝试所有模型
+            # 调用方显式开启时，仅大小写、标点等措辞不同的提示词复用已生成的图片
+            if allow_similar:
+                similar_result = self._get_similar_from_cache(prompt, width, height, style_preset)
+                if similar_result:
+                    logger.info(
+                        f"Near-hit cache ({similar_result['similarity']:.2f}) for prompt: {prompt[:50]}..."
+                    )
+                    return similar_result
+
+        # 相同参数的并发请求合并为一次生成
+        flight_key = f"{cache_key}:{hashlib.md5((negative_prompt or '').encode()).hexdigest()[:8]}"
+        result, shared = self.single_flight.do(
+            flight_key,
+            lambda: self._generate_with_fallback(
+                prompt, negative_prompt, width, height, style_preset, cache_key=cache_key
+            ),
+            check=(lambda: self._get_from_cache(cache_key)) if self.cache_client else None
+        )
+
+        if shared:
+            logger.info(f"Joined in-flight generation for prompt: {prompt[:50]}...")
+            return dict(result)
+        return result
+
+    def _generate_with_fallback(
+        self,
+        prompt: str,
+        negative_prompt: Optional[str],
+        width: int,
+        height: int,
+        style_preset: str,
+        cache_key: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        按优先级依次尝试所有模型，成功后写入缓存
+        """
         last_error = None
         for model in self.model_chain:
             try:
@@ -94,8 +144,8 @@ class BedrockImageService:
                 )
 
                 # 保存到缓存
-                if use_cache and self.cache_client:
-                    self._save_to_cache(cache_key, result)
+                if cache_key and self.cache_client:
+                    self._save_to_cache(cache_key, result, style_preset)
 
                 return result
 
@@ -287,30 +337,65 @@ class BedrockImageService:
         return hashlib.md5(key_data.encode()).hexdigest()
 
     def _get_from_cache(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """从缓存获取图片"""
+        """从缓存获取图片（cache_client需提供ImageCacheService的接口）"""
         if not self.cache_client:
             return None
 
         try:
-            # 这里需要根据实际的缓存服务实现
-            # 示例：DynamoDB缓存
-            return None  # TODO: 实现缓存读取
+            cached = self.cache_client.get_cached_image(cache_key)
+            return self._cached_result(cached) if cached else None
         except Exception as e:
             logger.warning(f"Cache read failed: {e}")
             return None
 
-    def _save_to_cache(self, cache_key: str, data: Dict[str, Any]) -> None:
+    def _get_similar_from_cache(
+        self,
+        prompt: str,
+        width: int,
+        height: int,
+        style_preset: str
+    ) -> Optional[Dict[str, Any]]:
+        """从缓存获取提示词相似、尺寸和风格相同的图片"""
+        find_similar = getattr(self.cache_client, 'get_similar_cached_image', None)
+        if find_similar is None:
+            return None
+
+        try:
+            cached = find_similar(prompt, width=width, height=height, style=style_preset)
+            return self._cached_result(cached) if cached else None
+        except Exception as e:
+            logger.warning(f"Similar cache lookup failed: {e}")
+            return None
+
+    def _save_to_cache(self, cache_key: str, data: Dict[str, Any],
+                       style_preset: Optional[str] = None) -> None:
         """保存到缓存"""
         if not self.cache_client:
             return
 
         try:
-            # 这里需要根据实际的缓存服务实现
-            # 示例：DynamoDB缓存
-            pass  # TODO: 实现缓存保存
+            metadata = {k: v for k, v in data.items() if k != 'image_data'}
+            if style_preset:
+                metadata['style'] = style_preset
+            self.cache_client.save_to_cache(cache_key, data['image_data'], metadata)
         except Exception as e:
             logger.warning(f"Cache write failed: {e}")
 
+    @staticmethod
+    def _cached_result(cached: Dict[str, Any]) -> Dict[str, Any]:
+        """将缓存条目转换为generate_image的返回结构"""
+        metadata = cached.get('metadata', {})
+        return {
+            'image_data': cached['image_data'],
+            'model': metadata.get('model'),
+            'prompt': metadata.get('prompt'),
+            'width': metadata.get('width'),
+            'height': metadata.get('height'),
+            'generated_at': metadata.get('cached_at'),
+            'cached': True,
+            'similarity': float(metadata.get('similarity', 1.0))
+        }
+
     def enhance_prompt(self, base_prompt: str, context: Dict[str, Any]) -> str:
         """
         增强提示词
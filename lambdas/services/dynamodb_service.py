@@ -4,8 +4,16 @@
 """
 
 import boto3
+import base64
+import binascii
 import logging
-from typing import Dict, Any, Optional, List
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Any, Optional, List, Tuple, Iterator
 from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -13,6 +21,14 @@ import json
 
 logger = logging.getLogger(__name__)
 
+# 批量操作限制（DynamoDB API上限）
+BATCH_WRITE_CHUNK_SIZE = 25
+BATCH_GET_CHUNK_SIZE = 100
+BATCH_MAX_WORKERS = 4
+BATCH_MAX_RETRIES = 8
+BATCH_RETRY_BASE_DELAY = 0.05  # 秒
+BATCH_RETRY_MAX_DELAY = 5.0  # 秒
+
 
 class DynamoDBServiceError(Exception):
     """DynamoDB服务错误"""
@@ -37,6 +53,8 @@ class DynamoDBService:
         self.table_name = table_name
         self.dynamodb = dynamodb_resource or boto3.resource('dynamodb')
         self.table = self.dynamodb.Table(table_name)
+        # 资源对象不是线程安全的，并发操作使用底层客户端（同样自动转换类型）
+        self.client = self.dynamodb.meta.client
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def put_item(self, item: Dict, condition_expression: str = None) -> Dict:
@@ -240,6 +258,100 @@ class DynamoDBService:
         Returns:
             项目列表
 
+        Raises:
+            DynamoDBServiceError: 操作失败时抛出
+        """
+        items = list(islice(
+            self.iter_query(key_condition, expression_attribute_values, index_name,
+                            scan_forward, filter_expression, page_size=limit),
+            limit
+        ))
+        self.logger.info(f"Successfully queried {len(items)} items from {self.table_name}")
+        return items
+
+    def iter_query(self, key_condition: str, expression_attribute_values: Dict,
+                   index_name: str = None, scan_forward: bool = True,
+                   filter_expression: str = None, projection_expression: str = None,
+                   expression_attribute_names: Dict = None,
+                   page_size: int = None) -> Iterator[Dict]:
+        """
+        逐页查询并逐项返回，不在内存中保存全部结果
+
+        Args:
+            key_condition: 键条件表达式
+            expression_attribute_values: 表达式属性值
+            index_name: 索引名称（可选）
+            scan_forward: 是否正向扫描（默认True）
+            filter_expression: 过滤表达式（可选）
+            projection_expression: 投影表达式（可选）
+            expression_attribute_names: 表达式属性名（可选）
+            page_size: 每次请求读取的项目数（可选）
+
+        Yields:
+            项目
+
+        Raises:
+            DynamoDBServiceError: 操作失败时抛出
+        """
+        kwargs = {
+            'TableName': self.table_name,
+            'KeyConditionExpression': key_condition,
+            'ExpressionAttributeValues': self._convert_to_dynamodb_types(expression_attribute_values),
+            'ScanIndexForward': scan_forward
+        }
+        if index_name:
+            kwargs['IndexName'] = index_name
+        if filter_expression:
+            kwargs['FilterExpression'] = filter_expression
+        if projection_expression:
+            kwargs['ProjectionExpression'] = projection_expression
+        if expression_attribute_names:
+            kwargs['ExpressionAttributeNames'] = expression_attribute_names
+        if page_size:
+            kwargs['Limit'] = page_size
+
+        while True:
+            try:
+                response = self.client.query(**kwargs)
+            except ClientError as e:
+                error_code = e.response['Error']['Code']
+                error_message = e.response['Error']['Message']
+                self.logger.error(f"Failed to query items: {error_code} - {error_message}")
+                raise DynamoDBServiceError(f"Failed to query items: {error_message}", error_code)
+
+            for item in response.get('Items', []):
+                yield self._convert_from_dynamodb_types(item)
+
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return
+            kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+    def query_page(self, key_condition: str, expression_attribute_values: Dict,
+                   index_name: str = None, limit: int = 20, scan_forward: bool = True,
+                   filter_expression: str = None, projection_expression: str = None,
+                   expression_attribute_names: Dict = None,
+                   exclusive_start_key: Dict = None) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        分页查询一页项目
+
+        每次请求的Limit取剩余数量，因此有过滤条件时不会越过未返回的匹配项，
+        返回的LastEvaluatedKey可以作为下一页的起点。
+
+        Args:
+            key_condition: 键条件表达式
+            expression_attribute_values: 表达式属性值
+            index_name: 索引名称（可选）
+            limit: 每页最多返回的项目数
+            scan_forward: 是否正向扫描（默认True）
+            filter_expression: 过滤表达式（可选）
+            projection_expression: 投影表达式（可选，只返回需要的字段）
+            expression_attribute_names: 表达式属性名（可选）
+            exclusive_start_key: 上一页返回的LastEvaluatedKey（可选）
+
+        Returns:
+            (项目列表, 下一页的起始键，没有更多数据时为None)
+
         Raises:
             DynamoDBServiceError: 操作失败时抛出
         """
@@ -252,15 +364,18 @@ class DynamoDBService:
 
             if index_name:
                 kwargs['IndexName'] = index_name
-            if limit:
-                kwargs['Limit'] = limit
             if filter_expression:
                 kwargs['FilterExpression'] = filter_expression
+            if projection_expression:
+                kwargs['ProjectionExpression'] = projection_expression
+            if expression_attribute_names:
+                kwargs['ExpressionAttributeNames'] = expression_attribute_names
 
             items = []
-            last_evaluated_key = None
+            last_evaluated_key = self._convert_to_dynamodb_types(exclusive_start_key) if exclusive_start_key else None
 
-            while True:
+            while len(items) < limit:
+                kwargs['Limit'] = limit - len(items)
                 if last_evaluated_key:
                     kwargs['ExclusiveStartKey'] = last_evaluated_key
 
@@ -270,19 +385,18 @@ class DynamoDBService:
                     items.append(self._convert_from_dynamodb_types(item))
 
                 last_evaluated_key = response.get('LastEvaluatedKey')
-
-                # 如果没有更多数据或已达到限制，停止
-                if not last_evaluated_key or (limit and len(items) >= limit):
+                if not last_evaluated_key:
                     break
 
-            self.logger.info(f"Successfully queried {len(items)} items from {self.table_name}")
-            return items[:limit] if limit else items
+            next_key = self._convert_from_dynamodb_types(last_evaluated_key) if last_evaluated_key else None
+            self.logger.info(f"Successfully queried page of {len(items)} items from {self.table_name}")
+            return items, next_key
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
-            self.logger.error(f"Failed to query items: {error_code} - {error_message}")
-            raise DynamoDBServiceError(f"Failed to query items: {error_message}", error_code)
+            self.logger.error(f"Failed to query page: {error_code} - {error_message}")
+            raise DynamoDBServiceError(f"Failed to query page: {error_message}", error_code)
 
     def scan(self, filter_expression: str = None, expression_attribute_values: Dict = None,
              limit: int = None) -> List[Dict]:
@@ -300,117 +414,255 @@ class DynamoDBService:
         Raises:
             DynamoDBServiceError: 操作失败时抛出
         """
-        try:
-            kwargs = {}
+        items = list(islice(
+            self.iter_scan(filter_expression, expression_attribute_values),
+            limit
+        ))
+        self.logger.info(f"Successfully scanned {len(items)} items from {self.table_name}")
+        return items
+
+    def iter_scan(self, filter_expression: str = None, expression_attribute_values: Dict = None,
+                  projection_expression: str = None, expression_attribute_names: Dict = None,
+                  segment: int = None, total_segments: int = None,
+                  page_size: int = None) -> Iterator[Dict]:
+        """
+        逐页扫描表并逐项返回，不在内存中保存整张表
 
-            if filter_expression:
-                kwargs['FilterExpression'] = filter_expression
-            if expression_attribute_values:
-                kwargs['ExpressionAttributeValues'] = self._convert_to_dynamodb_types(expression_attribute_values)
+        Args:
+            filter_expression: 过滤表达式（可选）
+            expression_attribute_values: 表达式属性值（可选）
+            projection_expression: 投影表达式（可选）
+            expression_attribute_names: 表达式属性名（可选）
+            segment: 并行扫描的分段编号（可选，需同时指定total_segments）
+            total_segments: 并行扫描的总分段数（可选）
+            page_size: 每次请求读取的项目数（可选）
 
-            items = []
-            last_evaluated_key = None
+        Yields:
+            项目
 
-            while True:
-                if last_evaluated_key:
-                    kwargs['ExclusiveStartKey'] = last_evaluated_key
+        Raises:
+            DynamoDBServiceError: 操作失败时抛出
+        """
+        kwargs = {'TableName': self.table_name}
+        if filter_expression:
+            kwargs['FilterExpression'] = filter_expression
+        if expression_attribute_values:
+            kwargs['ExpressionAttributeValues'] = self._convert_to_dynamodb_types(expression_attribute_values)
+        if projection_expression:
+            kwargs['ProjectionExpression'] = projection_expression
+        if expression_attribute_names:
+            kwargs['ExpressionAttributeNames'] = expression_attribute_names
+        if total_segments:
+            kwargs['Segment'] = segment
+            kwargs['TotalSegments'] = total_segments
+        if page_size:
+            kwargs['Limit'] = page_size
+
+        while True:
+            try:
+                response = self.client.scan(**kwargs)
+            except ClientError as e:
+                error_code = e.response['Error']['Code']
+                error_message = e.response['Error']['Message']
+                self.logger.error(f"Failed to scan table: {error_code} - {error_message}")
+                raise DynamoDBServiceError(f"Failed to scan table: {error_message}", error_code)
 
-                response = self.table.scan(**kwargs)
+            for item in response.get('Items', []):
+                yield self._convert_from_dynamodb_types(item)
 
-                for item in response.get('Items', []):
-                    items.append(self._convert_from_dynamodb_types(item))
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return
+            kwargs['ExclusiveStartKey'] = last_evaluated_key
 
-                last_evaluated_key = response.get('LastEvaluatedKey')
+    def parallel_scan(self, total_segments: int = 4, max_workers: int = None,
+                      filter_expression: str = None, expression_attribute_values: Dict = None,
+                      projection_expression: str = None, expression_attribute_names: Dict = None,
+                      page_size: int = None, buffer_pages: int = 8) -> Iterator[Dict]:
+        """
+        分段并行扫描（Segment/TotalSegments），以流的形式返回项目
 
-                # 如果没有更多数据或已达到限制，停止
-                if not last_evaluated_key or (limit and len(items) >= limit):
-                    break
+        各分段在线程池中独立翻页，结果经有界队列交给调用方，调用方处理较慢时
+        扫描线程会等待，内存占用不超过buffer_pages页。提前停止迭代时扫描线程随之退出。
+        返回顺序不固定。
 
-            self.logger.info(f"Successfully scanned {len(items)} items from {self.table_name}")
-            return items[:limit] if limit else items
+        Args:
+            total_segments: 分段数
+            max_workers: 并发线程数（默认等于分段数）
+            filter_expression: 过滤表达式（可选）
+            expression_attribute_values: 表达式属性值（可选）
+            projection_expression: 投影表达式（可选）
+            expression_attribute_names: 表达式属性名（可选）
+            page_size: 每次请求读取的项目数（可选）
+            buffer_pages: 缓冲的最大页数
 
-        except ClientError as e:
-            error_code = e.response['Error']['Code']
-            error_message = e.response['Error']['Message']
-            self.logger.error(f"Failed to scan table: {error_code} - {error_message}")
-            raise DynamoDBServiceError(f"Failed to scan table: {error_message}", error_code)
+        Yields:
+            项目
 
-    def batch_write(self, items_to_put: List[Dict] = None, keys_to_delete: List[Dict] = None) -> Dict:
+        Raises:
+            DynamoDBServiceError: 任一分段扫描失败时抛出
+        """
+        results: "queue.Queue" = queue.Queue(maxsize=max(1, buffer_pages))
+        stop = threading.Event()
+        done_marker = object()
+
+        def put(value) -> bool:
+            while not stop.is_set():
+                try:
+                    results.put(value, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def scan_segment(segment: int):
+            try:
+                page = []
+                for item in self.iter_scan(filter_expression, expression_attribute_values,
+                                           projection_expression, expression_attribute_names,
+                                           segment=segment, total_segments=total_segments,
+                                           page_size=page_size):
+                    if stop.is_set():
+                        return
+                    page.append(item)
+                    if len(page) >= (page_size or 100):
+                        if not put(page):
+                            return
+                        page = []
+                if page:
+                    put(page)
+            except Exception as e:
+                put(e)
+            finally:
+                put(done_marker)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers or total_segments,
+                                      thread_name_prefix="dynamodb-scan")
+        try:
+            for segment in range(total_segments):
+                executor.submit(scan_segment, segment)
+
+            remaining = total_segments
+            while remaining:
+                value = results.get()
+                if value is done_marker:
+                    remaining -= 1
+                elif isinstance(value, Exception):
+                    raise value
+                else:
+                    yield from value
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
+
+    def batch_write(self, items_to_put: List[Dict] = None, keys_to_delete: List[Dict] = None,
+                    max_workers: int = BATCH_MAX_WORKERS) -> Dict:
         """
         批量写入操作
 
+        按25项分块并发提交，未处理的项目按指数退避重试。
+
         Args:
             items_to_put: 要添加的项目列表
             keys_to_delete: 要删除的键列表
+            max_workers: 并发提交的分块数
 
         Returns:
-            未处理的项目
+            重试后仍未处理的请求（格式同UnprocessedItems），全部成功时为空字典
 
         Raises:
             DynamoDBServiceError: 操作失败时抛出
         """
-        try:
-            with self.table.batch_writer() as batch:
-                if items_to_put:
-                    for item in items_to_put:
-                        item = self._convert_to_dynamodb_types(item)
-                        if 'created_at' not in item:
-                            item['created_at'] = datetime.utcnow().isoformat()
-                        item['updated_at'] = datetime.utcnow().isoformat()
-                        batch.put_item(Item=item)
-
-                if keys_to_delete:
-                    for key in keys_to_delete:
-                        batch.delete_item(Key=key)
-
-            self.logger.info(f"Successfully completed batch write to {self.table_name}")
-            return {}
+        requests = []
+        now = datetime.utcnow().isoformat()
+        for item in items_to_put or []:
+            item = self._convert_to_dynamodb_types(item)
+            if 'created_at' not in item:
+                item['created_at'] = now
+            item['updated_at'] = now
+            requests.append({'PutRequest': {'Item': item}})
+        for key in keys_to_delete or []:
+            requests.append({'DeleteRequest': {'Key': self._convert_to_dynamodb_types(key)}})
 
-        except ClientError as e:
-            error_code = e.response['Error']['Code']
-            error_message = e.response['Error']['Message']
-            self.logger.error(f"Failed to batch write: {error_code} - {error_message}")
-            raise DynamoDBServiceError(f"Failed to batch write: {error_message}", error_code)
+        chunks = _chunked(requests, BATCH_WRITE_CHUNK_SIZE)
+        unprocessed = []
+        for remaining in self._run_chunks(self._write_chunk, chunks, max_workers):
+            unprocessed.extend(remaining)
+
+        if unprocessed:
+            self.logger.warning(f"Batch write left {len(unprocessed)} unprocessed requests in {self.table_name}")
+            return {self.table_name: unprocessed}
+
+        self.logger.info(f"Successfully completed batch write of {len(requests)} requests to {self.table_name}")
+        return {}
 
-    def batch_get(self, keys: List[Dict]) -> List[Dict]:
+    def batch_get(self, keys: List[Dict], max_workers: int = BATCH_MAX_WORKERS) -> List[Dict]:
         """
         批量获取项目
 
+        按100个键分块并发读取，未处理的键按指数退避重试。
+
         Args:
             keys: 主键列表
+            max_workers: 并发读取的分块数
 
         Returns:
-            项目列表
+            项目列表（顺序不保证与keys一致）
 
         Raises:
             DynamoDBServiceError: 操作失败时抛出
         """
+        chunks = _chunked([self._convert_to_dynamodb_types(key) for key in keys], BATCH_GET_CHUNK_SIZE)
+        items = []
+        unprocessed_count = 0
+        for chunk_items, remaining in self._run_chunks(self._get_chunk, chunks, max_workers):
+            items.extend(self._convert_from_dynamodb_types(item) for item in chunk_items)
+            unprocessed_count += len(remaining)
+
+        if unprocessed_count:
+            self.logger.warning(f"Some keys were not processed after retries: {unprocessed_count} keys")
+
+        self.logger.info(f"Successfully batch retrieved {len(items)} items from {self.table_name}")
+        return items
+
+    def _run_chunks(self, fn, chunks: List[List[Dict]], max_workers: int) -> List[Any]:
+        """并发处理分块，ClientError统一转换为DynamoDBServiceError"""
+        if not chunks:
+            return []
         try:
-            response = self.dynamodb.batch_get_item(
-                RequestItems={
-                    self.table_name: {
-                        'Keys': keys
-                    }
-                }
-            )
-
-            items = []
-            for item in response['Responses'].get(self.table_name, []):
-                items.append(self._convert_from_dynamodb_types(item))
-
-            # 处理未处理的键
-            unprocessed_keys = response.get('UnprocessedKeys', {})
-            if unprocessed_keys:
-                self.logger.warning(f"Some keys were not processed: {len(unprocessed_keys)} items")
-
-            self.logger.info(f"Successfully batch retrieved {len(items)} items from {self.table_name}")
-            return items
-
+            if len(chunks) == 1 or max_workers <= 1:
+                return [fn(chunk) for chunk in chunks]
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks)),
+                                    thread_name_prefix="dynamodb-batch") as executor:
+                return list(executor.map(fn, chunks))
         except ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
-            self.logger.error(f"Failed to batch get items: {error_code} - {error_message}")
-            raise DynamoDBServiceError(f"Failed to batch get items: {error_message}", error_code)
+            self.logger.error(f"Failed batch operation: {error_code} - {error_message}")
+            raise DynamoDBServiceError(f"Failed batch operation: {error_message}", error_code)
+
+    def _write_chunk(self, requests: List[Dict]) -> List[Dict]:
+        """提交一个写入分块，返回重试后仍未处理的请求"""
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = self.client.batch_write_item(RequestItems={self.table_name: requests})
+            requests = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            if not requests or attempt == BATCH_MAX_RETRIES:
+                return requests
+            _backoff(attempt)
+        return requests
+
+    def _get_chunk(self, keys: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """读取一个键分块，返回(项目, 重试后仍未处理的键)"""
+        items = []
+        request = {'Keys': keys}
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = self.client.batch_get_item(RequestItems={self.table_name: request})
+            items.extend(response.get('Responses', {}).get(self.table_name, []))
+            request = response.get('UnprocessedKeys', {}).get(self.table_name)
+            if not request or attempt == BATCH_MAX_RETRIES:
+                break
+            _backoff(attempt)
+        return items, (request or {}).get('Keys', [])
 
     def set_ttl(self, ttl_attribute_name: str = 'ttl') -> None:
         """
@@ -473,4 +725,41 @@ class DynamoDBService:
         elif isinstance(value, dict) or isinstance(value, list):
             return self._convert_to_dynamodb_types(value)
         else:
-            return value
\ No newline at end of file
+            return value
+
+
+def _chunked(values: List[Any], size: int) -> List[List[Any]]:
+    """按固定大小切分列表"""
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def _backoff(attempt: int):
+    """指数退避（带全抖动）"""
+    time.sleep(random.uniform(0, min(BATCH_RETRY_MAX_DELAY, BATCH_RETRY_BASE_DELAY * (2 ** attempt))))
+
+
+def encode_page_token(last_evaluated_key: Optional[Dict]) -> Optional[str]:
+    """将分页起始键编码为不透明的URL安全令牌"""
+    if not last_evaluated_key:
+        return None
+    payload = json.dumps(last_evaluated_key, sort_keys=True, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_page_token(token: Optional[str]) -> Optional[Dict]:
+    """
+    解码分页令牌
+
+    Raises:
+        DynamoDBServiceError: 令牌格式无效（error_code为INVALID_PAGE_TOKEN）
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError, binascii.Error) as e:
+        raise DynamoDBServiceError("Invalid page token", 'INVALID_PAGE_TOKEN', str(e))
+    if not isinstance(key, dict) or not key:
+        raise DynamoDBServiceError("Invalid page token", 'INVALID_PAGE_TOKEN')
+    return key
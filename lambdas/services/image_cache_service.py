@@ -3,17 +3,179 @@
 """
 
 import json
+import math
+import time
+import zlib
 import hashlib
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+from array import array
+from itertools import islice
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 import boto3
 from botocore.exceptions import ClientError
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from .dynamodb_service import DynamoDBService
+except ImportError:
+    from dynamodb_service import DynamoDBService
+
 logger = logging.getLogger(__name__)
 
+# 提示词嵌入维度（特征哈希桶数）
+EMBEDDING_DIM = 512
+
+
+def normalize_prompt(prompt: str) -> str:
+    """标准化提示词（去除多余空格、转小写），与缓存键使用相同规则"""
+    return ' '.join(prompt.lower().split())
+
+
+def embed_prompt(prompt: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """
+    计算提示词的本地嵌入向量
+
+    对标准化后的提示词提取单词和字符2/3-gram（中文没有空格分词，依靠字符n-gram），
+    通过带符号的特征哈希映射到dim维，并做L2归一化，点积即余弦相似度。
+
+    Args:
+        prompt: 提示词
+        dim: 向量维度
+
+    Returns:
+        List[float]: 归一化后的向量（空提示词返回零向量）
+    """
+    text = normalize_prompt(prompt)
+    features = text.split(' ') if text else []
+    padded = f" {text} "
+    for n in (2, 3):
+        features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+    vector = [0.0] * dim
+    for feature in features:
+        h = zlib.crc32(feature.encode('utf-8'))
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        return vector
+    return [v / norm for v in vector]
+
+
+def pack_embedding(vector: List[float]) -> bytes:
+    """将向量打包为float32字节（存入DynamoDB二进制属性）"""
+    return array('f', vector).tobytes()
+
+
+def unpack_embedding(data: Any) -> List[float]:
+    """解包DynamoDB中的向量（兼容boto3的Binary类型）"""
+    values = array('f')
+    values.frombytes(bytes(getattr(data, 'value', data)))
+    return values.tolist()
+
+
+class PromptSimilarityIndex:
+    """提示词向量的内存索引，安装NumPy时使用矩阵运算批量计算相似度"""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self._keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._vectors: List[List[float]] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._matrix = None
+        self._lock = threading.Lock()
+
+    def add(self, key: str, vector: List[float], metadata: Dict[str, Any]) -> None:
+        """添加或替换一条向量"""
+        if len(vector) != self.dim:
+            raise ValueError(f"Embedding dimension {len(vector)} != {self.dim}")
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                self._positions[key] = len(self._keys)
+                self._keys.append(key)
+                self._vectors.append(vector)
+                self._metadata.append(metadata)
+            else:
+                self._vectors[position] = vector
+                self._metadata[position] = metadata
+            self._matrix = None
+
+    def remove(self, key: str) -> bool:
+        """删除一条向量（与末尾元素交换后弹出）"""
+        with self._lock:
+            position = self._positions.pop(key, None)
+            if position is None:
+                return False
+            last = len(self._keys) - 1
+            if position != last:
+                self._keys[position] = self._keys[last]
+                self._vectors[position] = self._vectors[last]
+                self._metadata[position] = self._metadata[last]
+                self._positions[self._keys[position]] = position
+            self._keys.pop()
+            self._vectors.pop()
+            self._metadata.pop()
+            self._matrix = None
+            return True
+
+    def search(
+        self,
+        vector: List[float],
+        threshold: float,
+        limit: int = 5,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """
+        查找相似度不低于threshold的向量
+
+        Returns:
+            (相似度, 键, 元数据)列表，按相似度降序
+        """
+        with self._lock:
+            if not self._keys:
+                return []
+            if np is not None:
+                if self._matrix is None:
+                    self._matrix = np.asarray(self._vectors, dtype=np.float32)
+                scores = self._matrix @ np.asarray(vector, dtype=np.float32)
+                candidates = np.flatnonzero(scores >= threshold)
+                ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+                matches = [(float(scores[i]), self._keys[i], self._metadata[i]) for i in ranked]
+            else:
+                scored = (
+                    (sum(a * b for a, b in zip(row, vector)), i)
+                    for i, row in enumerate(self._vectors)
+                )
+                matches = sorted(
+                    ((score, self._keys[i], self._metadata[i]) for score, i in scored if score >= threshold),
+                    key=lambda match: -match[0]
+                )
+
+        if predicate is not None:
+            matches = [match for match in matches if predicate(match[2])]
+        return matches[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self._positions.clear()
+            self._vectors.clear()
+            self._metadata.clear()
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
 
 class ImageCacheService:
     """图片缓存服务 - 使用DynamoDB和S3实现两级缓存"""
@@ -22,7 +184,11 @@ class ImageCacheService:
         self,
         dynamodb_table: str = "ai-ppt-image-cache",
         s3_bucket: str = "ai-ppt-image-cache",
-        cache_ttl_hours: int = 24 * 7  # 默认缓存7天
+        cache_ttl_hours: int = 24 * 7,  # 默认缓存7天
+        similarity_threshold: float = 0.99,
+        index_refresh_seconds: Optional[int] = None,
+        index_max_entries: int = 5000,
+        cleanup_segments: int = 4
     ):
         """
         初始化缓存服务
@@ -31,12 +197,27 @@ class ImageCacheService:
             dynamodb_table: DynamoDB表名
             s3_bucket: S3桶名
             cache_ttl_hours: 缓存过期时间（小时）
+            similarity_threshold: 相似提示词命中的默认阈值（余弦相似度）。嵌入只反映字面重合，
+                长提示词中替换一个词（如growth/decline）相似度仍在0.97左右，阈值只放行大小写、
+                标点等措辞差异
+            index_refresh_seconds: 相似度索引从DynamoDB重新加载的间隔（秒），None表示每个容器只加载一次，
+                之后由本容器的保存和删除增量维护
+            index_max_entries: 相似度索引从DynamoDB加载的最大条目数（限制扫描的读取量）
+            cleanup_segments: 清理过期缓存时并行扫描的分段数
         """
         self.dynamodb = boto3.resource('dynamodb')
         self.s3_client = boto3.client('s3')
         self.table = self.dynamodb.Table(dynamodb_table)
+        self.db = DynamoDBService(dynamodb_table, dynamodb_resource=self.dynamodb)
         self.s3_bucket = s3_bucket
         self.cache_ttl_hours = cache_ttl_hours
+        self.similarity_threshold = similarity_threshold
+        self.index_refresh_seconds = index_refresh_seconds
+        self.index_max_entries = index_max_entries
+        self._similarity_index = PromptSimilarityIndex()
+        self._index_loaded_at: Optional[float] = None
+        self._index_lock = threading.Lock()
+        self.cleanup_segments = cleanup_segments
 
     def generate_cache_key(
         self,
@@ -60,7 +241,7 @@ class ImageCacheService:
             缓存键
         """
         # 标准化提示词（去除多余空格、转小写）
-        normalized_prompt = ' '.join(prompt.lower().split())
+        normalized_prompt = normalize_prompt(prompt)
 
         # 生成键
         key_components = [
@@ -152,7 +333,8 @@ class ImageCacheService:
             if not self._save_to_s3(s3_key, image_data):
                 return False
 
-            # 保存元数据到DynamoDB
+            # 保存元数据到DynamoDB（附带提示词向量用于相似查找）
+            embedding = embed_prompt(metadata.get('prompt', ''))
             item = {
                 'cache_key': cache_key,
                 's3_key': s3_key,
@@ -171,8 +353,10 @@ class ImageCacheService:
 
             # 转换数值类型为Decimal（DynamoDB要求）
             item = self._convert_to_decimal(item)
+            item['embedding'] = pack_embedding(embedding)
 
             self.table.put_item(Item=item)
+            self._similarity_index.add(cache_key, embedding, self._index_metadata(item))
 
             logger.info(f"Cached image: {cache_key}")
             return True
@@ -184,28 +368,129 @@ class ImageCacheService:
     def find_similar_cached_images(
         self,
         prompt: str,
-        threshold: float = 0.8
+        threshold: Optional[float] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        style: Optional[str] = None,
+        limit: int = 5
     ) -> List[Dict[str, Any]]:
         """
         查找相似的缓存图片（基于提示词相似度）
 
         Args:
             prompt: 提示词
-            threshold: 相似度阈值
+            threshold: 相似度阈值，默认使用similarity_threshold
+            width: 只匹配该宽度的图片（可选）
+            height: 只匹配该高度的图片（可选）
+            style: 只匹配该风格的图片（可选）
+            limit: 最多返回的数量
 
         Returns:
-            相似图片列表
+            相似图片列表（按相似度降序），每项包含cache_key、prompt、similarity等
         """
         try:
-            # 使用GSI查询相似提示词
-            # 这需要在DynamoDB表上创建合适的GSI
-            # 简化版：返回空列表
-            return []
+            self._ensure_index()
+            threshold = self.similarity_threshold if threshold is None else threshold
+            now = datetime.now(timezone.utc).isoformat()
+
+            def matches(metadata: Dict[str, Any]) -> bool:
+                return (
+                    (width is None or metadata.get('width') == width)
+                    and (height is None or metadata.get('height') == height)
+                    and (style is None or metadata.get('style') == style)
+                    and metadata.get('expires_at', now) >= now
+                )
+
+            results = self._similarity_index.search(
+                embed_prompt(prompt), threshold, limit=limit, predicate=matches
+            )
+            return [
+                {'cache_key': key, 'similarity': score, **metadata}
+                for score, key, metadata in results
+            ]
 
         except Exception as e:
             logger.error(f"Error finding similar images: {e}")
             return []
 
+    def get_similar_cached_image(
+        self,
+        prompt: str,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        style: Optional[str] = None,
+        threshold: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        精确键未命中时，返回提示词最相似的缓存图片
+
+        Returns:
+            与get_cached_image相同结构的数据（metadata附带similarity和cache_key），无相似图片时返回None
+        """
+        for match in self.find_similar_cached_images(prompt, threshold, width, height, style):
+            cached = self.get_cached_image(match['cache_key'])
+            if cached:
+                cached['metadata']['similarity'] = match['similarity']
+                cached['metadata']['cache_key'] = match['cache_key']
+                logger.info(f"Near-hit cache ({match['similarity']:.2f}): {match['cache_key']}")
+                return cached
+        return None
+
+    def _ensure_index(self) -> None:
+        """索引未加载或已过刷新间隔时从DynamoDB重新加载"""
+        with self._index_lock:
+            if self._index_loaded_at is not None and (
+                    self.index_refresh_seconds is None
+                    or time.monotonic() - self._index_loaded_at < self.index_refresh_seconds):
+                return
+            self._load_index()
+            self._index_loaded_at = time.monotonic()
+
+    def _load_index(self) -> None:
+        """
+        分页扫描缓存表，重建相似度索引（缺少向量的旧条目按提示词计算）
+
+        最多读取index_max_entries条，超出部分不进入索引，只能精确命中。
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        scan_kwargs = {
+            'ProjectionExpression': 'cache_key, prompt, embedding, width, height, #style, model, expires_at',
+            'ExpressionAttributeNames': {'#style': 'style'}
+        }
+        entries = []
+        scanned = 0
+        while scanned < self.index_max_entries:
+            scan_kwargs['Limit'] = self.index_max_entries - scanned
+            response = self.table.scan(**scan_kwargs)
+            scanned += response.get('ScannedCount', len(response.get('Items', [])))
+            for item in response.get('Items', []):
+                if item.get('expires_at', now) < now:
+                    continue
+                embedding = item.get('embedding')
+                vector = unpack_embedding(embedding) if embedding is not None else embed_prompt(item.get('prompt', ''))
+                if len(vector) == EMBEDDING_DIM:
+                    entries.append((item['cache_key'], vector, self._index_metadata(item)))
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        self._similarity_index.clear()
+        for cache_key, vector, metadata in entries:
+            self._similarity_index.add(cache_key, vector, metadata)
+        logger.info(f"Loaded {len(entries)} entries into similarity index")
+
+    @staticmethod
+    def _index_metadata(item: Dict[str, Any]) -> Dict[str, Any]:
+        """索引中保存的条目元数据（数值转换回int）"""
+        return {
+            'prompt': item.get('prompt', ''),
+            'model': item.get('model'),
+            'width': int(item['width']) if item.get('width') is not None else None,
+            'height': int(item['height']) if item.get('height') is not None else None,
+            'style': item.get('style', 'default'),
+            'expires_at': item.get('expires_at')
+        }
+
     def cleanup_expired_cache(self) -> int:
         """
         清理过期缓存
@@ -214,22 +499,21 @@ class ImageCacheService:
             清理的条目数量
         """
         try:
-            # 扫描过期条目
+            # 分段并行扫描过期条目，每1000条批量删除一次，不在内存中保留全部结果
             now = datetime.now(timezone.utc).isoformat()
-            response = self.table.scan(
-                FilterExpression='expires_at < :now',
-                ExpressionAttributeValues={':now': now}
+            expired = self.db.parallel_scan(
+                total_segments=self.cleanup_segments,
+                filter_expression='expires_at < :now',
+                expression_attribute_values={':now': now},
+                projection_expression='cache_key, s3_key'
             )
-
-            expired_items = response.get('Items', [])
             deleted_count = 0
 
-            for item in expired_items:
-                cache_key = item['cache_key']
-                s3_key = item.get('s3_key')
-
-                if self._delete_cache_entry(cache_key, s3_key):
-                    deleted_count += 1
+            while True:
+                batch = list(islice(expired, 1000))
+                if not batch:
+                    break
+                deleted_count += self._delete_cache_entries(batch)
 
             logger.info(f"Cleaned up {deleted_count} expired cache entries")
             return deleted_count
@@ -238,6 +522,32 @@ class ImageCacheService:
             logger.error(f"Error cleaning up cache: {e}")
             return 0
 
+    def _delete_cache_entries(self, items: List[Dict[str, Any]]) -> int:
+        """批量删除缓存条目（DynamoDB按25条分块，S3按1000个对象一次）"""
+        unprocessed = self.db.batch_write(
+            keys_to_delete=[{'cache_key': item['cache_key']} for item in items]
+        )
+        failed = {
+            request['DeleteRequest']['Key']['cache_key']
+            for request in unprocessed.get(self.db.table_name, [])
+        }
+
+        deleted = [item for item in items if item['cache_key'] not in failed]
+        for item in deleted:
+            self._similarity_index.remove(item['cache_key'])
+
+        s3_objects = [{'Key': item['s3_key']} for item in deleted if item.get('s3_key')]
+        if s3_objects:
+            try:
+                self.s3_client.delete_objects(
+                    Bucket=self.s3_bucket,
+                    Delete={'Objects': s3_objects, 'Quiet': True}
+                )
+            except ClientError as e:
+                logger.warning(f"Failed to delete cached objects from S3: {e}")
+
+        return len(deleted)
+
     def get_cache_stats(self) -> Dict[str, Any]:
         """
         获取缓存统计信息
@@ -307,6 +617,8 @@ class ImageCacheService:
     ) -> bool:
         """删除缓存条目"""
         try:
+            self._similarity_index.remove(cache_key)
+
             # 删除DynamoDB条目
             self.table.delete_item(Key={'cache_key': cache_key})
 
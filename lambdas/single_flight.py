@@ -0,0 +1,243 @@
+"""
+请求合并（single-flight）- 相同键的并发计算只执行一次
+
+实现：
+- 进程内：同一键的并发调用者共享同一个Future，只有第一个调用者执行计算
+- 跨容器：通过缓存后端（Redis）上的租约键协调，只有持有租约的容器执行计算，
+  其他容器轮询共享缓存直到结果可用或租约释放
+- 同步（线程）和异步（asyncio）调用方共用同一张在途请求表
+"""
+
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class RedisLeaseStore:
+    """基于Redis SET NX EX的租约存储"""
+
+    def __init__(self, redis_client, prefix: str = "lease:"):
+        self._redis = redis_client
+        self.prefix = prefix
+
+    def acquire(self, key: str, ttl: int) -> Optional[str]:
+        """尝试获取租约，成功返回令牌，被其他容器持有时返回None"""
+        token = uuid.uuid4().hex
+        try:
+            if self._redis.set(self.prefix + key, token, nx=True, ex=ttl):
+                return token
+            return None
+        except Exception as e:
+            # 后端不可用时退化为仅进程内合并
+            logger.warning(f"Lease acquire failed for {key}: {e}")
+            return token
+
+    def release(self, key: str, token: str):
+        """释放租约（仅当令牌仍属于自己时）"""
+        name = self.prefix + key
+        try:
+            current = self._redis.get(name)
+            if isinstance(current, bytes):
+                current = current.decode()
+            if current == token:
+                self._redis.delete(name)
+        except Exception as e:
+            logger.warning(f"Lease release failed for {key}: {e}")
+
+    def is_held(self, key: str) -> bool:
+        """租约是否仍被持有"""
+        try:
+            return bool(self._redis.exists(self.prefix + key))
+        except Exception as e:
+            logger.warning(f"Lease check failed for {key}: {e}")
+            return False
+
+
+class SingleFlight:
+    """相同键的并发请求合并器"""
+
+    def __init__(self, lease_store: Optional[RedisLeaseStore] = None,
+                 lease_ttl: int = 120,
+                 poll_interval: float = 0.25,
+                 wait_timeout: float = 60.0):
+        """
+        Args:
+            lease_store: 跨容器租约存储（可选，None表示仅进程内合并）
+            lease_ttl: 租约过期时间（秒），防止持有者崩溃后永久阻塞
+            poll_interval: 等待其他容器结果时的轮询间隔（秒）
+            wait_timeout: 跟随者等待结果的最长时间（秒）
+        """
+        self.lease_store = lease_store
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.wait_timeout = wait_timeout
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'leaders': 0,
+            'shared': 0,
+            'remote_waits': 0,
+            'remote_hits': 0
+        }
+
+    def do(self, key: str, fn: Callable[[], Any],
+           check: Optional[Callable[[], Any]] = None) -> Tuple[Any, bool]:
+        """执行或加入同一键的计算
+
+        Args:
+            key: 合并键
+            fn: 实际计算函数
+            check: 读取共享缓存的函数（跨容器等待时使用，返回None表示未命中）
+
+        Returns:
+            (结果, 是否为共享结果)
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(timeout=self.wait_timeout), True
+
+        try:
+            result = self._run_with_lease(key, fn, check)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result, False
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]],
+                       check: Optional[Callable[[], Any]] = None) -> Tuple[Any, bool]:
+        """do的异步版本，fn返回协程"""
+        future, leader = self._join(key)
+        if not leader:
+            # shield：跟随者超时或被取消时不能取消共享的Future
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                            self.wait_timeout)
+            return result, True
+
+        try:
+            result = await self._run_with_lease_async(key, fn, check)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result, False
+
+    def in_flight(self) -> int:
+        """当前在途的键数量"""
+        with self._lock:
+            return len(self._calls)
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats['shared'] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.stats['leaders'] += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None,
+                error: Optional[BaseException] = None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _run_with_lease(self, key: str, fn: Callable[[], Any],
+                        check: Optional[Callable[[], Any]]) -> Any:
+        if self.lease_store is None:
+            return fn()
+
+        token = self.lease_store.acquire(key, self.lease_ttl)
+        if token is None:
+            result = self._wait_remote(key, check)
+            if result is not None:
+                return result
+            token = self.lease_store.acquire(key, self.lease_ttl)
+
+        try:
+            return fn()
+        finally:
+            if token:
+                self.lease_store.release(key, token)
+
+    async def _run_with_lease_async(self, key: str, fn: Callable[[], Awaitable[Any]],
+                                    check: Optional[Callable[[], Any]]) -> Any:
+        if self.lease_store is None:
+            return await fn()
+
+        token = self.lease_store.acquire(key, self.lease_ttl)
+        if token is None:
+            result = await self._wait_remote_async(key, check)
+            if result is not None:
+                return result
+            token = self.lease_store.acquire(key, self.lease_ttl)
+
+        try:
+            return await fn()
+        finally:
+            if token:
+                self.lease_store.release(key, token)
+
+    def _wait_remote(self, key: str, check: Optional[Callable[[], Any]]) -> Any:
+        """等待其他容器完成计算，超时或租约释放后返回缓存结果（可能为None）"""
+        self.stats['remote_waits'] += 1
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            result = self._check_remote(check)
+            if result is not None:
+                return result
+            if not self.lease_store.is_held(key):
+                return self._check_remote(check)
+            time.sleep(self.poll_interval)
+
+        logger.warning(f"Timed out waiting for remote computation of {key}")
+        return None
+
+    async def _wait_remote_async(self, key: str, check: Optional[Callable[[], Any]]) -> Any:
+        self.stats['remote_waits'] += 1
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            result = self._check_remote(check)
+            if result is not None:
+                return result
+            if not self.lease_store.is_held(key):
+                return self._check_remote(check)
+            await asyncio.sleep(self.poll_interval)
+
+        logger.warning(f"Timed out waiting for remote computation of {key}")
+        return None
+
+    def _check_remote(self, check: Optional[Callable[[], Any]]) -> Any:
+        if check is None:
+            return None
+        result = check()
+        if result is not None:
+            self.stats['remote_hits'] += 1
+        return result
+
+
+# 按命名空间共享的实例（Lambda容器内复用）
+_instances: Dict[str, SingleFlight] = {}
+_instances_lock = threading.Lock()
+
+
+def get_single_flight(namespace: str = "default", **kwargs) -> SingleFlight:
+    """获取命名空间对应的共享SingleFlight实例（首次调用时按kwargs创建）"""
+    with _instances_lock:
+        if namespace not in _instances:
+            _instances[namespace] = SingleFlight(**kwargs)
+        return _instances[namespace]
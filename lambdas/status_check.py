@@ -2,9 +2,21 @@
 状态查询Lambda函数 - 检查PPT生成状态（简化版）
 """
 import json
+import os
+import time
 import boto3
 import logging
 from datetime import datetime
+from typing import Dict, Optional
+
+try:
+    from src.config import STATUS_LONG_POLL_MAX_WAIT
+    from src.status_feed import TERMINAL_STATUSES, get_status_feed, merge_status_events
+    from src.status_manager import StatusManager
+except ImportError:
+    from config import STATUS_LONG_POLL_MAX_WAIT
+    from status_feed import TERMINAL_STATUSES, get_status_feed, merge_status_events
+    from status_manager import StatusManager
 
 dynamodb = boto3.resource('dynamodb')
 s3 = boto3.client('s3')
@@ -36,6 +48,10 @@ def lambda_handler(event, context):
 
         logger.info(f"查询presentation_id: {presentation_id}")
 
+        # 订阅状态变更：GET /status/{id}/events
+        if _is_events_request(event):
+            return handle_status_events(event, presentation_id)
+
         # 尝试从DynamoDB查询状态
         try:
             table = dynamodb.Table('ai-ppt-presentations')
@@ -103,6 +119,94 @@ def lambda_handler(event, context):
         return format_error_response(500, 'Internal server error')
 
 
+def _is_events_request(event: dict) -> bool:
+    resource = event.get('resource') or event.get('path') or ''
+    return resource.rstrip('/').endswith('/events')
+
+
+def read_status_updates(presentation_id: str, cursor: Optional[str] = None, wait: float = 0.0,
+                        feed=None, status_manager: Optional[StatusManager] = None) -> Optional[Dict]:
+    """
+    读取状态变更（长轮询）
+
+    首次订阅（不带游标）立即返回完整状态快照和当前游标；之后携带游标读取增量，
+    没有新变更时最多等待wait秒。变更流不可用时返回快照并标记push为False，
+    客户端应回退到定时查询。
+
+    Args:
+        presentation_id: 演示文稿ID
+        cursor: 上次返回的游标
+        wait: 最长等待时间（秒），不超过STATUS_LONG_POLL_MAX_WAIT
+        feed: 状态变更流（可选，默认使用get_status_feed()）
+        status_manager: 读取快照的状态管理器（可选）
+
+    Returns:
+        {'presentation_id', 'push', 'cursor', 'events', 'snapshot'(首次订阅时)}，
+        演示文稿不存在时返回None
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    feed = feed if feed is not None else get_status_feed()
+    wait = min(max(wait, 0.0), STATUS_LONG_POLL_MAX_WAIT)
+    result = {'presentation_id': presentation_id, 'push': feed is not None, 'cursor': cursor, 'events': []}
+
+    if feed is not None:
+        try:
+            if cursor is None:
+                # 先取游标再读快照：快照一定不早于游标处的状态，之后的增量可直接合并
+                result['cursor'] = feed.latest_cursor(presentation_id)
+            else:
+                events = feed.read(presentation_id, cursor, timeout=wait)
+                if events:
+                    result['events'] = events
+                    result['cursor'] = events[-1]['cursor']
+                return result
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.warning(f"读取状态变更失败，回退到快照: {str(e)}")
+            result['push'] = False
+
+    manager = status_manager or StatusManager(os.environ.get('S3_BUCKET', 'ai-ppt-presentations-dev'),
+                                              s3_client=s3, change_feed=feed)
+    snapshot = manager.get_status(presentation_id)
+    if snapshot is None:
+        return None
+    result['snapshot'] = snapshot
+    return result
+
+
+def handle_status_events(event: dict, presentation_id: str, feed=None,
+                         status_manager: Optional[StatusManager] = None) -> dict:
+    """处理GET /status/{id}/events?cursor=&wait=请求"""
+    params = event.get('queryStringParameters') or {}
+    try:
+        wait = float(params.get('wait', STATUS_LONG_POLL_MAX_WAIT))
+        updates = read_status_updates(presentation_id, params.get('cursor') or None, wait,
+                                      feed=feed, status_manager=status_manager)
+    except ValueError as e:
+        return format_error_response(400, str(e))
+
+    if updates is None:
+        return format_error_response(404, 'Presentation not found')
+    return format_success_response(updates)
+
+
+def format_success_response(data: dict) -> dict:
+    """构建成功响应"""
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Accept',
+            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+        },
+        'body': json.dumps(data, ensure_ascii=False, default=str)
+    }
+
+
 def format_error_response(status_code: int, message: str) -> dict:
     """构建错误响应"""
     return {
@@ -170,9 +274,16 @@ def get_status_summary(presentation_id: str) -> dict:
 
 
 def monitor_generation_progress(presentation_id: str,
-                              check_interval: int = 5, max_checks: int = 60) -> dict:
-    """监控生成进度直到完成（测试用）"""
-    import time
+                              check_interval: int = 5, max_checks: int = 60,
+                              feed=None, status_manager: Optional[StatusManager] = None) -> dict:
+    """监控生成进度直到完成（测试用）
+
+    变更流可用时订阅状态变更，不再按间隔查询；否则按check_interval轮询。
+    """
+    feed = feed if feed is not None else get_status_feed()
+    if feed is not None:
+        return _follow_status_feed(presentation_id, feed, check_interval * max_checks, status_manager)
+
     checks_made = 0
 
     while checks_made < max_checks:
@@ -208,6 +319,31 @@ def monitor_generation_progress(presentation_id: str,
     return {'error': f'Monitoring timeout after {max_checks} checks'}
 
 
+def _follow_status_feed(presentation_id: str, feed, timeout: float,
+                       status_manager: Optional[StatusManager] = None) -> dict:
+    """订阅状态变更直到生成结束或超时"""
+    deadline = time.monotonic() + timeout
+    try:
+        updates = read_status_updates(presentation_id, feed=feed, status_manager=status_manager)
+        if updates is None:
+            return {'error': 'Status check failed'}
+        state, cursor = updates['snapshot'], updates['cursor']
+
+        while state.get('status') not in TERMINAL_STATUSES and state.get('progress', 0) < 100:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {'error': f'Monitoring timeout after {timeout}s'}
+            events = feed.read(presentation_id, cursor, timeout=min(remaining, STATUS_LONG_POLL_MAX_WAIT))
+            if events:
+                state = merge_status_events(state, events)
+                cursor = events[-1]['cursor']
+                logger.info(f"状态变更: 状态={state.get('status')}, 进度={state.get('progress')}%")
+        return state
+    except Exception as e:
+        logger.error(f"监控过程中出错: {str(e)}")
+        return {'error': str(e)}
+
+
 # 兼容测试的别名函数
 def handle_status_request(presentation_id: str) -> dict:
     """处理状态请求（测试兼容）"""
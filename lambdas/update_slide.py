@@ -4,6 +4,7 @@ API: PATCH /presentations/{id}/slides/{n}
 """
 
 import json
+import logging
 import boto3
 import uuid
 import hashlib
@@ -11,6 +12,9 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from botocore.exceptions import ClientError
 
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
 # AWS服务客户端
 s3 = boto3.client('s3')
 dynamodb = boto3.resource('dynamodb')
@@ -78,6 +82,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             # 保存更新
             new_etag = save_presentation(updated_presentation)
 
+            # 增量重新编译PPTX（只重建变化的幻灯片）
+            recompile_presentation(updated_presentation)
+
             # 生成预览URL
             preview_url = generate_preview_url(presentation_id, slide_number)
 
@@ -303,6 +310,25 @@ def save_presentation(presentation: Dict[str, Any]) -> str:
     return etag
 
 
+def recompile_presentation(presentation: Dict[str, Any]) -> Optional[str]:
+    """
+    基于上次编译结果增量更新PPTX，失败不影响本次更新
+    """
+    try:
+        try:
+            from .ppt_compiler import PPTCompiler
+        except ImportError:
+            from ppt_compiler import PPTCompiler
+
+        return PPTCompiler().compile_edited_slides(
+            presentation['presentation_id'],
+            presentation.get('slides', [])
+        )
+    except Exception as e:
+        logger.warning(f"Incremental recompile failed: {e}")
+        return None
+
+
 def generate_etag(data: Dict[str, Any]) -> str:
     """
     生成ETag
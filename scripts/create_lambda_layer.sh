@@ -12,7 +12,7 @@ mkdir -p $LAYER_DIR/python
 
 # 创建requirements文件
 cat > $LAYER_DIR/requirements.txt << EOF
-boto3==1.34.14
+boto3==1.40.30
 python-pptx==0.6.23
 Pillow==10.2.0
 EOF
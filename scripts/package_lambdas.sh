@@ -338,6 +338,11 @@ build_image_generator_optimized() {
         cp "$LAMBDA_DIR/image_processing_service_optimized.py" "$build_path/"
         cp "$LAMBDA_DIR/image_config.py" "$build_path/"
         cp "$LAMBDA_DIR/image_exceptions.py" "$build_path/"
+        cp "$LAMBDA_DIR/single_flight.py" "$build_path/"
+        cp "$LAMBDA_DIR/metrics_emf.py" "$build_path/"
+        # BedrockInvoker 位于 src 包中（from src.bedrock_invoker import ...）
+        cp -r "$PROJECT_ROOT/src" "$build_path/"
+        find "$build_path/src" -name "__pycache__" -type d -prune -exec rm -rf {} +
 
         # 创建简化的优化处理器
         cat > "$build_path/lambda_function.py" << 'EOF'
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+重建演示文稿状态的日期索引（status-index/）
+
+列表查询和过期清理只读取日期索引。索引上线前创建的演示文稿没有索引条目，
+部署后需对每个存储桶运行一次本脚本补齐；重复运行是安全的。
+
+用法:
+    python scripts/rebuild_status_index.py --bucket ai-ppt-presentations-dev
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.status_manager import create_status_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description='重建演示文稿状态日期索引')
+    parser.add_argument('-b', '--bucket', default=os.environ.get('S3_BUCKET'),
+                        help='存储演示文稿的S3桶（默认读取S3_BUCKET环境变量）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if not args.bucket:
+        parser.error('需要通过--bucket或S3_BUCKET指定存储桶')
+
+    count = create_status_manager(args.bucket).rebuild_index()
+    print(f"已为 {count} 个演示文稿写入日期索引: s3://{args.bucket}/status-index/")
+
+
+if __name__ == '__main__':
+    main()
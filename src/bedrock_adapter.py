@@ -115,4 +115,35 @@ class BedrockAdapter:
 
         except Exception as e:
             logger.error(f"解析响应失败: {str(e)}, 响应体: {response_body}")
-            raise ValueError(f"无法解析模型响应: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"无法解析模型响应: {str(e)}")
+
+    @staticmethod
+    def parse_stream_chunk(model_id: str, chunk_body: dict) -> str:
+        """解析invoke_model_with_response_stream返回的单个事件块
+
+        Args:
+            model_id: 模型ID
+            chunk_body: 事件块中bytes字段解码后的JSON
+
+        Returns:
+            本块中的增量文本（无文本时返回空字符串）
+        """
+        try:
+            # Nova模型: {"contentBlockDelta": {"delta": {"text": "..."}}}
+            if 'nova' in model_id.lower():
+                delta = chunk_body.get('contentBlockDelta', {}).get('delta', {})
+                return delta.get('text', '')
+
+            # Claude模型 (Messages API): {"type": "content_block_delta", "delta": {"text": "..."}}
+            elif 'claude' in model_id.lower():
+                if chunk_body.get('type') == 'content_block_delta':
+                    return chunk_body.get('delta', {}).get('text', '')
+                return chunk_body.get('completion', '')
+
+            # 默认格式
+            else:
+                return chunk_body.get('completion', '')
+
+        except Exception as e:
+            logger.error(f"解析流式响应块失败: {str(e)}, 响应块: {chunk_body}")
+            return ""
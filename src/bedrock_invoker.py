@@ -0,0 +1,203 @@
+"""
+Bedrock调用封装 - 线程安全的超时与截止时间控制
+
+替代基于signal.alarm的超时（只能在主线程使用）：
+- botocore读超时限制单次HTTP读取的阻塞时间
+- 调用在共享线程池中执行，调用方通过Future等待，超时后立即返回并取消未开始的任务
+- 每个请求携带一个截止时间（Deadline），所有下游调用共享剩余预算
+"""
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+import boto3
+from botocore.config import Config as BotoConfig
+
+try:
+    from .constants import Config
+    from .exceptions import TimeoutError as AppTimeoutError
+except ImportError:
+    from constants import Config
+    from exceptions import TimeoutError as AppTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceededError(AppTimeoutError, TimeoutError):
+    """调用超过超时时间或请求截止时间
+
+    同时继承内置TimeoutError，原有的except TimeoutError分支仍然生效。
+    """
+
+    # 剩余预算已耗尽，重试没有意义
+    retryable = False
+
+
+class Deadline:
+    """请求级截止时间（基于单调时钟）"""
+
+    def __init__(self, timeout_seconds: float):
+        self.expires_at = time.monotonic() + timeout_seconds
+
+    @classmethod
+    def from_lambda_context(cls, context: Any, reserve_seconds: float = 5.0) -> Optional['Deadline']:
+        """根据Lambda剩余执行时间创建截止时间，预留收尾时间
+
+        Args:
+            context: Lambda上下文（本地调用时可能为None）
+            reserve_seconds: 为保存状态、返回响应预留的秒数
+
+        Returns:
+            截止时间，无法获取剩余时间时返回None
+        """
+        get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        if not callable(get_remaining):
+            return None
+        try:
+            remaining = get_remaining() / 1000.0
+        except Exception:
+            return None
+        return cls(max(0.0, remaining - reserve_seconds))
+
+    def remaining(self) -> float:
+        """剩余秒数（不小于0）"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget(self, timeout: Optional[float]) -> float:
+        """在单次调用超时和剩余预算中取较小值"""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar('bedrock_deadline', default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """当前上下文中的请求截止时间"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """在当前上下文中设置请求截止时间
+
+    BedrockInvoker.call会把当前上下文复制到工作线程；
+    其他线程池不会自动继承contextvars，跨线程时请显式传递deadline。
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def create_bedrock_client(read_timeout: float = Config.Timeout.BEDROCK_TIMEOUT_SECONDS,
+                          connect_timeout: float = 5,
+                          max_pool_connections: int = 50,
+                          **kwargs) -> Any:
+    """创建带读超时的bedrock-runtime客户端
+
+    boto3客户端本身是线程安全的，可以在工作线程之间共享。
+    """
+    config = BotoConfig(
+        read_timeout=read_timeout,
+        connect_timeout=connect_timeout,
+        max_pool_connections=max_pool_connections,
+        retries={'max_attempts': 2, 'mode': 'adaptive'}
+    )
+    return boto3.client('bedrock-runtime', config=config, **kwargs)
+
+
+class BedrockInvoker:
+    """在共享线程池中执行调用，并按超时/截止时间等待结果"""
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, client: Any = None,
+                 default_timeout: float = Config.Timeout.BEDROCK_TIMEOUT_SECONDS,
+                 max_workers: int = 32):
+        """
+        Args:
+            client: bedrock-runtime客户端（可选，invoke_model时使用）
+            default_timeout: 单次调用的默认超时（秒）
+            max_workers: 共享线程池大小（首次创建时生效）
+        """
+        self.client = client
+        self.default_timeout = default_timeout
+        self._max_workers = max_workers
+
+    @classmethod
+    def _get_executor(cls, max_workers: int) -> ThreadPoolExecutor:
+        # 类级别共享，调用方可能本身就在其他线程池的工作线程中
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix="bedrock-invoke"
+                )
+            return cls._executor
+
+    def call(self, fn: Callable[..., Any], *args,
+             timeout: Optional[float] = None,
+             deadline: Optional[Deadline] = None,
+             operation: Optional[str] = None,
+             **kwargs) -> Any:
+        """执行调用，超过超时或截止时间时抛出DeadlineExceededError
+
+        Args:
+            fn: 要执行的函数
+            timeout: 单次调用超时（秒），默认使用default_timeout
+            deadline: 请求截止时间，默认使用当前上下文中的截止时间
+            operation: 用于日志和异常的操作名称
+
+        Returns:
+            fn的返回值
+        """
+        operation = operation or getattr(fn, '__name__', 'bedrock_call')
+        timeout = self.default_timeout if timeout is None else timeout
+        deadline = deadline or current_deadline()
+        budget = deadline.budget(timeout) if deadline else timeout
+
+        if budget <= 0:
+            raise DeadlineExceededError(
+                f"{operation}: 请求截止时间已到，跳过调用",
+                operation=operation,
+                timeout_seconds=0
+            )
+
+        # 复制上下文，工作线程内的嵌套调用共享同一截止时间
+        context = contextvars.copy_context()
+        future = self._get_executor(self._max_workers).submit(context.run, fn, *args, **kwargs)
+        try:
+            return future.result(timeout=budget)
+        except FutureTimeoutError:
+            # 尚未开始的任务会被取消；已在执行的调用由botocore读超时兜底
+            future.cancel()
+            logger.warning(f"{operation} 超时（{budget:.1f}秒）")
+            raise DeadlineExceededError(
+                f"{operation} 超时: {budget:.1f}秒",
+                operation=operation,
+                timeout_seconds=int(budget)
+            )
+
+    def invoke_model(self, timeout: Optional[float] = None,
+                     deadline: Optional[Deadline] = None,
+                     **kwargs) -> Any:
+        """带超时的client.invoke_model"""
+        if self.client is None:
+            raise ValueError("BedrockInvoker未配置client")
+        return self.call(
+            self.client.invoke_model,
+            timeout=timeout,
+            deadline=deadline,
+            operation=f"invoke_model({kwargs.get('modelId', '')})",
+            **kwargs
+        )
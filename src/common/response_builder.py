@@ -9,12 +9,14 @@ class ResponseBuilder:
     """统一的API响应构建器"""
 
     @staticmethod
-    def success_response(status_code: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    def success_response(status_code: int, data: Dict[str, Any],
+                         headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """构建成功响应
 
         Args:
             status_code: HTTP状态码
             data: 响应数据
+            headers: 额外的响应头（可选，如ETag）
 
         Returns:
             标准化的成功响应字典
@@ -23,11 +25,31 @@ class ResponseBuilder:
             'statusCode': status_code,
             'headers': {
                 'Content-Type': Config.API.CONTENT_TYPE_JSON,
-                **Config.API.CORS_HEADERS
+                **Config.API.CORS_HEADERS,
+                **(headers or {})
             },
             'body': json.dumps(data, ensure_ascii=False)
         }
 
+    @staticmethod
+    def not_modified_response(headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """构建304响应（客户端缓存的版本仍然有效）
+
+        Args:
+            headers: 额外的响应头（可选，如ETag）
+
+        Returns:
+            不含响应体的304响应字典
+        """
+        return {
+            'statusCode': Config.API.HTTP_NOT_MODIFIED,
+            'headers': {
+                **Config.API.CORS_HEADERS,
+                **(headers or {})
+            },
+            'body': ''
+        }
+
     @staticmethod
     def error_response(status_code: int, message: str,
                       error_code: Optional[str] = None,
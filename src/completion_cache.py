@@ -0,0 +1,206 @@
+"""
+文本生成缓存 - 跨请求复用相同提示词的Bedrock响应
+
+功能：
+- 按模型ID、标准化提示词和生成参数（temperature/max_tokens）生成缓存键
+- 基于MultiLevelCache（L1内存 + L2 Redis），相同键的并发未命中只调用一次模型
+- 高温度的创意调用不缓存
+- 命中率统计
+"""
+import json
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from .config import PROMPT_CACHE_ENABLED, PROMPT_CACHE_TTL_SECONDS, PROMPT_CACHE_MAX_TEMPERATURE
+except ImportError:
+    from config import PROMPT_CACHE_ENABLED, PROMPT_CACHE_TTL_SECONDS, PROMPT_CACHE_MAX_TEMPERATURE
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _default_backend():
+    """获取容器内共享的MultiLevelCache实例，缓存模块不可用时返回None"""
+    try:
+        from lambdas.cache_manager import get_cache_instance
+    except ImportError:
+        try:
+            from cache_manager import get_cache_instance
+        except ImportError as e:
+            logger.warning(f"缓存模块不可用，文本生成缓存已禁用: {e}")
+            return None
+    try:
+        return get_cache_instance()
+    except Exception as e:
+        logger.warning(f"初始化缓存失败，文本生成缓存已禁用: {e}")
+        return None
+
+
+class CompletionCache:
+    """Bedrock文本生成结果缓存"""
+
+    KEY_PREFIX = "completion"
+
+    def __init__(self, backend: Optional[Any] = None,
+                 ttl: int = PROMPT_CACHE_TTL_SECONDS,
+                 max_temperature: float = PROMPT_CACHE_MAX_TEMPERATURE,
+                 enabled: bool = True):
+        """
+        Args:
+            backend: 缓存后端（MultiLevelCache或兼容get/set/get_or_compute的对象），
+                     None表示首次使用时获取共享实例
+            ttl: 缓存有效期（秒）
+            max_temperature: 可缓存的最高温度，高于该值的调用直接请求模型
+            enabled: 是否启用缓存
+        """
+        self._backend = backend
+        self._backend_resolved = backend is not None
+        self._backend_lock = threading.Lock()
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+        self.enabled = enabled
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'bypassed': 0,
+            'errors': 0
+        }
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """标准化提示词：统一Unicode全半角形式，合并空白字符
+
+        只做不改变语义的标准化（不改变大小写、不替换同义词），
+        避免把含义不同的提示词映射到同一响应。
+        """
+        normalized = unicodedata.normalize('NFKC', prompt)
+        return _WHITESPACE.sub(' ', normalized).strip()
+
+    @classmethod
+    def make_key(cls, model_id: str, prompt: str, temperature: float,
+                 max_tokens: int, **params: Any) -> str:
+        """生成缓存键
+
+        Args:
+            model_id: 模型ID
+            prompt: 提示词
+            temperature: 生成温度
+            max_tokens: 最大输出token数
+            **params: 其他影响输出的参数（如system提示词）
+
+        Returns:
+            str: 缓存键
+        """
+        payload = json.dumps({
+            'prompt': cls.normalize_prompt(prompt),
+            'temperature': round(float(temperature), 3),
+            'max_tokens': int(max_tokens),
+            'params': params
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return f"{cls.KEY_PREFIX}:{model_id}:{digest}"
+
+    def cacheable(self, temperature: float) -> bool:
+        """该温度的调用是否可缓存"""
+        return self.enabled and temperature <= self.max_temperature
+
+    def get_or_generate(self, model_id: str, prompt: str, generate_fn: Callable[[], Any],
+                        temperature: float, max_tokens: int, **params: Any) -> Any:
+        """
+        返回缓存的响应，未命中时调用generate_fn生成并写入缓存
+
+        空响应不缓存；generate_fn抛出的异常原样传播，不写入缓存。
+
+        Args:
+            model_id: 模型ID
+            prompt: 提示词
+            generate_fn: 实际调用模型的函数
+            temperature: 生成温度
+            max_tokens: 最大输出token数
+            **params: 其他影响输出的参数
+
+        Returns:
+            模型响应
+        """
+        backend = self._get_backend() if self.cacheable(temperature) else None
+        if backend is None:
+            self._count('bypassed')
+            return generate_fn()
+
+        key = self.make_key(model_id, prompt, temperature, max_tokens, **params)
+        generated = []
+
+        def compute():
+            result = generate_fn()
+            generated.append(result)
+            # 空响应返回None，MultiLevelCache不会写入
+            return result if result else None
+
+        value = backend.get_or_compute(key, compute, self.ttl)
+
+        if generated:
+            self._count('misses')
+            return generated[0]
+        if not value:
+            # 合并的请求失败或返回空响应时自行调用模型
+            self._count('misses')
+            return generate_fn()
+
+        self._count('hits')
+        logger.debug(f"文本生成缓存命中: {key}")
+        return value
+
+    def invalidate(self, model_id: Optional[str] = None) -> int:
+        """使缓存的响应失效
+
+        Args:
+            model_id: 只失效该模型的响应，None表示全部
+
+        Returns:
+            失效的键数量
+        """
+        backend = self._get_backend()
+        if backend is None:
+            return 0
+        return backend.invalidate_pattern(f"{self.KEY_PREFIX}:{model_id or '*'}:*")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中率统计"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['enabled'] = self.enabled
+        return stats
+
+    def _get_backend(self):
+        if not self._backend_resolved:
+            with self._backend_lock:
+                if not self._backend_resolved:
+                    self._backend = _default_backend()
+                    self._backend_resolved = True
+        return self._backend
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+
+_completion_cache: Optional[CompletionCache] = None
+_completion_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    """获取容器内共享的文本生成缓存（由PROMPT_CACHE_ENABLED控制是否启用）"""
+    global _completion_cache
+    with _completion_cache_lock:
+        if _completion_cache is None:
+            _completion_cache = CompletionCache(enabled=PROMPT_CACHE_ENABLED)
+        return _completion_cache
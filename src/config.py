@@ -15,6 +15,28 @@ BEDROCK_MODEL_ID = "amazon.nova-pro-v1:0"  # Amazon Nova Pro - AWS原生模型
 MAX_TOKENS = 20000
 TEMPERATURE = 0.7
 
+# 并发配置
+CONTENT_MAX_WORKERS = int(os.environ.get('CONTENT_MAX_WORKERS', '4'))  # 幻灯片内容并发生成的线程数
+BEDROCK_REQUESTS_PER_SECOND = float(os.environ.get('BEDROCK_REQUESTS_PER_SECOND', '2.0'))  # 容器内共享的调用速率
+BEDROCK_SHARED_QUOTA_TABLE = os.environ.get('BEDROCK_SHARED_QUOTA_TABLE', '')  # 跨容器共享配额的DynamoDB表（为空则不启用）
+BEDROCK_SHARED_REQUESTS_PER_SECOND = float(os.environ.get('BEDROCK_SHARED_REQUESTS_PER_SECOND', '10.0'))  # 所有容器合计的调用速率
+STREAMING_OUTLINE_ENABLED = os.environ.get('STREAMING_OUTLINE_ENABLED', 'false').lower() == 'true'  # 大纲流式生成，边生成边派发内容
+
+# 文本生成缓存配置（跨请求复用相同提示词的响应）
+PROMPT_CACHE_ENABLED = os.environ.get('PROMPT_CACHE_ENABLED', 'false').lower() == 'true'  # 是否启用
+PROMPT_CACHE_TTL_SECONDS = int(os.environ.get('PROMPT_CACHE_TTL_SECONDS', '86400'))  # 缓存有效期（秒）
+PROMPT_CACHE_MAX_TEMPERATURE = float(os.environ.get('PROMPT_CACHE_MAX_TEMPERATURE', '0.7'))  # 高于该温度的创意调用不缓存
+
+# 状态推送配置（客户端长轮询订阅状态变更，替代定时读取status.json）
+STATUS_FEED_REDIS_ENDPOINT = os.environ.get('STATUS_FEED_REDIS_ENDPOINT', os.environ.get('REDIS_ENDPOINT', ''))  # 跨容器变更流的Redis端点（为空则不启用推送）
+STATUS_FEED_HISTORY = int(os.environ.get('STATUS_FEED_HISTORY', '100'))  # 每个演示文稿保留的变更条数
+STATUS_FEED_TTL_SECONDS = int(os.environ.get('STATUS_FEED_TTL_SECONDS', '86400'))  # 变更流有效期（秒）
+STATUS_LONG_POLL_MAX_WAIT = float(os.environ.get('STATUS_LONG_POLL_MAX_WAIT', '8'))  # 单次长轮询最长等待（秒），需小于状态查询Lambda超时
+
+# 状态缓存配置（status.json的容器内缓存与ETag条件读取）
+STATUS_CACHE_TTL_SECONDS = float(os.environ.get('STATUS_CACHE_TTL_SECONDS', '2'))  # 未过期时不访问S3，过期后条件GET校验
+STATUS_CACHE_MAX_ENTRIES = int(os.environ.get('STATUS_CACHE_MAX_ENTRIES', '1024'))  # 最多缓存的演示文稿数
+
 # 业务配置
 DEFAULT_PAGE_COUNT = 5
 MIN_PAGE_COUNT = 3
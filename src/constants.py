@@ -8,6 +8,7 @@ class APIConstants:
     # 响应状态码
     HTTP_OK = 200
     HTTP_ACCEPTED = 202
+    HTTP_NOT_MODIFIED = 304
     HTTP_BAD_REQUEST = 400
     HTTP_NOT_FOUND = 404
     HTTP_INTERNAL_ERROR = 500
@@ -17,7 +18,8 @@ class APIConstants:
     CORS_HEADERS = {
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-        'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+        'Access-Control-Allow-Methods': 'GET,POST,OPTIONS',
+        'Access-Control-Expose-Headers': 'ETag'
     }
 
     # 内容类型
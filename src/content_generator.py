@@ -9,10 +9,10 @@
 注意: S3操作已分离到独立的服务类中
 """
 import json
-import boto3
 import uuid
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from botocore.exceptions import ClientError
 
@@ -26,10 +26,17 @@ try:
         MIN_PAGE_COUNT,
         MAX_PAGE_COUNT,
         S3_BUCKET,
-        AWS_REGION
+        AWS_REGION,
+        BEDROCK_REQUESTS_PER_SECOND,
+        BEDROCK_SHARED_QUOTA_TABLE,
+        BEDROCK_SHARED_REQUESTS_PER_SECOND
     )
     from .prompts import OUTLINE_PROMPT, CONTENT_PROMPT
     from .utils import retry_with_backoff, validate_json_response, clean_text
+    from .throttle_manager import ThrottleManager, RateBudget
+    from .stream_parser import OutlineStreamParser
+    from .bedrock_invoker import BedrockInvoker, Deadline, DeadlineExceededError, create_bedrock_client
+    from .completion_cache import CompletionCache, get_completion_cache
     from .constants import Config
     from .exceptions import (
         ContentGenerationError,
@@ -54,10 +61,17 @@ except ImportError:
         MIN_PAGE_COUNT,
         MAX_PAGE_COUNT,
         S3_BUCKET,
-        AWS_REGION
+        AWS_REGION,
+        BEDROCK_REQUESTS_PER_SECOND,
+        BEDROCK_SHARED_QUOTA_TABLE,
+        BEDROCK_SHARED_REQUESTS_PER_SECOND
     )
     from prompts import OUTLINE_PROMPT, CONTENT_PROMPT
     from utils import retry_with_backoff, validate_json_response, clean_text
+    from throttle_manager import ThrottleManager, RateBudget
+    from stream_parser import OutlineStreamParser
+    from bedrock_invoker import BedrockInvoker, Deadline, DeadlineExceededError, create_bedrock_client
+    from completion_cache import CompletionCache, get_completion_cache
     from constants import Config
     from bedrock_adapter import BedrockAdapter
     from exceptions import (
@@ -83,23 +97,63 @@ class ContentGenerator:
 
     def __init__(self,
                  bedrock_client: Optional[Any] = None,
-                 s3_service: Optional[S3Service] = None) -> None:
+                 s3_service: Optional[S3Service] = None,
+                 max_workers: int = 1,
+                 rate_budget: Optional[RateBudget] = None,
+                 deadline: Optional[Deadline] = None,
+                 invoke_timeout: float = Config.Timeout.BEDROCK_TIMEOUT_SECONDS,
+                 completion_cache: Optional[CompletionCache] = None) -> None:
         """初始化内容生成器
 
         Args:
             bedrock_client: Bedrock客户端（可选，用于测试）
             s3_service: S3服务实例（可选）
+            max_workers: 幻灯片内容并发生成的最大线程数，1表示逐页生成
+            rate_budget: Bedrock调用速率预算（可选），并发模式下默认使用容器内共享预算
+            deadline: 请求截止时间（可选），所有Bedrock调用共享剩余时间
+            invoke_timeout: 单次Bedrock调用超时（秒）
+            completion_cache: 文本生成缓存（可选），默认使用容器内共享缓存
         """
-        self.bedrock_client = bedrock_client or boto3.client(
-            'bedrock-runtime',
+        # 读超时与单次调用超时一致，超时返回后工作线程上的HTTP读取也会及时结束
+        self.bedrock_client = bedrock_client or create_bedrock_client(
+            read_timeout=invoke_timeout,
             region_name=AWS_REGION
         )
         self.s3_service = s3_service
         self.model_id = BEDROCK_MODEL_ID
+        self.max_workers = max(1, max_workers)
+        if rate_budget is None and self.max_workers > 1:
+            # 按模型划分的自适应令牌桶，容器内所有调用方共享
+            rate_budget = ThrottleManager.get_shared_limiter(
+                rate=BEDROCK_REQUESTS_PER_SECOND,
+                quota_table=BEDROCK_SHARED_QUOTA_TABLE or None,
+                shared_rate=BEDROCK_SHARED_REQUESTS_PER_SECOND
+            ).bucket(self.model_id)
+        self.rate_budget = rate_budget
+        self.deadline = deadline
+        self.invoker = BedrockInvoker(default_timeout=invoke_timeout)
+        self.completion_cache = completion_cache or get_completion_cache()
 
-    @retry_with_backoff(max_retries=5, initial_delay=2, backoff_factor=3, max_delay=60)
     def _invoke_bedrock(self, prompt: str) -> str:
-        """调用Bedrock API
+        """调用Bedrock API，相同提示词和参数的响应跨请求复用
+
+        Args:
+            prompt: 提示词
+
+        Returns:
+            模型响应文本
+        """
+        return self.completion_cache.get_or_generate(
+            self.model_id,
+            prompt,
+            lambda: self._invoke_bedrock_uncached(prompt),
+            temperature=Config.Bedrock.DEFAULT_TEMPERATURE,
+            max_tokens=Config.Bedrock.DEFAULT_MAX_TOKENS
+        )
+
+    @retry_with_backoff(max_retries=5, initial_delay=2, backoff_factor=3, max_delay=60)
+    def _invoke_bedrock_uncached(self, prompt: str) -> str:
+        """调用Bedrock API（不经过缓存，失败时退避重试）
 
         Args:
             prompt: 提示词
@@ -107,6 +161,10 @@ class ContentGenerator:
         Returns:
             模型响应文本
         """
+        # 每次尝试（包括重试）都从共享预算中扣除一个令牌
+        if self.rate_budget is not None:
+            self.rate_budget.acquire()
+
         try:
             # 使用适配器构建请求体
             request_body = BedrockAdapter.prepare_request(
@@ -116,8 +174,11 @@ class ContentGenerator:
                 temperature=Config.Bedrock.DEFAULT_TEMPERATURE
             )
 
-            # 调用Bedrock
-            response = self.bedrock_client.invoke_model(
+            # 调用Bedrock（线程安全的超时控制，可在工作线程中使用）
+            response = self.invoker.call(
+                self.bedrock_client.invoke_model,
+                deadline=self.deadline,
+                operation="invoke_model",
                 modelId=self.model_id,
                 contentType=Config.API.CONTENT_TYPE_JSON,
                 accept=Config.API.CONTENT_TYPE_JSON,
@@ -134,15 +195,28 @@ class ContentGenerator:
                     model_id=self.model_id
                 )
 
+            if self.rate_budget is not None:
+                self.rate_budget.on_success()
+
             return completion
 
+        except DeadlineExceededError:
+            raise
         except ClientError as e:
             logger.error(f"Bedrock API调用失败: {str(e)}")
+            self._record_throttle(e)
             raise handle_aws_error(e)
         except Exception as e:
             logger.error(f"处理Bedrock响应时出错: {str(e)}")
             raise BedrockAPIError(f"处理Bedrock响应时出错: {str(e)}", model_id=self.model_id)
 
+    def _record_throttle(self, error: ClientError) -> None:
+        """收到限流响应时降低共享速率预算（AIMD）"""
+        if self.rate_budget is None:
+            return
+        if error.response.get('Error', {}).get('Code') in ('ThrottlingException', 'TooManyRequestsException'):
+            self.rate_budget.on_throttle()
+
     def generate_outline(self,
                         topic: str,
                         page_count: int = DEFAULT_PAGE_COUNT) -> OutlineData:
@@ -178,7 +252,13 @@ class ContentGenerator:
             # 返回默认大纲结构
             outline = self._create_default_outline(topic, page_count)
 
-        # 确保必要字段存在
+        return self._finalize_outline(outline, topic, page_count)
+
+    def _finalize_outline(self,
+                          outline: OutlineData,
+                          topic: str,
+                          page_count: int) -> OutlineData:
+        """确保大纲包含必要字段"""
         if "title" not in outline:
             outline["title"] = topic
         if "metadata" not in outline:
@@ -190,67 +270,221 @@ class ContentGenerator:
 
     def generate_slide_content(self,
                               outline: OutlineData,
-                              include_speaker_notes: bool = True) -> List[SlideContent]:
+                              include_speaker_notes: bool = True,
+                              max_workers: Optional[int] = None) -> List[SlideContent]:
         """为每页生成详细内容
 
         Args:
             outline: PPT大纲
             include_speaker_notes: 是否包含演讲者备注
+            max_workers: 并发线程数（可选），默认使用初始化时的配置
 
         Returns:
-            包含详细内容的幻灯片列表
+            包含详细内容的幻灯片列表，顺序与大纲一致
         """
-        slides = []
         topic = outline.get("title", "")
+        slide_infos = outline.get("slides", [])
+        workers = min(max_workers or self.max_workers, len(slide_infos))
 
-        for slide_info in outline.get("slides", []):
-            slide_number = slide_info.get("slide_number", len(slides) + 1)
-            slide_title = slide_info.get("title", f"幻灯片 {slide_number}")
-            slide_purpose = slide_info.get("content", [""])[0] if slide_info.get("content") else ""
+        if workers <= 1:
+            return [
+                self._generate_single_slide(slide_info, index, topic, include_speaker_notes)
+                for index, slide_info in enumerate(slide_infos)
+            ]
 
-            # 构建提示词
-            prompt = CONTENT_PROMPT.format(
-                page_title=slide_title,
-                page_purpose=slide_purpose,
-                topic=topic,
-                slide_number=slide_number
+        logger.info(f"并发生成 {len(slide_infos)} 页内容，线程数: {workers}")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slide-content") as executor:
+            # executor.map按提交顺序返回结果，保证幻灯片顺序
+            return list(executor.map(
+                lambda args: self._generate_single_slide(args[1], args[0], topic, include_speaker_notes),
+                enumerate(slide_infos)
+            ))
+
+    def _generate_single_slide(self,
+                               slide_info: Dict[str, Any],
+                               index: int,
+                               topic: str,
+                               include_speaker_notes: bool) -> SlideContent:
+        """生成单页内容，失败时回退到默认内容
+
+        Args:
+            slide_info: 大纲中的幻灯片信息
+            index: 幻灯片在大纲中的位置（从0开始）
+            topic: PPT主题
+            include_speaker_notes: 是否包含演讲者备注
+
+        Returns:
+            幻灯片内容
+        """
+        slide_number = slide_info.get("slide_number", index + 1)
+        slide_title = slide_info.get("title", f"幻灯片 {slide_number}")
+        slide_purpose = slide_info.get("content", [""])[0] if slide_info.get("content") else ""
+
+        # 构建提示词
+        prompt = CONTENT_PROMPT.format(
+            page_title=slide_title,
+            page_purpose=slide_purpose,
+            topic=topic,
+            slide_number=slide_number
+        )
+
+        # 调用Bedrock生成内容
+        try:
+            response_text = self._invoke_bedrock(prompt)
+            # 解析响应
+            slide_content = validate_json_response(response_text)
+        except BedrockAPIError:
+            logger.warning(f"幻灯片 {slide_number} Bedrock调用失败，使用默认内容")
+            slide_content = self._create_default_slide_content(
+                slide_number, slide_title, slide_info.get("content", [])
+            )
+        except Exception as e:
+            logger.warning(f"幻灯片 {slide_number} 内容解析失败: {str(e)}，使用默认内容")
+            slide_content = self._create_default_slide_content(
+                slide_number, slide_title, slide_info.get("content", [])
             )
 
-            # 调用Bedrock生成内容
-            try:
-                response_text = self._invoke_bedrock(prompt)
-                # 解析响应
-                slide_content = validate_json_response(response_text)
-            except BedrockAPIError:
-                logger.warning(f"幻灯片 {slide_number} Bedrock调用失败，使用默认内容")
-                slide_content = self._create_default_slide_content(
-                    slide_number, slide_title, slide_info.get("content", [])
-                )
-            except Exception as e:
-                logger.warning(f"幻灯片 {slide_number} 内容解析失败: {str(e)}，使用默认内容")
-                slide_content = self._create_default_slide_content(
-                    slide_number, slide_title, slide_info.get("content", [])
-                )
+        # 确保必要字段
+        if "slide_number" not in slide_content:
+            slide_content["slide_number"] = slide_number
+        if "title" not in slide_content:
+            slide_content["title"] = slide_title
+        if "bullet_points" not in slide_content or len(slide_content["bullet_points"]) < Config.PPT.MIN_BULLET_POINTS:
+            slide_content["bullet_points"] = self._ensure_min_bullets(
+                slide_content.get("bullet_points", []),
+                slide_info.get("content", []),
+                Config.PPT.MIN_BULLET_POINTS
+            )
 
-            # 确保必要字段
-            if "slide_number" not in slide_content:
-                slide_content["slide_number"] = slide_number
-            if "title" not in slide_content:
-                slide_content["title"] = slide_title
-            if "bullet_points" not in slide_content or len(slide_content["bullet_points"]) < Config.PPT.MIN_BULLET_POINTS:
-                slide_content["bullet_points"] = self._ensure_min_bullets(
-                    slide_content.get("bullet_points", []),
-                    slide_info.get("content", []),
-                    Config.PPT.MIN_BULLET_POINTS
-                )
+        # 添加演讲者备注
+        if include_speaker_notes and "speaker_notes" not in slide_content:
+            slide_content["speaker_notes"] = f"介绍{slide_title}的主要内容"
+
+        return slide_content
 
-            # 添加演讲者备注
-            if include_speaker_notes and "speaker_notes" not in slide_content:
-                slide_content["speaker_notes"] = f"介绍{slide_title}的主要内容"
+    def _invoke_bedrock_stream(self, prompt: str) -> Iterator[str]:
+        """调用Bedrock流式API，逐段返回模型输出的文本
 
-            slides.append(slide_content)
+        Args:
+            prompt: 提示词
 
-        return slides
+        Yields:
+            增量文本片段
+        """
+        if self.deadline is not None and self.deadline.expired():
+            raise DeadlineExceededError("请求截止时间已到，跳过流式调用", operation="invoke_model_with_response_stream")
+
+        if self.rate_budget is not None:
+            self.rate_budget.acquire()
+
+        request_body = BedrockAdapter.prepare_request(
+            model_id=self.model_id,
+            prompt=prompt,
+            max_tokens=Config.Bedrock.DEFAULT_MAX_TOKENS,
+            temperature=Config.Bedrock.DEFAULT_TEMPERATURE
+        )
+
+        try:
+            response = self.bedrock_client.invoke_model_with_response_stream(
+                modelId=self.model_id,
+                contentType=Config.API.CONTENT_TYPE_JSON,
+                accept=Config.API.CONTENT_TYPE_JSON,
+                body=json.dumps(request_body)
+            )
+
+            for event in response['body']:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                text = BedrockAdapter.parse_stream_chunk(self.model_id, json.loads(chunk['bytes']))
+                if text:
+                    yield text
+
+            if self.rate_budget is not None:
+                self.rate_budget.on_success()
+
+        except ClientError as e:
+            logger.error(f"Bedrock流式API调用失败: {str(e)}")
+            self._record_throttle(e)
+            raise BedrockAPIError(
+                f"Bedrock流式API调用失败: {str(e)}",
+                model_id=self.model_id,
+                aws_error_code=e.response.get('Error', {}).get('Code')
+            )
+        except BedrockAPIError:
+            raise
+        except Exception as e:
+            logger.error(f"处理Bedrock流式响应时出错: {str(e)}")
+            raise BedrockAPIError(f"处理Bedrock流式响应时出错: {str(e)}", model_id=self.model_id)
+
+    def generate_presentation_streaming(self,
+                                        topic: str,
+                                        page_count: int = DEFAULT_PAGE_COUNT,
+                                        include_speaker_notes: bool = True
+                                        ) -> Tuple[OutlineData, List[SlideContent]]:
+        """流式生成大纲，并在每页大纲完成时立即开始生成该页内容
+
+        模型仍在输出第N+1页大纲时，第N页的内容生成已经在线程池中进行，
+        从而让大纲生成和内容生成两个阶段重叠。流式调用失败时回退到
+        generate_outline的非流式路径，已开始的幻灯片不会重复生成。
+
+        Args:
+            topic: PPT主题
+            page_count: 页数（3-20）
+            include_speaker_notes: 是否包含演讲者备注
+
+        Returns:
+            (大纲, 按大纲顺序排列的幻灯片内容列表)
+        """
+        if page_count < Config.PPT.MIN_PAGE_COUNT or page_count > Config.PPT.MAX_PAGE_COUNT:
+            raise OutlineGenerationError(
+                f"页数必须在{Config.PPT.MIN_PAGE_COUNT}-{Config.PPT.MAX_PAGE_COUNT}之间",
+                topic=topic,
+                page_count=page_count
+            )
+
+        prompt = OUTLINE_PROMPT.format(topic=topic, page_count=page_count)
+        parser = OutlineStreamParser()
+        streamed_slides: List[Dict[str, Any]] = []
+        futures = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="slide-content") as executor:
+
+            def dispatch(slide_info: Dict[str, Any]) -> None:
+                index = len(futures)
+                futures.append(executor.submit(
+                    self._generate_single_slide, slide_info, index, topic, include_speaker_notes
+                ))
+
+            try:
+                for text in self._invoke_bedrock_stream(prompt):
+                    for slide_info in parser.feed(text):
+                        logger.info(f"大纲第 {len(futures) + 1} 页已就绪，开始生成内容")
+                        streamed_slides.append(slide_info)
+                        dispatch(slide_info)
+
+                try:
+                    outline = validate_json_response(parser.text)
+                except Exception as e:
+                    logger.warning(f"完整大纲解析失败: {str(e)}，使用已流式解析的幻灯片")
+                    outline = {"title": topic, "slides": list(streamed_slides)}
+
+                if not outline.get("slides"):
+                    outline = self._create_default_outline(topic, page_count)
+
+            except BedrockAPIError as e:
+                logger.warning(f"流式大纲生成失败: {str(e)}，回退到非流式生成")
+                outline = self.generate_outline(topic, page_count)
+
+            # 已开始生成的页保持流式版本，其余页补充派发
+            slides_info = outline.get("slides", [])
+            outline["slides"] = streamed_slides + slides_info[len(streamed_slides):]
+            for slide_info in outline["slides"][len(futures):]:
+                dispatch(slide_info)
+
+            slides = [future.result() for future in futures]
+
+        return self._finalize_outline(outline, topic, page_count), slides
 
     def save_to_s3(self,
                    presentation_id: str,
@@ -1,85 +1,267 @@
 """
 PPT验证器 - 验证生成的PPTX文件的完整性和质量
+
+PPTX只解析一次，得到共享的幻灯片/形状模型，各项检查作为访问者
+在同一次遍历中完成。
 """
 
 import zipfile
 import logging
-from typing import Dict, Any, List
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Union
 from io import BytesIO
 from pptx import Presentation
 
 logger = logging.getLogger(__name__)
 
+# python-pptx 形状类型编号
+SHAPE_TYPE_AUTO_SHAPE = 1
+SHAPE_TYPE_PICTURE = 13
+
+
+@dataclass
+class ShapeModel:
+    """形状模型：只保留检查需要的字段"""
+    shape_type: Optional[int]
+    text: Optional[str]
+
+    @property
+    def has_text_frame(self) -> bool:
+        return self.text is not None
+
+    @property
+    def stripped_text(self) -> str:
+        return self.text.strip() if self.text else ''
+
+
+@dataclass
+class SlideModel:
+    """幻灯片模型"""
+    index: int
+    shapes: List[ShapeModel] = field(default_factory=list)
+
 
-def validate_pptx_integrity(pptx_bytes: bytes) -> bool:
+@dataclass
+class DeckModel:
+    """演示文稿模型，解析失败时记录原因"""
+    slides: List[SlideModel] = field(default_factory=list)
+    is_zip: bool = True
+    error: Optional[str] = None
+
+    @property
+    def parsed(self) -> bool:
+        return self.is_zip and self.error is None
+
+
+def _shape_type(shape) -> Optional[int]:
+    """读取形状类型，无法识别的形状返回None"""
+    try:
+        shape_type = shape.shape_type
+    except Exception:
+        return None
+    return int(shape_type) if shape_type is not None else None
+
+
+def parse_deck(pptx_bytes: bytes) -> DeckModel:
     """
-    验证PPTX文件完整性
+    解析PPTX为共享模型
 
     Args:
         pptx_bytes: PPTX文件字节数据
 
     Returns:
-        bool: 文件是否完整有效
+        DeckModel: 幻灯片/形状模型
     """
+    stream = BytesIO(pptx_bytes)
+    if not zipfile.is_zipfile(stream):
+        return DeckModel(is_zip=False, error="PPTX file is not a valid ZIP file")
+
     try:
-        # 检查是否为有效的ZIP文件（PPTX本质上是ZIP）
-        if not zipfile.is_zipfile(BytesIO(pptx_bytes)):
-            logger.error("PPTX file is not a valid ZIP file")
-            return False
+        stream.seek(0)
+        prs = Presentation(stream)
+        slides = []
+        for index, slide in enumerate(prs.slides):
+            shapes = [
+                ShapeModel(shape_type=_shape_type(shape),
+                           text=shape.text if hasattr(shape, 'text') else None)
+                for shape in slide.shapes
+            ]
+            slides.append(SlideModel(index=index, shapes=shapes))
+        return DeckModel(slides=slides)
+    except Exception as e:
+        return DeckModel(error=str(e))
+
+
+def _as_deck(source: Union[bytes, DeckModel]) -> DeckModel:
+    return source if isinstance(source, DeckModel) else parse_deck(source)
+
 
-        # 尝试使用python-pptx打开文件
-        pptx_stream = BytesIO(pptx_bytes)
-        prs = Presentation(pptx_stream)
+class DeckCheck:
+    """检查访问者基类：逐张幻灯片访问，最后给出结果"""
 
-        # 检查是否至少有一个幻灯片
-        if len(prs.slides) == 0:
+    def visit_slide(self, slide: SlideModel) -> None:
+        pass
+
+    def result(self, deck: DeckModel):
+        raise NotImplementedError
+
+
+class IntegrityCheck(DeckCheck):
+    """文件完整性检查"""
+
+    def result(self, deck: DeckModel) -> bool:
+        if not deck.is_zip:
+            logger.error(deck.error)
+            return False
+        if deck.error:
+            logger.error(f"PPTX file validation failed: {deck.error}")
+            return False
+        if not deck.slides:
             logger.error("PPTX file contains no slides")
             return False
 
-        logger.info(f"PPTX file validation passed: {len(prs.slides)} slides found")
+        logger.info(f"PPTX file validation passed: {len(deck.slides)} slides found")
         return True
 
-    except Exception as e:
-        logger.error(f"PPTX file validation failed: {e}")
-        return False
 
+class StructureCheck(DeckCheck):
+    """幻灯片结构检查"""
 
-def validate_content_completeness(input_content: Dict[str, Any], pptx_bytes: bytes) -> bool:
-    """
-    验证幻灯片内容完整性
+    def __init__(self):
+        self.summary = {
+            'total_slides': 0,
+            'slides_with_title': 0,
+            'slides_with_content': 0,
+            'slides_with_images': 0,
+            'empty_slides': 0,
+            'valid': True,
+            'issues': []
+        }
 
-    Args:
-        input_content: 输入的内容数据
-        pptx_bytes: 生成的PPTX文件字节数据
+    def visit_slide(self, slide: SlideModel) -> None:
+        summary = self.summary
+        summary['total_slides'] += 1
+
+        slide_has_title = False
+        slide_has_content = False
+        slide_has_images = False
+        text_shapes = 0
+
+        for shape in slide.shapes:
+            if shape.stripped_text:
+                text_shapes += 1
+                if not slide_has_title:
+                    slide_has_title = True
+                elif not slide_has_content:
+                    slide_has_content = True
+
+            # 检查图片（简化检查）
+            if shape.shape_type == SHAPE_TYPE_PICTURE:
+                slide_has_images = True
+
+        if slide_has_title:
+            summary['slides_with_title'] += 1
+        if slide_has_content:
+            summary['slides_with_content'] += 1
+        if slide_has_images:
+            summary['slides_with_images'] += 1
+
+        # 检查空幻灯片
+        if text_shapes == 0:
+            summary['empty_slides'] += 1
+            summary['issues'].append(f"Slide {slide.index + 1}: No text content")
+
+        # 检查只有标题没有内容的幻灯片
+        if slide_has_title and not slide_has_content:
+            summary['issues'].append(f"Slide {slide.index + 1}: Title only, no content")
+
+    def result(self, deck: DeckModel) -> Dict[str, Any]:
+        if not deck.parsed:
+            logger.error(f"Slide structure validation failed: {deck.error}")
+            return {'valid': False, 'error': deck.error}
 
-    Returns:
-        bool: 内容是否完整
+        # 判断整体有效性
+        if self.summary['empty_slides'] > 0:
+            self.summary['valid'] = False
+
+        logger.info(f"Slide structure validation completed: {self.summary}")
+        return self.summary
+
+
+class AccessibilityCheck(DeckCheck):
+    """可访问性检查"""
+
+    def __init__(self):
+        self.total_checks = 0
+        self.passed_checks = 0
+
+    def visit_slide(self, slide: SlideModel) -> None:
+        # 检查1: 是否有标题（带文本的自选图形）
+        self.total_checks += 1
+        if any(shape.shape_type == SHAPE_TYPE_AUTO_SHAPE and shape.stripped_text
+               for shape in slide.shapes):
+            self.passed_checks += 1
+
+        # 检查2: 文本是否可读（非空）
+        self.total_checks += 1
+        if any(len(shape.stripped_text) > 5 for shape in slide.shapes):
+            self.passed_checks += 1
+
+    def result(self, deck: DeckModel) -> float:
+        if not deck.parsed:
+            logger.error(f"Accessibility validation failed: {deck.error}")
+            return 0.0
+        if self.total_checks == 0:
+            return 0.0
+
+        score = self.passed_checks / self.total_checks
+        logger.info(f"Accessibility score: {score:.2f} ({self.passed_checks}/{self.total_checks})")
+        return score
+
+
+class ContentCompletenessCheck(DeckCheck):
     """
-    try:
-        # 提取输入内容的文本
-        input_texts = []
+    内容完整性检查
+
+    遍历时收集幻灯片文本，结束后拼接一次，逐条对输入文本做子串查找。
+    """
+
+    def __init__(self, input_content: Dict[str, Any]):
+        self.input_content = input_content
+        self.texts: List[str] = []
+
+    @staticmethod
+    def _input_texts(input_content: Dict[str, Any]) -> List[str]:
+        texts = []
         if 'slides' in input_content:
             for slide in input_content['slides']:
                 if 'title' in slide:
-                    input_texts.append(slide['title'])
+                    texts.append(slide['title'])
                 if 'bullet_points' in slide:
-                    input_texts.extend(slide['bullet_points'])
-
-        # 从PPTX文件提取文本
-        pptx_stream = BytesIO(pptx_bytes)
-        prs = Presentation(pptx_stream)
-
-        pptx_text = ""
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text.strip():
-                    pptx_text += shape.text + " "
+                    texts.extend(slide['bullet_points'])
+        return texts
+
+    def visit_slide(self, slide: SlideModel) -> None:
+        for shape in slide.shapes:
+            if shape.stripped_text:
+                self.texts.append(shape.text)
+
+    def missing(self) -> List[str]:
+        """未在幻灯片中找到的输入文本"""
+        full_text = ' '.join(self.texts)
+        return [text for text in self._input_texts(self.input_content)
+                if text.strip() and text.strip() not in full_text]
+
+    def result(self, deck: DeckModel) -> bool:
+        if not deck.parsed:
+            logger.error(f"Content completeness validation failed: {deck.error}")
+            return False
 
-        # 检查输入文本是否都存在于PPTX中
-        missing_content = []
-        for text in input_texts:
-            if text.strip() and text.strip() not in pptx_text:
-                missing_content.append(text)
+        try:
+            missing_content = self.missing()
+        except Exception as e:
+            logger.error(f"Content completeness validation failed: {e}")
+            return False
 
         if missing_content:
             logger.warning(f"Missing content in PPTX: {missing_content}")
@@ -88,66 +270,63 @@ def validate_content_completeness(input_content: Dict[str, Any], pptx_bytes: byt
         logger.info("Content completeness validation passed")
         return True
 
-    except Exception as e:
-        logger.error(f"Content completeness validation failed: {e}")
-        return False
 
-
-def validate_accessibility(pptx_bytes: bytes) -> float:
+def run_checks(deck: DeckModel, checks: List[DeckCheck]) -> List[Any]:
     """
-    验证PPTX可访问性
+    一次遍历幻灯片执行所有检查
 
     Args:
-        pptx_bytes: PPTX文件字节数据
+        deck: 演示文稿模型
+        checks: 检查访问者列表
 
     Returns:
-        float: 可访问性得分 (0.0-1.0)
+        List: 与 checks 顺序一致的检查结果
     """
-    try:
-        pptx_stream = BytesIO(pptx_bytes)
-        prs = Presentation(pptx_stream)
+    for slide in deck.slides:
+        for check in checks:
+            check.visit_slide(slide)
+    return [check.result(deck) for check in checks]
 
-        total_checks = 0
-        passed_checks = 0
 
-        for slide in prs.slides:
-            # 检查1: 是否有标题
-            total_checks += 1
-            has_title = False
+def validate_pptx_integrity(pptx_bytes: Union[bytes, DeckModel]) -> bool:
+    """
+    验证PPTX文件完整性
 
-            for shape in slide.shapes:
-                if shape.shape_type == 1 and hasattr(shape, 'text'):  # 文本框
-                    if shape.text.strip():
-                        has_title = True
-                        break
+    Args:
+        pptx_bytes: PPTX文件字节数据或已解析的模型
 
-            if has_title:
-                passed_checks += 1
+    Returns:
+        bool: 文件是否完整有效
+    """
+    return IntegrityCheck().result(_as_deck(pptx_bytes))
 
-            # 检查2: 文本是否可读（非空）
-            total_checks += 1
-            has_readable_text = False
 
-            for shape in slide.shapes:
-                if hasattr(shape, 'text') and len(shape.text.strip()) > 5:
-                    has_readable_text = True
-                    break
+def validate_content_completeness(input_content: Dict[str, Any],
+                                  pptx_bytes: Union[bytes, DeckModel]) -> bool:
+    """
+    验证幻灯片内容完整性
 
-            if has_readable_text:
-                passed_checks += 1
+    Args:
+        input_content: 输入的内容数据
+        pptx_bytes: 生成的PPTX文件字节数据或已解析的模型
 
-        # 计算可访问性得分
-        if total_checks == 0:
-            return 0.0
+    Returns:
+        bool: 内容是否完整
+    """
+    return run_checks(_as_deck(pptx_bytes), [ContentCompletenessCheck(input_content)])[0]
 
-        score = passed_checks / total_checks
-        logger.info(f"Accessibility score: {score:.2f} ({passed_checks}/{total_checks})")
 
-        return score
+def validate_accessibility(pptx_bytes: Union[bytes, DeckModel]) -> float:
+    """
+    验证PPTX可访问性
 
-    except Exception as e:
-        logger.error(f"Accessibility validation failed: {e}")
-        return 0.0
+    Args:
+        pptx_bytes: PPTX文件字节数据或已解析的模型
+
+    Returns:
+        float: 可访问性得分 (0.0-1.0)
+    """
+    return run_checks(_as_deck(pptx_bytes), [AccessibilityCheck()])[0]
 
 
 def validate_file_size(pptx_bytes: bytes, max_size_mb: int = 100) -> bool:
@@ -176,79 +355,17 @@ def validate_file_size(pptx_bytes: bytes, max_size_mb: int = 100) -> bool:
         return False
 
 
-def validate_slide_structure(pptx_bytes: bytes) -> Dict[str, Any]:
+def validate_slide_structure(pptx_bytes: Union[bytes, DeckModel]) -> Dict[str, Any]:
     """
     验证幻灯片结构
 
     Args:
-        pptx_bytes: PPTX文件字节数据
+        pptx_bytes: PPTX文件字节数据或已解析的模型
 
     Returns:
         Dict: 结构验证结果
     """
-    try:
-        pptx_stream = BytesIO(pptx_bytes)
-        prs = Presentation(pptx_stream)
-
-        validation_result = {
-            'total_slides': len(prs.slides),
-            'slides_with_title': 0,
-            'slides_with_content': 0,
-            'slides_with_images': 0,
-            'empty_slides': 0,
-            'valid': True,
-            'issues': []
-        }
-
-        for i, slide in enumerate(prs.slides):
-            slide_has_title = False
-            slide_has_content = False
-            slide_has_images = False
-            text_shapes = 0
-
-            for shape in slide.shapes:
-                if hasattr(shape, 'text'):
-                    if shape.text.strip():
-                        text_shapes += 1
-                        if not slide_has_title:
-                            slide_has_title = True
-                        elif not slide_has_content:
-                            slide_has_content = True
-
-                # 检查图片（简化检查）
-                if shape.shape_type == 13:  # Picture
-                    slide_has_images = True
-
-            # 统计
-            if slide_has_title:
-                validation_result['slides_with_title'] += 1
-            if slide_has_content:
-                validation_result['slides_with_content'] += 1
-            if slide_has_images:
-                validation_result['slides_with_images'] += 1
-
-            # 检查空幻灯片
-            if text_shapes == 0:
-                validation_result['empty_slides'] += 1
-                validation_result['issues'].append(f"Slide {i+1}: No text content")
-
-            # 检查只有标题没有内容的幻灯片
-            if slide_has_title and not slide_has_content:
-                validation_result['issues'].append(f"Slide {i+1}: Title only, no content")
-
-        # 判断整体有效性
-        if validation_result['empty_slides'] > 0:
-            validation_result['valid'] = False
-
-        logger.info(f"Slide structure validation completed: {validation_result}")
-        return validation_result
-
-    except Exception as e:
-        logger.error(f"Slide structure validation failed: {e}")
-        return {
-            'valid': False,
-            'error': str(e)
-        }
+    return run_checks(_as_deck(pptx_bytes), [StructureCheck()])[0]
 
 
 class PPTXValidator:
@@ -280,8 +397,15 @@ class PPTXValidator:
             'warnings': []
         }
 
+        # 只解析一次，所有检查在同一次遍历中完成
+        deck = parse_deck(pptx_bytes)
+        checks = [IntegrityCheck(), StructureCheck(), AccessibilityCheck()]
+        if input_content:
+            checks.append(ContentCompletenessCheck(input_content))
+        check_results = run_checks(deck, checks)
+        integrity_valid, structure_result, accessibility_score = check_results[:3]
+
         # 1. 文件完整性检查
-        integrity_valid = validate_pptx_integrity(pptx_bytes)
         results['checks']['integrity'] = integrity_valid
         if not integrity_valid:
             results['overall_valid'] = False
@@ -295,7 +419,6 @@ class PPTXValidator:
             results['issues'].append("File size exceeds limit")
 
         # 3. 结构检查
-        structure_result = validate_slide_structure(pptx_bytes)
         results['checks']['structure'] = structure_result
 
         if not structure_result.get('valid', False):
@@ -311,7 +434,6 @@ class PPTXValidator:
             results['warnings'].append(f"Many slides: {slide_count}")
 
         # 4. 可访问性检查
-        accessibility_score = validate_accessibility(pptx_bytes)
         results['checks']['accessibility'] = accessibility_score
 
         if accessibility_score < self.validation_rules['min_accessibility_score']:
@@ -319,7 +441,7 @@ class PPTXValidator:
 
         # 5. 内容完整性检查（如果提供了输入内容）
         if input_content:
-            content_complete = validate_content_completeness(input_content, pptx_bytes)
+            content_complete = check_results[3]
             results['checks']['content_completeness'] = content_complete
 
             if not content_complete:
@@ -0,0 +1,207 @@
+"""
+状态变更流 - 将状态写入发布为增量事件，供客户端长轮询订阅
+
+实现：
+- StatusManager每次写入状态时发布一条事件，只包含相对上次状态变化的字段
+- 订阅者携带游标读取之后的事件，没有新事件时阻塞等待直到超时
+- RedisStatusFeed：基于Redis Stream（XADD / XREAD BLOCK），跨容器共享
+- InMemoryStatusFeed：进程内实现，用于本地运行和测试
+"""
+import json
+import logging
+import re
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    from .config import STATUS_FEED_REDIS_ENDPOINT, STATUS_FEED_HISTORY, STATUS_FEED_TTL_SECONDS, \
+        STATUS_LONG_POLL_MAX_WAIT
+except ImportError:
+    from config import STATUS_FEED_REDIS_ENDPOINT, STATUS_FEED_HISTORY, STATUS_FEED_TTL_SECONDS, \
+        STATUS_LONG_POLL_MAX_WAIT
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 生成结束的状态，订阅者收到后不再等待
+TERMINAL_STATUSES = ('completed', 'failed')
+
+_STREAM_ID = re.compile(r'^\d+-\d+$')
+
+
+def status_changes(previous: Optional[Dict], current: Dict) -> Dict:
+    """计算两次状态之间变化的顶层字段（被删除的字段记为None）"""
+    previous = previous or {}
+    changes = {key: value for key, value in current.items() if previous.get(key, object()) != value}
+    changes.update({key: None for key in previous if key not in current})
+    return changes
+
+
+def merge_status_events(state: Optional[Dict], events: List[Dict]) -> Dict:
+    """按顺序将事件中的变化合并到状态上，返回新状态"""
+    merged = dict(state or {})
+    for event in events:
+        merged.update(event['changes'])
+    return merged
+
+
+class InMemoryStatusFeed:
+    """进程内状态变更流"""
+
+    def __init__(self, history: int = STATUS_FEED_HISTORY):
+        """
+        Args:
+            history: 每个演示文稿保留的事件条数
+        """
+        self.history = history
+        self._events: Dict[str, deque] = {}
+        self._sequence = 0
+        self._changed = threading.Condition()
+
+    def publish(self, presentation_id: str, changes: Dict) -> str:
+        """发布状态变化，返回事件游标"""
+        with self._changed:
+            self._sequence += 1
+            cursor = str(self._sequence)
+            events = self._events.setdefault(presentation_id, deque(maxlen=self.history))
+            events.append({'cursor': cursor, 'changes': dict(changes)})
+            self._changed.notify_all()
+        return cursor
+
+    def latest_cursor(self, presentation_id: str) -> str:
+        """最新事件的游标，没有事件时返回起始游标'0'（之后的任何事件都在其后）"""
+        with self._changed:
+            events = self._events.get(presentation_id)
+            return events[-1]['cursor'] if events else '0'
+
+    def read(self, presentation_id: str, cursor: Optional[str] = None,
+             timeout: float = 0.0) -> List[Dict]:
+        """
+        读取游标之后的事件
+
+        Args:
+            presentation_id: 演示文稿ID
+            cursor: 上次读取到的游标，None表示从最新事件之后开始（不回放历史）
+            timeout: 没有新事件时的最长等待时间（秒）
+
+        Returns:
+            事件列表，超时时为空
+        """
+        if cursor is None:
+            cursor = self.latest_cursor(presentation_id)
+        try:
+            after = int(cursor)
+        except ValueError:
+            raise ValueError(f"Invalid status feed cursor: {cursor}")
+
+        def pending():
+            return [event for event in self._events.get(presentation_id, ())
+                    if int(event['cursor']) > after]
+
+        with self._changed:
+            self._changed.wait_for(pending, timeout=max(timeout, 0))
+            return pending()
+
+
+class RedisStatusFeed:
+    """基于Redis Stream的跨容器状态变更流"""
+
+    def __init__(self, redis_client, prefix: str = 'status-feed:',
+                 history: int = STATUS_FEED_HISTORY, ttl: int = STATUS_FEED_TTL_SECONDS):
+        """
+        Args:
+            redis_client: Redis客户端
+            prefix: 变更流键前缀
+            history: 每个演示文稿保留的事件条数（近似裁剪）
+            ttl: 变更流有效期（秒），每次发布时续期
+        """
+        self._redis = redis_client
+        self.prefix = prefix
+        self.history = history
+        self.ttl = ttl
+
+    def publish(self, presentation_id: str, changes: Dict) -> str:
+        """发布状态变化，返回事件游标（Stream条目ID）"""
+        key = self.prefix + presentation_id
+        pipeline = self._redis.pipeline()
+        pipeline.xadd(key, {'changes': json.dumps(changes, ensure_ascii=False, default=str)},
+                      maxlen=self.history, approximate=True)
+        pipeline.expire(key, self.ttl)
+        entry_id, _ = pipeline.execute()
+        return _text(entry_id)
+
+    def latest_cursor(self, presentation_id: str) -> str:
+        """最新事件的游标（XREVRANGE ... COUNT 1），没有事件时返回起始游标'0-0'"""
+        entries = self._redis.xrevrange(self.prefix + presentation_id, '+', '-', count=1)
+        return _text(entries[0][0]) if entries else '0-0'
+
+    def read(self, presentation_id: str, cursor: Optional[str] = None,
+             timeout: float = 0.0) -> List[Dict]:
+        """读取游标之后的事件，没有新事件时阻塞等待（参数同InMemoryStatusFeed.read）"""
+        if cursor is None:
+            cursor = self.latest_cursor(presentation_id)
+        elif not _STREAM_ID.match(cursor):
+            raise ValueError(f"Invalid status feed cursor: {cursor}")
+
+        # XREAD 的 BLOCK 0 表示无限等待，不等待时不传 BLOCK
+        block = int(timeout * 1000) if timeout > 0 else None
+        response = self._redis.xread({self.prefix + presentation_id: cursor},
+                                     count=self.history, block=block)
+
+        events = []
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                raw = fields.get(b'changes', fields.get('changes'))
+                events.append({'cursor': _text(entry_id), 'changes': json.loads(_text(raw))})
+        return events
+
+
+def _text(value) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+_status_feed = None
+_status_feed_initialized = False
+_status_feed_lock = threading.Lock()
+
+
+def configure_status_feed(feed) -> None:
+    """设置容器内共享的状态变更流（本地运行时可设置为InMemoryStatusFeed）"""
+    global _status_feed, _status_feed_initialized
+    with _status_feed_lock:
+        _status_feed = feed
+        _status_feed_initialized = True
+
+
+def get_status_feed():
+    """
+    获取容器内共享的状态变更流
+
+    配置了STATUS_FEED_REDIS_ENDPOINT时使用Redis Stream，否则返回None（不启用推送）。
+    """
+    global _status_feed, _status_feed_initialized
+    if _status_feed_initialized:
+        return _status_feed
+
+    with _status_feed_lock:
+        if not _status_feed_initialized:
+            if STATUS_FEED_REDIS_ENDPOINT and redis is not None:
+                host, _, port = STATUS_FEED_REDIS_ENDPOINT.partition(':')
+                # 读超时需覆盖长轮询的阻塞时间
+                _status_feed = RedisStatusFeed(redis.Redis(
+                    host=host,
+                    port=int(port or 6379),
+                    socket_connect_timeout=2,
+                    socket_timeout=STATUS_LONG_POLL_MAX_WAIT + 5
+                ))
+                logger.info(f"状态变更流: Redis {STATUS_FEED_REDIS_ENDPOINT}")
+            elif STATUS_FEED_REDIS_ENDPOINT:
+                logger.warning("redis模块不可用，状态推送已禁用")
+            _status_feed_initialized = True
+    return _status_feed
@@ -1,12 +1,25 @@
 """
 状态管理器 - 管理PPT生成过程的状态跟踪
 """
+import copy
 import json
 import boto3
+from botocore.exceptions import ClientError
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
+import threading
+import time
+
+try:
+    from .config import STATUS_CACHE_TTL_SECONDS, STATUS_CACHE_MAX_ENTRIES
+    from .status_feed import get_status_feed, status_changes
+except ImportError:
+    from config import STATUS_CACHE_TTL_SECONDS, STATUS_CACHE_MAX_ENTRIES
+    from status_feed import get_status_feed, status_changes
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -20,18 +33,101 @@ class PresentationStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+
+def _error_code(error: ClientError) -> str:
+    return error.response.get('Error', {}).get('Code', '')
+
+
+def _is_write_conflict(error: ClientError) -> bool:
+    """S3条件写入因对象已被修改而失败"""
+    return _error_code(error) in ('PreconditionFailed', 'ConditionalRequestConflict')
+
+
+def _supports_conditional_writes(s3_client) -> bool:
+    """S3客户端的PutObject是否支持IfMatch/IfNoneMatch（botocore 1.36之前不支持，传入会抛出ParamValidationError）"""
+    try:
+        members = s3_client.meta.service_model.operation_model('PutObject').input_shape.members
+    except Exception:
+        # 无法检查服务模型的客户端（如测试替身）按支持处理
+        return True
+    if not isinstance(members, dict):
+        return True
+    return 'IfMatch' in members and 'IfNoneMatch' in members
+
+
+class StatusCache:
+    """容器内共享的状态缓存：保存解析后的status.json及其ETag"""
+
+    def __init__(self, ttl: float = STATUS_CACHE_TTL_SECONDS, max_entries: int = STATUS_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            ttl: 条目未过期时直接返回的时长（秒），过期后用ETag条件GET校验
+            max_entries: 最多缓存的条目数（按最近使用淘汰）
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple[Optional[str], Dict, bool]]:
+        """返回(ETag, 状态, 是否未过期)，没有缓存时返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            etag, status, stored_at = entry
+            return etag, status, time.monotonic() - stored_at < self.ttl
+
+    def put(self, key: Tuple[str, str], etag: Optional[str], status: Dict):
+        with self._lock:
+            self._entries[key] = (etag, status, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Tuple[str, str]):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 同一容器内的所有StatusManager共享状态缓存
+_status_cache = StatusCache()
+
+
 class StatusManager:
     """状态管理器"""
 
-    def __init__(self, bucket_name: str, s3_client=None):
+    # 按创建日期划分的列表索引：status-index/{YYYY-MM-DD}.json
+    INDEX_PREFIX = 'status-index/'
+    INDEX_FIELDS = ('presentation_id', 'topic', 'status', 'page_count', 'created_at')
+    INDEX_WRITE_ATTEMPTS = 5
+    STATUS_WRITE_ATTEMPTS = 5
+
+    def __init__(self, bucket_name: str, s3_client=None, change_feed=None,
+                 status_cache: Optional[StatusCache] = None):
         """初始化状态管理器
 
         Args:
             bucket_name: S3存储桶名称
             s3_client: S3客户端（可选，用于测试）
+            change_feed: 状态变更流（可选，默认使用get_status_feed()）
+            status_cache: 状态缓存（可选，默认使用容器内共享的缓存）
         """
         self.s3_client = s3_client or boto3.client('s3')
         self.bucket_name = bucket_name
+        self.change_feed = change_feed if change_feed is not None else get_status_feed()
+        self.status_cache = status_cache if status_cache is not None else _status_cache
+        # 旧版botocore不支持条件写入时退化为无条件写入（并发写入后写覆盖）
+        self.conditional_writes = _supports_conditional_writes(self.s3_client)
+        if not self.conditional_writes:
+            logger.warning("当前botocore不支持S3条件写入，状态和索引并发写入可能互相覆盖")
+        # 本容器最近写入索引的条目，列表字段未变化时跳过索引更新
+        self._indexed_entries: Dict[str, Dict] = {}
 
     def create_status(self, presentation_id: str, topic: str, page_count: int = 5) -> Dict:
         """创建初始状态
@@ -64,6 +160,7 @@ class StatusManager:
         }
 
         self.save_status(presentation_id, status)
+        self._publish_change(presentation_id, None, status)
         logger.info(f"创建初始状态: {presentation_id}")
         return status
 
@@ -71,6 +168,9 @@ class StatusManager:
                      step: Optional[str] = None, error_info: Optional[Dict] = None):
         """更新状态
 
+        以读取时的ETag条件写入（比较并交换），并发写入冲突时重新读取后重试，
+        并行的幻灯片任务不会互相覆盖更新。botocore不支持条件写入时退化为后写覆盖。
+
         Args:
             presentation_id: 演示文稿ID
             status: 状态值
@@ -78,37 +178,76 @@ class StatusManager:
             step: 当前完成的步骤
             error_info: 错误信息（如果有）
         """
-        current_status = self.get_status(presentation_id)
-        if current_status:
-            current_status['status'] = status
-            current_status['progress'] = min(100, max(0, progress))  # 确保在0-100范围内
-            current_status['updated_at'] = datetime.utcnow().isoformat()
-
-            if step:
-                current_status['current_step'] = step
-                if step in current_status['steps']:
-                    current_status['steps'][step] = True
-
-            if error_info:
-                current_status['error_info'] = error_info
-
-            # 计算预估完成时间
-            if status == PresentationStatus.PROCESSING.value and progress > 0:
-                # 简单的线性估算
-                elapsed_time = (datetime.utcnow() - datetime.fromisoformat(
-                    current_status['created_at'].replace('Z', '+00:00')
-                )).total_seconds()
-
-                if progress > 5:  # 避免除零
-                    estimated_total_time = elapsed_time * (100 / progress)
-                    remaining_time = max(0, estimated_total_time - elapsed_time)
-                    estimated_completion = datetime.utcnow().timestamp() + remaining_time
-                    current_status['estimated_completion_time'] = datetime.fromtimestamp(
-                        estimated_completion
-                    ).isoformat()
-
-            self.save_status(presentation_id, current_status)
+        for attempt in range(self.STATUS_WRITE_ATTEMPTS):
+            current_status, etag = self.get_status_with_etag(presentation_id)
+            if not current_status:
+                return
+
+            previous_status = copy.deepcopy(current_status)
+            self._apply_update(current_status, status, progress, step, error_info)
+            try:
+                self.save_status(presentation_id, current_status, if_match=etag)
+            except ClientError as e:
+                if not _is_write_conflict(e):
+                    raise
+                # 缓存或读取的版本已过期，丢弃后重新读取
+                self.status_cache.invalidate(self._status_cache_key(presentation_id))
+                logger.debug(f"状态写入冲突，重试 ({attempt + 1}): {presentation_id}")
+                continue
+
+            self._publish_change(presentation_id, previous_status, current_status)
             logger.info(f"更新状态: {presentation_id} - {status} ({progress}%)")
+            return
+        raise RuntimeError(f"状态写入冲突次数过多: {presentation_id}")
+
+    @staticmethod
+    def _apply_update(current_status: Dict, status: str, progress: int,
+                      step: Optional[str], error_info: Optional[Dict]):
+        """将一次状态更新应用到状态字典上"""
+        current_status['status'] = status
+        current_status['progress'] = min(100, max(0, progress))  # 确保在0-100范围内
+        current_status['updated_at'] = datetime.utcnow().isoformat()
+
+        if step:
+            current_status['current_step'] = step
+            if step in current_status['steps']:
+                current_status['steps'][step] = True
+
+        if error_info:
+            current_status['error_info'] = error_info
+
+        # 计算预估完成时间
+        if status == PresentationStatus.PROCESSING.value and progress > 0:
+            # 简单的线性估算
+            elapsed_time = (datetime.utcnow() - datetime.fromisoformat(
+                current_status['created_at'].replace('Z', '+00:00')
+            )).total_seconds()
+
+            if progress > 5:  # 避免除零
+                estimated_total_time = elapsed_time * (100 / progress)
+                remaining_time = max(0, estimated_total_time - elapsed_time)
+                estimated_completion = datetime.utcnow().timestamp() + remaining_time
+                current_status['estimated_completion_time'] = datetime.fromtimestamp(
+                    estimated_completion
+                ).isoformat()
+
+    def _publish_change(self, presentation_id: str, previous: Optional[Dict], status: Dict):
+        """将状态变化发布到变更流（失败只影响推送，订阅方可回退到读取status.json）"""
+        if self.change_feed is None:
+            return
+        changes = status_changes(previous, status)
+        if not changes:
+            return
+        try:
+            self.change_feed.publish(presentation_id, changes)
+        except Exception as e:
+            logger.warning(f"发布状态变更失败 {presentation_id}: {str(e)}")
+
+    def _status_key(self, presentation_id: str) -> str:
+        return f"presentations/{presentation_id}/status.json"
+
+    def _status_cache_key(self, presentation_id: str) -> Tuple[str, str]:
+        return self.bucket_name, self._status_key(presentation_id)
 
     def get_status(self, presentation_id: str) -> Optional[Dict]:
         """获取状态
@@ -119,30 +258,73 @@ class StatusManager:
         Returns:
             状态字典，如果不存在则返回None
         """
+        status, _ = self.get_status_with_etag(presentation_id)
+        return status
+
+    def get_status_with_etag(self, presentation_id: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """获取状态及其ETag
+
+        缓存未过期时直接返回；过期后以缓存的ETag发起条件GET，
+        未修改（304）时只续期缓存，不再下载和解析status.json。
+
+        Args:
+            presentation_id: 演示文稿ID
+
+        Returns:
+            (状态字典, ETag)，不存在时返回(None, None)
+        """
+        cache_key = self._status_cache_key(presentation_id)
+        cached = self.status_cache.get(cache_key)
+        if cached and cached[2]:
+            return copy.deepcopy(cached[1]), cached[0]
+
+        request = {'Bucket': self.bucket_name, 'Key': self._status_key(presentation_id)}
+        if cached and cached[0]:
+            request['IfNoneMatch'] = cached[0]
+
+        try:
+            response = self.s3_client.get_object(**request)
+        except ClientError as e:
+            if cached and _error_code(e) in ('304', 'NotModified'):
+                self.status_cache.put(cache_key, cached[0], cached[1])
+                logger.debug(f"状态未修改: {presentation_id}")
+                return copy.deepcopy(cached[1]), cached[0]
+            self.status_cache.invalidate(cache_key)
+            logger.warning(f"无法获取状态 {presentation_id}: {str(e)}")
+            return None, None
+        except Exception as e:
+            logger.warning(f"无法获取状态 {presentation_id}: {str(e)}")
+            return None, None
+
         try:
-            key = f"presentations/{presentation_id}/status.json"
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=key
-            )
             status = json.loads(response['Body'].read().decode('utf-8'))
-            logger.debug(f"获取状态: {presentation_id}")
-            return status
         except Exception as e:
             logger.warning(f"无法获取状态 {presentation_id}: {str(e)}")
-            return None
+            return None, None
 
-    def save_status(self, presentation_id: str, status: Dict):
+        etag = response.get('ETag')
+        self.status_cache.put(cache_key, etag, status)
+        logger.debug(f"获取状态: {presentation_id}")
+        return copy.deepcopy(status), etag
+
+    def save_status(self, presentation_id: str, status: Dict, if_match: Optional[str] = None) -> Optional[str]:
         """保存状态到S3
 
         Args:
             presentation_id: 演示文稿ID
             status: 状态字典
+            if_match: 期望的当前ETag（可选），不一致时S3拒绝写入（PreconditionFailed）；
+                客户端不支持条件写入时忽略
+
+        Returns:
+            写入后的ETag
         """
-        key = f"presentations/{presentation_id}/status.json"
+        key = self._status_key(presentation_id)
+        condition = {'IfMatch': if_match} if if_match else {}
 
         try:
-            self.s3_client.put_object(
+            response = self._put_object(
+                condition,
                 Bucket=self.bucket_name,
                 Key=key,
                 Body=json.dumps(status, ensure_ascii=False, indent=2),
@@ -150,9 +332,19 @@ class StatusManager:
             )
             logger.debug(f"保存状态到S3: {key}")
         except Exception as e:
-            logger.error(f"保存状态失败 {presentation_id}: {str(e)}")
+            if isinstance(e, ClientError) and _is_write_conflict(e):
+                logger.debug(f"状态已被其他写入方修改 {presentation_id}")
+            else:
+                logger.error(f"保存状态失败 {presentation_id}: {str(e)}")
             raise
 
+        # 写入后以新ETag更新缓存，同一容器内随后的读取和更新无需再次GET
+        etag = response.get('ETag') if isinstance(response, dict) else None
+        self.status_cache.put(self._status_cache_key(presentation_id), etag, copy.deepcopy(status))
+
+        self._index_status(presentation_id, status)
+        return etag
+
     def mark_failed(self, presentation_id: str, error_message: str, error_code: str = "UNKNOWN_ERROR"):
         """标记为失败状态
 
@@ -191,44 +383,171 @@ class StatusManager:
         logger.info(f"标记完成状态: {presentation_id}")
 
     def list_presentations(self, status_filter: Optional[str] = None, limit: int = 50) -> list:
-        """列出演示文稿
+        """列出演示文稿（按创建时间倒序）
 
         Args:
             status_filter: 状态过滤器（可选）
             limit: 限制数量
 
         Returns:
-            演示文稿状态列表
+            演示文稿列表项（列表字段，见INDEX_FIELDS）
         """
+        presentations, _ = self.list_presentations_page(status_filter, limit)
+        return presentations
+
+    def list_presentations_page(self, status_filter: Optional[str] = None, limit: int = 50,
+                                cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """分页列出演示文稿
+
+        从最新的日期索引开始读取，每个日期只需一次GET，不再逐个读取status.json。
+
+        Args:
+            status_filter: 状态过滤器（可选）
+            limit: 每页数量
+            cursor: 上一页返回的游标（可选）
+
+        Returns:
+            (列表项, 下一页游标，没有更多数据时为None)
+        """
+        after = None
+        if cursor:
+            created_at, _, presentation_id = cursor.partition('|')
+            after = (created_at, presentation_id)
+
         try:
-            # 列出所有presentations目录下的status.json文件
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix='presentations/',
-                Delimiter='/'
+            days = self._list_index_days()
+        except Exception as e:
+            logger.error(f"列出演示文稿失败: {str(e)}")
+            return [], None
+
+        presentations = []
+        for day in days:
+            if after and day > after[0][:10]:
+                continue
+            entries, _ = self._read_day_index(day)
+            ordered = sorted(
+                entries.values(),
+                key=lambda entry: (entry.get('created_at', ''), entry.get('presentation_id', '')),
+                reverse=True
             )
+            for entry in ordered:
+                position = (entry.get('created_at', ''), entry.get('presentation_id', ''))
+                if after and position >= after:
+                    continue
+                if status_filter and entry.get('status') != status_filter:
+                    continue
+                presentations.append(entry)
+                if len(presentations) >= limit:
+                    return presentations, f"{position[0]}|{position[1]}"
 
-            presentations = []
-            for obj in response.get('CommonPrefixes', []):
-                prefix = obj['Prefix']
-                presentation_id = prefix.split('/')[-2] if len(prefix.split('/')) > 2 else None
+        return presentations, None
 
-                if presentation_id:
-                    status = self.get_status(presentation_id)
-                    if status:
-                        if not status_filter or status.get('status') == status_filter:
-                            presentations.append(status)
+    def rebuild_index(self) -> int:
+        """从各演示文稿的status.json重建日期索引（用于补齐索引上线前的数据）
 
-                        if len(presentations) >= limit:
-                            break
+        部署日期索引后通过scripts/rebuild_status_index.py对每个存储桶运行一次。
 
-            # 按创建时间排序（最新的在前）
-            presentations.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-            return presentations
+        Returns:
+            写入索引的演示文稿数量
+        """
+        by_day: Dict[str, Dict[str, Dict]] = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix='presentations/', Delimiter='/'):
+            for prefix in page.get('CommonPrefixes', []):
+                presentation_id = prefix['Prefix'].rstrip('/').split('/')[-1]
+                status = self.get_status(presentation_id)
+                if status and status.get('created_at'):
+                    entry = self._index_entry(presentation_id, status)
+                    by_day.setdefault(entry['created_at'][:10], {})[presentation_id] = entry
+
+        for day, entries in by_day.items():
+            self._modify_day_index(day, lambda index, entries=entries: index.update(entries) or True)
+        count = sum(len(entries) for entries in by_day.values())
+        logger.info(f"重建状态索引: {count} 个演示文稿，{len(by_day)} 天")
+        return count
+
+    def _index_entry(self, presentation_id: str, status: Dict) -> Dict:
+        entry = {field: status.get(field) for field in self.INDEX_FIELDS}
+        entry['presentation_id'] = presentation_id
+        return entry
+
+    def _index_key(self, day: str) -> str:
+        return f"{self.INDEX_PREFIX}{day}.json"
+
+    def _index_status(self, presentation_id: str, status: Dict):
+        """将列表字段写入创建日期的索引（失败只影响列表，不影响状态保存）"""
+        created_at = status.get('created_at')
+        if not created_at:
+            return
+        entry = self._index_entry(presentation_id, status)
+        if self._indexed_entries.get(presentation_id) == entry:
+            return
+
+        def upsert(index: Dict) -> bool:
+            if index.get(presentation_id) == entry:
+                return False
+            index[presentation_id] = entry
+            return True
 
+        try:
+            self._modify_day_index(created_at[:10], upsert)
+            self._indexed_entries[presentation_id] = entry
         except Exception as e:
-            logger.error(f"列出演示文稿失败: {str(e)}")
-            return []
+            logger.warning(f"更新状态索引失败 {presentation_id}: {str(e)}")
+
+    def _list_index_days(self) -> List[str]:
+        """列出所有索引日期（最新的在前）"""
+        days = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=self.INDEX_PREFIX):
+            for obj in page.get('Contents', []):
+                name = obj['Key'][len(self.INDEX_PREFIX):]
+                if name.endswith('.json'):
+                    days.append(name[:-len('.json')])
+        return sorted(days, reverse=True)
+
+    def _put_object(self, condition: Dict, **kwargs):
+        """写入S3对象，客户端不支持条件写入时忽略condition"""
+        if condition and self.conditional_writes:
+            kwargs.update(condition)
+        return self.s3_client.put_object(**kwargs)
+
+    def _read_day_index(self, day: str) -> Tuple[Dict[str, Dict], Optional[str]]:
+        """读取日期索引，返回(条目, ETag)，不存在时返回({}, None)"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self._index_key(day))
+        except ClientError as e:
+            if _error_code(e) in ('NoSuchKey', '404'):
+                return {}, None
+            raise
+        return json.loads(response['Body'].read().decode('utf-8')), response.get('ETag')
+
+    def _modify_day_index(self, day: str, modify: Callable[[Dict], bool]):
+        """读取-修改-条件写入日期索引，并发写入冲突时重试
+
+        Args:
+            day: 日期（YYYY-MM-DD）
+            modify: 原地修改索引的函数，返回False表示无需写入
+        """
+        for attempt in range(self.INDEX_WRITE_ATTEMPTS):
+            index, etag = self._read_day_index(day)
+            if not modify(index):
+                return
+            condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+            try:
+                self._put_object(
+                    condition,
+                    Bucket=self.bucket_name,
+                    Key=self._index_key(day),
+                    Body=json.dumps(index, ensure_ascii=False, separators=(',', ':')),
+                    ContentType='application/json'
+                )
+                return
+            except ClientError as e:
+                if not _is_write_conflict(e):
+                    raise
+                logger.debug(f"状态索引写入冲突，重试 ({attempt + 1}): {day}")
+        raise RuntimeError(f"状态索引写入冲突次数过多: {day}")
 
     def get_progress_details(self, presentation_id: str) -> Dict:
         """获取详细进度信息
@@ -274,64 +593,87 @@ class StatusManager:
 
         return progress_details
 
-    def cleanup_old_presentations(self, days_old: int = 7):
+    def cleanup_old_presentations(self, days_old: int = 7, max_workers: int = 8):
         """清理旧的演示文稿
 
         Args:
             days_old: 保留天数
+            max_workers: 并发删除的线程数
         """
         cutoff_time = datetime.utcnow().timestamp() - (days_old * 24 * 3600)
-
-        presentations = self.list_presentations()
+        cutoff_day = datetime.utcfromtimestamp(cutoff_time).date().isoformat()
         cleaned_count = 0
 
-        for presentation in presentations:
-            created_at = presentation.get('created_at', '')
+        # 只读取截止日期及之前的日期索引，逐天并发删除
+        for day in self._list_index_days():
+            if day > cutoff_day:
+                continue
+
+            expired = []
+            for presentation in self._read_day_index(day)[0].values():
+                created_at = presentation.get('created_at', '')
+                try:
+                    created_time = datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
+                    if created_time < cutoff_time:
+                        expired.append(presentation['presentation_id'])
+                except Exception as e:
+                    logger.warning(f"清理演示文稿失败: {str(e)}")
+
+            if not expired:
+                continue
+
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(expired)))) as executor:
+                deleted = [pid for pid, ok in zip(expired, executor.map(self._delete_presentation_files, expired)) if ok]
+
+            # 每天的索引只改写一次
+            def remove_deleted(index: Dict, deleted=deleted) -> bool:
+                removed = [index.pop(pid) for pid in deleted if pid in index]
+                return bool(removed)
+
+            for presentation_id in deleted:
+                self._indexed_entries.pop(presentation_id, None)
             try:
-                created_time = datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
-                if created_time < cutoff_time:
-                    presentation_id = presentation['presentation_id']
-                    self._delete_presentation_files(presentation_id)
-                    cleaned_count += 1
+                self._modify_day_index(day, remove_deleted)
             except Exception as e:
-                logger.warning(f"清理演示文稿失败: {str(e)}")
+                logger.warning(f"移除状态索引失败 {day}: {str(e)}")
+            cleaned_count += len(deleted)
 
         logger.info(f"清理了 {cleaned_count} 个旧演示文稿")
+        return cleaned_count
 
-    def _delete_presentation_files(self, presentation_id: str):
+    def _delete_presentation_files(self, presentation_id: str) -> bool:
         """删除演示文稿相关的所有文件
 
         Args:
             presentation_id: 演示文稿ID
+
+        Returns:
+            是否删除成功
         """
         try:
-            # 列出该presentation_id下的所有对象
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=f'presentations/{presentation_id}/'
-            )
-
-            # 删除所有对象
-            objects_to_delete = []
-            for obj in response.get('Contents', []):
-                objects_to_delete.append({'Key': obj['Key']})
-
-            if objects_to_delete:
-                self.s3_client.delete_objects(
-                    Bucket=self.bucket_name,
-                    Delete={'Objects': objects_to_delete}
-                )
-                logger.info(f"删除演示文稿文件: {presentation_id}")
+            # 分页列出该presentation_id下的所有对象，每页（最多1000个）一次批量删除
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=f'presentations/{presentation_id}/'):
+                objects_to_delete = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+                if objects_to_delete:
+                    self.s3_client.delete_objects(
+                        Bucket=self.bucket_name,
+                        Delete={'Objects': objects_to_delete, 'Quiet': True}
+                    )
+            self.status_cache.invalidate(self._status_cache_key(presentation_id))
+            logger.info(f"删除演示文稿文件: {presentation_id}")
+            return True
         except Exception as e:
             logger.error(f"删除演示文稿文件失败 {presentation_id}: {str(e)}")
+            return False
 
 
 # 便捷函数
-def create_status_manager(bucket_name: str = None, s3_client=None) -> StatusManager:
+def create_status_manager(bucket_name: str = None, s3_client=None, change_feed=None) -> StatusManager:
     """创建状态管理器实例"""
     if not bucket_name:
         bucket_name = 'ai-ppt-presentations-dev'
-    return StatusManager(bucket_name, s3_client)
+    return StatusManager(bucket_name, s3_client, change_feed)
 
 
 def get_status_from_s3(presentation_id: str, s3_client, bucket_name: str) -> Optional[Dict]:
@@ -0,0 +1,107 @@
+"""
+流式大纲解析器 - 从Bedrock流式响应中增量解析幻灯片
+
+模型逐段输出大纲JSON时，每当"slides"数组中的一个幻灯片对象完整闭合，
+解析器就立即返回该对象，调用方无需等待整个大纲生成完毕。
+"""
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OutlineStreamParser:
+    """增量解析大纲JSON中的幻灯片对象
+
+    只跟踪字符串/转义状态和括号嵌套，不对不完整的JSON做整体解析，
+    因此每个字符只处理一次。
+    """
+
+    SLIDES_KEY = "slides"
+
+    def __init__(self) -> None:
+        self._text = ""
+        # 容器栈：每项为 '{' 或 '['，数组项额外记录是否为slides数组
+        self._stack: List[str] = []
+        self._slides_array_depth: Optional[int] = None
+        self._slide_start: Optional[int] = None
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self.slides_parsed = 0
+
+    @property
+    def text(self) -> str:
+        """目前为止收到的完整文本"""
+        return self._text
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """输入一段文本，返回本次新完成的幻灯片对象
+
+        Args:
+            chunk: 模型流式输出的文本片段
+
+        Returns:
+            新解析出的幻灯片列表（可能为空）
+        """
+        if not chunk:
+            return []
+
+        start = len(self._text)
+        self._text += chunk
+        text = self._text
+        completed = []
+
+        for index in range(start, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start:index]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index + 1
+            elif char == '{':
+                if self._slides_array_depth is not None and len(self._stack) == self._slides_array_depth:
+                    self._slide_start = index
+                self._stack.append('{')
+            elif char == '[':
+                # 顶层对象中紧跟在 "slides" 键之后的数组
+                if len(self._stack) == 1 and self._last_string == self.SLIDES_KEY:
+                    self._slides_array_depth = len(self._stack) + 1
+                self._stack.append('[')
+            elif char in '}]':
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if char == ']' and self._slides_array_depth is not None \
+                        and len(self._stack) + 1 == self._slides_array_depth:
+                    self._slides_array_depth = None
+                elif char == '}' and self._slide_start is not None \
+                        and len(self._stack) == self._slides_array_depth:
+                    slide = self._parse_slide(text[self._slide_start:index + 1])
+                    self._slide_start = None
+                    if slide is not None:
+                        completed.append(slide)
+
+        return completed
+
+    def _parse_slide(self, fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            slide = json.loads(fragment)
+        except json.JSONDecodeError as e:
+            logger.warning(f"流式幻灯片片段解析失败: {str(e)}")
+            return None
+        if not isinstance(slide, dict):
+            return None
+        self.slides_parsed += 1
+        return slide
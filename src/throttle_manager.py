@@ -2,14 +2,19 @@
 限流管理器 - 控制API调用速率
 
 功能：
-- 添加随机初始延迟
-- 跟踪并发请求数
-- 实现令牌桶算法
+- 添加随机初始延迟（仅在近期发生限流时）
+- 按模型划分的令牌桶，AIMD自适应调整速率
+- 同步/异步获取令牌，统计等待时间
+- 可选的DynamoDB共享配额（跨Lambda容器）
 """
 import time
 import random
+import asyncio
 import logging
-from typing import Optional
+import threading
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
@@ -18,32 +23,44 @@ class ThrottleManager:
     """限流管理器"""
 
     # 类级别的共享状态（在Lambda容器内共享）
-    _last_request_time = 0
-    _min_interval = 1.0  # 最小请求间隔（秒）
+    _shared_limiter: Optional['AdaptiveRateLimiter'] = None
+    _limiter_lock = threading.Lock()
+
+    DEFAULT_BUCKET = "default"
 
     @classmethod
-    def add_initial_delay(cls, max_delay: float = 5.0) -> None:
+    def add_initial_delay(cls, max_delay: float = 5.0) -> float:
         """添加随机初始延迟，减少请求冲突
 
+        只有近期发生过限流时才延迟；配额充足时直接返回，不再无条件等待。
+
         Args:
             max_delay: 最大延迟时间（秒）
+
+        Returns:
+            实际延迟的秒数
         """
+        if not cls.get_shared_limiter().recently_throttled():
+            return 0.0
         delay = random.uniform(0.1, max_delay)
-        logger.info(f"添加初始延迟: {delay:.2f}秒")
+        logger.info(f"近期发生限流，添加初始延迟: {delay:.2f}秒")
         time.sleep(delay)
+        return delay
 
     @classmethod
-    def wait_if_needed(cls) -> None:
-        """如果需要，等待以满足最小请求间隔"""
-        current_time = time.time()
-        time_since_last = current_time - cls._last_request_time
-
-        if time_since_last < cls._min_interval:
-            wait_time = cls._min_interval - time_since_last
-            logger.info(f"限流等待: {wait_time:.2f}秒")
-            time.sleep(wait_time)
+    def wait_if_needed(cls, model_id: Optional[str] = None) -> float:
+        """从共享限流器获取令牌，必要时等待
 
-        cls._last_request_time = time.time()
+        Args:
+            model_id: 模型ID，默认使用通用令牌桶
+
+        Returns:
+            实际等待的秒数
+        """
+        waited = cls.get_shared_limiter().acquire(model_id or cls.DEFAULT_BUCKET)
+        if waited > 0:
+            logger.info(f"限流等待: {waited:.2f}秒")
+        return waited
 
     @classmethod
     def get_batch_delay(cls, batch_index: int, batch_size: int = 5) -> float:
@@ -62,6 +79,354 @@ class ThrottleManager:
         jitter = random.uniform(0, 1)
         return batch_delay + jitter
 
+    @classmethod
+    def get_shared_limiter(cls,
+                           rate: float = 2.0,
+                           quota_table: Optional[str] = None,
+                           shared_rate: Optional[float] = None) -> 'AdaptiveRateLimiter':
+        """获取容器内共享的自适应限流器（首次调用时创建，之后参数被忽略）
+
+        Args:
+            rate: 每个模型的初始速率（每秒请求数）
+            quota_table: 共享配额DynamoDB表名（可选）
+            shared_rate: 所有容器合计的每秒请求数上限（配合quota_table使用）
+
+        Returns:
+            共享的AdaptiveRateLimiter实例
+        """
+        with cls._limiter_lock:
+            if cls._shared_limiter is None:
+                quota_store = DynamoDBQuotaStore(quota_table) if quota_table else None
+                cls._shared_limiter = AdaptiveRateLimiter(
+                    default_rate=rate,
+                    quota_store=quota_store,
+                    shared_rate=shared_rate
+                )
+            return cls._shared_limiter
+
+    @classmethod
+    def get_shared_budget(cls, rate: float = 2.0, capacity: Optional[float] = None,
+                          model_id: Optional[str] = None) -> 'RateBudget':
+        """获取容器内共享的速率预算
+
+        Args:
+            rate: 每秒补充的令牌数（限流器首次创建时生效）
+            capacity: 令牌桶容量，默认等于rate
+            model_id: 模型ID，不同模型使用独立的令牌桶
+
+        Returns:
+            共享的RateBudget实例
+        """
+        return cls.get_shared_limiter(rate=rate).bucket(model_id or cls.DEFAULT_BUCKET, capacity=capacity)
+
+
+class RateBudget:
+    """线程安全的自适应令牌桶
+
+    多个工作线程共享同一个预算：每次Bedrock调用（包括重试）消耗一个令牌，
+    某个幻灯片的退避等待只阻塞它自己的线程，不会占用其他线程的配额。
+
+    速率按AIMD调整：收到限流响应时乘性降低（on_throttle），
+    成功调用时加性恢复（on_success），不超过初始速率。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 min_rate: Optional[float] = None,
+                 increase_step: Optional[float] = None,
+                 decrease_factor: float = 0.5,
+                 cooldown: float = 1.0,
+                 quota_store: Optional['DynamoDBQuotaStore'] = None,
+                 quota_key: Optional[str] = None,
+                 shared_rate: Optional[float] = None):
+        """
+        Args:
+            rate: 每秒补充的令牌数（也是速率上限）
+            capacity: 令牌桶容量，默认等于rate
+            min_rate: 速率下限，默认为rate的10%
+            increase_step: 每次成功调用恢复的速率，默认为rate的5%
+            decrease_factor: 限流时速率乘以的系数
+            cooldown: 两次降速之间的最短间隔（秒），避免同一波限流连续降速
+            quota_store: 跨容器共享配额存储（可选）
+            quota_key: 共享配额的键
+            shared_rate: 所有容器合计的每秒请求数上限
+        """
+        if rate <= 0:
+            raise ValueError("rate必须大于0")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor必须在0和1之间")
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate * 0.1
+        self.increase_step = increase_step if increase_step is not None else rate * 0.05
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.quota_store = quota_store
+        self.quota_key = quota_key
+        self.shared_rate = shared_rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._last_throttle_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+        # 等待时间统计
+        self.stats = {
+            'acquired': 0,
+            'waited': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+            'throttles': 0,
+            'shared_quota_waits': 0
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _reserve(self, tokens: float) -> float:
+        """尝试扣除令牌，成功返回0，否则返回需要等待的秒数"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def _shared_wait(self, tokens: float) -> float:
+        """尝试消耗共享配额，成功返回0，否则返回距下一个窗口的秒数"""
+        if self.quota_store is None or not self.shared_rate:
+            return 0.0
+        limit = self.shared_rate * self.quota_store.window_seconds
+        if self.quota_store.try_consume(self.quota_key or 'default', limit, tokens):
+            return 0.0
+        with self._lock:
+            self.stats['shared_quota_waits'] += 1
+        return self.quota_store.seconds_until_next_window()
+
+    def _record_wait(self, waited: float) -> None:
+        with self._lock:
+            self.stats['acquired'] += 1
+            if waited > 0:
+                self.stats['waited'] += 1
+                self.stats['total_wait'] += waited
+                self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """非阻塞获取令牌"""
+        return self._reserve(tokens) == 0.0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """阻塞直到获取令牌
+
+        Returns:
+            实际等待的秒数
+        """
+        waited = 0.0
+        while True:
+            wait_time = self._reserve(tokens)
+            if wait_time == 0.0:
+                break
+            time.sleep(wait_time)
+            waited += wait_time
+        while True:
+            wait_time = self._shared_wait(tokens)
+            if wait_time == 0.0:
+                break
+            time.sleep(wait_time)
+            waited += wait_time
+        self._record_wait(waited)
+        return waited
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """异步获取令牌，等待期间不阻塞事件循环
+
+        Returns:
+            实际等待的秒数
+        """
+        loop = asyncio.get_running_loop()
+        waited = 0.0
+        while True:
+            wait_time = self._reserve(tokens)
+            if wait_time == 0.0:
+                break
+            await asyncio.sleep(wait_time)
+            waited += wait_time
+        while True:
+            # DynamoDB调用是同步的，放到默认线程池执行
+            wait_time = await loop.run_in_executor(None, self._shared_wait, tokens)
+            if wait_time == 0.0:
+                break
+            await asyncio.sleep(wait_time)
+            waited += wait_time
+        self._record_wait(waited)
+        return waited
+
+    def on_throttle(self) -> float:
+        """收到限流响应：乘性降低速率并清空令牌
+
+        Returns:
+            调整后的速率
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.stats['throttles'] += 1
+            if self._last_throttle_at is None or now - self._last_throttle_at >= self.cooldown:
+                self._refill()
+                self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                self._tokens = 0.0
+                logger.warning(f"收到限流响应，速率降至 {self.rate:.2f}/秒 ({self.quota_key or 'default'})")
+            self._last_throttle_at = now
+            return self.rate
+
+    def on_success(self) -> float:
+        """调用成功：加性恢复速率
+
+        Returns:
+            调整后的速率
+        """
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+            return self.rate
+
+    def recently_throttled(self, window: float = 60.0) -> bool:
+        """最近window秒内是否发生过限流"""
+        last = self._last_throttle_at
+        return last is not None and time.monotonic() - last < window
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取速率与等待时间统计"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['rate'] = self.rate
+            stats['max_rate'] = self.max_rate
+            stats['avg_wait'] = stats['total_wait'] / stats['acquired'] if stats['acquired'] else 0.0
+            return stats
+
+
+class AdaptiveRateLimiter:
+    """按模型划分令牌桶的自适应限流器
+
+    同一容器内所有Bedrock调用方共享；不同模型的配额互不影响。
+    """
+
+    def __init__(self, default_rate: float = 2.0,
+                 model_rates: Optional[Dict[str, float]] = None,
+                 quota_store: Optional['DynamoDBQuotaStore'] = None,
+                 shared_rate: Optional[float] = None,
+                 **bucket_options):
+        """
+        Args:
+            default_rate: 未单独配置的模型的初始速率
+            model_rates: 按模型ID配置的速率
+            quota_store: 跨容器共享配额存储（可选）
+            shared_rate: 所有容器合计的每秒请求数上限
+            bucket_options: 传给RateBudget的AIMD参数
+        """
+        self.default_rate = default_rate
+        self.model_rates = dict(model_rates or {})
+        self.quota_store = quota_store
+        self.shared_rate = shared_rate
+        self.bucket_options = bucket_options
+        self._buckets: Dict[str, RateBudget] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, model_id: str, capacity: Optional[float] = None) -> RateBudget:
+        """获取模型对应的令牌桶（首次调用时创建）"""
+        with self._lock:
+            budget = self._buckets.get(model_id)
+            if budget is None:
+                budget = RateBudget(
+                    self.model_rates.get(model_id, self.default_rate),
+                    capacity=capacity,
+                    quota_store=self.quota_store,
+                    quota_key=model_id,
+                    shared_rate=self.shared_rate,
+                    **self.bucket_options
+                )
+                self._buckets[model_id] = budget
+            return budget
+
+    def acquire(self, model_id: str, tokens: float = 1.0) -> float:
+        """阻塞获取令牌，返回等待秒数"""
+        return self.bucket(model_id).acquire(tokens)
+
+    async def acquire_async(self, model_id: str, tokens: float = 1.0) -> float:
+        """异步获取令牌，返回等待秒数"""
+        return await self.bucket(model_id).acquire_async(tokens)
+
+    def record_throttle(self, model_id: str) -> float:
+        """记录限流响应，返回调整后的速率"""
+        return self.bucket(model_id).on_throttle()
+
+    def record_success(self, model_id: str) -> float:
+        """记录成功调用，返回调整后的速率"""
+        return self.bucket(model_id).on_success()
+
+    def recently_throttled(self, window: float = 60.0) -> bool:
+        """任一模型最近是否发生过限流"""
+        with self._lock:
+            buckets = list(self._buckets.values())
+        return any(budget.recently_throttled(window) for budget in buckets)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """按模型返回速率与等待时间统计"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {model_id: budget.get_stats() for model_id, budget in buckets.items()}
+
+
+class DynamoDBQuotaStore:
+    """基于DynamoDB固定窗口计数的跨容器共享配额
+
+    表结构：分区键pk（字符串），ttl属性expires_at。
+    每个窗口一条计数记录，通过条件更新保证总数不超过上限。
+    """
+
+    def __init__(self, table_name: str, dynamodb_client: Any = None, window_seconds: int = 1):
+        self.table_name = table_name
+        self.window_seconds = window_seconds
+        if dynamodb_client is None:
+            import boto3
+            dynamodb_client = boto3.client('dynamodb')
+        self.dynamodb = dynamodb_client
+
+    def _current_window(self) -> int:
+        return int(time.time() // self.window_seconds)
+
+    def seconds_until_next_window(self) -> float:
+        """距离下一个计数窗口的秒数"""
+        return max(0.01, (self._current_window() + 1) * self.window_seconds - time.time())
+
+    def try_consume(self, key: str, limit: float, tokens: float = 1.0) -> bool:
+        """在当前窗口内消耗配额
+
+        Returns:
+            是否在上限内；DynamoDB不可用时返回True（不因配额表故障阻塞生成）
+        """
+        window = self._current_window()
+        try:
+            self.dynamodb.update_item(
+                TableName=self.table_name,
+                Key={'pk': {'S': f"{key}#{window}"}},
+                UpdateExpression="ADD #count :n SET expires_at = :expires",
+                ConditionExpression="attribute_not_exists(#count) OR #count <= :max",
+                ExpressionAttributeNames={'#count': 'request_count'},
+                ExpressionAttributeValues={
+                    ':n': {'N': str(tokens)},
+                    ':max': {'N': str(limit - tokens)},
+                    ':expires': {'N': str((window + 2) * self.window_seconds)}
+                }
+            )
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            logger.warning(f"共享配额检查失败，跳过: {str(e)}")
+            return True
+
 
 def with_throttle(func):
     """带限流的装饰器"""
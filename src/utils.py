@@ -28,6 +28,10 @@ def retry_with_backoff(max_retries=3, backoff_factor=2, initial_delay=1, max_del
                 except Exception as e:
                     error_msg = str(e)
 
+                    # 明确标记为不可重试的错误（如截止时间已到）直接抛出
+                    if getattr(e, 'retryable', True) is False:
+                        raise
+
                     # 检查是否是限流错误
                     if 'ThrottlingException' in error_msg or 'Too many requests' in error_msg:
                         if attempt == max_retries - 1:
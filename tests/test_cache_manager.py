@@ -0,0 +1,402 @@
+"""
+多级缓存管理器单元测试
+"""
+
+import pytest
+import json
+import time
+import asyncio
+import threading
+from unittest.mock import Mock, patch
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lambdas'))
+
+from lambdas.cache_manager import MemoryLRUCache, MultiLevelCache
+from lambdas.single_flight import SingleFlight
+from lambdas.cache_codec import CacheCodec, CodecError
+
+
+class TestMemoryLRUCache:
+    """L1内存LRU缓存测试"""
+
+    def test_get_and_set(self):
+        """测试基本读写"""
+        cache = MemoryLRUCache(max_bytes=1024)
+
+        assert cache.get("missing") == (False, None)
+        cache.set("key", {"status": "ok"})
+
+        assert cache.get("key") == (True, {"status": "ok"})
+        assert cache.stats['hits'] == 1
+        assert cache.stats['misses'] == 1
+
+    def test_expired_entry_not_served(self):
+        """过期数据在读取时被淘汰"""
+        cache = MemoryLRUCache(max_bytes=1024)
+        cache.set("key", "value", ttl=10)
+
+        with patch("lambdas.cache_manager.time.time", return_value=time.time() + 11):
+            assert cache.get("key") == (False, None)
+
+        assert "key" not in cache
+        assert cache.bytes_used == 0
+        assert cache.stats['expirations'] == 1
+
+    def test_evicts_by_byte_budget(self):
+        """按字节预算逐出最久未使用的项"""
+        cache = MemoryLRUCache(max_bytes=250)
+        cache.set("a", b"x" * 100)
+        cache.set("b", b"x" * 100)
+        cache.get("a")  # a变为最近使用
+        cache.set("c", b"x" * 100)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.bytes_used == 200
+        assert cache.stats['evictions'] == 1
+
+    def test_oversized_value_rejected(self):
+        """超过整个预算的值不进入L1"""
+        cache = MemoryLRUCache(max_bytes=10)
+
+        assert cache.set("big", b"x" * 11) is False
+        assert len(cache) == 0
+        assert cache.stats['rejected'] == 1
+
+    def test_oversized_overwrite_drops_old_value(self):
+        """用超出预算的值覆盖时旧值被移除，不再从L1返回"""
+        cache = MemoryLRUCache(max_bytes=10)
+        cache.set("key", b"x" * 5)
+
+        assert cache.set("key", b"x" * 11) is False
+        assert cache.get("key") == (False, None)
+        assert cache.bytes_used == 0
+
+    def test_overwrite_updates_bytes(self):
+        """覆盖写入时字节计数正确"""
+        cache = MemoryLRUCache(max_bytes=1024)
+        cache.set("key", b"x" * 100)
+        cache.set("key", b"x" * 10)
+
+        assert cache.bytes_used == 10
+        assert len(cache) == 1
+
+    def test_max_entries_limit(self):
+        """同时支持条目数上限"""
+        cache = MemoryLRUCache(max_bytes=1024, max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.set(key, "v")
+
+        assert cache.keys() == ["b", "c"]
+
+
+class TestMultiLevelCacheStats:
+    """多级缓存统计测试"""
+
+    def test_per_level_stats(self):
+        """get_stats按级别报告命中/未命中/逐出/字节"""
+        cache = MultiLevelCache(enable_cdn=False, memory_cache_max_bytes=150)
+        cache.set("a", b"x" * 100)
+        cache.get("a")
+        cache.get("missing")
+        cache.set("b", b"x" * 100)
+
+        stats = cache.get_stats()
+
+        assert stats['hits']['l1'] == 1
+        assert stats['misses'] == 1
+        assert stats['evictions'] == 1
+        assert stats['levels']['l1']['bytes'] == 100
+        assert stats['levels']['l1']['entries'] == 1
+        assert stats['memory_cache_max_bytes'] == 150
+        assert stats['levels']['l2']['enabled'] is False
+
+
+class FakeLeaseRedis:
+    """进程内Redis替身，仅支持租约和缓存所需的命令"""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, name, value, nx=False, ex=None):
+        if nx and name in self.data:
+            return None
+        self.data[name] = value
+        return True
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def setex(self, name, ttl, value):
+        self.data[name] = value
+        return True
+
+    def delete(self, name):
+        self.data.pop(name, None)
+
+    def exists(self, name):
+        return int(name in self.data)
+
+
+class TestSingleFlight:
+    """请求合并测试"""
+
+    def test_concurrent_callers_share_one_computation(self):
+        """相同键的并发调用只执行一次计算"""
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return "result"
+
+        results = []
+
+        def worker():
+            results.append(flight.do("key", compute))
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait(timeout=5)
+        followers = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in followers:
+            thread.start()
+        while flight.stats['shared'] < 5:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(timeout=5)
+
+        assert len(calls) == 1
+        assert sorted(shared for _, shared in results) == [False] + [True] * 5
+        assert all(value == "result" for value, _ in results)
+        assert flight.in_flight() == 0
+
+    def test_error_propagates_to_followers_and_clears(self):
+        """计算失败时异常传给所有等待者，之后可以重新计算"""
+        flight = SingleFlight()
+
+        with pytest.raises(ValueError):
+            flight.do("key", Mock(side_effect=ValueError("boom")))
+
+        assert flight.do("key", lambda: 42) == (42, False)
+
+    def test_async_callers_share_one_computation(self):
+        """异步调用者同样合并"""
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"image"
+
+        async def run():
+            return await asyncio.gather(*[
+                flight.do_async("image-key", compute) for _ in range(4)
+            ])
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert [value for value, _ in results] == [b"image"] * 4
+
+    def test_timed_out_async_followers_do_not_fail_leader(self):
+        """跟随者等待超时不影响领导者拿到结果"""
+        flight = SingleFlight(wait_timeout=0.2)
+
+        async def compute():
+            await asyncio.sleep(0.5)
+            return b"image"
+
+        async def run():
+            return await asyncio.gather(*[
+                flight.do_async("image-key", compute) for _ in range(3)
+            ], return_exceptions=True)
+
+        leader, *followers = asyncio.run(run())
+
+        assert leader == (b"image", False)
+        assert all(isinstance(error, asyncio.TimeoutError) for error in followers)
+        assert flight.in_flight() == 0
+
+    def test_waits_for_remote_lease_holder(self):
+        """其他容器持有租约时读取其结果而不是重新计算"""
+        from lambdas.single_flight import RedisLeaseStore
+
+        redis_client = FakeLeaseRedis()
+        store = RedisLeaseStore(redis_client)
+        assert store.acquire("key", 60) is not None  # 模拟另一个容器
+
+        remote_cache = {}
+        flight = SingleFlight(lease_store=store, poll_interval=0.01, wait_timeout=2)
+        compute = Mock(return_value="local")
+
+        timer = threading.Timer(0.05, lambda: remote_cache.update(key="remote"))
+        timer.start()
+        value, _ = flight.do("key", compute, check=lambda: remote_cache.get("key"))
+        timer.join()
+
+        assert value == "remote"
+        compute.assert_not_called()
+        assert flight.stats['remote_hits'] == 1
+
+    def test_computes_after_remote_lease_released_without_result(self):
+        """租约释放但没有结果时由本容器计算"""
+        from lambdas.single_flight import RedisLeaseStore
+
+        redis_client = FakeLeaseRedis()
+        store = RedisLeaseStore(redis_client)
+        token = store.acquire("key", 60)
+        threading.Timer(0.05, lambda: store.release("key", token)).start()
+
+        flight = SingleFlight(lease_store=store, poll_interval=0.01, wait_timeout=2)
+        value, _ = flight.do("key", lambda: "local", check=lambda: None)
+
+        assert value == "local"
+        assert not store.is_held("key")
+
+
+class TestGetOrCompute:
+    """MultiLevelCache.get_or_compute测试"""
+
+    def test_miss_computes_and_caches(self):
+        cache = MultiLevelCache(enable_cdn=False)
+        compute = Mock(return_value={"slides": 5})
+
+        assert cache.get_or_compute("ppt:key", compute) == {"slides": 5}
+        assert cache.get_or_compute("ppt:key", compute) == {"slides": 5}
+        compute.assert_called_once()
+
+
+def _sample_outline_content(slide_count=20):
+    """接近真实大小的大纲/内容JSON"""
+    return {
+        "title": "人工智能在企业数字化转型中的应用",
+        "slides": [
+            {
+                "slide_number": i,
+                "title": f"第{i}部分：AI驱动的业务流程优化",
+                "bullet_points": [
+                    f"要点{i}.{j}：通过机器学习模型自动识别流程瓶颈并给出优化建议" for j in range(5)
+                ],
+                "speaker_notes": "本页介绍如何在现有系统中逐步引入AI能力，" * 4
+            }
+            for i in range(1, slide_count + 1)
+        ],
+        "metadata": {"total_slides": slide_count, "created_at": "2025-01-01T00:00:00"}
+    }
+
+
+class TestCacheCodec:
+    """L2编解码器测试"""
+
+    def test_round_trip_by_type(self):
+        """bytes/str/JSON以及嵌套bytes均可无损往返"""
+        codec = CacheCodec(compress_threshold=16)
+        values = [
+            b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 10,
+            "纯文本" * 50,
+            {"status": "completed", "progress": 100},
+            {"image_data": b"\x00\xff" * 100, "model": "nova"},
+            [1, 2, 3]
+        ]
+
+        for value in values:
+            assert codec.decode(codec.encode(value)) == value
+
+    def test_compresses_above_threshold_only(self):
+        """小负载不压缩，大负载压缩"""
+        codec = CacheCodec(compress_threshold=1024, compression='zlib')
+
+        small = codec.encode({"status": "ok"})
+        large = codec.encode(_sample_outline_content())
+
+        assert small[4] == CacheCodec.COMPRESSION_NONE
+        assert large[4] == CacheCodec.COMPRESSION_ZLIB
+        assert codec.decode(large) == _sample_outline_content()
+
+    def test_legacy_json_entries_still_readable(self):
+        """升级前写入的JSON字符串仍可读取"""
+        codec = CacheCodec()
+
+        assert codec.decode(json.dumps({"a": 1}).encode()) == {"a": 1}
+        assert codec.decode(json.dumps({"a": 1})) == {"a": 1}
+
+    def test_future_version_rejected(self):
+        """未知版本不会被错误解析"""
+        codec = CacheCodec()
+        data = bytearray(codec.encode({"a": 1}))
+        data[2] = CacheCodec.VERSION + 1
+
+        with pytest.raises(CodecError):
+            codec.decode(bytes(data))
+
+    def test_multilevel_cache_round_trips_bytes_through_l2(self):
+        """图片字节经Redis L2往返不损坏"""
+        redis_client = FakeLeaseRedis()
+        writer = MultiLevelCache(enable_cdn=False, redis_client=redis_client)
+        reader = MultiLevelCache(enable_cdn=False, redis_client=redis_client)
+        image = bytes(range(256)) * 40
+
+        writer.set("image:key", image)
+
+        assert isinstance(redis_client.data["image:key"], bytes)
+        assert reader.get("image:key") == image
+        assert reader.get_stats()['hits']['l2'] == 1
+
+
+@pytest.mark.benchmark
+class TestCacheCodecBenchmark:
+    """编解码基准：与旧版json.dumps(default=str)路径对比负载大小和耗时"""
+
+    ITERATIONS = 200
+
+    def _measure(self, encode, decode, value):
+        start = time.perf_counter()
+        for _ in range(self.ITERATIONS):
+            payload = encode(value)
+        encode_time = (time.perf_counter() - start) / self.ITERATIONS
+
+        start = time.perf_counter()
+        for _ in range(self.ITERATIONS):
+            decode(payload)
+        decode_time = (time.perf_counter() - start) / self.ITERATIONS
+        return len(payload), encode_time, decode_time
+
+    def test_codec_vs_legacy_json(self):
+        redis_client = FakeLeaseRedis()
+        codec = CacheCodec()
+        legacy_encode = lambda v: json.dumps(v, default=str)
+        legacy_decode = json.loads
+
+        payloads = {
+            'status': {"status": "processing", "progress": 50, "current_step": "content_generation"},
+            'outline_20_slides': _sample_outline_content(20)
+        }
+
+        print(f"\n{'payload':<20}{'legacy bytes':>14}{'codec bytes':>14}"
+              f"{'legacy enc/dec ms':>22}{'codec enc/dec ms':>22}")
+        for name, value in payloads.items():
+            legacy = self._measure(legacy_encode, legacy_decode, value)
+            current = self._measure(codec.encode, codec.decode, value)
+            redis_client.setex(name, 60, codec.encode(value))
+            assert codec.decode(redis_client.get(name)) == value
+            print(f"{name:<20}{legacy[0]:>14}{current[0]:>14}"
+                  f"{legacy[1] * 1000:>11.3f}/{legacy[2] * 1000:<10.3f}"
+                  f"{current[1] * 1000:>11.3f}/{current[2] * 1000:<10.3f}")
+
+        legacy_size = len(legacy_encode(payloads['outline_20_slides']).encode('utf-8'))
+        assert len(codec.encode(payloads['outline_20_slides'])) < legacy_size / 3
+
+        # 旧路径无法往返二进制数据，新路径可以
+        image = bytes(range(256)) * 400
+        assert legacy_decode(legacy_encode(image)) != image
+        assert codec.decode(codec.encode(image)) == image
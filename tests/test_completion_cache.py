@@ -0,0 +1,151 @@
+"""
+文本生成缓存单元测试
+"""
+
+import json
+import threading
+import time
+from io import BytesIO
+from unittest.mock import Mock
+
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lambdas'))
+
+from lambdas.cache_manager import MultiLevelCache
+from src.completion_cache import CompletionCache
+
+
+def _backend():
+    return MultiLevelCache(enable_cdn=False)
+
+
+class TestCompletionCacheKey:
+    """缓存键生成测试"""
+
+    @pytest.mark.unit
+    def test_whitespace_and_width_variants_share_key(self):
+        """空白和全半角差异不影响缓存键"""
+        key = CompletionCache.make_key("model-a", "生成 AI 大纲\n共5页", 0.7, 2000)
+
+        assert CompletionCache.make_key("model-a", "  生成  ＡＩ 大纲 共５页 ", 0.7, 2000) == key
+
+    @pytest.mark.unit
+    def test_model_and_parameters_change_key(self):
+        """模型、温度、max_tokens和其他参数都参与缓存键"""
+        key = CompletionCache.make_key("model-a", "prompt", 0.7, 2000)
+
+        assert CompletionCache.make_key("model-b", "prompt", 0.7, 2000) != key
+        assert CompletionCache.make_key("model-a", "prompt", 0.3, 2000) != key
+        assert CompletionCache.make_key("model-a", "prompt", 0.7, 1000) != key
+        assert CompletionCache.make_key("model-a", "Prompt", 0.7, 2000) != key
+        assert CompletionCache.make_key("model-a", "prompt", 0.7, 2000, system="s") != key
+        assert key.startswith("completion:model-a:")
+
+
+class TestCompletionCache:
+    """缓存读写与命中率测试"""
+
+    @pytest.mark.unit
+    def test_repeat_prompt_served_from_cache(self):
+        """相同提示词第二次调用不再请求模型"""
+        cache = CompletionCache(backend=_backend())
+        generate = Mock(return_value="大纲内容")
+
+        first = cache.get_or_generate("model-a", "prompt", generate, temperature=0.7, max_tokens=2000)
+        second = cache.get_or_generate("model-a", "prompt ", generate, temperature=0.7, max_tokens=2000)
+
+        assert first == second == "大纲内容"
+        assert generate.call_count == 1
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    @pytest.mark.unit
+    def test_high_temperature_and_disabled_bypass_cache(self):
+        """高温度调用和禁用状态直接请求模型"""
+        backend = Mock()
+        cache = CompletionCache(backend=backend, max_temperature=0.7)
+        generate = Mock(return_value="text")
+
+        cache.get_or_generate("model-a", "prompt", generate, temperature=0.9, max_tokens=100)
+        CompletionCache(backend=backend, enabled=False).get_or_generate(
+            "model-a", "prompt", generate, temperature=0.1, max_tokens=100
+        )
+
+        assert generate.call_count == 2
+        backend.get_or_compute.assert_not_called()
+        assert cache.get_stats()['bypassed'] == 1
+
+    @pytest.mark.unit
+    def test_errors_and_empty_responses_not_cached(self):
+        """异常原样抛出，空响应不写入缓存"""
+        cache = CompletionCache(backend=_backend())
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_generate("model-a", "p", Mock(side_effect=RuntimeError("throttled")),
+                                  temperature=0.7, max_tokens=10)
+
+        empty = Mock(return_value="")
+        assert cache.get_or_generate("model-a", "p", empty, temperature=0.7, max_tokens=10) == ""
+        assert cache.get_or_generate("model-a", "p", empty, temperature=0.7, max_tokens=10) == ""
+        assert empty.call_count == 2
+
+    @pytest.mark.unit
+    def test_concurrent_misses_invoke_model_once(self):
+        """相同提示词的并发未命中只调用一次模型"""
+        cache = CompletionCache(backend=_backend())
+        calls = []
+
+        def generate():
+            calls.append(1)
+            time.sleep(0.1)
+            return "shared"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                cache.get_or_generate("model-a", "popular topic", generate, temperature=0.5, max_tokens=10)
+            ))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["shared"] * 5
+        assert len(calls) == 1
+        assert cache.get_stats()['hits'] == 4
+
+
+class TestContentGeneratorCaching:
+    """ContentGenerator接入缓存测试"""
+
+    @pytest.mark.unit
+    def test_outline_prompt_cached_across_generators(self):
+        """不同请求的相同大纲提示词复用响应"""
+        from src.content_generator import ContentGenerator
+
+        outline = {"title": "AI", "slides": [
+            {"slide_number": i, "title": f"第{i}页", "key_points": ["a", "b"]} for i in range(1, 4)
+        ]}
+
+        def invoke_model(**kwargs):
+            return {"body": BytesIO(json.dumps({
+                "output": {"message": {"content": [{"text": json.dumps(outline)}]}}
+            }).encode())}
+
+        client = Mock()
+        client.invoke_model.side_effect = invoke_model
+        cache = CompletionCache(backend=_backend())
+
+        first = ContentGenerator(bedrock_client=client, completion_cache=cache).generate_outline("AI", 3)
+        second = ContentGenerator(bedrock_client=client, completion_cache=cache).generate_outline("AI", 3)
+
+        assert first["title"] == second["title"] == "AI"
+        assert client.invoke_model.call_count == 1
+        assert cache.get_stats()['hits'] == 1
@@ -13,6 +13,8 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from src.content_generator import ContentGenerator, generate_outline, generate_slide_content, generate_and_save_content
+from src.throttle_manager import RateBudget
+from src.bedrock_invoker import BedrockInvoker, Deadline, DeadlineExceededError, deadline_scope
 from src.content_validator import (
     validate_content_format,
     validate_content_length,
@@ -281,6 +283,307 @@ class TestContentGeneratorImplementation:
         assert result["content"]["status"] == "completed"
 
 
+
+class TestConcurrentSlideContent:
+    """并发幻灯片内容生成测试"""
+
+    @staticmethod
+    def _make_outline(count):
+        return {
+            "title": "并发测试",
+            "slides": [
+                {"slide_number": i, "title": f"第{i}页", "content": ["要点A", "要点B", "要点C"]}
+                for i in range(1, count + 1)
+            ]
+        }
+
+    @staticmethod
+    def _make_client(fail_titles=()):
+        """根据提示词中的页面标题返回内容，随机延迟以打乱完成顺序"""
+        import random
+        import re
+        import time
+
+        def invoke_model(**kwargs):
+            prompt = json.loads(kwargs["body"])["messages"][0]["content"][0]["text"]
+            title = re.search(r"页面标题：(.+)", prompt).group(1).strip()
+            time.sleep(random.uniform(0, 0.02))
+            if title in fail_titles:
+                return {"body": Mock(read=Mock(return_value=b"{}"))}
+            content = {
+                "title": title,
+                "bullet_points": [f"{title}-1", f"{title}-2", f"{title}-3"],
+                "speaker_notes": f"{title}备注"
+            }
+            body = {"output": {"message": {"content": [{"text": json.dumps(content, ensure_ascii=False)}]}}}
+            return {"body": Mock(read=Mock(return_value=json.dumps(body).encode()))}
+
+        client = Mock()
+        client.invoke_model.side_effect = invoke_model
+        return client
+
+    @pytest.mark.unit
+    def test_concurrent_mode_preserves_slide_order(self):
+        """并发模式下结果顺序与大纲一致"""
+        outline = self._make_outline(12)
+        generator = ContentGenerator(
+            bedrock_client=self._make_client(),
+            max_workers=6,
+            rate_budget=RateBudget(rate=1000.0)
+        )
+
+        slides = generator.generate_slide_content(outline)
+
+        assert [slide["title"] for slide in slides] == [f"第{i}页" for i in range(1, 13)]
+        assert all(len(slide["bullet_points"]) == 3 for slide in slides)
+
+    @pytest.mark.unit
+    def test_concurrent_mode_applies_per_slide_fallback(self):
+        """单页失败只影响该页，使用默认内容"""
+        outline = self._make_outline(5)
+        generator = ContentGenerator(
+            bedrock_client=self._make_client(fail_titles={"第3页"}),
+            max_workers=4,
+            rate_budget=RateBudget(rate=1000.0)
+        )
+
+        with patch("src.utils.time.sleep"):
+            slides = generator.generate_slide_content(outline)
+
+        assert slides[2]["title"] == "第3页"
+        assert slides[2]["bullet_points"] == ["要点A", "要点B", "要点C"]
+        assert slides[1]["bullet_points"] == ["第2页-1", "第2页-2", "第2页-3"]
+
+    @pytest.mark.unit
+    def test_concurrent_calls_share_rate_budget(self):
+        """所有线程的调用都从同一个速率预算扣除令牌"""
+        budget = RateBudget(rate=1000.0)
+        budget.acquire = Mock(wraps=budget.acquire)
+        generator = ContentGenerator(
+            bedrock_client=self._make_client(),
+            max_workers=3,
+            rate_budget=budget
+        )
+
+        generator.generate_slide_content(self._make_outline(6))
+
+        assert budget.acquire.call_count == 6
+
+    @pytest.mark.unit
+    def test_throttling_lowers_shared_rate(self):
+        """收到ThrottlingException时降低共享预算的速率"""
+        from botocore.exceptions import ClientError
+
+        budget = RateBudget(rate=1000.0)
+        client = Mock()
+        client.invoke_model.side_effect = ClientError(
+            {'Error': {'Code': 'ThrottlingException', 'Message': 'Too many requests'}},
+            'InvokeModel'
+        )
+        generator = ContentGenerator(bedrock_client=client, max_workers=2, rate_budget=budget)
+
+        with patch("src.utils.time.sleep"):
+            with pytest.raises(Exception):
+                generator._invoke_bedrock("测试")
+
+        assert budget.rate < 1000.0
+        assert budget.get_stats()['throttles'] == 5
+
+
+
+class FakeStreamingBedrockClient:
+    """流式Bedrock客户端替身：按固定大小分块返回大纲，并记录调用顺序"""
+
+    def __init__(self, outline, chunk_size=16, fail_stream=False):
+        self.outline_text = json.dumps(outline, ensure_ascii=False)
+        self.chunk_size = chunk_size
+        self.fail_stream = fail_stream
+        self.events = []
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        if self.fail_stream:
+            raise RuntimeError("stream unavailable")
+
+        def body():
+            for i in range(0, len(self.outline_text), self.chunk_size):
+                piece = self.outline_text[i:i + self.chunk_size]
+                chunk = {"contentBlockDelta": {"delta": {"text": piece}}}
+                yield {"chunk": {"bytes": json.dumps(chunk).encode()}}
+                # 给内容生成线程留出执行机会
+                import time
+                time.sleep(0.005)
+            self.events.append("stream_end")
+
+        return {"body": body()}
+
+    def invoke_model(self, **kwargs):
+        import re
+        prompt = json.loads(kwargs["body"])["messages"][0]["content"][0]["text"]
+        match = re.search(r"页面标题：(.+)", prompt)
+        title = match.group(1).strip() if match else None
+        if title is None:
+            text = self.outline_text
+        else:
+            self.events.append(f"content:{title}")
+            text = json.dumps({
+                "title": title,
+                "bullet_points": [f"{title}-1", f"{title}-2", f"{title}-3"],
+                "speaker_notes": "备注"
+            }, ensure_ascii=False)
+        body = {"output": {"message": {"content": [{"text": text}]}}}
+        return {"body": Mock(read=Mock(return_value=json.dumps(body).encode()))}
+
+
+class TestStreamingOutlinePipeline:
+    """流式大纲到内容的流水线测试"""
+
+    @staticmethod
+    def _make_outline(count):
+        return {
+            "title": "流式测试",
+            "slides": [
+                {"slide_number": i, "title": f"第{i}页", "content": ["要点A", "要点B", "要点C"]}
+                for i in range(1, count + 1)
+            ]
+        }
+
+    @pytest.mark.unit
+    def test_parser_yields_slides_incrementally(self):
+        """解析器在每个幻灯片对象闭合时立即返回"""
+        from src.stream_parser import OutlineStreamParser
+
+        text = "```json\n" + json.dumps(self._make_outline(3), ensure_ascii=False) + "\n```"
+        parser = OutlineStreamParser()
+        seen = []
+        for ch in text:
+            seen.extend(slide["slide_number"] for slide in parser.feed(ch))
+
+        assert seen == [1, 2, 3]
+        assert parser.text == text
+
+    @pytest.mark.unit
+    def test_content_starts_before_outline_finishes(self):
+        """第一页内容在大纲流结束前开始生成，结果顺序与大纲一致"""
+        client = FakeStreamingBedrockClient(self._make_outline(5))
+        generator = ContentGenerator(
+            bedrock_client=client,
+            max_workers=3,
+            rate_budget=RateBudget(rate=1000.0)
+        )
+
+        outline, slides = generator.generate_presentation_streaming("流式测试", 5)
+
+        assert client.events.index("content:第1页") < client.events.index("stream_end")
+        assert [slide["title"] for slide in slides] == [f"第{i}页" for i in range(1, 6)]
+        assert len(outline["slides"]) == 5
+        assert outline["metadata"]["total_slides"] == 5
+
+    @pytest.mark.unit
+    def test_stream_failure_falls_back_to_non_streaming(self):
+        """流式调用失败时回退到非流式大纲生成"""
+        client = FakeStreamingBedrockClient(self._make_outline(4), fail_stream=True)
+        generator = ContentGenerator(
+            bedrock_client=client,
+            max_workers=2,
+            rate_budget=RateBudget(rate=1000.0)
+        )
+
+        outline, slides = generator.generate_presentation_streaming("流式测试", 4)
+
+        assert len(slides) == 4
+        assert slides[3]["title"] == "第4页"
+
+
+class TestBedrockInvokerTimeout:
+    """线程安全的Bedrock调用超时测试"""
+
+    @pytest.mark.unit
+    def test_timeout_works_in_worker_thread(self):
+        """在非主线程中超时也能生效（signal.alarm做不到）"""
+        import threading
+        import time
+
+        invoker = BedrockInvoker(default_timeout=0.05)
+        errors = []
+
+        def worker():
+            try:
+                invoker.call(time.sleep, 1)
+            except Exception as e:
+                errors.append(e)
+
+        started = time.monotonic()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert time.monotonic() - started < 0.5
+        assert len(errors) == 1
+        assert isinstance(errors[0], DeadlineExceededError)
+        assert isinstance(errors[0], TimeoutError)
+
+    @pytest.mark.unit
+    def test_deadline_caps_call_timeout(self):
+        """请求截止时间小于单次超时时按截止时间返回"""
+        import time
+
+        invoker = BedrockInvoker(default_timeout=10)
+        started = time.monotonic()
+
+        with pytest.raises(DeadlineExceededError):
+            invoker.call(time.sleep, 1, deadline=Deadline(0.05))
+
+        assert time.monotonic() - started < 0.5
+
+    @pytest.mark.unit
+    def test_expired_deadline_skips_call(self):
+        """截止时间已到时不再发起调用"""
+        fn = Mock(return_value="ok")
+
+        with deadline_scope(Deadline(0)):
+            with pytest.raises(DeadlineExceededError):
+                BedrockInvoker().call(fn)
+
+        fn.assert_not_called()
+
+    @pytest.mark.unit
+    def test_deadline_from_lambda_context(self):
+        """根据Lambda剩余时间创建截止时间并预留收尾时间"""
+        context = Mock()
+        context.get_remaining_time_in_millis.return_value = 30000
+
+        deadline = Deadline.from_lambda_context(context, reserve_seconds=5)
+
+        assert 24 < deadline.remaining() <= 25
+        assert Deadline.from_lambda_context(None) is None
+
+    @pytest.mark.unit
+    def test_default_client_read_timeout_matches_invoke_timeout(self):
+        """未传入客户端时创建的bedrock-runtime客户端读超时与单次调用超时一致"""
+        generator = ContentGenerator(invoke_timeout=12)
+        config = generator.bedrock_client.meta.config
+
+        assert config.read_timeout == 12
+        assert config.retries['mode'] == 'adaptive'
+
+    @pytest.mark.unit
+    def test_content_generator_does_not_retry_after_deadline(self):
+        """截止时间耗尽后不重试，直接抛出"""
+        client = Mock()
+        generator = ContentGenerator(
+            bedrock_client=client,
+            rate_budget=RateBudget(rate=1000.0),
+            deadline=Deadline(0)
+        )
+
+        with patch("src.utils.time.sleep") as sleep:
+            with pytest.raises(DeadlineExceededError):
+                generator._invoke_bedrock("测试")
+
+        client.invoke_model.assert_not_called()
+        sleep.assert_not_called()
+
+
 if __name__ == "__main__":
     # 运行测试
     pytest.main([__file__, "-v"])
\ No newline at end of file
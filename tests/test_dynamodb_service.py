@@ -0,0 +1,136 @@
+"""
+DynamoDBService批量操作与并行扫描测试
+"""
+
+import os
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from lambdas.services import dynamodb_service
+from lambdas.services.dynamodb_service import DynamoDBService, DynamoDBServiceError
+
+
+@pytest.fixture
+def service():
+    """moto模拟的单主键表"""
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        dynamodb.create_table(
+            TableName="items",
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        yield DynamoDBService("items", dynamodb_resource=dynamodb)
+
+
+class TestBatchOperations:
+    """分块批量读写测试"""
+
+    @pytest.mark.unit
+    def test_batch_write_and_get_chunk_large_inputs(self, service):
+        """超过单次上限的批量写入和读取自动分块"""
+        items = [{"id": f"item-{i:03d}", "value": i} for i in range(230)]
+
+        assert service.batch_write(items_to_put=items) == {}
+        fetched = service.batch_get([{"id": item["id"]} for item in items])
+
+        assert sorted(item["value"] for item in fetched) == list(range(230))
+
+        assert service.batch_write(keys_to_delete=[{"id": f"item-{i:03d}"} for i in range(200)]) == {}
+        assert len(list(service.iter_scan())) == 30
+
+    @pytest.mark.unit
+    def test_unprocessed_items_retried_with_backoff(self, service):
+        """未处理的写入请求和读取键按退避重试"""
+        original_write = service.client.batch_write_item
+        original_get = service.client.batch_get_item
+        calls = {"write": 0, "get": 0}
+
+        def flaky_write(RequestItems):
+            calls["write"] += 1
+            requests = RequestItems["items"]
+            if calls["write"] == 1:
+                original_write(RequestItems={"items": requests[:10]})
+                return {"UnprocessedItems": {"items": requests[10:]}}
+            return original_write(RequestItems=RequestItems)
+
+        def flaky_get(RequestItems):
+            calls["get"] += 1
+            keys = RequestItems["items"]["Keys"]
+            if calls["get"] == 1:
+                response = original_get(RequestItems={"items": {"Keys": keys[:5]}})
+                response["UnprocessedKeys"] = {"items": {"Keys": keys[5:]}}
+                return response
+            return original_get(RequestItems=RequestItems)
+
+        with patch.object(service.client, "batch_write_item", side_effect=flaky_write), \
+                patch.object(service.client, "batch_get_item", side_effect=flaky_get), \
+                patch.object(dynamodb_service.time, "sleep") as sleep:
+            assert service.batch_write(items_to_put=[{"id": str(i)} for i in range(20)]) == {}
+            fetched = service.batch_get([{"id": str(i)} for i in range(20)])
+
+        assert calls == {"write": 2, "get": 2}
+        assert len(fetched) == 20
+        assert sleep.call_count == 2
+
+    @pytest.mark.unit
+    def test_persistently_unprocessed_items_returned(self, service):
+        """重试耗尽后返回仍未处理的请求"""
+        with patch.object(service.client, "batch_write_item",
+                          side_effect=lambda RequestItems: {"UnprocessedItems": RequestItems}), \
+                patch.object(dynamodb_service.time, "sleep"):
+            unprocessed = service.batch_write(keys_to_delete=[{"id": "a"}, {"id": "b"}])
+
+        assert [request["DeleteRequest"]["Key"]["id"] for request in unprocessed["items"]] == ["a", "b"]
+
+
+class TestStreamingScan:
+    """流式与并行扫描测试"""
+
+    @pytest.mark.unit
+    def test_parallel_scan_returns_every_item_once(self, service):
+        """并行分段扫描覆盖全表且不重复"""
+        service.batch_write(items_to_put=[{"id": str(i), "group": i % 3} for i in range(120)])
+
+        ids = [item["id"] for item in service.parallel_scan(total_segments=4, page_size=7)]
+        assert sorted(ids, key=int) == [str(i) for i in range(120)]
+
+        filtered = list(service.parallel_scan(
+            total_segments=3,
+            filter_expression="#g = :g",
+            expression_attribute_names={"#g": "group"},
+            expression_attribute_values={":g": 0},
+            projection_expression="id"
+        ))
+        assert len(filtered) == 40
+        assert all(set(item) == {"id"} for item in filtered)
+
+    @pytest.mark.unit
+    def test_iter_scan_is_lazy_and_scan_respects_limit(self, service):
+        """流式扫描按页读取，scan的limit提前停止"""
+        service.batch_write(items_to_put=[{"id": str(i)} for i in range(50)])
+
+        with patch.object(service.client, "scan", wraps=service.client.scan) as scan:
+            first = next(service.iter_scan(page_size=10))
+            assert scan.call_count == 1
+        assert "id" in first
+
+        assert len(service.scan(limit=15)) == 15
+
+    @pytest.mark.unit
+    def test_parallel_scan_propagates_segment_errors(self, service):
+        """任一分段失败时抛出DynamoDBServiceError"""
+        from botocore.exceptions import ClientError
+
+        error = ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow down"}},
+                            "Scan")
+        with patch.object(service.client, "scan", side_effect=error):
+            with pytest.raises(DynamoDBServiceError) as exc:
+                list(service.parallel_scan(total_segments=2))
+
+        assert exc.value.error_code == "ProvisionedThroughputExceededException"
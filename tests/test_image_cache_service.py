@@ -0,0 +1,232 @@
+"""
+图片缓存服务相似查找测试
+"""
+
+import os
+from unittest.mock import Mock
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from lambdas.services import image_cache_service
+from lambdas.services.image_cache_service import (
+    ImageCacheService,
+    PromptSimilarityIndex,
+    embed_prompt,
+    pack_embedding,
+    unpack_embedding
+)
+
+TEMPLATE = ("Professional business presentation illustration about {}, clean modern corporate style, "
+            "high quality, blue color palette, minimalist design")
+
+
+@pytest.fixture
+def cache_service():
+    """使用moto模拟的DynamoDB和S3创建缓存服务"""
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        dynamodb.create_table(
+            TableName="image-cache",
+            KeySchema=[{"AttributeName": "cache_key", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "cache_key", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="image-cache")
+        yield ImageCacheService(dynamodb_table="image-cache", s3_bucket="image-cache")
+
+
+class TestPromptEmbedding:
+    """提示词嵌入测试"""
+
+    @pytest.mark.unit
+    def test_reworded_prompts_more_similar_than_unrelated(self):
+        """措辞不同的相同主题比无关主题相似度更高"""
+        def similarity(a, b):
+            return sum(x * y for x, y in zip(embed_prompt(a), embed_prompt(b)))
+
+        base = "modern office team meeting discussing quarterly sales chart"
+        reworded = "a modern office team meeting, discussing the quarterly sales chart"
+        unrelated = "mountain lake at sunrise with pine trees"
+
+        assert similarity(base, base.upper()) == pytest.approx(1.0, abs=1e-6)
+        assert similarity(base, reworded) >= 0.8
+        assert similarity(base, unrelated) < 0.3
+        assert similarity("人工智能在医疗领域的应用场景", "人工智能在医疗领域中的应用场景") >= 0.8
+
+    @pytest.mark.unit
+    def test_embedding_roundtrip(self):
+        """向量打包为float32后可还原"""
+        vector = embed_prompt("business growth")
+        assert unpack_embedding(pack_embedding(vector)) == pytest.approx(vector, abs=1e-6)
+
+
+class TestPromptSimilarityIndex:
+    """相似度索引测试"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_search_ranks_and_filters(self, monkeypatch, use_numpy):
+        """按相似度降序返回阈值以上的结果，NumPy和纯Python实现一致"""
+        if not use_numpy:
+            monkeypatch.setattr(image_cache_service, "np", None)
+        elif image_cache_service.np is None:
+            pytest.skip("NumPy未安装")
+
+        index = PromptSimilarityIndex()
+        prompts = {
+            "a": "team meeting in a modern office",
+            "b": "modern office team meeting with laptops",
+            "c": "rocket launching into space",
+        }
+        for key, prompt in prompts.items():
+            index.add(key, embed_prompt(prompt), {"style": "photo" if key != "b" else "art"})
+
+        results = index.search(embed_prompt("team meeting in modern office"), threshold=0.5)
+        assert [key for _, key, _ in results][:1] == ["a"]
+        assert "c" not in [key for _, key, _ in results]
+        assert [score for score, _, _ in results] == sorted((score for score, _, _ in results), reverse=True)
+
+        filtered = index.search(embed_prompt("modern office team meeting"), threshold=0.3,
+                                predicate=lambda meta: meta["style"] == "art")
+        assert [key for _, key, _ in filtered] == ["b"]
+
+        assert index.remove("a")
+        assert len(index) == 2
+        assert "a" not in [key for _, key, _ in index.search(embed_prompt(prompts["a"]), threshold=0.0)]
+
+
+class TestSimilarCachedImages:
+    """缓存服务相似查找测试"""
+
+    @pytest.mark.unit
+    def test_near_hit_returns_cached_image(self, cache_service):
+        """精确键未命中时返回仅标点不同、尺寸相同的缓存图片"""
+        prompt = TEMPLATE.format("quarterly sales growth")
+        key = cache_service.generate_cache_key(prompt, 1024, 768, "photographic")
+        assert cache_service.save_to_cache(key, b"png-bytes", {
+            "prompt": prompt, "model": "nova", "width": 1024, "height": 768, "style": "photographic"
+        })
+
+        reworded = prompt + "."
+        assert cache_service.get_cached_image(
+            cache_service.generate_cache_key(reworded, 1024, 768, "photographic")
+        ) is None
+
+        cached = cache_service.get_similar_cached_image(reworded, width=1024, height=768, style="photographic")
+        assert cached["image_data"] == b"png-bytes"
+        assert cached["metadata"]["cache_key"] == key
+        assert cached["metadata"]["similarity"] >= cache_service.similarity_threshold
+
+        assert cache_service.find_similar_cached_images(reworded, width=512) == []
+        assert cache_service.find_similar_cached_images("rocket launching into space") == []
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("original,changed", [
+        ("revenue growth", "revenue decline"),
+        ("AWS Lambda", "Azure Functions"),
+        ("Q1 results", "Q4 results"),
+    ])
+    def test_different_meaning_is_not_a_near_hit(self, cache_service, original, changed):
+        """长提示词中替换关键词时字面相似度很高，但默认阈值下不命中"""
+        prompt = TEMPLATE.format(original)
+        cache_service.save_to_cache(cache_service.generate_cache_key(prompt), b"img", {"prompt": prompt})
+
+        assert cache_service.find_similar_cached_images(TEMPLATE.format(changed)) == []
+
+    @pytest.mark.unit
+    def test_index_loaded_from_table(self, cache_service):
+        """新实例从DynamoDB加载已保存的向量，之后不再重复扫描"""
+        prompt = "solar panels on a green field"
+        key = cache_service.generate_cache_key(prompt)
+        cache_service.save_to_cache(key, b"img", {"prompt": prompt, "width": 1024, "height": 768})
+
+        fresh = ImageCacheService(dynamodb_table="image-cache", s3_bucket="image-cache")
+        fresh.table = Mock(wraps=fresh.table)
+        matches = fresh.find_similar_cached_images("Solar panels on a green field!", threshold=0.9)
+        assert [match["cache_key"] for match in matches] == [key]
+        assert matches[0]["width"] == 1024
+
+        fresh.find_similar_cached_images(prompt)
+        assert fresh.table.scan.call_count == 1
+
+    @pytest.mark.unit
+    def test_index_load_is_bounded(self, cache_service):
+        """加载索引时最多读取index_max_entries条"""
+        for i in range(12):
+            cache_service.save_to_cache(cache_service.generate_cache_key(f"prompt {i}"), b"img",
+                                        {"prompt": f"prompt {i}"})
+
+        bounded = ImageCacheService(dynamodb_table="image-cache", s3_bucket="image-cache",
+                                    index_max_entries=5)
+        bounded.find_similar_cached_images("prompt 1")
+        assert len(bounded._similarity_index) == 5
+
+
+class TestBedrockImageServiceNearHit:
+    """BedrockImageService相似缓存回退测试"""
+
+    @staticmethod
+    def _service(similarity=0.995):
+        from lambdas.services.bedrock_image_service import BedrockImageService
+
+        cache_client = Mock()
+        cache_client.get_cached_image.return_value = None
+        cache_client.get_similar_cached_image.return_value = {
+            "image_data": b"cached",
+            "metadata": {"prompt": "original", "model": "nova", "width": 1024, "height": 768,
+                         "cached_at": "2026-01-01T00:00:00", "similarity": similarity}
+        }
+        bedrock_client = Mock()
+        return BedrockImageService(bedrock_client=bedrock_client, cache_client=cache_client), \
+            cache_client, bedrock_client
+
+    @pytest.mark.unit
+    def test_generate_image_uses_similar_cached_image(self):
+        """开启allow_similar时精确缓存未命中使用相似图片，不调用模型"""
+        service, cache_client, bedrock_client = self._service()
+        result = service.generate_image("reworded prompt", width=1024, height=768, allow_similar=True)
+
+        assert result["image_data"] == b"cached"
+        assert result["cached"] is True
+        assert result["similarity"] == 0.995
+        bedrock_client.invoke_model.assert_not_called()
+        cache_client.get_similar_cached_image.assert_called_once_with(
+            "reworded prompt", width=1024, height=768, style="photographic"
+        )
+
+    @pytest.mark.unit
+    def test_similar_lookup_is_opt_in(self):
+        """默认不查找相似图片"""
+        service, cache_client, _ = self._service()
+        service.single_flight.do = Mock(return_value=({"image_data": b"new"}, False))
+
+        assert service.generate_image("reworded prompt")["image_data"] == b"new"
+        cache_client.get_similar_cached_image.assert_not_called()
+
+
+class TestCleanupExpiredCache:
+    """过期缓存清理测试"""
+
+    @pytest.mark.unit
+    def test_cleanup_deletes_expired_entries_in_batches(self, cache_service):
+        """并行扫描过期条目，批量删除DynamoDB条目、S3对象和索引"""
+        for i in range(30):
+            key = cache_service.generate_cache_key(f"prompt {i}")
+            cache_service.save_to_cache(key, b"img", {"prompt": f"prompt {i}"})
+            if i < 20:
+                cache_service.table.update_item(
+                    Key={"cache_key": key},
+                    UpdateExpression="SET expires_at = :past",
+                    ExpressionAttributeValues={":past": "2000-01-01T00:00:00+00:00"}
+                )
+
+        assert cache_service.cleanup_expired_cache() == 20
+
+        remaining = cache_service.table.scan()["Items"]
+        assert len(remaining) == 10
+        objects = cache_service.s3_client.list_objects_v2(Bucket="image-cache").get("Contents", [])
+        assert len(objects) == 10
+        assert len(cache_service._similarity_index) == 10
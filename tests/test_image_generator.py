@@ -617,6 +617,106 @@ class TestImageGeneratorAdvanced:
         assert isinstance(prompt, str)
 
 
+class TestConcurrentImageGeneration:
+    """并发图片生成测试"""
+
+    @staticmethod
+    def _make_generator(delays=None, fail_titles=(), max_workers=4, image_timeout=5):
+        """按提示词中的标题控制延迟和失败，S3保存记录到字典"""
+        import threading
+        import time
+        from lambdas.image_generator import ImageGenerator
+
+        delays = delays or {}
+        saved = {}
+        active = {'current': 0, 'peak': 0}
+        lock = threading.Lock()
+
+        def call_image_generation(prompt):
+            title = next(t for t in list(delays) + list(fail_titles) + ["默认"] if t in prompt or t == "默认")
+            with lock:
+                active['current'] += 1
+                active['peak'] = max(active['peak'], active['current'])
+            try:
+                time.sleep(delays.get(title, 0.01))
+                if title in fail_titles:
+                    raise RuntimeError("模型调用失败")
+                return f"image:{prompt}".encode()
+            finally:
+                with lock:
+                    active['current'] -= 1
+
+        processing_service = Mock()
+        processing_service.generate_prompt.side_effect = lambda slide, audience: f"插图 {slide['title']}"
+        processing_service.call_image_generation.side_effect = call_image_generation
+        processing_service.create_placeholder_image.return_value = b"placeholder"
+
+        s3_service = Mock(bucket_name=TEST_BUCKET_NAME)
+
+        def save_image(data, presentation_id, slide_number):
+            saved[slide_number] = data
+            return f"s3://{TEST_BUCKET_NAME}/{presentation_id}/slide_{slide_number}.png"
+
+        s3_service.save_image.side_effect = save_image
+
+        generator = ImageGenerator(
+            processing_service=processing_service,
+            s3_service=s3_service,
+            max_workers=max_workers,
+            image_timeout=image_timeout
+        )
+        return generator, saved, active
+
+    def test_results_preserve_slide_order(self):
+        """先开始的慢图片不影响结果顺序"""
+        slides = [{"title": f"第{i}页", "content": ["要点"]} for i in range(1, 7)]
+        generator, saved, active = self._make_generator(delays={"第1页": 0.1, "第2页": 0.05})
+
+        results = generator.generate_consistent_images(slides, TEST_PRESENTATION_ID)
+
+        assert [r['prompt'] for r in results] == [f"插图 第{i}页" for i in range(1, 7)]
+        assert all(r['status'] == 'success' for r in results)
+        assert active['peak'] > 1
+        assert saved[1] == "image:插图 第1页".encode()
+
+    def test_worker_cap_is_respected(self):
+        """并发数不超过配置的上限"""
+        slides = [{"title": f"第{i}页", "content": []} for i in range(1, 9)]
+        generator, _, active = self._make_generator(max_workers=2)
+
+        generator.batch_generate_images(slides, TEST_PRESENTATION_ID)
+
+        assert active['peak'] <= 2
+
+    def test_timeout_and_failure_fall_back_to_placeholder(self):
+        """超时或失败的图片使用占位图，风格参数保持一致"""
+        slides = [
+            {"title": "正常", "content": []},
+            {"title": "超时", "content": []},
+            {"title": "失败", "content": []}
+        ]
+        generator, saved, _ = self._make_generator(
+            delays={"超时": 1.0}, fail_titles=("失败",), image_timeout=0.2
+        )
+
+        results = generator.generate_consistent_images(slides, TEST_PRESENTATION_ID)
+
+        assert [r['status'] for r in results] == ['success', 'fallback', 'fallback']
+        assert saved[2] == b"placeholder"
+        assert saved[3] == b"placeholder"
+        assert all(r['style_params'] == results[0]['style_params'] for r in results)
+
+    def test_single_worker_runs_sequentially(self):
+        """max_workers=1时逐张生成"""
+        slides = [{"title": f"第{i}页", "content": []} for i in range(1, 4)]
+        generator, _, active = self._make_generator(max_workers=1)
+
+        results = generator.generate_consistent_images(slides, TEST_PRESENTATION_ID)
+
+        assert len(results) == 3
+        assert active['peak'] == 1
+
+
 class TestImageGeneratorIntegration:
     """图片生成器集成测试"""
 
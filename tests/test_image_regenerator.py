@@ -0,0 +1,147 @@
+"""
+图片重新生成器测试 - 批量并发重新生成
+"""
+
+import base64
+import json
+import threading
+import time
+import sys
+import os
+from unittest.mock import Mock
+
+import pytest
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+TEST_BUCKET_NAME = "ai-ppt-presentations-test"
+TEST_PRESENTATION_ID = "test-presentation-123"
+
+
+class FakeImageBedrock:
+    """按提示词返回图片，可配置延迟和失败，并记录调用次数"""
+
+    def __init__(self, delays=None, fail_prompts=()):
+        self.delays = delays or {}
+        self.fail_prompts = set(fail_prompts)
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def invoke_model(self, modelId, body):
+        prompt = json.loads(body)["textToImageParams"]["text"]
+        with self._lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delays.get(prompt, 0.01))
+            if prompt in self.fail_prompts:
+                return {"body": Mock(read=Mock(return_value=b"{}"))}
+            image = base64.b64encode(f"image:{prompt}".encode()).decode()
+            return {"body": Mock(read=Mock(return_value=json.dumps({"images": [image]}).encode()))}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def regenerator_factory(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    from lambdas.image_regenerator import ImageRegenerator
+
+    def factory(bedrock, max_workers=4):
+        s3_client = Mock()
+        regenerator = ImageRegenerator(
+            bedrock_client=bedrock,
+            s3_client=s3_client,
+            bucket_name=TEST_BUCKET_NAME,
+            max_workers=max_workers
+        )
+        regenerator.image_generator.processing_service = Mock(
+            create_placeholder_image=Mock(return_value=b"placeholder")
+        )
+        return regenerator, s3_client
+
+    return factory
+
+
+def _request(slide_number, prompt, **extra):
+    return {"slide_number": slide_number, "regenerate_image": True, "image_prompt": prompt, **extra}
+
+
+class TestBatchRegeneration:
+    """批量重新生成测试"""
+
+    @pytest.mark.unit
+    def test_results_keep_request_order_and_run_concurrently(self, regenerator_factory):
+        """列表接口按请求顺序返回，模型调用并发执行"""
+        bedrock = FakeImageBedrock(delays={"图1": 0.1})
+        regenerator, s3_client = regenerator_factory(bedrock)
+        requests = [_request(i, f"图{i}") for i in range(1, 6)]
+
+        results = regenerator.regenerate_multiple_images(TEST_PRESENTATION_ID, requests)
+
+        assert [r["slide_number"] for r in results] == [1, 2, 3, 4, 5]
+        assert all(r["status"] == "success" for r in results)
+        assert bedrock.peak > 1
+        assert s3_client.put_object.call_count == 5
+
+    @pytest.mark.unit
+    def test_identical_prompts_generate_once(self, regenerator_factory):
+        """同一批次内相同提示词只调用一次模型"""
+        bedrock = FakeImageBedrock()
+        regenerator, s3_client = regenerator_factory(bedrock)
+        requests = [_request(i, "统一风格") for i in range(1, 5)]
+
+        results = regenerator.regenerate_multiple_images(TEST_PRESENTATION_ID, requests)
+
+        assert bedrock.prompts == ["统一风格"]
+        assert len({r["new_image_url"] for r in results}) == 4
+        assert s3_client.put_object.call_count == 4
+
+    @pytest.mark.unit
+    def test_streaming_api_yields_fast_slides_first(self, regenerator_factory):
+        """生成器接口按完成顺序返回结果"""
+        bedrock = FakeImageBedrock(delays={"慢": 0.3})
+        regenerator, _ = regenerator_factory(bedrock)
+        requests = [_request(1, "慢"), _request(2, "快")]
+
+        order = [r["slide_number"] for r in regenerator.iter_regenerate_images(TEST_PRESENTATION_ID, requests)]
+
+        assert order == [2, 1]
+
+    @pytest.mark.unit
+    def test_failures_fall_back_and_invalid_requests_error(self, regenerator_factory):
+        """生成失败使用占位图，非法请求返回错误，其余页不受影响"""
+        bedrock = FakeImageBedrock(fail_prompts={"坏"})
+        regenerator, _ = regenerator_factory(bedrock)
+        requests = [
+            _request(1, "好"),
+            _request(2, "坏"),
+            {"slide_number": 3}
+        ]
+
+        results = regenerator.regenerate_multiple_images(TEST_PRESENTATION_ID, requests)
+
+        assert [r["status"] for r in results] == ["success", "fallback", "error"]
+        assert results[2]["slide_number"] == 3
+
+    @pytest.mark.unit
+    def test_old_image_deleted_after_save(self, regenerator_factory):
+        """保存新图片后删除请求中的旧图片"""
+        bedrock = FakeImageBedrock()
+        regenerator, s3_client = regenerator_factory(bedrock)
+        old_url = f"s3://{TEST_BUCKET_NAME}/presentations/{TEST_PRESENTATION_ID}/images/slide_1_1.png"
+
+        results = regenerator.regenerate_multiple_images(
+            TEST_PRESENTATION_ID, [_request(1, "新图", old_image_url=old_url)]
+        )
+
+        assert results[0]["old_image_deleted"] is True
+        s3_client.delete_object.assert_called_once_with(
+            Bucket=TEST_BUCKET_NAME,
+            Key=f"presentations/{TEST_PRESENTATION_ID}/images/slide_1_1.png"
+        )
@@ -0,0 +1,174 @@
+"""
+异步日志投递测试
+"""
+
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from lambdas.log_shipper import (
+    CloudWatchLogsSink, LogShipper, MemorySink, flush_logs_after_invocation
+)
+from lambdas.logging_manager import LoggingManager
+
+
+def _entry(i, level='INFO'):
+    return {'timestamp': f'2024-01-01T00:00:{i % 60:02d}Z', 'level': level, 'message': f'm{i}'}
+
+
+class SlowSink(MemorySink):
+    """每次投递阻塞的投递目标"""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def send(self, entries):
+        time.sleep(self.delay)
+        super().send(entries)
+
+
+class TestLogShipper:
+    """后台投递与背压测试"""
+
+    @pytest.mark.unit
+    def test_batch_size_triggers_background_shipping(self):
+        """达到批量大小时后台线程投递，提交不等待投递"""
+        sink = SlowSink(delay=0.2)
+        shipper = LogShipper(sink, batch_size=5, flush_interval=60)
+
+        start = time.perf_counter()
+        for i in range(5):
+            assert shipper.submit(_entry(i))
+        assert time.perf_counter() - start < 0.1
+
+        deadline = time.time() + 2
+        while len(sink.entries) < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert [e['message'] for e in sink.entries] == [f'm{i}' for i in range(5)]
+        shipper.close()
+
+    @pytest.mark.unit
+    def test_flush_interval_ships_partial_batch(self):
+        """未攒够一批时按时间间隔投递"""
+        sink = MemorySink()
+        shipper = LogShipper(sink, batch_size=100, flush_interval=0.05)
+        shipper.submit(_entry(1))
+
+        time.sleep(0.3)
+        assert len(sink.entries) == 1
+        shipper.close()
+
+    @pytest.mark.unit
+    def test_drop_oldest_under_backpressure(self):
+        """缓冲区满时丢弃最旧条目并计数"""
+        sink = MemorySink()
+        shipper = LogShipper(sink, capacity=3, batch_size=100, flush_interval=60)
+        for i in range(5):
+            shipper.submit(_entry(i))
+
+        assert shipper.flush()
+        assert [e['message'] for e in sink.entries] == ['m2', 'm3', 'm4']
+        stats = shipper.get_stats()
+        assert stats['dropped_oldest'] == 2 and stats['shipped'] == 3 and stats['pending'] == 0
+        shipper.close()
+
+    @pytest.mark.unit
+    def test_sample_policy_keeps_errors(self):
+        """采样策略丢弃普通日志，错误日志总是保留"""
+        sink = MemorySink()
+        shipper = LogShipper(sink, capacity=2, batch_size=100, flush_interval=60,
+                             overflow_policy='sample', sample_rate=0.0)
+        shipper.submit(_entry(0))
+        shipper.submit(_entry(1))
+
+        assert not shipper.submit(_entry(2))
+        assert shipper.submit(_entry(3, level='ERROR'))
+        shipper.flush()
+
+        assert [e['message'] for e in sink.entries] == ['m1', 'm3']
+        assert shipper.get_stats()['sampled_out'] == 1
+        shipper.close()
+
+    @pytest.mark.unit
+    def test_sink_failures_counted(self):
+        """投递失败计数且不抛出"""
+        sink = Mock()
+        sink.send.side_effect = RuntimeError('throttled')
+        shipper = LogShipper(sink, batch_size=100, flush_interval=60)
+        shipper.submit(_entry(0))
+
+        shipper.flush()
+        assert shipper.get_stats()['failed'] == 1
+        shipper.close()
+
+    @pytest.mark.unit
+    def test_invocation_hook_flushes_pending_logs(self):
+        """处理函数返回后刷新日志，异常时同样刷新"""
+        sink = MemorySink()
+        shipper = LogShipper(sink, batch_size=100, flush_interval=60)
+
+        @flush_logs_after_invocation
+        def handler(event, context):
+            shipper.submit(_entry(event['n']))
+            if event.get('fail'):
+                raise ValueError('boom')
+            return {'statusCode': 200}
+
+        assert handler({'n': 1}, None) == {'statusCode': 200}
+        assert len(sink.entries) == 1
+        with pytest.raises(ValueError):
+            handler({'n': 2, 'fail': True}, None)
+        assert len(sink.entries) == 2
+        shipper.close()
+
+
+class TestCloudWatchLogsSink:
+    """CloudWatch Logs 投递目标测试"""
+
+    @pytest.mark.unit
+    def test_events_sorted_and_stream_created_once(self):
+        """日志按时间排序投递，日志流只创建一次"""
+        client = Mock()
+        sink = CloudWatchLogsSink(client, '/aws/test', 'svc')
+
+        sink.send([_entry(5), _entry(1)])
+        sink.send([_entry(2)])
+
+        assert client.create_log_stream.call_count == 1
+        first = client.put_log_events.call_args_list[0].kwargs
+        assert first['logGroupName'] == '/aws/test'
+        assert [e['timestamp'] for e in first['logEvents']] == [1704067201000, 1704067205000]
+
+    @pytest.mark.unit
+    def test_large_batches_split_by_size(self):
+        """超过PutLogEvents大小限制时拆分"""
+        client = Mock()
+        sink = CloudWatchLogsSink(client, '/aws/test', 'svc')
+        big = 'x' * 400000
+
+        sink.send([{**_entry(i), 'message': big} for i in range(5)])
+
+        assert [len(c.kwargs['logEvents']) for c in client.put_log_events.call_args_list] == [2, 2, 1]
+
+
+class TestLoggingManagerShipping:
+    """LoggingManager 接入测试"""
+
+    @pytest.mark.unit
+    def test_log_structured_never_blocks_on_sink(self):
+        """记录日志不等待投递目标"""
+        sink = SlowSink(delay=0.5)
+        shipper = LogShipper(sink, batch_size=1, flush_interval=60)
+        manager = LoggingManager(service_name='test', shipper=shipper)
+
+        start = time.perf_counter()
+        for i in range(20):
+            assert manager.log_structured('INFO', f'event {i}')['logged']
+        assert time.perf_counter() - start < 0.25
+
+        assert manager.flush(timeout=5)
+        assert len(sink.entries) == 20
+        assert manager.get_stats()['shipping']['shipped'] == 20
+        shipper.close()
@@ -0,0 +1,176 @@
+"""
+指标聚合引擎测试
+"""
+
+import random
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from lambdas import metrics_aggregation
+from lambdas.cloudwatch_monitoring import MetricsAggregator
+from lambdas.metrics_aggregation import (
+    AggregationEngine, DDSketch, MetricAggregate, compact_metric_data
+)
+
+
+def _exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class TestDDSketch:
+    """分位数草图测试"""
+
+    @pytest.mark.unit
+    def test_quantiles_within_relative_accuracy(self):
+        """分位数估计满足相对误差保证"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(3, 1.5) for _ in range(20000)]
+        sketch = DDSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        for q in (0.5, 0.9, 0.99):
+            exact = _exact_quantile(values, q)
+            assert abs(sketch.quantile(q) - exact) <= 0.01 * exact + 1e-9
+
+    @pytest.mark.unit
+    def test_bulk_add_matches_scalar_add(self):
+        """批量更新与逐个更新得到相同的桶"""
+        rng = random.Random(3)
+        values = [rng.uniform(-50, 500) for _ in range(5000)] + [0.0] * 10
+        scalar, bulk = DDSketch(), DDSketch()
+        for value in values:
+            scalar.add(value)
+        bulk.add_many(values)
+
+        assert bulk.bins() == scalar.bins()
+        assert bulk.count == scalar.count == len(values)
+
+    @pytest.mark.unit
+    def test_bulk_add_without_numpy(self):
+        """未安装numpy时退化为逐个更新"""
+        with patch.object(metrics_aggregation, "np", None):
+            aggregate = MetricAggregate()
+            aggregate.add_many([1.0, 2.0, 3.0])
+
+        assert aggregate.count == 3
+        assert aggregate.mean == 2.0
+
+    @pytest.mark.unit
+    def test_memory_bounded_by_max_bins(self):
+        """桶数超过上限时合并最低的桶"""
+        sketch = DDSketch(relative_accuracy=0.01, max_bins=64)
+        sketch.add_many([10 ** (i / 100) for i in range(2000)])
+
+        assert len(sketch) <= 64
+        assert sketch.count == 2000
+        assert sketch.quantile(1.0) == pytest.approx(10 ** 19.99, rel=0.01)
+
+    @pytest.mark.unit
+    def test_merge(self):
+        """合并草图等价于合并输入"""
+        left, right, combined = DDSketch(), DDSketch(), DDSketch()
+        left.add_many(range(1, 501))
+        right.add_many(range(501, 1001))
+        combined.add_many(range(1, 1001))
+        left.merge(right)
+
+        assert left.bins() == combined.bins()
+
+
+class TestAggregationEngine:
+    """聚合引擎与统计集测试"""
+
+    @pytest.mark.unit
+    def test_statistics_and_statistic_set(self):
+        """统计摘要与CloudWatch统计集"""
+        engine = AggregationEngine()
+        engine.record_many("latency", [float(i) for i in range(1, 101)])
+        engine.record("latency", 1000.0)
+
+        stats = engine.statistics("latency")
+        assert stats["count"] == 101
+        assert stats["min"] == 1.0 and stats["max"] == 1000.0
+        assert stats["median"] == pytest.approx(51, rel=0.01)
+
+        statistic_set = engine.get("latency").to_statistic_set()
+        assert statistic_set == {"SampleCount": 101.0, "Sum": 6050.0, "Minimum": 1.0, "Maximum": 1000.0}
+
+        engine.record("errors", 1.0)
+        assert list(engine.drain(["errors", "missing"])) == ["errors"]
+        assert "errors" not in engine and "latency" in engine
+
+        drained = engine.drain()
+        assert list(drained) == ["latency"]
+        assert engine.statistics("latency") == {}
+
+    @pytest.mark.unit
+    def test_critical_metrics_reported_per_interval(self, monkeypatch):
+        """关键指标按采集周期统计，没有新值的周期沿用上一周期的统计"""
+        monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+        from lambdas.metrics_collector import MetricsCollector
+
+        collector = MetricsCollector(namespace="Test")
+        collector.critical_metrics = ["ResponseTime"]
+
+        collector._update_aggregator("ResponseTime", [1000.0] * 50)
+        first = collector._collect_critical_metrics()["ResponseTime"]
+        assert first["avg"] == 1000.0
+
+        collector._update_aggregator("ResponseTime", [10.0, 20.0, 30.0])
+        second = collector._collect_critical_metrics()["ResponseTime"]
+        assert second["latest"] == 30.0
+        assert second["avg"] == pytest.approx(20.0)
+        assert 10.0 <= second["p99"] <= 30.0
+
+        assert collector._collect_critical_metrics()["ResponseTime"] == second
+
+    @pytest.mark.unit
+    def test_windowed_aggregator_expires_old_slots(self):
+        """时间窗口外的时间槽不参与统计"""
+        aggregator = MetricsAggregator(window_size=60)
+        with patch("lambdas.cloudwatch_monitoring.time.time", return_value=1000.0):
+            aggregator.add_values("requests", [1.0, 2.0, 3.0])
+        with patch("lambdas.cloudwatch_monitoring.time.time", return_value=1100.0):
+            aggregator.add_value("requests", 10.0)
+            stats = aggregator.get_statistics("requests")
+
+        assert stats["count"] == 1
+        assert stats["average"] == 10.0
+
+
+class TestCompactMetricData:
+    """刷新前预聚合测试"""
+
+    @pytest.mark.unit
+    def test_duplicates_collapsed_into_values_and_counts(self):
+        """相同指标的数据点合并为Values/Counts，不同维度分开"""
+        now = datetime(2024, 1, 1, 12, 0, 30)
+        dims = [{"Name": "Service", "Value": "api"}]
+        data = [{"MetricName": "Latency", "Value": v, "Unit": "Milliseconds",
+                 "Timestamp": now, "Dimensions": dims} for v in (5, 5, 7)]
+        data.append({"MetricName": "Latency", "Value": 9, "Unit": "Milliseconds",
+                     "Timestamp": now, "Dimensions": [{"Name": "Service", "Value": "web"}]})
+        data.append({"MetricName": "Errors", "StatisticValues": {"SampleCount": 1, "Sum": 1,
+                                                                 "Minimum": 1, "Maximum": 1}})
+
+        compacted = compact_metric_data(data)
+
+        assert len(compacted) == 3
+        assert compacted[0]["Values"] == [5, 7] and compacted[0]["Counts"] == [2.0, 1.0]
+        assert "Value" not in compacted[0]
+        assert compacted[1]["Value"] == 9
+        assert "StatisticValues" in compacted[2]
+
+    @pytest.mark.unit
+    def test_values_split_at_cloudwatch_limit(self):
+        """不同值超过150个时拆分为多个数据点"""
+        data = [{"MetricName": "Size", "Value": float(i), "Unit": "Bytes"} for i in range(400)]
+
+        compacted = compact_metric_data(data)
+
+        assert [len(d["Values"]) for d in compacted] == [150, 150, 100]
+        assert sum(sum(d["Counts"]) for d in compacted) == 400
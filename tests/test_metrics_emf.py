@@ -0,0 +1,138 @@
+"""
+嵌入式指标格式输出测试
+"""
+
+import io
+import json
+from datetime import datetime
+
+import boto3
+import pytest
+
+from lambdas.cloudwatch_monitoring import CloudWatchMonitor
+from lambdas.metrics_emf import EMFEmitter, create_metrics_client, get_metrics_backend
+
+
+def _records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestEMFEmitter:
+    """EMF记录格式测试"""
+
+    @pytest.mark.unit
+    def test_groups_data_points_by_dimension_set(self):
+        """同一维度集的指标合并为一条记录，值合并为数组"""
+        stream = io.StringIO()
+        emitter = EMFEmitter(stream=stream)
+        now = datetime(2024, 1, 1, 12, 0, 0)
+        api = [{"Name": "Service", "Value": "api"}]
+
+        emitter.put_metric_data(Namespace="AI-PPT", MetricData=[
+            {"MetricName": "Latency", "Value": 12, "Unit": "Milliseconds", "Timestamp": now, "Dimensions": api},
+            {"MetricName": "Latency", "Values": [5, 7], "Counts": [2, 1], "Unit": "Milliseconds",
+             "Timestamp": now, "Dimensions": api},
+            {"MetricName": "Errors", "Value": 1, "Unit": "Count", "Timestamp": now, "Dimensions": api},
+            {"MetricName": "Latency", "Value": 3, "Unit": "Milliseconds", "Timestamp": now,
+             "Dimensions": [{"Name": "Service", "Value": "web"}]},
+        ])
+
+        api_record, web_record = _records(stream)
+        directive = api_record["_aws"]["CloudWatchMetrics"][0]
+        assert api_record["_aws"]["Timestamp"] == 1704110400000
+        assert directive["Namespace"] == "AI-PPT"
+        assert directive["Dimensions"] == [["Service"]]
+        assert directive["Metrics"] == [{"Name": "Latency", "Unit": "Milliseconds"},
+                                        {"Name": "Errors", "Unit": "Count"}]
+        assert api_record["Service"] == "api"
+        assert api_record["Latency"] == [12, 5, 5, 7]
+        assert api_record["Errors"] == 1
+        assert web_record["Latency"] == 3
+
+    @pytest.mark.unit
+    def test_high_resolution_and_statistic_sets(self):
+        """高精度指标标记StorageResolution，统计集保持计数、求和与极值"""
+        stream = io.StringIO()
+        EMFEmitter(stream=stream, default_dimensions={"Environment": "dev"}).put_metric_data(
+            Namespace="AI-PPT", MetricData=[
+                {"MetricName": "QueueDepth", "Value": 4, "StorageResolution": 1},
+                {"MetricName": "Size", "Unit": "Bytes", "StatisticValues": {
+                    "SampleCount": 4, "Sum": 100, "Minimum": 10, "Maximum": 40}},
+            ])
+
+        records = _records(stream)
+        metrics = {m["Name"]: m for r in records for m in r["_aws"]["CloudWatchMetrics"][0]["Metrics"]}
+        assert metrics["QueueDepth"]["StorageResolution"] == 1
+        assert "StorageResolution" not in metrics["Size"]
+
+        sizes = next(r["Size"] for r in records if "Size" in r)
+        assert (len(sizes), sum(sizes), min(sizes), max(sizes)) == (4, 100, 10, 40)
+        assert all(r["Environment"] == "dev" for r in records)
+
+    @pytest.mark.unit
+    def test_large_statistic_set_keeps_count_and_sum(self):
+        """样本数超过单指标值上限的统计集拆分到多条记录，计数与求和不截断"""
+        stream = io.StringIO()
+        EMFEmitter(stream=stream).put_metric_data(Namespace="AI-PPT", MetricData=[
+            {"MetricName": "Latency", "Unit": "Milliseconds", "StatisticValues": {
+                "SampleCount": 250, "Sum": 25000.0, "Minimum": 5.0, "Maximum": 900.0}},
+        ])
+
+        records = _records(stream)
+        values = [v for r in records for v in r["Latency"]]
+        assert all(len(r["Latency"]) <= 100 for r in records)
+        assert len(values) == 250
+        assert sum(values) == pytest.approx(25000.0)
+        assert (min(values), max(values)) == (5.0, 900.0)
+
+    @pytest.mark.unit
+    def test_records_split_at_emf_limits(self):
+        """超过单指标值数量和单记录指标数量上限时拆分记录"""
+        stream = io.StringIO()
+        data = [{"MetricName": "Latency", "Value": float(i)} for i in range(250)]
+        data += [{"MetricName": f"Metric{i}", "Value": 1} for i in range(120)]
+
+        EMFEmitter(stream=stream).put_metric_data(Namespace="AI-PPT", MetricData=data)
+
+        records = _records(stream)
+        latency = [v for r in records if "Latency" in r for v in r["Latency"]]
+        assert latency == [float(i) for i in range(250)]
+        assert all(len(r["_aws"]["CloudWatchMetrics"][0]["Metrics"]) <= 100 for r in records)
+        assert sum(len(r["_aws"]["CloudWatchMetrics"][0]["Metrics"]) for r in records) == 123
+
+
+class TestBackendSelection:
+    """按环境选择指标后端测试"""
+
+    @pytest.mark.unit
+    def test_backend_from_environment(self, monkeypatch):
+        """只有显式配置METRICS_BACKEND=emf时使用EMF，Lambda环境默认仍调用API"""
+        monkeypatch.delenv("METRICS_BACKEND", raising=False)
+        monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+        assert get_metrics_backend() == "api"
+
+        monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "generate-ppt")
+        assert get_metrics_backend() == "api"
+
+        monkeypatch.setenv("METRICS_BACKEND", "emf")
+        assert get_metrics_backend() == "emf"
+        assert isinstance(create_metrics_client(), EMFEmitter)
+
+        monkeypatch.setenv("METRICS_BACKEND", "api")
+        sentinel = object()
+        assert create_metrics_client(lambda: sentinel) is sentinel
+
+    @pytest.mark.unit
+    def test_monitor_writes_emf_instead_of_calling_api(self, monkeypatch, capsys):
+        """EMF后端下监控器不调用PutMetricData"""
+        monkeypatch.setenv("METRICS_BACKEND", "emf")
+        monkeypatch.setattr(boto3, "client", lambda *a, **k: pytest.fail("unexpected API client"))
+
+        monitor = CloudWatchMonitor(namespace="AI-PPT", flush_interval=1)
+        monitor.record_timing("render", 0.25, dimensions={"Stage": "compile"})
+        monitor.record_metric("inflight", 3, unit="Count", high_resolution=True)
+        monitor.shutdown()
+
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+        assert any(r.get("render") == 250.0 and r["Stage"] == "compile" for r in records)
+        assert monitor.get_stats()["metrics_sent"] == 2
@@ -21,8 +21,9 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambdas'))
 
 from image_processing_service_v3 import (
     ImageProcessingServiceV3, ImageRequest, ImageResponse,
-    CacheManager, BatchProcessor, RateLimiter
+    CacheManager, BatchProcessor
 )
+from src.throttle_manager import RateBudget
 from cloudwatch_monitoring import CloudWatchMonitor, PerformanceTracker, MetricsAggregator
 from image_config import CONFIG
 
@@ -222,15 +223,15 @@ class TestPerformanceOptimizations:
         print(f"最大内存使用: {stats['memory']['max']:.2f}MB")
 
     def test_rate_limiting(self):
-        """测试限流功能"""
-        limiter = RateLimiter(max_requests=10, time_window=1)
+        """测试限流功能（服务使用的共享令牌桶）"""
+        limiter = RateBudget(rate=10)
 
         # 快速发送请求
         allowed = 0
         rejected = 0
 
         for _ in range(15):
-            if limiter.allow_request():
+            if limiter.try_acquire():
                 allowed += 1
             else:
                 rejected += 1
@@ -5,6 +5,7 @@ PPT编译测试 - 验证PPTX文件生成功能
 
 import pytest
 import json
+import hashlib
 import tempfile
 import os
 from unittest.mock import Mock, patch, mock_open
@@ -460,6 +461,367 @@ class TestPPTCompilerPerformance:
         # assert memory_increase < max_memory_increase
 
 
+class TestIncrementalCompilation:
+    """增量编译测试"""
+
+    @staticmethod
+    def _png_bytes(color=(0, 120, 200)):
+        from PIL import Image
+        buffer = BytesIO()
+        Image.new("RGB", (40, 30), color).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @staticmethod
+    def _content(count=4):
+        slides = []
+        for i in range(1, count + 1):
+            slide = {
+                "slide_number": i,
+                "title": f"第{i}页",
+                "bullet_points": [f"要点{i}-1", f"要点{i}-2"],
+                "speaker_notes": f"备注{i}"
+            }
+            if i % 2 == 0:
+                slide["image_url"] = f"s3://bucket/images/slide_{i}.png"
+            slides.append(slide)
+        return {"title": "增量测试", "slides": slides}
+
+    @staticmethod
+    def _titles(pptx_bytes):
+        from pptx import Presentation
+        prs = Presentation(BytesIO(pptx_bytes))
+        titles = []
+        for slide in prs.slides:
+            texts = [shape.text_frame.text for shape in slide.shapes
+                     if shape.has_text_frame and shape.text_frame.text]
+            titles.append(texts[0] if texts else "")
+        return titles
+
+    @pytest.mark.unit
+    def test_title_edit_rebuilds_only_changed_slide(self):
+        """修改一页标题只重建该页，并复用已嵌入的图片"""
+        from src import ppt_compiler
+
+        content = self._content()
+        with patch.object(ppt_compiler, "fetch_image", side_effect=lambda url: BytesIO(self._png_bytes())) as fetch:
+            pptx_bytes = ppt_compiler.create_pptx_from_content(content)
+            manifest = ppt_compiler.build_slide_manifest(content)
+            assert fetch.call_count == 2
+
+            content["slides"][1]["title"] = "修改后的标题"
+            content["slides"][1]["updated_at"] = "2024-01-01T00:00:00"
+            updated, new_manifest, rebuilt = ppt_compiler.update_pptx_incremental(pptx_bytes, manifest, content)
+
+            assert fetch.call_count == 2
+
+        assert rebuilt == [2]
+        assert self._titles(updated) == ["第1页", "修改后的标题", "第3页", "第4页"]
+        assert new_manifest["slides"][0] == manifest["slides"][0]
+        assert ppt_compiler.extract_speaker_notes(updated)[1] == "备注2"
+
+        from pptx import Presentation
+        from pptx.enum.shapes import MSO_SHAPE_TYPE
+        prs = Presentation(BytesIO(updated))
+        assert any(shape.shape_type == MSO_SHAPE_TYPE.PICTURE for shape in prs.slides[1].shapes)
+
+        # 被替换的旧幻灯片部件不应残留在包中
+        with zipfile.ZipFile(BytesIO(updated)) as package:
+            slide_parts = [name for name in package.namelist() if name.startswith("ppt/slides/slide")]
+        assert len(slide_parts) == 4
+
+    @pytest.mark.unit
+    def test_multiple_edits_keep_part_names_unique(self):
+        """一次修改多页时部件名唯一，标题和备注与内容一致"""
+        from src import ppt_compiler
+
+        content = self._content(5)
+        with patch.object(ppt_compiler, "fetch_image", return_value=None):
+            pptx_bytes = ppt_compiler.create_pptx_from_content(content)
+            manifest = ppt_compiler.build_slide_manifest(content)
+
+            for index in (0, 2, 3):
+                content["slides"][index]["title"] = f"修改{index + 1}"
+            updated, _, rebuilt = ppt_compiler.update_pptx_incremental(pptx_bytes, manifest, content)
+
+        assert rebuilt == [1, 3, 4]
+        assert self._titles(updated) == ["修改1", "第2页", "修改3", "修改4", "第5页"]
+        assert ppt_compiler.extract_speaker_notes(updated) == [f"备注{i}" for i in range(1, 6)]
+
+        with zipfile.ZipFile(BytesIO(updated)) as package:
+            names = package.namelist()
+        assert len(names) == len(set(names))
+        assert sorted(name for name in names if name.startswith("ppt/slides/slide")) == \
+            [f"ppt/slides/slide{i}.xml" for i in range(1, 6)]
+        assert len([name for name in names if name.startswith("ppt/notesSlides/notesSlide")]) == 5
+
+    @pytest.mark.unit
+    def test_unchanged_content_rebuilds_nothing(self):
+        """内容未变化时不重建任何幻灯片"""
+        from src import ppt_compiler
+
+        content = self._content(3)
+        with patch.object(ppt_compiler, "fetch_image", return_value=None):
+            pptx_bytes = ppt_compiler.create_pptx_from_content(content)
+            manifest = ppt_compiler.build_slide_manifest(content)
+
+            _, _, rebuilt = ppt_compiler.update_pptx_incremental(pptx_bytes, manifest, content)
+
+        assert rebuilt == []
+
+    @pytest.mark.unit
+    def test_added_and_removed_slides(self):
+        """新增的页追加到末尾，删除的页从包中移除"""
+        from src import ppt_compiler
+
+        content = self._content(3)
+        with patch.object(ppt_compiler, "fetch_image", return_value=None):
+            pptx_bytes = ppt_compiler.create_pptx_from_content(content)
+            manifest = ppt_compiler.build_slide_manifest(content)
+
+            shorter = {"slides": content["slides"][:2]}
+            updated, manifest, rebuilt = ppt_compiler.update_pptx_incremental(pptx_bytes, manifest, shorter)
+            assert rebuilt == []
+            assert self._titles(updated) == ["第1页", "第2页"]
+
+            longer = {"slides": shorter["slides"] + [{"title": "新增页", "bullet_points": ["内容"]}]}
+            updated, _, rebuilt = ppt_compiler.update_pptx_incremental(updated, manifest, longer)
+
+        assert rebuilt == [3]
+        assert self._titles(updated) == ["第1页", "第2页", "新增页"]
+
+    @pytest.mark.unit
+    def test_incompatible_manifest_falls_back_to_full_build(self):
+        """清单缺失或版本不符时全量编译"""
+        from src import ppt_compiler
+
+        content = self._content(2)
+        with patch.object(ppt_compiler, "fetch_image", return_value=None):
+            pptx_bytes = ppt_compiler.create_pptx_from_content(content)
+
+            _, _, rebuilt = ppt_compiler.update_pptx_incremental(pptx_bytes, None, content)
+            assert rebuilt == [1, 2]
+
+            manifest = ppt_compiler.build_slide_manifest(content, include_notes=False)
+            _, _, rebuilt = ppt_compiler.update_pptx_incremental(pptx_bytes, manifest, content)
+            assert rebuilt == [1, 2]
+
+    @pytest.mark.unit
+    def test_compiler_uses_previous_build_from_s3(self):
+        """PPTCompiler读取上次的PPTX和清单进行增量编译，并写回新清单"""
+        from src import ppt_compiler
+
+        content = self._content(2)
+        with patch.object(ppt_compiler, "fetch_image", return_value=None):
+            previous = ppt_compiler.create_pptx_from_content(content)
+            manifest = ppt_compiler.build_slide_manifest(content)
+            manifest["pptx_sha256"] = hashlib.sha256(previous).hexdigest()
+
+            stored = {
+                "presentations/p1/output/manifest.json": json.dumps(manifest).encode(),
+                "presentations/p1/output/presentation.pptx": previous
+            }
+            s3_client = Mock()
+            s3_client.get_object.side_effect = lambda Bucket, Key: {"Body": BytesIO(stored[Key])}
+
+            with patch.object(ppt_compiler.boto3, "client", return_value=s3_client):
+                compiler = ppt_compiler.PPTCompiler()
+
+            content["slides"][0]["title"] = "新标题"
+            with patch.object(ppt_compiler, "update_pptx_incremental",
+                              wraps=ppt_compiler.update_pptx_incremental) as incremental:
+                s3_key = compiler.compile_content("p1", content)
+
+        assert s3_key == "presentations/p1/output/presentation.pptx"
+        assert incremental.call_count == 1
+        written = {call.kwargs["Key"]: call.kwargs["Body"] for call in s3_client.put_object.call_args_list}
+        assert set(written) == set(stored)
+        new_manifest = json.loads(written["presentations/p1/output/manifest.json"])
+        assert new_manifest["pptx_sha256"] == \
+            hashlib.sha256(written["presentations/p1/output/presentation.pptx"]).hexdigest()
+
+    @pytest.mark.unit
+    def test_overwritten_pptx_invalidates_manifest(self):
+        """PPTX被其他流程覆盖后清单摘要不匹配，全量编译"""
+        from src import ppt_compiler
+
+        content = self._content(2)
+        with patch.object(ppt_compiler, "fetch_image", return_value=None):
+            previous = ppt_compiler.create_pptx_from_content(content)
+            manifest = ppt_compiler.build_slide_manifest(content)
+            manifest["pptx_sha256"] = hashlib.sha256(previous).hexdigest()
+
+            # 其他流程写入了内容不同的PPTX，但没有更新清单
+            other = {"slides": [{"title": "其他流程", "bullet_points": ["旧内容"]}] * 2}
+            stored = {
+                "presentations/p1/output/manifest.json": json.dumps(manifest).encode(),
+                "presentations/p1/output/presentation.pptx": ppt_compiler.create_pptx_from_content(other)
+            }
+            s3_client = Mock()
+            s3_client.get_object.side_effect = lambda Bucket, Key: {"Body": BytesIO(stored[Key])}
+
+            with patch.object(ppt_compiler.boto3, "client", return_value=s3_client):
+                compiler = ppt_compiler.PPTCompiler()
+
+            content["slides"][0]["title"] = "新标题"
+            with patch.object(ppt_compiler, "update_pptx_incremental") as incremental:
+                compiler.compile_content("p1", content)
+
+        incremental.assert_not_called()
+        written = {call.kwargs["Key"]: call.kwargs["Body"] for call in s3_client.put_object.call_args_list}
+        assert self._titles(written["presentations/p1/output/presentation.pptx"]) == ["新标题", "第2页"]
+
+    @pytest.mark.unit
+    def test_edited_slides_map_content_to_bullet_points(self):
+        """编辑接口的content字段映射为bullet_points后增量编译"""
+        from src import ppt_compiler
+
+        with patch.object(ppt_compiler.boto3, "client", return_value=Mock()):
+            compiler = ppt_compiler.PPTCompiler()
+        slides = [{"title": "A", "content": ["要点"]}, {"title": "B", "bullet_points": ["保留"], "content": ["忽略"]}]
+        with patch.object(compiler, "compile_content", return_value="key") as compile_content:
+            assert compiler.compile_edited_slides("p1", slides) == "key"
+
+        content = compile_content.call_args.args[1]
+        assert [slide["bullet_points"] for slide in content["slides"]] == [["要点"], ["保留"]]
+        assert "bullet_points" not in slides[0]
+        assert compile_content.call_args.kwargs == {"incremental": True}
+
+
+class TestImagePrefetch:
+    """编译前图片预取测试"""
+
+    @staticmethod
+    def _png_bytes():
+        from PIL import Image
+        buffer = BytesIO()
+        Image.new("RGB", (40, 30), (0, 120, 200)).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @pytest.mark.unit
+    def test_parse_s3_url_variants(self):
+        """s3://、虚拟主机和路径风格（含预签名参数）都解析为bucket/key"""
+        from src.ppt_compiler import parse_s3_url
+
+        assert parse_s3_url("s3://bucket/images/a.png") == ("bucket", "images/a.png")
+        assert parse_s3_url(
+            "https://bucket.s3.us-east-1.amazonaws.com/images/a%20b.png?X-Amz-Signature=abc"
+        ) == ("bucket", "images/a b.png")
+        assert parse_s3_url("https://s3.us-west-2.amazonaws.com/bucket/images/a.png") == ("bucket", "images/a.png")
+        assert parse_s3_url("https://example.com/a.png") is None
+
+    @pytest.mark.unit
+    def test_duplicate_urls_fetched_once_and_concurrently(self):
+        """相同地址只下载一次，不同地址并发下载"""
+        import threading
+        import time
+        from src import ppt_compiler
+
+        png = self._png_bytes()
+        active = {"current": 0, "peak": 0, "calls": []}
+        lock = threading.Lock()
+
+        def fake_fetch(url):
+            with lock:
+                active["calls"].append(url)
+                active["current"] += 1
+                active["peak"] = max(active["peak"], active["current"])
+            time.sleep(0.05)
+            with lock:
+                active["current"] -= 1
+            return BytesIO(png)
+
+        urls = ["s3://b/1.png", "s3://b/2.png", "s3://b/1.png", None, "s3://b/3.png"]
+        with patch.object(ppt_compiler, "fetch_image", side_effect=fake_fetch):
+            images = ppt_compiler.prefetch_images(urls, max_workers=4)
+
+        assert sorted(active["calls"]) == ["s3://b/1.png", "s3://b/2.png", "s3://b/3.png"]
+        assert active["peak"] > 1
+        assert images["s3://b/2.png"] == png
+
+    @pytest.mark.unit
+    def test_slow_and_broken_images_degrade_to_placeholder(self):
+        """超时、下载失败或无法解码的图片使用占位图"""
+        import time
+        from src import ppt_compiler
+
+        png = self._png_bytes()
+
+        def fake_fetch(url):
+            if "slow" in url:
+                time.sleep(1)
+            if "missing" in url:
+                raise RuntimeError("NoSuchKey")
+            if "corrupt" in url:
+                return BytesIO(b"not an image")
+            return BytesIO(png)
+
+        urls = ["s3://b/ok.png", "s3://b/slow.png", "s3://b/missing.png", "s3://b/corrupt.png"]
+        started = time.monotonic()
+        with patch.object(ppt_compiler, "fetch_image", side_effect=fake_fetch):
+            images = ppt_compiler.prefetch_images(urls, timeout=0.3)
+
+        assert time.monotonic() - started < 0.9
+        assert images["s3://b/ok.png"] == png
+        placeholder = ppt_compiler.placeholder_image()
+        assert images["s3://b/slow.png"] == placeholder
+        assert images["s3://b/missing.png"] == placeholder
+        assert images["s3://b/corrupt.png"] == placeholder
+
+    @pytest.mark.unit
+    def test_timeout_starts_when_fetch_begins(self):
+        """排队等待线程的图片不占用超时时间"""
+        import time
+        from src import ppt_compiler
+
+        png = self._png_bytes()
+
+        def fake_fetch(url):
+            time.sleep(0.2)
+            return BytesIO(png)
+
+        urls = [f"s3://b/{i}.png" for i in range(4)]
+        with patch.object(ppt_compiler, "fetch_image", side_effect=fake_fetch):
+            images = ppt_compiler.prefetch_images(urls, max_workers=1, timeout=0.3)
+
+        assert all(images[url] == png for url in urls)
+
+    @pytest.mark.unit
+    def test_presigned_s3_url_read_directly(self):
+        """预签名S3地址通过S3 API读取，不走HTTP"""
+        from src import ppt_compiler
+
+        s3_client = Mock()
+        s3_client.get_object.return_value = {"Body": BytesIO(b"data")}
+
+        with patch.object(ppt_compiler, "_get_s3_client", return_value=s3_client), \
+                patch.object(ppt_compiler.urllib.request, "urlopen") as urlopen:
+            stream = ppt_compiler.fetch_image(
+                "https://bucket.s3.amazonaws.com/images/a.png?X-Amz-Expires=3600"
+            )
+
+        assert stream.getvalue() == b"data"
+        s3_client.get_object.assert_called_once_with(Bucket="bucket", Key="images/a.png")
+        urlopen.assert_not_called()
+
+    @pytest.mark.unit
+    def test_shared_image_embedded_once(self):
+        """多页使用同一张图片时PPTX中只保存一份媒体"""
+        from src import ppt_compiler
+
+        png = self._png_bytes()
+        content = {"slides": [
+            {"title": f"第{i}页", "bullet_points": ["要点"], "image_url": "s3://b/logo.png"}
+            for i in range(1, 4)
+        ]}
+        with patch.object(ppt_compiler, "fetch_image", return_value=BytesIO(png)) as fetch:
+            pptx_bytes = ppt_compiler.create_pptx_from_content(content)
+
+        assert fetch.call_count == 1
+        with zipfile.ZipFile(BytesIO(pptx_bytes)) as package:
+            media = [name for name in package.namelist() if name.startswith("ppt/media/")]
+        assert len(media) == 1
+
+
 class TestErrorHandling:
     """PPT编译错误处理测试"""
 
@@ -523,6 +885,99 @@ class TestErrorHandling:
             pptx_bytes = create_pptx_with_template(content, template_name="nonexistent_template")
 
 
+class TestMediaNormalization:
+    """编译时图片规范化与媒体去重测试"""
+
+    @staticmethod
+    def _photo_png(width=1200, height=800):
+        """生成照片类（颜色丰富）的大尺寸PNG"""
+        import random
+        from PIL import Image
+        rng = random.Random(42)
+        image = Image.new("RGB", (width, height))
+        image.putdata([
+            (x * 255 // width, y * 255 // height, rng.randrange(256))
+            for y in range(height) for x in range(width)
+        ])
+        buffer = BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+        return buffer.getvalue()
+
+    @pytest.mark.unit
+    def test_photo_downscaled_to_box_and_encoded_as_jpeg(self):
+        """照片缩放到图片框尺寸x目标DPI并转为JPEG"""
+        from PIL import Image
+        from src import ppt_compiler
+
+        original = self._photo_png()
+        normalized = ppt_compiler.normalize_image(original, dpi=150)
+
+        image = Image.open(BytesIO(normalized))
+        assert image.format == "JPEG"
+        # 缩放到覆盖600x450的图片框，保持宽高比
+        assert image.size == (675, 450)
+        assert len(normalized) < len(original)
+
+    @pytest.mark.unit
+    def test_graphics_and_transparency_stay_png(self):
+        """平面图形和带透明通道的图片保持PNG，小图不放大"""
+        from PIL import Image
+        from src import ppt_compiler
+
+        flat = Image.new("RGB", (2000, 1500), (255, 255, 255))
+        flat.paste((30, 90, 200), (100, 100, 1900, 700))
+        buffer = BytesIO()
+        flat.save(buffer, format="BMP")
+        normalized = Image.open(BytesIO(ppt_compiler.normalize_image(buffer.getvalue())))
+        assert normalized.format == "PNG"
+        assert normalized.size == (600, 450)
+
+        icon = Image.new("RGBA", (1600, 1200), (0, 0, 0, 0))
+        icon.paste((200, 0, 0, 255), (0, 0, 800, 600))
+        buffer = BytesIO()
+        icon.save(buffer, format="PNG")
+        normalized = Image.open(BytesIO(ppt_compiler.normalize_image(buffer.getvalue())))
+        assert normalized.format == "PNG"
+        assert normalized.mode == "RGBA"
+
+        small = BytesIO()
+        Image.new("RGB", (40, 30), (0, 120, 200)).save(small, format="PNG")
+        assert ppt_compiler.normalize_image(small.getvalue()) == small.getvalue()
+
+    @pytest.mark.unit
+    def test_identical_media_stored_once_and_reported(self):
+        """相同图片在PPTX中只保存一份，并报告节省的字节数"""
+        import zipfile
+        from src import ppt_compiler
+
+        photo = self._photo_png(800, 600)
+        content = {"slides": [
+            {"title": "第1页", "bullet_points": ["a"], "image_url": "s3://b/photo.png"},
+            {"title": "第2页", "bullet_points": ["b"], "image_url": "s3://b/copy.png"},
+            {"title": "第3页", "bullet_points": ["c"], "image_url": "s3://b/missing.png"},
+            {"title": "第4页", "bullet_points": ["d"], "image_url": "s3://b/gone.png"},
+        ]}
+
+        def fake_fetch(url):
+            if "missing" in url or "gone" in url:
+                raise RuntimeError("NoSuchKey")
+            return BytesIO(photo)
+
+        report = {}
+        with patch.object(ppt_compiler, "fetch_image", side_effect=fake_fetch):
+            pptx_bytes = ppt_compiler.create_pptx_from_content(content, media_report=report)
+
+        with zipfile.ZipFile(BytesIO(pptx_bytes)) as package:
+            media = [name for name in package.namelist() if name.startswith("ppt/media/")]
+        assert len(media) == 2
+
+        assert report["images"] == 2
+        assert report["references"] == 4
+        assert report["deduplicated"] == 2
+        assert report["original_bytes"] == len(photo) + len(ppt_compiler.placeholder_image())
+        assert report["bytes_saved"] == report["original_bytes"] - report["embedded_bytes"] > 0
+
+
 if __name__ == "__main__":
     # 运行测试的快速方法
-    pytest.main([__file__, "-v", "-m", "not slow"])
\ No newline at end of file
+    pytest.main([__file__, "-v", "-m", "not slow"])
@@ -0,0 +1,124 @@
+"""
+PPTX单次解析验证测试
+"""
+
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from pptx import Presentation
+from pptx.util import Inches
+
+from src import ppt_validator
+from src.ppt_validator import (
+    PPTXValidator, parse_deck, validate_accessibility, validate_content_completeness,
+    validate_pptx_integrity, validate_slide_structure
+)
+
+CONTENT = {
+    'slides': [
+        {'title': '市场规模与增长趋势', 'bullet_points': ['2024年市场规模达到1200亿元', 'Adoption moved to production']},
+        {'title': 'Outlook', 'bullet_points': ['Three-year growth plan']}
+    ]
+}
+
+
+def _build_pptx(content=CONTENT, empty_last=False):
+    prs = Presentation()
+    for slide_data in content['slides']:
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = slide_data['title']
+        slide.placeholders[1].text = '\n'.join(slide_data['bullet_points'])
+        box = slide.shapes.add_textbox(Inches(1), Inches(6), Inches(4), Inches(1))
+        box.text = f"Notes for {slide_data['title']}"
+    if empty_last:
+        prs.slides.add_slide(prs.slide_layouts[6])
+    stream = BytesIO()
+    prs.save(stream)
+    return stream.getvalue()
+
+
+class TestSingleParseValidation:
+    """单次解析与访问者检查测试"""
+
+    @pytest.mark.unit
+    def test_validate_all_parses_once(self):
+        """全面验证只解析一次PPTX"""
+        pptx_bytes = _build_pptx()
+        with patch.object(ppt_validator, 'Presentation', wraps=Presentation) as parse:
+            results = PPTXValidator().validate_all(pptx_bytes, CONTENT)
+
+        assert parse.call_count == 1
+        assert results['overall_valid']
+        assert results['checks']['integrity'] is True
+        assert results['checks']['content_completeness'] is True
+        assert results['checks']['structure']['total_slides'] == 2
+        assert results['checks']['structure']['slides_with_content'] == 2
+        assert results['checks']['accessibility'] == 0.5
+
+    @pytest.mark.unit
+    def test_standalone_checks_accept_shared_model(self):
+        """单项检查可复用已解析的模型"""
+        deck = parse_deck(_build_pptx(empty_last=True))
+        with patch.object(ppt_validator, 'Presentation') as parse:
+            structure = validate_slide_structure(deck)
+            score = validate_accessibility(deck)
+            assert validate_pptx_integrity(deck)
+
+        parse.assert_not_called()
+        assert structure['valid'] is False
+        assert structure['issues'] == ['Slide 3: No text content']
+        assert score == pytest.approx(2 / 6)
+
+    @pytest.mark.unit
+    def test_invalid_bytes(self):
+        """非ZIP或损坏的文件所有检查均失败"""
+        results = PPTXValidator().validate_all(b'not a pptx', CONTENT)
+
+        assert not results['overall_valid']
+        assert results['checks']['integrity'] is False
+        assert results['checks']['structure']['valid'] is False
+        assert results['checks']['accessibility'] == 0.0
+        assert results['checks']['content_completeness'] is False
+
+
+class TestContentCompleteness:
+    """内容完整性测试"""
+
+    @pytest.mark.unit
+    def test_missing_bullet_detected(self):
+        """输入中有而幻灯片中没有的要点被识别"""
+        content = {'slides': CONTENT['slides'] + [{'title': 'Risks', 'bullet_points': ['Supply constraints']}]}
+
+        assert not validate_content_completeness(content, _build_pptx())
+
+    @pytest.mark.unit
+    def test_partial_text_matched_as_substring(self):
+        """幻灯片文本中连续出现的片段视为存在"""
+        content = {'slides': [{'title': '增长趋势', 'bullet_points': ['Adoption moved to prod']}]}
+
+        assert validate_content_completeness(content, _build_pptx())
+
+    @pytest.mark.unit
+    def test_scattered_words_are_missing(self):
+        """词语分散在不同位置但不连续出现时视为缺失"""
+        content = {'slides': [{'title': 'production Adoption', 'bullet_points': []}]}
+
+        assert not validate_content_completeness(content, _build_pptx())
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('slide', [
+        {'title': None},
+        {'title': 42},
+        {'bullet_points': None},
+        {'bullet_points': ['Outlook', None]},
+    ], ids=['none-title', 'int-title', 'none-bullets', 'none-bullet'])
+    def test_malformed_fields_fail_validation(self, slide):
+        """字段为None或非字符串时检查不通过而不是抛出异常"""
+        content = {'slides': [slide]}
+        pptx_bytes = _build_pptx()
+
+        assert validate_content_completeness(content, pptx_bytes) is False
+        results = PPTXValidator().validate_all(pptx_bytes, content)
+        assert results['checks']['content_completeness'] is False
+        assert not results['overall_valid']
@@ -0,0 +1,119 @@
+"""
+轻量PPTX读取器测试
+"""
+
+import time
+from io import BytesIO
+
+import pytest
+from pptx import Presentation
+from pptx.util import Inches
+
+from src.ppt_compiler import (
+    PPTXInspector, create_pptx_from_content, extract_speaker_notes,
+    extract_text_content, get_slide_count
+)
+
+
+def _content(slides):
+    return {'slides': [{
+        'slide_number': i,
+        'title': f'第{i}页：市场规模与增长',
+        'bullet_points': [f'要点 {i}.{j} growth & adoption' for j in range(1, 5)],
+        'speaker_notes': f'第{i}页备注：强调增长驱动因素。' if i % 3 else ''
+    } for i in range(1, slides + 1)]}
+
+
+def _legacy_text(pptx_bytes):
+    prs = Presentation(BytesIO(pptx_bytes))
+    return " ".join(shape.text for slide in prs.slides for shape in slide.shapes if hasattr(shape, "text"))
+
+
+def _legacy_notes(pptx_bytes):
+    prs = Presentation(BytesIO(pptx_bytes))
+    notes = []
+    for slide in prs.slides:
+        if slide.has_notes_slide:
+            notes.append("".join(shape.text for shape in slide.notes_slide.shapes if hasattr(shape, "text")))
+        else:
+            notes.append("")
+    return notes
+
+
+def _legacy_count(pptx_bytes):
+    return len(Presentation(BytesIO(pptx_bytes)).slides)
+
+
+def _mixed_deck():
+    """包含换行、分组形状、图片占位和备注的演示文稿"""
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[1])
+    slide.shapes.title.text = 'Line one\vsoft break'
+    slide.placeholders[1].text = 'first\nsecond'
+    group = slide.shapes.add_group_shape()
+    group.shapes.add_textbox(Inches(1), Inches(1), Inches(1), Inches(1)).text = 'grouped text'
+    slide.notes_slide.notes_text_frame.text = 'note line 1\nnote line 2'
+
+    blank = prs.slides.add_slide(prs.slide_layouts[6])
+    blank.shapes.add_textbox(Inches(1), Inches(1), Inches(2), Inches(1)).text = 'only box'
+
+    # 重新排序：第二张幻灯片放到最前
+    sld_id_lst = prs.slides._sldIdLst
+    sld_id_lst.insert(0, sld_id_lst[1])
+
+    stream = BytesIO()
+    prs.save(stream)
+    return stream.getvalue()
+
+
+class TestPPTXInspector:
+    """与python-pptx结果一致性测试"""
+
+    @pytest.mark.unit
+    def test_matches_python_pptx_on_generated_deck(self):
+        """编译生成的演示文稿上文本、备注和页数一致"""
+        pptx_bytes = create_pptx_from_content(_content(6))
+
+        assert get_slide_count(pptx_bytes) == _legacy_count(pptx_bytes) == 6
+        assert extract_text_content(pptx_bytes) == _legacy_text(pptx_bytes)
+        assert extract_speaker_notes(pptx_bytes) == _legacy_notes(pptx_bytes)
+
+    @pytest.mark.unit
+    def test_matches_python_pptx_on_mixed_shapes(self):
+        """换行、分组形状和幻灯片顺序与python-pptx一致"""
+        pptx_bytes = _mixed_deck()
+
+        assert extract_text_content(pptx_bytes) == _legacy_text(pptx_bytes)
+        assert extract_speaker_notes(pptx_bytes) == _legacy_notes(pptx_bytes)
+        with PPTXInspector(pptx_bytes) as inspector:
+            assert inspector.slide_texts()[0] == ['only box']
+            assert 'grouped text' not in extract_text_content(pptx_bytes)
+
+
+@pytest.mark.benchmark
+class TestPPTXInspectorBenchmark:
+    """读取基准：与python-pptx对象模型对比"""
+
+    def _measure(self, func, pptx_bytes, iterations=3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(pptx_bytes)
+        return (time.perf_counter() - start) / iterations
+
+    def test_inspector_vs_python_pptx(self):
+        operations = [
+            ('slide count', _legacy_count, get_slide_count),
+            ('text', _legacy_text, extract_text_content),
+            ('speaker notes', _legacy_notes, extract_speaker_notes),
+        ]
+
+        print(f"\n{'deck':<12}{'operation':<16}{'python-pptx ms':>16}{'inspector ms':>14}{'speedup':>10}")
+        for slides in (50, 200):
+            pptx_bytes = create_pptx_from_content(_content(slides))
+            for name, legacy, current in operations:
+                assert current(pptx_bytes) == legacy(pptx_bytes)
+                legacy_time = self._measure(legacy, pptx_bytes)
+                current_time = self._measure(current, pptx_bytes)
+                print(f"{f'{slides} slides':<12}{name:<16}{legacy_time * 1000:>16.2f}"
+                      f"{current_time * 1000:>14.2f}{legacy_time / current_time:>9.1f}x")
+                assert current_time < legacy_time
@@ -0,0 +1,292 @@
+"""
+演示文稿列表查询测试：GSI分页查询和S3日期索引
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lambdas'))
+
+from lambdas.services.dynamodb_service import (
+    DynamoDBService,
+    DynamoDBServiceError,
+    encode_page_token,
+    decode_page_token
+)
+from src.status_manager import StatusManager
+
+TABLE_NAME = "presentations-test"
+INDEX_NAME = "user_id-created_at-index"
+
+
+@pytest.fixture
+def presentations_table():
+    """创建带user_id/created_at GSI的演示文稿表"""
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        table = dynamodb.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{"AttributeName": "presentation_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "presentation_id", "AttributeType": "S"},
+                {"AttributeName": "user_id", "AttributeType": "S"},
+                {"AttributeName": "created_at", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[{
+                "IndexName": INDEX_NAME,
+                "KeySchema": [
+                    {"AttributeName": "user_id", "KeyType": "HASH"},
+                    {"AttributeName": "created_at", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            }],
+            BillingMode="PAY_PER_REQUEST"
+        )
+        base = datetime(2026, 1, 1)
+        for i in range(7):
+            table.put_item(Item={
+                "presentation_id": f"p{i}",
+                "user_id": "alice" if i < 5 else "bob",
+                "created_at": (base + timedelta(minutes=i)).isoformat(),
+                "status": "completed" if i % 2 == 0 else "processing",
+                "topic": f"主题{i}",
+                "page_count": 5,
+                "content": "x" * 100,
+            })
+        yield dynamodb
+
+
+class TestDynamoDBQueryPage:
+    """DynamoDBService分页查询测试"""
+
+    @pytest.mark.unit
+    def test_pages_follow_created_at_descending(self, presentations_table):
+        """分页按创建时间倒序返回，游标衔接且不重复"""
+        service = DynamoDBService(TABLE_NAME, dynamodb_resource=presentations_table)
+        seen = []
+        start_key = None
+        while True:
+            items, start_key = service.query_page(
+                "user_id = :u", {":u": "alice"}, index_name=INDEX_NAME, limit=2,
+                scan_forward=False, projection_expression="presentation_id, created_at",
+                exclusive_start_key=decode_page_token(encode_page_token(start_key))
+            )
+            seen.extend(item["presentation_id"] for item in items)
+            assert all(set(item) == {"presentation_id", "created_at"} for item in items)
+            if start_key is None:
+                break
+
+        assert seen == ["p4", "p3", "p2", "p1", "p0"]
+
+    @pytest.mark.unit
+    def test_filter_does_not_skip_matches(self, presentations_table):
+        """带过滤条件时每页仍按数量返回且不跳过匹配项"""
+        service = DynamoDBService(TABLE_NAME, dynamodb_resource=presentations_table)
+        kwargs = dict(index_name=INDEX_NAME, limit=2, scan_forward=False,
+                      filter_expression="#status = :s",
+                      expression_attribute_names={"#status": "status"})
+
+        first, token = service.query_page("user_id = :u", {":u": "alice", ":s": "completed"}, **kwargs)
+        second, _ = service.query_page("user_id = :u", {":u": "alice", ":s": "completed"},
+                                       exclusive_start_key=token, **kwargs)
+
+        assert [item["presentation_id"] for item in first] == ["p4", "p2"]
+        assert [item["presentation_id"] for item in second] == ["p0"]
+
+    @pytest.mark.unit
+    def test_invalid_token_rejected(self):
+        """无效的分页令牌抛出INVALID_PAGE_TOKEN"""
+        with pytest.raises(DynamoDBServiceError) as exc:
+            decode_page_token("not-a-token!")
+        assert exc.value.error_code == "INVALID_PAGE_TOKEN"
+        assert decode_page_token(None) is None
+
+
+class TestListHandler:
+    """GET /presentations分页测试"""
+
+    @staticmethod
+    def _event(user, **params):
+        return {
+            "httpMethod": "GET",
+            "path": "/presentations",
+            "queryStringParameters": params,
+            "requestContext": {"identity": {"userArn": user}},
+        }
+
+    @pytest.mark.unit
+    def test_list_uses_index_and_next_token(self, presentations_table, monkeypatch):
+        """列表只返回当前用户的数据，next_token可取下一页，且不能跨用户使用"""
+        monkeypatch.setenv("DYNAMODB_TABLE", TABLE_NAME)
+        boto3.client("s3", region_name="us-east-1")
+        from api_handler_optimized import PPTAPIHandler
+
+        handler = PPTAPIHandler()
+        handler.dynamodb_service = DynamoDBService(TABLE_NAME, dynamodb_resource=presentations_table)
+
+        first = json.loads(handler.handle_request(self._event("alice", limit="3"), None)["body"])["data"]
+        assert [p["presentation_id"] for p in first["presentations"]] == ["p4", "p3", "p2"]
+        assert first["next_token"]
+
+        second = json.loads(handler.handle_request(
+            self._event("alice", limit="3", next_token=first["next_token"]), None
+        )["body"])["data"]
+        assert [p["presentation_id"] for p in second["presentations"]] == ["p1", "p0"]
+        assert second["next_token"] is None
+
+        foreign = handler.handle_request(self._event("bob", next_token=first["next_token"]), None)
+        assert foreign["statusCode"] == 400
+
+
+class LegacyS3:
+    """模拟botocore 1.36之前的S3客户端：PutObject没有IfMatch/IfNoneMatch参数"""
+
+    def __init__(self, client):
+        from types import SimpleNamespace
+        self._client = client
+        self.put_keys = []
+        members = {name: shape for name, shape in
+                   client.meta.service_model.operation_model("PutObject").input_shape.members.items()
+                   if name not in ("IfMatch", "IfNoneMatch")}
+        input_shape = SimpleNamespace(members=members)
+        operation = SimpleNamespace(input_shape=input_shape)
+        self.meta = SimpleNamespace(service_model=SimpleNamespace(operation_model=lambda name: operation))
+
+    def put_object(self, **kwargs):
+        from botocore.exceptions import ParamValidationError
+        for name in ("IfMatch", "IfNoneMatch"):
+            if name in kwargs:
+                raise ParamValidationError(report=f'Unknown parameter in input: "{name}"')
+        self.put_keys.append(kwargs["Key"])
+        return self._client.put_object(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class TestStatusDayIndex:
+    """StatusManager日期索引测试"""
+
+    @pytest.fixture
+    def manager(self):
+        os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+        with mock_aws():
+            s3 = boto3.client("s3", region_name="us-east-1")
+            s3.create_bucket(Bucket="status-bucket")
+            yield StatusManager("status-bucket", s3)
+
+    @staticmethod
+    def _save(manager, presentation_id, created_at, status="pending"):
+        manager.save_status(presentation_id, {
+            "presentation_id": presentation_id,
+            "topic": f"主题-{presentation_id}",
+            "page_count": 5,
+            "status": status,
+            "progress": 0,
+            "created_at": created_at,
+        })
+
+    @pytest.mark.unit
+    def test_list_reads_day_indexes_without_status_gets(self, manager):
+        """列表只读取日期索引，按创建时间倒序分页"""
+        self._save(manager, "a", "2026-01-01T10:00:00")
+        self._save(manager, "b", "2026-01-02T09:00:00")
+        self._save(manager, "c", "2026-01-02T11:00:00", status="completed")
+        manager.update_status("a", "completed", 100)
+
+        reads = []
+        original_get = manager.s3_client.get_object
+
+        def counting_get(**kwargs):
+            reads.append(kwargs["Key"])
+            return original_get(**kwargs)
+
+        manager.s3_client.get_object = counting_get
+
+        page, cursor = manager.list_presentations_page(limit=2)
+        assert [p["presentation_id"] for p in page] == ["c", "b"]
+        rest, cursor = manager.list_presentations_page(limit=2, cursor=cursor)
+        assert [p["presentation_id"] for p in rest] == ["a"]
+        assert rest[0]["status"] == "completed"
+        assert cursor is None
+        assert all(key.startswith("status-index/") for key in reads)
+
+        completed = manager.list_presentations(status_filter="completed")
+        assert [p["presentation_id"] for p in completed] == ["c", "a"]
+
+    @pytest.mark.unit
+    def test_rebuild_index_backfills_existing_status(self, manager):
+        """重建索引补齐索引上线前保存的状态"""
+        manager.s3_client.put_object(
+            Bucket="status-bucket",
+            Key="presentations/legacy/status.json",
+            Body=json.dumps({"presentation_id": "legacy", "status": "completed",
+                             "created_at": "2025-12-31T08:00:00"}),
+        )
+
+        assert manager.list_presentations() == []
+        assert manager.rebuild_index() == 1
+        assert [p["presentation_id"] for p in manager.list_presentations()] == ["legacy"]
+
+    @pytest.mark.unit
+    def test_conflicting_index_write_retried(self, manager):
+        """并发写入导致条件写失败时重新读取并重试"""
+        from botocore.exceptions import ClientError
+
+        original_put = manager.s3_client.put_object
+        conflicts = []
+
+        def conflicting_put(**kwargs):
+            if kwargs["Key"].startswith("status-index/") and not conflicts:
+                # 模拟另一个容器先写入了同一天的索引
+                conflicts.append(kwargs)
+                original_put(Bucket="status-bucket", Key=kwargs["Key"], Body=json.dumps({
+                    "other": {"presentation_id": "other", "created_at": "2026-01-03T01:00:00"}
+                }))
+                raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+            return original_put(**kwargs)
+
+        manager.s3_client.put_object = conflicting_put
+        self._save(manager, "mine", "2026-01-03T02:00:00")
+
+        assert conflicts and conflicts[0]["IfNoneMatch"] == "*"
+        assert [p["presentation_id"] for p in manager.list_presentations()] == ["mine", "other"]
+
+    @pytest.mark.unit
+    def test_index_written_without_conditions_on_old_botocore(self, manager):
+        """botocore不支持条件写入时无条件写入索引，列表仍可用"""
+        legacy = LegacyS3(manager.s3_client)
+        legacy_manager = StatusManager("status-bucket", legacy)
+        assert legacy_manager.conditional_writes is False
+
+        self._save(legacy_manager, "a", "2026-01-01T10:00:00")
+        self._save(legacy_manager, "b", "2026-01-01T11:00:00")
+
+        assert legacy.put_keys == ["presentations/a/status.json", "status-index/2026-01-01.json",
+                                   "presentations/b/status.json", "status-index/2026-01-01.json"]
+        assert [p["presentation_id"] for p in legacy_manager.list_presentations()] == ["b", "a"]
+
+    @pytest.mark.unit
+    def test_cleanup_removes_old_presentations_and_index_entries(self, manager):
+        """清理过期演示文稿的所有文件并从日期索引中移除"""
+        old = (datetime.utcnow() - timedelta(days=30)).isoformat()
+        for presentation_id in ("old-1", "old-2"):
+            self._save(manager, presentation_id, old)
+            manager.s3_client.put_object(Bucket="status-bucket",
+                                         Key=f"presentations/{presentation_id}/output/presentation.pptx",
+                                         Body=b"pptx")
+        self._save(manager, "recent", datetime.utcnow().isoformat())
+
+        assert manager.cleanup_old_presentations(days_old=7) == 2
+
+        assert [p["presentation_id"] for p in manager.list_presentations()] == ["recent"]
+        keys = [obj["Key"] for obj in manager.s3_client.list_objects_v2(
+            Bucket="status-bucket", Prefix="presentations/").get("Contents", [])]
+        assert keys == ["presentations/recent/status.json"]
@@ -0,0 +1,145 @@
+"""
+预编译幻灯片模板测试
+"""
+
+import time
+import zipfile
+from io import BytesIO
+
+import pytest
+from pptx import Presentation
+
+from src.ppt_compiler import (
+    add_content_slide, create_pptx_from_content, create_pptx_with_template,
+    extract_speaker_notes, get_compiled_template, placeholder_image
+)
+
+IMAGE_URL = 's3://bucket/images/chart.png'
+
+
+def _slides(count):
+    slides = []
+    for i in range(1, count + 1):
+        slide = {
+            'title': f'第{i}页：市场 & <增长>',
+            'bullet_points': [f'要点 {i}.{j} growth & adoption' for j in range(1, 5)],
+            'speaker_notes': f'第{i}页备注：强调增长驱动因素。' if i % 3 else ''
+        }
+        if i % 4 == 0:
+            slide['image_url'] = IMAGE_URL
+        slides.append(slide)
+    return slides
+
+
+def _build(slides, add_slide_factory):
+    prs, add_slide = add_slide_factory()
+    image = placeholder_image()
+    for slide_data in slides:
+        add_slide(slide_data, True, image_data=image if slide_data.get('image_url') else None)
+    stream = BytesIO()
+    prs.save(stream)
+    return stream.getvalue()
+
+
+def _legacy_factory():
+    prs = Presentation()
+    return prs, lambda slide_data, include_notes, image_data: add_content_slide(
+        prs, slide_data, include_notes, image_data=image_data)
+
+
+def _compiled_factory():
+    template = get_compiled_template()
+    prs = template.new_presentation()
+    return prs, template.stamper(prs).add_slide
+
+
+def _package_entries(pptx_bytes):
+    with zipfile.ZipFile(BytesIO(pptx_bytes)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()
+                if name != 'docProps/core.xml'}
+
+
+class TestCompiledTemplate:
+    """预编译模板与逐页构建的一致性测试"""
+
+    @pytest.mark.unit
+    def test_output_matches_add_content_slide(self):
+        """克隆生成的包与逐页调用add_content_slide逐字节一致"""
+        slides = _slides(9)
+        slides[2]['bullet_points'].append('')
+        slides[4].pop('speaker_notes')
+
+        assert _package_entries(_build(slides, _compiled_factory)) == \
+            _package_entries(_build(slides, _legacy_factory))
+
+    @pytest.mark.unit
+    def test_uncovered_slides_fall_back(self):
+        """缺少字段、空要点和含换行的文本回退到add_content_slide"""
+        slides = [
+            {'title': '只有标题'},
+            {'title': '空要点', 'bullet_points': []},
+            {'title': '多行\n标题', 'bullet_points': ['a'], 'speaker_notes': '第一行\n第二行'},
+            {'title': '正常', 'bullet_points': ['a', 'b'], 'speaker_notes': '备注'},
+        ]
+        template = get_compiled_template()
+        prs = template.new_presentation()
+        stamper = template.stamper(prs)
+        for slide_data in slides:
+            stamper.add_slide(slide_data)
+
+        assert stamper.stats == {'stamped': 1, 'fallback': 3}
+        stream = BytesIO()
+        prs.save(stream)
+        assert _package_entries(stream.getvalue()) == \
+            _package_entries(_build(slides, _legacy_factory))
+
+    @pytest.mark.unit
+    def test_template_compiled_once(self):
+        """每个模板只编译一次"""
+        assert get_compiled_template('default') is get_compiled_template('default')
+
+    @pytest.mark.unit
+    def test_unknown_template_raises(self):
+        """不存在的模板抛出FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            get_compiled_template('nonexistent_template')
+        with pytest.raises(FileNotFoundError):
+            create_pptx_with_template({'slides': _slides(1)}, template_name='../default')
+
+    @pytest.mark.unit
+    def test_create_pptx_uses_template(self):
+        """create_pptx_from_content生成的备注与输入一致"""
+        slides = _slides(5)
+        pptx_bytes = create_pptx_from_content({'slides': [
+            {key: value for key, value in slide.items() if key != 'image_url'} for slide in slides
+        ]})
+
+        assert extract_speaker_notes(pptx_bytes) == [slide['speaker_notes'] for slide in slides]
+
+
+@pytest.mark.benchmark
+class TestCompiledTemplateBenchmark:
+    """编译基准：与逐页构建对比每页CPU时间"""
+
+    def _measure(self, slides, factory, iterations=3):
+        prs_time = 0.0
+        for _ in range(iterations):
+            prs, add_slide = factory()
+            start = time.process_time()
+            for slide_data in slides:
+                add_slide(slide_data, True, image_data=None)
+            prs_time += time.process_time() - start
+        return prs_time / iterations / len(slides)
+
+    def test_compiled_vs_add_content_slide(self):
+        get_compiled_template()
+
+        print(f"\n{'deck':<12}{'legacy ms/slide':>16}{'compiled ms/slide':>19}{'speedup':>10}")
+        for count in (20, 100):
+            slides = [{key: value for key, value in slide.items() if key != 'image_url'}
+                      for slide in _slides(count)]
+            legacy_time = self._measure(slides, _legacy_factory)
+            compiled_time = self._measure(slides, _compiled_factory)
+            print(f"{f'{count} slides':<12}{legacy_time * 1000:>16.3f}"
+                  f"{compiled_time * 1000:>19.3f}{legacy_time / compiled_time:>9.1f}x")
+            assert compiled_time * 3 < legacy_time
@@ -0,0 +1,229 @@
+"""
+状态缓存测试：ETag条件读取、容器内缓存、304透传和比较并交换写入
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import boto3
+import pytest
+from botocore.exceptions import ParamValidationError
+from moto import mock_aws
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lambdas'))
+
+from src.status_manager import StatusCache, StatusManager
+
+BUCKET = 'status-cache-test'
+STEPS = ('outline_generation', 'content_generation', 'ppt_compilation', 'upload_complete')
+
+
+@pytest.fixture
+def s3_client():
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+class RecordingS3:
+    """记录status.json读取请求的S3客户端包装"""
+
+    def __init__(self, client):
+        self._client = client
+        self.status_gets = []
+
+    def get_object(self, **kwargs):
+        if kwargs['Key'].endswith('/status.json'):
+            self.status_gets.append(kwargs)
+        return self._client.get_object(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class LegacyS3(RecordingS3):
+    """模拟botocore 1.36之前的S3客户端：PutObject没有IfMatch/IfNoneMatch参数"""
+
+    def __init__(self, client):
+        super().__init__(client)
+        members = {name: shape for name, shape in
+                   client.meta.service_model.operation_model('PutObject').input_shape.members.items()
+                   if name not in ('IfMatch', 'IfNoneMatch')}
+        operation = SimpleNamespace(input_shape=SimpleNamespace(members=members))
+        self.meta = SimpleNamespace(service_model=SimpleNamespace(operation_model=lambda name: operation))
+
+    def put_object(self, **kwargs):
+        if 'IfMatch' in kwargs or 'IfNoneMatch' in kwargs:
+            raise ParamValidationError(report='Unknown parameter in input: "IfMatch"')
+        return self._client.put_object(**kwargs)
+
+
+class TestStatusCache:
+    """缓存读取测试"""
+
+    @pytest.mark.unit
+    def test_fresh_entries_skip_s3(self, s3_client):
+        """缓存未过期时不访问S3，返回的副本可以安全修改"""
+        recording = RecordingS3(s3_client)
+        manager = StatusManager(BUCKET, recording, status_cache=StatusCache(ttl=60))
+        manager.create_status('p1', '主题', 5)
+
+        first = manager.get_status('p1')
+        first['progress'] = 99
+        second = manager.get_status('p1')
+
+        assert recording.status_gets == []
+        assert second['progress'] == 0
+
+    @pytest.mark.unit
+    def test_expired_entries_revalidate_with_etag(self, s3_client):
+        """过期后条件GET：未修改时复用缓存，被其他写入方修改时读取新版本"""
+        recording = RecordingS3(s3_client)
+        manager = StatusManager(BUCKET, recording, status_cache=StatusCache(ttl=0))
+        etag = manager.save_status('p1', {'presentation_id': 'p1', 'progress': 10})
+
+        status, current = manager.get_status_with_etag('p1')
+        assert (status['progress'], current) == (10, etag)
+        assert recording.status_gets[-1]['IfNoneMatch'] == etag
+
+        other = StatusManager(BUCKET, s3_client, status_cache=StatusCache())
+        new_etag = other.save_status('p1', {'presentation_id': 'p1', 'progress': 50})
+
+        status, current = manager.get_status_with_etag('p1')
+        assert (status['progress'], current) == (50, new_etag)
+
+    @pytest.mark.unit
+    def test_missing_status(self, s3_client):
+        """不存在的状态返回(None, None)"""
+        manager = StatusManager(BUCKET, s3_client, status_cache=StatusCache())
+
+        assert manager.get_status_with_etag('missing') == (None, None)
+
+    @pytest.mark.unit
+    def test_bounded_entries(self):
+        """超过容量时淘汰最久未使用的条目"""
+        cache = StatusCache(ttl=60, max_entries=2)
+        cache.put(('b', 'k1'), 'e1', {})
+        cache.put(('b', 'k2'), 'e2', {})
+        cache.get(('b', 'k1'))
+        cache.put(('b', 'k3'), 'e3', {})
+
+        assert cache.get(('b', 'k2')) is None
+        assert cache.get(('b', 'k1'))[0] == 'e1'
+
+
+class TestCompareAndSwap:
+    """比较并交换写入测试"""
+
+    @pytest.mark.unit
+    def test_parallel_workers_do_not_lose_updates(self, s3_client):
+        """多个容器并发更新同一状态，所有步骤都被保留"""
+        StatusManager(BUCKET, s3_client, status_cache=StatusCache()).create_status('p1', '主题', 5)
+        # 每个工作者有独立且长期有效的缓存，模拟不同容器持有过期版本
+        workers = [StatusManager(BUCKET, s3_client, status_cache=StatusCache(ttl=60)) for _ in STEPS]
+        for worker in workers:
+            worker.get_status('p1')
+
+        barrier = threading.Barrier(len(workers))
+
+        def run(args):
+            worker, step = args
+            barrier.wait()
+            worker.update_status('p1', 'processing', 50, step)
+
+        with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+            list(executor.map(run, zip(workers, STEPS)))
+
+        status = StatusManager(BUCKET, s3_client, status_cache=StatusCache()).get_status('p1')
+        assert all(status['steps'][step] for step in STEPS)
+
+    @pytest.mark.unit
+    def test_stale_cache_is_refreshed_on_conflict(self, s3_client):
+        """缓存版本过期导致写入冲突时重新读取后写入"""
+        manager = StatusManager(BUCKET, s3_client, status_cache=StatusCache(ttl=60))
+        manager.create_status('p1', '主题', 5)
+
+        other = StatusManager(BUCKET, s3_client, status_cache=StatusCache())
+        other.update_status('p1', 'processing', 30, 'outline_generation')
+        manager.update_status('p1', 'processing', 60, 'content_generation')
+
+        status = StatusManager(BUCKET, s3_client, status_cache=StatusCache()).get_status('p1')
+        assert status['steps']['outline_generation'] is True
+        assert status['steps']['content_generation'] is True
+        assert status['progress'] == 60
+
+
+    @pytest.mark.unit
+    def test_old_botocore_falls_back_to_plain_writes(self, s3_client):
+        """botocore不支持条件写入时无条件写入，状态更新不失败"""
+        manager = StatusManager(BUCKET, LegacyS3(s3_client), status_cache=StatusCache())
+        assert manager.conditional_writes is False
+        manager.create_status('p1', '主题', 5)
+        manager.update_status('p1', 'processing', 30, 'outline_generation')
+
+        status = StatusManager(BUCKET, s3_client, status_cache=StatusCache()).get_status('p1')
+        assert status['progress'] == 30
+        assert status['steps']['outline_generation'] is True
+
+
+class TestStatusEndpointETag:
+    """GET /status/{id} 的ETag透传"""
+
+    @pytest.fixture
+    def api_handler(self, s3_client):
+        from lambdas.api_handler import APIHandler
+        os.environ['S3_BUCKET'] = BUCKET
+        try:
+            handler = APIHandler(s3_client)
+        finally:
+            os.environ.pop('S3_BUCKET', None)
+        handler.status_manager.status_cache = StatusCache()
+        return handler
+
+    def _request(self, presentation_id, etag=None):
+        headers = {'if-none-match': etag} if etag else {}
+        return {'httpMethod': 'GET', 'path': f'/status/{presentation_id}',
+                'pathParameters': {'id': presentation_id}, 'headers': headers}
+
+    @pytest.mark.unit
+    def test_not_modified(self, api_handler):
+        """请求携带当前ETag时返回304，状态变化后返回200和新ETag"""
+        api_handler.status_manager.create_status('p1', '主题', 5)
+
+        first = api_handler.handle_status(self._request('p1'))
+        etag = first['headers']['ETag']
+        assert first['statusCode'] == 200
+
+        cached = api_handler.handle_status(self._request('p1', etag))
+        assert cached['statusCode'] == 304
+        assert cached['body'] == ''
+
+        api_handler.status_manager.update_status('p1', 'processing', 40)
+        changed = api_handler.handle_status(self._request('p1', etag))
+        assert changed['statusCode'] == 200
+        assert changed['headers']['ETag'] != etag
+
+    @pytest.mark.unit
+    def test_missing_presentation(self, api_handler):
+        """不存在的演示文稿返回404"""
+        assert api_handler.handle_status(self._request('missing'))['statusCode'] == 404
+
+
+class TestETagMatching:
+    """If-None-Match解析"""
+
+    @pytest.mark.unit
+    def test_etag_matches(self):
+        from lambdas.api_handler import etag_matches
+
+        assert etag_matches('"a"', '"a"')
+        assert etag_matches('W/"a"', '"a"')
+        assert etag_matches('"b", "a"', '"a"')
+        assert etag_matches('*', '"a"')
+        assert not etag_matches('"b"', '"a"')
+        assert not etag_matches(None, '"a"')
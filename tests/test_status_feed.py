@@ -0,0 +1,349 @@
+"""
+状态变更流测试：增量发布、长轮询订阅和轮询回退
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lambdas'))
+
+from lambdas import status_check
+from src.status_feed import (
+    InMemoryStatusFeed, RedisStatusFeed, merge_status_events, status_changes
+)
+from src.status_manager import StatusManager
+
+BUCKET = 'status-feed-test'
+
+
+@pytest.fixture
+def s3_client():
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+class CountingS3:
+    """统计status.json读取次数的S3客户端包装"""
+
+    def __init__(self, client):
+        self._client = client
+        self.status_reads = 0
+
+    def get_object(self, **kwargs):
+        if kwargs['Key'].endswith('/status.json'):
+            self.status_reads += 1
+        return self._client.get_object(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class FakeStreamRedis:
+    """进程内Redis替身，仅支持变更流所需的Stream命令"""
+
+    def __init__(self):
+        self.streams = {}
+        self.ttls = {}
+        self._sequence = 0
+        self._changed = threading.Condition()
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def xadd(self, name, fields, maxlen=None, approximate=True):
+        with self._changed:
+            self._sequence += 1
+            entry_id = f"{int(time.time() * 1000)}-{self._sequence}".encode()
+            entries = self.streams.setdefault(name, [])
+            entries.append((entry_id, {key.encode(): value.encode() for key, value in fields.items()}))
+            if maxlen is not None:
+                del entries[:-maxlen]
+            self._changed.notify_all()
+            return entry_id
+
+    def expire(self, name, ttl):
+        self.ttls[name] = ttl
+        return True
+
+    def xrevrange(self, name, max='+', min='-', count=None):
+        with self._changed:
+            return list(reversed(self.streams.get(name, [])))[:count]
+
+    def xread(self, streams, count=None, block=None):
+        (name, last_id), = streams.items()
+        after = tuple(int(part) for part in last_id.split('-'))
+
+        def pending():
+            return [(entry_id, fields) for entry_id, fields in self.streams.get(name, [])
+                    if tuple(int(part) for part in entry_id.decode().split('-')) > after][:count]
+
+        with self._changed:
+            if block is not None:
+                self._changed.wait_for(pending, timeout=block / 1000)
+            entries = pending()
+        return [[name.encode(), entries]] if entries else []
+
+
+class FakePipeline:
+    def __init__(self, redis_client):
+        self._redis = redis_client
+        self._calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in self._calls]
+
+
+def _events_request(presentation_id, cursor=None, wait=0):
+    params = {'wait': str(wait)}
+    if cursor:
+        params['cursor'] = cursor
+    return {
+        'resource': '/status/{id}/events',
+        'path': f'/status/{presentation_id}/events',
+        'pathParameters': {'id': presentation_id},
+        'queryStringParameters': params,
+        'httpMethod': 'GET'
+    }
+
+
+class TestStatusChanges:
+    """增量计算测试"""
+
+    @pytest.mark.unit
+    def test_only_changed_fields_are_published(self):
+        """只发布变化的顶层字段，删除的字段记为None"""
+        previous = {'status': 'pending', 'progress': 0, 'steps': {'a': False}, 'topic': 'x'}
+        current = {'status': 'processing', 'progress': 0, 'steps': {'a': True}}
+
+        changes = status_changes(previous, current)
+
+        assert changes == {'status': 'processing', 'steps': {'a': True}, 'topic': None}
+        assert merge_status_events(previous, [{'cursor': '1', 'changes': changes}]) == \
+            {**current, 'topic': None}
+
+
+@pytest.mark.parametrize('feed_factory', [
+    InMemoryStatusFeed,
+    lambda: RedisStatusFeed(FakeStreamRedis(), history=3),
+], ids=['memory', 'redis'])
+class TestStatusFeeds:
+    """变更流读写测试"""
+
+    @pytest.mark.unit
+    def test_read_after_cursor(self, feed_factory):
+        """按游标读取之后的事件"""
+        feed = feed_factory()
+        first = feed.publish('p1', {'progress': 10})
+        feed.publish('p2', {'progress': 99})
+        feed.publish('p1', {'progress': 20})
+
+        assert [event['changes'] for event in feed.read('p1', first)] == [{'progress': 20}]
+
+    @pytest.mark.unit
+    def test_read_without_cursor_starts_at_latest(self, feed_factory):
+        """不带游标时从最新事件之后开始读取，不回放历史"""
+        feed = feed_factory()
+        feed.publish('p1', {'progress': 10})
+        latest = feed.publish('p1', {'progress': 20})
+        feed.publish('p2', {'progress': 99})
+
+        assert feed.latest_cursor('p1') == latest
+        assert feed.read('p1') == []
+
+        timer = threading.Timer(0.1, feed.publish, args=('p1', {'progress': 30}))
+        timer.start()
+        events = feed.read('p1', timeout=5)
+        timer.join()
+        assert [event['changes'] for event in events] == [{'progress': 30}]
+
+    @pytest.mark.unit
+    def test_empty_feed_returns_start_cursor(self, feed_factory):
+        """没有事件时返回起始游标，之后发布的第一条事件可按该游标读到"""
+        feed = feed_factory()
+        cursor = feed.latest_cursor('p1')
+        assert cursor is not None
+
+        feed.publish('p1', {'progress': 10})
+        assert [event['changes'] for event in feed.read('p1', cursor)] == [{'progress': 10}]
+
+    @pytest.mark.unit
+    def test_read_blocks_until_publish(self, feed_factory):
+        """没有新事件时阻塞，发布后立即返回"""
+        feed = feed_factory()
+        cursor = feed.publish('p1', {'progress': 10})
+        timer = threading.Timer(0.1, feed.publish, args=('p1', {'progress': 50}))
+        timer.start()
+
+        start = time.monotonic()
+        events = feed.read('p1', cursor, timeout=5)
+
+        assert [event['changes'] for event in events] == [{'progress': 50}]
+        assert time.monotonic() - start < 2
+        assert feed.read('p1', events[-1]['cursor'], timeout=0.05) == []
+
+    @pytest.mark.unit
+    def test_invalid_cursor(self, feed_factory):
+        """游标格式无效时抛出ValueError"""
+        with pytest.raises(ValueError):
+            feed_factory().read('p1', 'not-a-cursor')
+
+
+class TestStatusManagerPublishing:
+    """StatusManager写入时发布变更"""
+
+    @pytest.mark.unit
+    def test_updates_publish_deltas(self, s3_client):
+        """创建发布完整状态，更新只发布变化的字段"""
+        feed = InMemoryStatusFeed()
+        manager = StatusManager(BUCKET, s3_client, change_feed=feed)
+
+        manager.create_status('p1', '主题', 5)
+        manager.update_status('p1', 'processing', 30, 'outline_generation')
+        manager.mark_completed('p1')
+
+        events = feed.read('p1', '0')
+        assert events[0]['changes']['topic'] == '主题'
+        assert events[1]['changes']['steps']['outline_generation'] is True
+        assert 'topic' not in events[1]['changes']
+        assert merge_status_events(None, events) == manager.get_status('p1')
+
+    @pytest.mark.unit
+    def test_feed_failure_does_not_fail_write(self, s3_client):
+        """变更流不可用时状态仍然保存"""
+        class BrokenFeed:
+            def publish(self, presentation_id, changes):
+                raise ConnectionError('redis down')
+
+        manager = StatusManager(BUCKET, s3_client, change_feed=BrokenFeed())
+        manager.create_status('p1', '主题', 5)
+        manager.update_status('p1', 'processing', 40)
+
+        assert manager.get_status('p1')['progress'] == 40
+
+
+class TestStatusEventsEndpoint:
+    """GET /status/{id}/events 长轮询测试"""
+
+    @pytest.mark.unit
+    def test_snapshot_then_deltas(self, s3_client, monkeypatch):
+        """首次订阅返回快照，之后只返回增量且不再读取status.json"""
+        feed = InMemoryStatusFeed()
+        writer = StatusManager(BUCKET, s3_client, change_feed=feed)
+        writer.create_status('p1', '主题', 5)
+        writer.update_status('p1', 'processing', 20)
+
+        monkeypatch.setenv('S3_BUCKET', BUCKET)
+        monkeypatch.setattr(status_check, 's3', s3_client)
+        monkeypatch.setattr(status_check, 'get_status_feed', lambda: feed)
+        response = status_check.lambda_handler(_events_request('p1'), None)
+        body = json.loads(response['body'])
+        assert response['statusCode'] == 200
+        assert body['push'] is True
+        assert body['snapshot']['progress'] == 20
+
+        counting_s3 = CountingS3(s3_client)
+        reader = StatusManager(BUCKET, counting_s3, change_feed=feed)
+        timer = threading.Timer(0.1, writer.update_status, args=('p1', 'processing', 60))
+        timer.start()
+        response = status_check.handle_status_events(
+            _events_request('p1', body['cursor'], wait=5), 'p1', feed=feed, status_manager=reader)
+        timer.join()
+        delta = json.loads(response['body'])
+
+        assert 'snapshot' not in delta
+        assert [event['changes']['progress'] for event in delta['events']] == [60]
+        assert counting_s3.status_reads == 0
+        assert merge_status_events(body['snapshot'], delta['events'])['progress'] == 60
+
+    @pytest.mark.unit
+    def test_empty_feed_returns_start_cursor(self, s3_client):
+        """变更流中还没有事件时返回起始游标，下一次请求进入长轮询而不是重复读取快照"""
+        feed = InMemoryStatusFeed()
+        manager = StatusManager(BUCKET, s3_client)
+        manager.create_status('p1', '主题', 5)
+
+        first = json.loads(status_check.handle_status_events(
+            _events_request('p1'), 'p1', feed=feed, status_manager=manager)['body'])
+        assert first['push'] is True
+        assert first['cursor'] == '0'
+
+        counting_s3 = CountingS3(s3_client)
+        reader = StatusManager(BUCKET, counting_s3, change_feed=feed)
+        timer = threading.Timer(0.1, feed.publish, args=('p1', {'progress': 30}))
+        timer.start()
+        delta = json.loads(status_check.handle_status_events(
+            _events_request('p1', first['cursor'], wait=5), 'p1', feed=feed, status_manager=reader)['body'])
+        timer.join()
+
+        assert [event['changes'] for event in delta['events']] == [{'progress': 30}]
+        assert counting_s3.status_reads == 0
+
+    @pytest.mark.unit
+    def test_without_feed_returns_snapshot(self, s3_client):
+        """未启用推送时返回快照并标记push为False"""
+        manager = StatusManager(BUCKET, s3_client)
+        manager.create_status('p1', '主题', 5)
+
+        response = status_check.handle_status_events(_events_request('p1'), 'p1', status_manager=manager)
+        body = json.loads(response['body'])
+
+        assert body['push'] is False
+        assert body['snapshot']['status'] == 'pending'
+
+    @pytest.mark.unit
+    def test_errors(self, s3_client):
+        """未知演示文稿返回404，无效游标返回400"""
+        feed = InMemoryStatusFeed()
+        manager = StatusManager(BUCKET, s3_client, change_feed=feed)
+
+        missing = status_check.handle_status_events(_events_request('nope'), 'nope',
+                                                    feed=feed, status_manager=manager)
+        invalid = status_check.handle_status_events(_events_request('p1', 'bad'), 'p1',
+                                                    feed=feed, status_manager=manager)
+
+        assert missing['statusCode'] == 404
+        assert invalid['statusCode'] == 400
+
+
+class TestMonitorGenerationProgress:
+    """监控函数订阅变更流"""
+
+    @pytest.mark.unit
+    def test_follows_feed_until_completed(self, s3_client):
+        """完成时立即返回，不按检查间隔休眠"""
+        feed = InMemoryStatusFeed()
+        manager = StatusManager(BUCKET, s3_client, change_feed=feed)
+        manager.create_status('p1', '主题', 5)
+
+        def generate():
+            for progress in (20, 60):
+                time.sleep(0.05)
+                manager.update_status('p1', 'processing', progress)
+            manager.mark_completed('p1')
+
+        worker = threading.Thread(target=generate)
+        start = time.monotonic()
+        worker.start()
+        result = status_check.monitor_generation_progress('p1', check_interval=5, max_checks=2,
+                                                          feed=feed, status_manager=manager)
+        worker.join()
+
+        assert result['status'] == 'completed'
+        assert result['progress'] == 100
+        assert time.monotonic() - start < 3
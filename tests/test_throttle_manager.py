@@ -0,0 +1,184 @@
+"""
+限流管理器测试 - 自适应令牌桶、按模型配额与共享配额
+"""
+
+import asyncio
+import time
+import sys
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.throttle_manager import (
+    ThrottleManager,
+    RateBudget,
+    AdaptiveRateLimiter,
+    DynamoDBQuotaStore
+)
+
+
+def _client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'UpdateItem')
+
+
+class FakeQuotaDynamoDB:
+    """模拟DynamoDB条件更新计数"""
+
+    def __init__(self):
+        self.counts = {}
+        self.calls = 0
+
+    def update_item(self, **kwargs):
+        self.calls += 1
+        pk = kwargs['Key']['pk']['S']
+        n = float(kwargs['ExpressionAttributeValues'][':n']['N'])
+        maximum = float(kwargs['ExpressionAttributeValues'][':max']['N'])
+        current = self.counts.get(pk)
+        if current is not None and current > maximum:
+            raise _client_error('ConditionalCheckFailedException')
+        self.counts[pk] = (current or 0) + n
+        return {}
+
+
+class TestAdaptiveRateBudget:
+    """AIMD令牌桶测试"""
+
+    @pytest.mark.unit
+    def test_throttle_decreases_and_success_recovers(self):
+        """限流时乘性降速，成功时加性恢复且不超过上限"""
+        budget = RateBudget(rate=10.0, decrease_factor=0.5, increase_step=1.0, cooldown=0)
+
+        assert budget.on_throttle() == 5.0
+        assert budget.on_throttle() == 2.5
+        assert budget.on_success() == 3.5
+        for _ in range(20):
+            budget.on_success()
+        assert budget.rate == 10.0
+
+    @pytest.mark.unit
+    def test_rate_never_below_min_rate(self):
+        """速率不低于下限"""
+        budget = RateBudget(rate=4.0, min_rate=1.0, cooldown=0)
+
+        for _ in range(10):
+            budget.on_throttle()
+
+        assert budget.rate == 1.0
+
+    @pytest.mark.unit
+    def test_cooldown_collapses_burst_of_throttles(self):
+        """同一波限流只降速一次"""
+        budget = RateBudget(rate=8.0, cooldown=60)
+
+        for _ in range(5):
+            budget.on_throttle()
+
+        assert budget.rate == 4.0
+        assert budget.get_stats()['throttles'] == 5
+
+    @pytest.mark.unit
+    def test_wait_time_metrics(self):
+        """统计获取次数与等待时间"""
+        budget = RateBudget(rate=50.0, capacity=1.0)
+
+        budget.acquire()
+        budget.acquire()
+        stats = budget.get_stats()
+
+        assert stats['acquired'] == 2
+        assert stats['waited'] == 1
+        assert 0 < stats['max_wait'] <= 0.1
+        assert stats['avg_wait'] == pytest.approx(stats['total_wait'] / 2)
+
+    @pytest.mark.unit
+    def test_async_acquire_does_not_block_event_loop(self):
+        """异步等待期间事件循环可以处理其他任务"""
+        budget = RateBudget(rate=20.0, capacity=1.0)
+        ticks = []
+
+        async def ticker():
+            for _ in range(3):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await budget.acquire_async()
+            return await asyncio.gather(budget.acquire_async(), ticker())
+
+        waited, _ = asyncio.run(main())
+
+        assert waited > 0
+        assert len(ticks) == 3
+
+
+class TestAdaptiveRateLimiter:
+    """按模型划分的限流器测试"""
+
+    @pytest.mark.unit
+    def test_models_have_independent_buckets(self):
+        """一个模型被限流不影响其他模型"""
+        limiter = AdaptiveRateLimiter(default_rate=10.0, model_rates={"image-model": 2.0})
+
+        limiter.record_throttle("text-model")
+
+        assert limiter.bucket("text-model").rate == 5.0
+        assert limiter.bucket("image-model").rate == 2.0
+        assert limiter.bucket("text-model") is limiter.bucket("text-model")
+        assert set(limiter.get_stats()) == {"text-model", "image-model"}
+
+    @pytest.mark.unit
+    def test_initial_delay_skipped_without_recent_throttle(self):
+        """配额充足时不再添加固定初始延迟"""
+        limiter = AdaptiveRateLimiter(default_rate=10.0)
+
+        with patch.object(ThrottleManager, '_shared_limiter', limiter), \
+                patch('src.throttle_manager.time.sleep') as sleep:
+            assert ThrottleManager.add_initial_delay(max_delay=3.0) == 0.0
+            sleep.assert_not_called()
+
+            limiter.record_throttle("model")
+            assert ThrottleManager.add_initial_delay(max_delay=3.0) > 0
+            sleep.assert_called_once()
+
+
+class TestDynamoDBQuotaStore:
+    """跨容器共享配额测试"""
+
+    @pytest.mark.unit
+    def test_shared_quota_limits_requests_per_window(self):
+        """共享配额用尽后等待下一个窗口"""
+        dynamodb = FakeQuotaDynamoDB()
+        store = DynamoDBQuotaStore("quota-table", dynamodb_client=dynamodb, window_seconds=60)
+
+        assert store.try_consume("model", limit=2)
+        assert store.try_consume("model", limit=2)
+        assert not store.try_consume("model", limit=2)
+        assert store.try_consume("other-model", limit=2)
+
+    @pytest.mark.unit
+    def test_quota_table_errors_fail_open(self):
+        """配额表故障时不阻塞调用"""
+        dynamodb = Mock()
+        dynamodb.update_item.side_effect = _client_error('ResourceNotFoundException')
+        store = DynamoDBQuotaStore("missing-table", dynamodb_client=dynamodb)
+
+        assert store.try_consume("model", limit=1)
+
+    @pytest.mark.unit
+    def test_bucket_consults_shared_quota(self):
+        """本地令牌充足时仍受共享配额约束"""
+        dynamodb = FakeQuotaDynamoDB()
+        store = DynamoDBQuotaStore("quota-table", dynamodb_client=dynamodb, window_seconds=60)
+        limiter = AdaptiveRateLimiter(default_rate=100.0, quota_store=store, shared_rate=1 / 60)
+
+        limiter.acquire("model")
+        with patch('src.throttle_manager.time.sleep', side_effect=RuntimeError("waiting")):
+            with pytest.raises(RuntimeError):
+                limiter.acquire("model")
+
+        assert limiter.bucket("model").get_stats()['shared_quota_waits'] == 1